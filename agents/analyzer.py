@@ -5830,7 +5830,7 @@ class AnalyzerAgent:
 
 import logging
 import json
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from utils.llm_client import LLMClient
 from rag_tools.hybrid_rag import HybridRAG
 from rag_tools.graph_rag import GraphRAG
@@ -5841,7 +5841,9 @@ from config.prompts import (
     get_analyzer_refined_queries_prompt,
     get_analyzer_node_evaluation_prompt
 )
-from config.settings import get_settings
+from config.settings import get_settings, current_execution_profile
+from utils.run_budget import current_run_budget
+from utils.token_budget import truncate_to_tokens, split_to_fit
 
 logger = logging.getLogger(__name__)
 
@@ -5887,6 +5889,8 @@ class AnalyzerAgent:
         Args:
             context: Context from orchestrator with:
                 - problem_statement: Focused problem statement from Orchestrator
+                - documents_to_query: Optional list of documents to search (None = all)
+                - guideline_documents: Optional list of always-included guideline documents
             
         Returns:
             Dictionary with:
@@ -5931,19 +5935,28 @@ class AnalyzerAgent:
             phase1_output.get("refined_queries", []),
             refined_problem_statement,
             phase,
-            level
+            level,
+            document_filter=context.get("documents_to_query"),
+            guideline_documents=context.get("guideline_documents")
         )
         
         logger.info(f"Analyzer Phase 2 Step 1 extracted {len(node_ids)} node IDs")
         
-        # Phase 2 Step 2: Sibling Expansion
-        additional_node_ids = self.phase2_sibling_expansion(
-            selected_node_ids=node_ids,
-            all_candidate_nodes=all_candidate_nodes,
-            problem_statement=refined_problem_statement,
-            phase=phase,
-            level=level
-        )
+        # Phase 2 Step 2: Sibling Expansion (off in faster profiles and as the run deadline approaches)
+        if not current_execution_profile().sibling_expansion:
+            logger.info(f"Skipping sibling expansion ({current_execution_profile().name} profile)")
+            additional_node_ids = []
+        elif current_run_budget().allows("sibling_expansion"):
+            additional_node_ids = self.phase2_sibling_expansion(
+                selected_node_ids=node_ids,
+                all_candidate_nodes=all_candidate_nodes,
+                problem_statement=refined_problem_statement,
+                phase=phase,
+                level=level
+            )
+        else:
+            logger.warning(f"Skipping sibling expansion (run degradation: {current_run_budget().level})")
+            additional_node_ids = []
         
         # Merge results and deduplicate
         if additional_node_ids:
@@ -6010,7 +6023,7 @@ class AnalyzerAgent:
         logger.info("Step 3: Querying introduction-level nodes with focused query")
         intro_nodes = self.graph_rag.query_introduction_nodes(
             initial_query,
-            top_k=self.settings.phase3_initial_top_k
+            top_k=current_run_budget().top_k(self.settings.phase3_initial_top_k)
         )
         
         logger.info(f"Found {len(intro_nodes)} introduction nodes")
@@ -6298,7 +6311,9 @@ class AnalyzerAgent:
         refined_queries: List[str],
         problem_statement: str,
         phase: str = "",
-        level: str = ""
+        level: str = "",
+        document_filter: Optional[List[str]] = None,
+        guideline_documents: Optional[List[str]] = None
     ) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
         Phase 2 Step 1: Execute refined queries and extract relevant node IDs.
@@ -6315,6 +6330,8 @@ class AnalyzerAgent:
             problem_statement: Original problem statement for context
             phase: Phase context for node evaluation
             level: Level context for node evaluation
+            document_filter: Optional list of documents to search (None = all documents)
+            guideline_documents: Optional list of guideline documents (always searched)
             
         Returns:
             Tuple of (selected node IDs, all candidate nodes examined)
@@ -6335,7 +6352,9 @@ class AnalyzerAgent:
                 results = self.unified_rag.query(
                     query,
                     strategy="hybrid",
-                    top_k=self.settings.top_k_results * 2  # Get more results for filtering
+                    top_k=current_run_budget().top_k(current_execution_profile().top_k_results),  # Document filter is applied in the retrievers
+                    document_filter=document_filter,
+                    guideline_documents=guideline_documents
                 )
                 
                 logger.info(f"Query returned {len(results)} results")
@@ -6357,8 +6376,8 @@ class AnalyzerAgent:
                         nodes.append(node_dict)
                         all_candidate_nodes.append(node_dict)  # Track all candidates
                 
-                # Process nodes with fixed batch size of 6
-                max_batch_size = 6
+                # Process nodes in batches sized by the execution profile
+                max_batch_size = current_execution_profile().analyzer_node_batch_size
                 if len(nodes) > max_batch_size:
                     logger.info(f"Batch processing {len(nodes)} nodes in batches of {max_batch_size}")
                     relevant_ids = self._process_nodes_in_batches(
@@ -6411,38 +6430,67 @@ class AnalyzerAgent:
         if not nodes:
             return []
         
-        # Prepare node summaries for LLM
-        node_context = "\n\n".join([
-            f"Node ID: {node['id']}\n"
-            f"Title: {node.get('title', 'Untitled')}\n"
-            f"Summary: {(node.get('summary') or 'No summary')[:300]}"
-            for node in nodes[:100]  # Increased limit - batching will handle large sets
-        ])
-        
+        # Prepare node summaries for LLM, each capped at NODE_SUMMARY_TOKENS
+        summary_tokens = self.settings.node_summary_tokens
+        entries = [
+            (
+                node,
+                f"Node ID: {node['id']}\n"
+                f"Title: {node.get('title', 'Untitled')}\n"
+                f"Summary: {truncate_to_tokens(node.get('summary') or 'No summary', summary_tokens, '...')}"
+            )
+            for node in nodes
+        ]
+        
+        # Nodes that do not fit one prompt go to additional calls instead of being dropped
+        system_prompt = get_prompt("analyzer_phase2")
+        budget = self.llm.prompt_budget()
+        available = budget.remaining(system_prompt, get_analyzer_node_evaluation_prompt(problem_statement, "", phase, level))
+        batches = split_to_fit(entries, lambda entry: entry[1] + "\n\n", available)
+        if len(batches) > 1:
+            logger.info(f"Node evaluation split into {len(batches)} prompts to fit the {budget.window}-token context")
+            relevant_ids = []
+            for batch in batches:
+                relevant_ids.extend(self._evaluate_node_batch(batch, problem_statement, system_prompt, phase, level))
+            return relevant_ids
+        return self._evaluate_node_batch(entries, problem_statement, system_prompt, phase, level)
+    
+    def _evaluate_node_batch(
+        self,
+        entries: List[Tuple[Dict[str, Any], str]],
+        problem_statement: str,
+        system_prompt: str,
+        phase: str = "",
+        level: str = ""
+    ) -> List[str]:
+        """Ask the LLM which of the (node, prompt entry) pairs of one prompt are relevant."""
+        node_context = "\n\n".join(entry for _, entry in entries)
         prompt = get_analyzer_node_evaluation_prompt(problem_statement, node_context, phase, level)
         
+        schema = {
+            "type": "object",
+            "properties": {
+                "relevant_node_ids": {"type": "array", "items": {"type": ["string", "integer"]}}
+            },
+            "required": ["relevant_node_ids"]
+        }
+        
         try:
             result = self.llm.generate_json(
                 prompt=prompt,
-                system_prompt=get_prompt("analyzer_phase2"),
+                system_prompt=system_prompt,
+                schema=schema,
                 temperature=0.2
             )
             
             if self.markdown_logger:
                 self.markdown_logger.log_llm_call(prompt, result, temperature=0.2)
             
-            if isinstance(result, dict) and "relevant_node_ids" in result:
-                node_ids = result["relevant_node_ids"]
-                if isinstance(node_ids, list):
-                    return [str(nid) for nid in node_ids if nid]
-            
-            logger.warning("Unexpected LLM result format")
-            # Fallback: return top-scored nodes
-            return [node['id'] for node in nodes[:5]]
+            return [str(nid) for nid in result["relevant_node_ids"] if nid]
             
         except Exception as e:
             logger.error(f"Error identifying relevant nodes: {e}")
-            return [node['id'] for node in nodes[:5]]  # Fallback
+            return [node['id'] for node, _ in entries[:5]]  # Fallback
     
     def _process_nodes_in_batches(
         self,
@@ -6614,8 +6662,8 @@ class AnalyzerAgent:
             logger.info("Phase 2 Step 2: No sibling content available for analysis")
             return []
         
-        # Analyze siblings using fixed batch size of 6
-        max_batch_size = 6
+        # Analyze siblings in batches sized by the execution profile
+        max_batch_size = current_execution_profile().analyzer_node_batch_size
         
         try:
             if len(sibling_nodes_with_content) > max_batch_size:
@@ -5,8 +5,9 @@ import json
 import os
 from typing import Dict, Any, List
 from utils.llm_client import LLMClient
+from utils.token_budget import count_tokens, fit_components
 from config.prompts import get_prompt, get_assigner_user_prompt
-from config.settings import get_settings
+from config.settings import get_settings, current_execution_profile
 
 logger = logging.getLogger(__name__)
 
@@ -99,8 +100,9 @@ class AssignerAgent:
             }
         
         # Check if batch processing is needed
-        batch_threshold = self.settings.assigner_batch_threshold
-        batch_size = self.settings.assigner_batch_size
+        profile = current_execution_profile()
+        batch_threshold = profile.assigner_batch_threshold
+        batch_size = profile.assigner_batch_size
         
         if len(prioritized_actions) > batch_threshold:
             logger.info(f"Using batch processing: {len(prioritized_actions)} actions, batch_size={batch_size}")
@@ -155,46 +157,71 @@ class AssignerAgent:
 	    # Extract key config parameters
 	    org_level = user_config.get('level', 'center')
 	
+	    task_prompt = get_assigner_user_prompt(
+	        org_level=org_level,
+	        phase=user_config.get('phase', ''),
+	        subject=user_config.get('subject', ''),
+	        actions_text=actions_text,
+	        reference_doc=""
+	    )
+	
+	    # The reply repeats every action, so it needs about as many tokens as the actions.
+	    # The instructions and actions take priority; the reference document gets what is left.
+	    reply_tokens = count_tokens(actions_text)
+	    budget = self.llm.prompt_budget(reserve_output=max(reply_tokens, self.settings.llm_output_reserve_tokens))
+	    available = budget.available
+	    fixed = count_tokens(self.system_prompt) + count_tokens(task_prompt)
+	    if fixed + count_tokens(self.reference_doc) > available:
+	        # Cut the reference document in fixed steps, so batches of similar size send the
+	        # same text ahead of their actions (a prompt prefix the server can reuse)
+	        step = self.settings.prefix_truncation_step_tokens
+	        available = fixed + max(0, available - fixed) // step * step
+	    fitted, cut = fit_components(
+	        [("system", self.system_prompt), ("task", task_prompt), ("reference_doc", self.reference_doc)],
+	        available
+	    )
+	    if ("system" in cut or "task" in cut) and len(actions) > 1:
+	        half = len(actions) // 2
+	        logger.info(f"Assigner prompt exceeds the {budget.window}-token context, splitting {len(actions)} actions")
+	        return (
+	            self._assign_responsibilities(actions[:half], user_config)
+	            + self._assign_responsibilities(actions[half:], user_config)
+	        )
+	    if cut:
+	        logger.warning(f"Assigner prompt truncated to fit the {budget.window}-token context: {', '.join(cut)}")
+	
 	    prompt = get_assigner_user_prompt(
 	        org_level=org_level,
 	        phase=user_config.get('phase', ''),
 	        subject=user_config.get('subject', ''),
 	        actions_text=actions_text,
-	        reference_doc=self.reference_doc
+	        reference_doc=fitted["reference_doc"]
 	    )
 	
+	    # One entry per input action, in order; generate_json re-asks the LLM on a mismatch
+	    schema = {
+	        "type": "object",
+	        "properties": {
+	            "actions": {
+	                "type": "array",
+	                "items": {"type": "object", "properties": {"who": {"type": "string"}}, "required": ["who"]},
+	                "minItems": len(actions),
+	                "maxItems": len(actions)
+	            }
+	        },
+	        "required": ["actions"]
+	    }
+
 	    try:
 	        result = self.llm.generate_json(
 	            prompt=prompt,
 	            system_prompt=self.system_prompt,
-	            temperature=0.1
+	            schema=schema,
+	            temperature=0.1,
+	            reserve_tokens=reply_tokens
 	        )
-	
-	        # Expect new format: "actions" key containing all actions
-	        if not isinstance(result, dict) or "actions" not in result:
-	            logger.error("LLM returned unexpected format. Expected 'actions' key, got: %r", list(result.keys()) if isinstance(result, dict) else type(result))
-	            return [dict(action, who=action.get('who', '')) for action in actions]
-	        
 	        assigned_raw = result["actions"]
-	        
-	        if not isinstance(assigned_raw, list):
-	            logger.error("LLM returned non-list for actions: %r", type(assigned_raw))
-	            return [dict(action, who=action.get('who', '')) for action in actions]
-	
-	        # Validate that LLM returned correct number of actions
-	        if len(assigned_raw) != len(actions):
-	            logger.error(
-	                "LLM returned %d actions for %d input actions. Expected same count.",
-	                len(assigned_raw), len(actions)
-	            )
-	            return [dict(action, who=action.get('who', '')) for action in actions]
-	
-	        # Validate each item is a dict
-	        for idx, item in enumerate(assigned_raw):
-	            if not isinstance(item, dict):
-	                logger.error("LLM returned non-dict at index %d: %r", idx, type(item))
-	                return [dict(action, who=action.get('who', '')) for action in actions]
-	
+
 	        # Merge LLM-returned actions with originals to preserve all fields
 	        # LLM returns all actions with updated 'who' field
 	        final_actions: List[Dict[str, Any]] = []
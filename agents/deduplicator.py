@@ -5,12 +5,10 @@ import json
 from typing import Dict, Any, List, Optional
 from utils.llm_client import LLMClient
 from config.prompts import get_prompt, get_deduplicator_actor_prompt
+from config.settings import current_execution_profile
 
 logger = logging.getLogger(__name__)
 
-# Define a batch size for processing actions to avoid overloading the LLM
-ACTION_BATCH_SIZE = 15
-
 
 class DeduplicatorAgent:
     """
@@ -102,21 +100,22 @@ class DeduplicatorAgent:
             }
         
         total_batches = 0
+        batch_size = current_execution_profile().action_batch_size
         
-        if len(actions) <= ACTION_BATCH_SIZE:
+        if len(actions) <= batch_size:
             # Process all actions in one batch
             logger.info(f"Processing {actor_name}: {len(actions)} actions in 1 batch")
             refined_actions, batch_summary = self._llm_deduplicate_actor(actor_name, actions)
             total_batches = 1
         else:
-            # Split into batches of ACTION_BATCH_SIZE
+            # Split into batches of the profile's action batch size
             refined_actions = []
-            num_batches = (len(actions) + ACTION_BATCH_SIZE - 1) // ACTION_BATCH_SIZE
+            num_batches = (len(actions) + batch_size - 1) // batch_size
             logger.info(f"Processing {actor_name}: {len(actions)} actions in {num_batches} batches")
             
-            for i in range(0, len(actions), ACTION_BATCH_SIZE):
-                batch = actions[i:i + ACTION_BATCH_SIZE]
-                batch_num = i // ACTION_BATCH_SIZE + 1
+            for i in range(0, len(actions), batch_size):
+                batch = actions[i:i + batch_size]
+                batch_num = i // batch_size + 1
                 logger.info(f"  - Batch {batch_num}/{num_batches}: {len(batch)} actions")
                 
                 batch_result, _ = self._llm_deduplicate_actor(actor_name, batch)
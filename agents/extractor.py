@@ -14,6 +14,7 @@ import re
 import uuid
 from typing import Dict, Any, List, Optional, Tuple
 from utils.llm_client import LLMClient
+from utils.markdown_logger import is_log_enabled
 from rag_tools.graph_rag import GraphRAG
 from utils.document_parser import DocumentParser
 from config.prompts import get_prompt, get_extractor_user_prompt
@@ -416,7 +417,7 @@ class ExtractorAgent:
             logger.info(f"  → This node: {len(node_actions)} actions, {len(node_tables)} tables")
             logger.info(f"  ✅ Running totals: {len(all_actions)} actions, {len(all_tables)} tables")
             
-            if self.markdown_logger:
+            if is_log_enabled(self.markdown_logger, "verbose"):
                 self.markdown_logger.add_text(f"**Node Extraction Summary:**")
                 self.markdown_logger.add_list_item(f"Actions from this node: {len(node_actions)}", level=0)
                 self.markdown_logger.add_list_item(f"Tables from this node: {len(node_tables)}", level=0)
@@ -745,7 +746,7 @@ class ExtractorAgent:
                 # Complete action - both WHO and WHEN are valid
                 logger.info(f"✅ Action {idx}: COMPLETE - {action_text[:80]}")
                 
-                if self.markdown_logger:
+                if is_log_enabled(self.markdown_logger, "verbose"):
                     self.markdown_logger.add_text(f"✅ **Action {idx}: COMPLETE**")
                     self.markdown_logger.add_list_item(f"Action: {action_text}", level=1)
                     self.markdown_logger.add_list_item(f"WHO: '{action.get('who', 'N/A')}'", level=1)
@@ -756,7 +757,7 @@ class ExtractorAgent:
                 flag_type = "actor unclear" if action['actor_flagged'] else "timing unclear"
                 logger.warning(f"⚠️ Action {idx}: FLAGGED ({flag_type}) - {action_text[:80]}")
                 
-                if self.markdown_logger:
+                if is_log_enabled(self.markdown_logger, "verbose"):
                     self.markdown_logger.add_text(f"⚠️ **Action {idx}: FLAGGED ({flag_type.upper()})**")
                     self.markdown_logger.add_list_item(f"Action: {action_text}", level=1)
                     self.markdown_logger.add_list_item(f"WHO: '{action.get('who', 'N/A')}' (valid: {who_is_valid})", level=1)
@@ -940,10 +941,10 @@ class ExtractorAgent:
     
     def _get_document_source_from_node(self, node_id: str) -> str:
         """
-        Query Neo4j to get document source path by traversing from node to its parent document.
+        Query the graph backend for the document source path stored on the heading node.
         
-        This approach doesn't rely on document name matching, instead it follows
-        the graph relationships from the node up to its parent document.
+        This approach doesn't rely on document name matching; the source is
+        denormalized onto each heading at ingestion (or by `migrate-db`).
         
         Args:
             node_id: Node identifier
@@ -956,25 +957,16 @@ class ExtractorAgent:
             return ""
         
         try:
-            # Query Neo4j by traversing relationships from node to document
-            # This works regardless of document naming conventions
-            query = """
-            MATCH (doc:Document)-[:HAS_SUBSECTION*]->(h:Heading {id: $node_id})
-            RETURN doc.source as source
-            LIMIT 1
-            """
-            
-            with self.graph_rag.driver.session() as session:
-                result = session.run(query, node_id=node_id)
-                record = result.single()
-                
-                if record and record['source']:
-                    source_path = record['source']
-                    logger.debug(f"Found source path for node '{node_id}': {source_path}")
-                    return source_path
-                else:
-                    logger.warning(f"No document found for node '{node_id}'")
-                    return ""
+            # Lookup by id in the graph backend; source is denormalized onto every heading
+            record = self.graph_rag.store.get_node_by_id(node_id)
+            
+            if record and record['source']:
+                source_path = record['source']
+                logger.debug(f"Found source path for node '{node_id}': {source_path}")
+                return source_path
+            else:
+                logger.warning(f"No document found for node '{node_id}'")
+                return ""
                     
         except Exception as e:
             logger.error(f"Error querying graph for node '{node_id}': {e}")
@@ -1226,27 +1218,25 @@ class ExtractorAgent:
             node_title=node_title
         )
         
+        # Infer missing or generic titles in as few LLM calls as possible
+        untitled = [
+            table_data for table_data in tables
+            if (table_data.get('table_title') or '').strip().lower() in ['untitled', 'table', 'n/a', '']
+        ]
+        inferred_titles = self._infer_table_titles(
+            untitled,
+            context=content[:1000],  # First 1000 chars for context
+            node_title=node_title
+        )
+        for table_data in tables:
+            table_data['title_inferred'] = False
+        for table_data, inferred_title in zip(untitled, inferred_titles):
+            table_data['table_title'] = inferred_title
+            table_data['title_inferred'] = True
+            logger.info(f"Inferred table title: '{inferred_title}'")
+        
         enhanced_tables = []
         for table_data in tables:
-            # Infer title if missing or generic
-            original_title = table_data.get('table_title', 'Untitled')
-            title_needs_inference = (
-                not original_title or
-                original_title.lower() in ['untitled', 'table', 'n/a', '']
-            )
-            
-            if title_needs_inference:
-                inferred_title = self._infer_table_title(
-                    table_data,
-                    context=content[:1000],  # First 1000 chars for context
-                    node_title=node_title
-                )
-                table_data['table_title'] = inferred_title
-                table_data['title_inferred'] = True
-                logger.info(f"Inferred table title: '{inferred_title}'")
-            else:
-                table_data['title_inferred'] = False
-            
             enhanced = create_table_schema(
                 table_title=table_data.get('table_title', 'Untitled'),
                 table_type=table_data.get('table_type', 'other'),
@@ -2069,44 +2059,44 @@ CORRECTIONS: [Brief explanation of fixes]"""
             logger.error(f"Error in markdown recovery: {e}", exc_info=True)
             return content, False, f"Recovery failed: {str(e)}"
     
-    def _infer_table_title(self, table_data: Dict[str, Any], context: str = "", node_title: str = "") -> str:
+    def _infer_table_titles(self, tables: List[Dict[str, Any]], context: str = "", node_title: str = "") -> List[str]:
         """
-        Use LLM to infer a contextually appropriate title for a table/checklist.
+        Use LLM to infer contextually appropriate titles for tables/checklists of one section.
+        
+        All tables are packed into as few calls as fit (LLMClient.generate_many).
         
         Args:
-            table_data: Table structure (headers, rows, type)
+            tables: Table structures (headers, rows, type) needing a title
             context: Surrounding document context
             node_title: Title of the containing document section
             
         Returns:
-            Inferred title string
+            Inferred title per table, in order
         """
-        # Check if table already has a title
-        existing_title = table_data.get('table_title', '').strip()
-        if existing_title and existing_title.lower() not in ['untitled', 'table', 'n/a', '']:
-            logger.debug(f"Table already has title: {existing_title}")
-            return existing_title
+        if not tables:
+            return []
         
-        logger.info("Inferring title for untitled table...")
+        logger.info(f"Inferring titles for {len(tables)} untitled tables...")
         
-        try:
-            # Prepare table description
-            headers = table_data.get('headers', [])
-            rows = table_data.get('rows', [])
-            table_type = table_data.get('table_type', 'other')
-            markdown_content = table_data.get('markdown_content', '')
-            
-            # Sample first few rows for context
-            sample_rows = rows[:3] if rows else []
-            
-            inference_prompt = f"""Infer a descriptive title for this table.
+        instructions = f"""Infer a descriptive title for each table below.
 
 **Document Section:** {node_title if node_title else "Unknown section"}
 
 **Surrounding Context:**
 {context[:600] if context else "No additional context provided"}
 
-**Table Type:** {table_type}
+Based on the context and table structure, generate a specific, descriptive title (5-12 words) for each table.
+Each result is ONLY the title, no quotes, no explanation."""
+        
+        items = []
+        for table_data in tables:
+            headers = table_data.get('headers', [])
+            rows = table_data.get('rows', [])
+            markdown_content = table_data.get('markdown_content', '')
+            
+            # Sample first few rows for context
+            sample_rows = rows[:3] if rows else []
+            items.append(f"""**Table Type:** {table_data.get('table_type', 'other')}
 
 **Table Headers:** {', '.join(headers) if headers else "No headers"}
 
@@ -2114,36 +2104,34 @@ CORRECTIONS: [Brief explanation of fixes]"""
 {json.dumps(sample_rows, indent=2) if sample_rows else "No row data"}
 
 **Table Markdown:**
-{markdown_content[:400] if markdown_content else "Not available"}
-
-Based on the context and table structure, generate a specific, descriptive title (5-12 words).
-Return ONLY the title, no quotes, no explanation."""
-            
-            inference_prompt_system = get_prompt("table_title_inference")
-            
-            inferred_title = self.llm.generate(
-                prompt=inference_prompt,
-                system_prompt=inference_prompt_system,
-                temperature=0.3
-            ).strip()
-            
-            # Clean up the title
-            inferred_title = inferred_title.strip('"\'')
-            
-            logger.info(f"Inferred table title: '{inferred_title}'")
+{markdown_content[:400] if markdown_content else "Not available"}""")
+        
+        # Tables without a valid reply come back as None and get a generic title
+        results = self.llm.generate_many(
+            items,
+            instructions,
+            {"type": "string"},
+            system_prompt=get_prompt("table_title_inference"),
+            temperature=0.3
+        )
+        
+        titles = []
+        for table_data, result in zip(tables, results):
+            table_type = table_data.get('table_type', 'other')
+            inferred_title = (result or "").strip().strip('"\'')
+            if not inferred_title:
+                # Fallback to generic title based on type
+                inferred_title = f"{table_type.title()} Table from {node_title}" if node_title else f"{table_type.title()} Table"
             
             if self.markdown_logger:
+                headers = table_data.get('headers', [])
                 self.markdown_logger.add_text(f"**Table Title Inferred:** '{inferred_title}'")
                 self.markdown_logger.add_list_item(f"Type: {table_type}", level=1)
                 self.markdown_logger.add_list_item(f"Headers: {', '.join(headers) if headers else 'None'}", level=1)
                 self.markdown_logger.add_text("")
-            
-            return inferred_title
-            
-        except Exception as e:
-            logger.error(f"Error inferring table title: {e}", exc_info=True)
-            # Fallback to generic title based on type
-            return f"{table_type.title()} Table from {node_title}" if node_title else f"{table_type.title()} Table"
+            titles.append(inferred_title)
+        
+        return titles
     
     def _validate_schema_compliance(
         self,
@@ -99,7 +99,7 @@ class Phase3Agent:
 
     def fetch_nodes_with_metadata(self, node_ids: List[str]) -> List[Dict[str, Any]]:
         """
-        Fetch nodes from Neo4j with complete metadata using ONLY graph queries.
+        Fetch nodes from the graph backend with complete metadata using ONLY graph queries.
         
         Args:
             node_ids: List of node IDs from Analyzer
@@ -111,39 +111,34 @@ class Phase3Agent:
         
         nodes_with_metadata = []
         
+        if not node_ids:
+            return nodes_with_metadata
+        
+        # Single round trip through the graph backend (Neo4j index seeks or in-memory lookups)
+        records_by_id = {}
+        try:
+            for record in self.graph_rag.get_nodes_by_ids(list(node_ids)):
+                records_by_id.setdefault(record['id'], record)
+        except Exception as e:
+            logger.error(f"Error fetching nodes: {e}")
+            return nodes_with_metadata
+        
         for node_id in node_ids:
-            try:
-                # Query Neo4j directly to get node with metadata and document source
-                query = """
-                MATCH (doc:Document)-[:HAS_SUBSECTION*]->(h:Heading {id: $node_id})
-                RETURN h.id as id, h.title as title, h.summary as summary,
-                       h.start_line as start_line, h.end_line as end_line,
-                       doc.source as source, doc.name as doc_name
-                LIMIT 1
-                """
-                
-                with self.graph_rag.driver.session() as session:
-                    result = session.run(query, node_id=node_id)
-                    record = result.single()
-                    
-                    if record:
-                        node = {
-                            'id': record['id'],
-                            'title': record['title'],
-                            'summary': record.get('summary', ''),
-                            'start_line': record['start_line'],
-                            'end_line': record['end_line'],
-                            'source': record['source'],
-                            'doc_name': record['doc_name']
-                        }
-                        nodes_with_metadata.append(node)
-                        logger.debug(f"✓ Fetched node {node_id}: {node['title']} (lines {node['start_line']}-{node['end_line']})")
-                    else:
-                        logger.warning(f"✗ Node {node_id} not found in graph")
-                        
-            except Exception as e:
-                logger.error(f"Error fetching node {node_id}: {e}")
-                continue
+            record = records_by_id.get(node_id)
+            if record:
+                node = {
+                    'id': record['id'],
+                    'title': record['title'],
+                    'summary': record.get('summary', ''),
+                    'start_line': record['start_line'],
+                    'end_line': record['end_line'],
+                    'source': record['source'],
+                    'doc_name': record['doc_name']
+                }
+                nodes_with_metadata.append(node)
+                logger.debug(f"✓ Fetched node {node_id}: {node['title']} (lines {node['start_line']}-{node['end_line']})")
+            else:
+                logger.warning(f"✗ Node {node_id} not found in graph")
         
         logger.info(f"Successfully fetched {len(nodes_with_metadata)} nodes with complete metadata")
         return nodes_with_metadata
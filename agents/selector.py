@@ -2,15 +2,15 @@
 
 import logging
 import json
-import re
 from typing import Dict, Any, List, Tuple
 from utils.llm_client import LLMClient
+from utils.markdown_logger import is_log_enabled
+from utils.run_budget import current_run_budget
+from config.settings import current_execution_profile
 from config.prompts import get_prompt, get_selector_user_prompt, get_selector_table_scoring_prompt
 
 logger = logging.getLogger(__name__)
 
-# Define a batch size for processing actions to avoid overloading the LLM
-ACTION_BATCH_SIZE = 15
 
 
 class SelectorAgent:
@@ -98,7 +98,7 @@ class SelectorAgent:
             )
             
             # Log all input actions (raw)
-            if complete_actions:
+            if complete_actions and is_log_enabled(self.markdown_logger, "verbose"):
                 self.markdown_logger.add_text("### Input Complete Actions (All)", bold=True)
                 self.markdown_logger.add_text("")
                 for idx, action in enumerate(complete_actions, 1):
@@ -107,7 +107,7 @@ class SelectorAgent:
                     self.markdown_logger.add_list_item(f"WHEN: {action.get('when', 'N/A')}", level=1)
                     self.markdown_logger.add_text("")
             
-            if flagged_actions:
+            if flagged_actions and is_log_enabled(self.markdown_logger, "verbose"):
                 self.markdown_logger.add_text("### Input Flagged Actions (All)", bold=True)
                 self.markdown_logger.add_text("")
                 for idx, action in enumerate(flagged_actions, 1):
@@ -254,10 +254,11 @@ class SelectorAgent:
 
         all_selected = []
         all_discarded = []
+        batch_size = current_execution_profile().action_batch_size
 
-        for i in range(0, len(actions), ACTION_BATCH_SIZE):
-            batch = actions[i:i + ACTION_BATCH_SIZE]
-            logger.info(f"Processing {action_type} actions batch {i//ACTION_BATCH_SIZE + 1}...")
+        for i in range(0, len(actions), batch_size):
+            batch = actions[i:i + batch_size]
+            logger.info(f"Processing {action_type} actions batch {i//batch_size + 1}...")
             
             if action_type == "complete":
                 result = self._llm_select(problem_statement, user_config, batch, [])
@@ -309,7 +310,7 @@ class SelectorAgent:
             )
             
             # Log raw LLM output to markdown
-            if self.markdown_logger:
+            if is_log_enabled(self.markdown_logger, "verbose"):
                 self.markdown_logger.add_text("### Raw LLM Selection Output", bold=True)
                 self.markdown_logger.add_text("")
                 self.markdown_logger.add_code_block(json.dumps(result, indent=2, ensure_ascii=False), language="json")
@@ -653,6 +654,9 @@ class SelectorAgent:
         self.markdown_logger.add_list_item(f"Average Relevance Score: {selection_summary.get('average_relevance_score', 0.0):.2f}")
         self.markdown_logger.add_text("")
         
+        if not is_log_enabled(self.markdown_logger, "verbose"):
+            return
+        
         # Log selected complete actions with relevance scores
         if selected_complete:
             self.markdown_logger.add_text("### Selected Complete Actions", bold=True)
@@ -716,6 +720,18 @@ class SelectorAgent:
         if not tables:
             return [], []
         
+        # Keep every table unscored in faster profiles or when the run deadline is close
+        if not current_execution_profile().table_scoring:
+            logger.info(f"Skipping table relevance scoring ({current_execution_profile().name} profile); keeping all {len(tables)} tables")
+            for table in tables:
+                table['kept_reason'] = 'scoring_skipped_profile'
+            return list(tables), []
+        if not current_run_budget().allows("table_scoring"):
+            logger.warning(f"Skipping table relevance scoring (run degradation: {current_run_budget().level}); keeping all {len(tables)} tables")
+            for table in tables:
+                table['kept_reason'] = 'scoring_skipped_deadline'
+            return list(tables), []
+        
         logger.info(f"Filtering {len(tables)} tables using relevance scoring...")
         
         selected_tables = []
@@ -723,9 +739,10 @@ class SelectorAgent:
         
         RELEVANCE_THRESHOLD = 7.0  # Minimum score out of 10
         
-        for table in tables:
-            # Score table for relevance (with selected actions context)
-            relevance_score = self._score_table_relevance(table, problem_statement, user_config, selected_actions)
+        # Score all tables for relevance (with selected actions context) in as few LLM calls as fit
+        scores = self._score_tables_relevance(tables, problem_statement, user_config, selected_actions)
+        
+        for table, relevance_score in zip(tables, scores):
             table['relevance_score'] = relevance_score
             
             if relevance_score >= RELEVANCE_THRESHOLD:
@@ -740,58 +757,58 @@ class SelectorAgent:
         logger.info(f"Table filtering complete: {len(selected_tables)} selected, {len(discarded_tables)} discarded")
         return selected_tables, discarded_tables
 
-    def _score_table_relevance(
+    def _score_tables_relevance(
         self,
-        table: Dict[str, Any],
+        tables: List[Dict[str, Any]],
         problem_statement: str,
         user_config: Dict[str, Any],
         selected_actions: List[Dict[str, Any]] = None
-    ) -> float:
+    ) -> List[float]:
         """
-        Score a table's relevance to the problem statement using LLM.
+        Score tables' relevance to the problem statement using LLM.
+        
+        The tables are packed into as few calls as fit (LLMClient.generate_many).
         
         Args:
-            table: Table object to score
+            tables: Table objects to score
             problem_statement: Problem/objective statement
             user_config: User configuration
             selected_actions: List of selected actions (for context in scoring)
             
         Returns:
-            Relevance score (0-10)
+            Relevance score (0-10) per table
         """
-        table_title = table.get('table_title', 'Untitled')
-        table_type = table.get('table_type', 'Unknown')
-        headers = table.get('headers', [])
-        row_count = len(table.get('rows', []))
-        markdown_content = table.get('markdown_content', '')
-        
-        # Build table content for LLM - include full markdown content
-        if markdown_content:
-            # Include metadata + full table content
-            table_summary = f"Title: {table_title}\nType: {table_type}\nHeaders: {', '.join(headers)}\nRow count: {row_count}\n\nTable Content:\n{markdown_content}"
-        else:
-            # Fallback to summary if markdown_content not available
-            table_summary = f"Title: {table_title}\nType: {table_type}\nHeaders: {', '.join(headers)}\nRow count: {row_count}"
-        
-        prompt = get_selector_table_scoring_prompt(problem_statement, user_config, table_summary, selected_actions)
-        
-        try:
-            result = self.llm.generate(
-                prompt=prompt,
-                system_prompt=None,
-                temperature=0.3
-            )
+        table_summaries = []
+        for table in tables:
+            table_title = table.get('table_title', 'Untitled')
+            table_type = table.get('table_type', 'Unknown')
+            headers = table.get('headers', [])
+            row_count = len(table.get('rows', []))
+            markdown_content = table.get('markdown_content', '')
             
-            # Extract number from result
-            match = re.search(r'\d+\.?\d*', result)
-            if match:
-                score = float(match.group())
-                return min(10.0, max(0.0, score))  # Clamp between 0-10
+            # Build table content for LLM - include full markdown content
+            if markdown_content:
+                # Include metadata + full table content
+                table_summaries.append(f"Title: {table_title}\nType: {table_type}\nHeaders: {', '.join(headers)}\nRow count: {row_count}\n\nTable Content:\n{markdown_content}")
             else:
-                logger.warning(f"Could not parse relevance score from LLM response: {result}")
-                return 5.0  # Default to neutral score
-                
-        except Exception as e:
-            logger.error(f"Error scoring table relevance: {e}")
-            return 5.0  # Default to neutral score on error
+                # Fallback to summary if markdown_content not available
+                table_summaries.append(f"Title: {table_title}\nType: {table_type}\nHeaders: {', '.join(headers)}\nRow count: {row_count}")
+        
+        instructions = get_selector_table_scoring_prompt(problem_statement, user_config, selected_actions)
+        results = self.llm.generate_many(
+            table_summaries,
+            instructions,
+            {"type": "number"},
+            system_prompt=None,
+            temperature=0.3
+        )
+        
+        scores = []
+        for table, score in zip(tables, results):
+            if score is None:
+                logger.warning(f"No relevance score for table '{table.get('table_title', 'Untitled')}'; using neutral score")
+                scores.append(5.0)  # Default to neutral score
+            else:
+                scores.append(min(10.0, max(0.0, float(score))))  # Clamp between 0-10
+        return scores
 
@@ -1,13 +1,18 @@
 """Translator Agent for Persian translation of action plans."""
 
 import logging
-from typing import Dict, Any
+import re
+from typing import Dict, Any, List
 from utils.llm_client import LLMClient
+from utils.token_budget import count_tokens, split_to_fit
 from config.prompts import get_prompt, get_translator_user_prompt
 from config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Persian text takes about twice the tokens of the English it translates
+PERSIAN_TOKEN_RATIO = 2
+
 
 class TranslatorAgent:
     """Translator agent for Persian translation using gemma3:27b."""
@@ -47,16 +52,23 @@ class TranslatorAgent:
             logger.warning("No final plan provided for translation")
             return ""
         
-        # Generate Persian translation using translator model
-        prompt = get_translator_user_prompt(final_plan)
+        # Generate Persian translation using translator model. A plan too long for one
+        # prompt is translated in consecutive groups of its sections.
+        chunks = self._split_plan(final_plan)
+        if len(chunks) > 1:
+            logger.info(f"Translating the plan in {len(chunks)} parts to fit the model's context window")
         
         try:
-            translated_plan = self.llm.generate(
-                prompt=prompt,
-                system_prompt=self.system_prompt,
-                temperature=0.1,
-                model_override=self.translator_model
-            )
+            translated_parts = []
+            for chunk in chunks:
+                translated_parts.append(self.llm.generate(
+                    prompt=get_translator_user_prompt(chunk),
+                    system_prompt=self.system_prompt,
+                    temperature=0.1,
+                    model_override=self.translator_model,
+                    reserve_tokens=count_tokens(chunk) * PERSIAN_TOKEN_RATIO
+                ))
+            translated_plan = "\n\n".join(part.strip() for part in translated_parts)
             
             logger.info(f"Translation completed: {len(translated_plan)} characters")
             return translated_plan
@@ -64,4 +76,19 @@ class TranslatorAgent:
         except Exception as e:
             logger.error(f"Translation error: {e}")
             raise
-
+    
+    def _split_plan(self, final_plan: str) -> List[str]:
+        """
+        Split the plan at its markdown headings into parts that fit one prompt.
+        
+        Each part leaves room for its translation, which takes about
+        PERSIAN_TOKEN_RATIO times its tokens.
+        """
+        budget = self.llm.prompt_budget(reserve_output=0, model_override=self.translator_model)
+        available = budget.remaining(self.system_prompt, get_translator_user_prompt(""))
+        max_chunk_tokens = max(1, available // (1 + PERSIAN_TOKEN_RATIO))
+        if count_tokens(final_plan) <= max_chunk_tokens:
+            return [final_plan]
+        
+        sections = [section for section in re.split(r"\n(?=#{1,6} )", final_plan) if section.strip()]
+        return ["\n".join(group) for group in split_to_fit(sections, lambda section: section + "\n", max_chunk_tokens)]
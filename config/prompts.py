@@ -1,5 +1,6 @@
 """prompts for all agents in the orchestration."""
 
+import json
 from typing import List, Dict
 
 """externally imposed economic and trade restrictions that block access to essential medicines, cripple health infrastructure, drive health workers to leave"""
@@ -493,16 +494,6 @@ ANALYZER_PHASE2_PROMPT = """You are a senior document analyst member of an exper
 
 ANALYZER_NODE_EVALUATION_TEMPLATE = """Your task is to identify which document nodes contain actionable, domain-relevant recommendations for the given problem.
 
-## Problem Statement
-{problem_statement}
-
-## Phase and Level Context
-Operational Phase: {phase}
-Organizational Level: {level}
-
-## Document Nodes to Evaluate
-{node_context}
-
 ## Evaluation Framework
 
 ### Step 1: Understand the Core Domain
@@ -568,7 +559,17 @@ Return a JSON object containing ONLY the node IDs that pass ALL criteria from St
 - Be inclusive: Cross-domain nodes may contain valuable actionable content
 - Each included node should have POTENTIAL applicability (direct or indirect)
 
-Respond with valid JSON only. No explanations or additional text."""
+Respond with valid JSON only. No explanations or additional text.
+
+## Problem Statement
+{problem_statement}
+
+## Phase and Level Context
+Operational Phase: {phase}
+Organizational Level: {level}
+
+## Document Nodes to Evaluate
+{node_context}"""
 
 
 
@@ -622,7 +623,7 @@ Respond with valid JSON only. No explanations or additional text."""
 │    │ STEP 5: Table Enhancement & Filtering              │
 │    │ → _enhance_tables_with_references()                │
 │    │   → Adds reference metadata                        │
-│    │   → If title missing: _infer_table_title()         │
+│    │   → If title missing: _infer_table_titles()        │
 │    │     → Uses TABLE_TITLE_INFERENCE_PROMPT            │
 │    │     → System: TABLE_TITLE_INFERENCE_PROMPT         │
 │    │   → Filters: Only keeps tables where               │
@@ -684,7 +685,7 @@ Respond with valid JSON only. No explanations or additional text."""
 │                                                         │
 │ 4. TABLE_TITLE_INFERENCE_PROMPT                         │
 │    → System prompt for table title inference            │
-│    → Used in: _infer_table_title()                      │
+│    → Used in: _infer_table_titles()                     │
 │    → When: Table missing or has generic title           │
 │                                                         │
 │ 5. DEPENDENCY_TO_ACTION_PROMPT                          │
@@ -964,16 +965,16 @@ Process the document systematically, section by section. Maintain a working buff
 
 EXTRACTOR_USER_PROMPT_TEMPLATE = """Extract ALL actionable items, formulas, dependencies, and tables from this content related to the subject: {subject}
 
+Expected output JSON with 4 keys: actions, formulas, tables, dependencies.
+Follow the schema specified in the system prompt exactly.
+Extract EVERYTHING relevant from the content.
+Respond with valid JSON only.
+
 Source Node: {node_title} (ID: {node_id})
 Lines: {start_line}-{end_line}
 
 Content:
-{content}
-
-Expected output JSON with 4 keys: actions, formulas, tables, dependencies.
-Follow the schema specified in the system prompt exactly.
-Extract EVERYTHING relevant from the content.
-Respond with valid JSON only."""
+{content}"""
 
 MARKDOWN_RECOVERY_PROMPT = """You are a Markdown Structure Recovery Specialist.
 
@@ -1247,11 +1248,11 @@ Respond with valid JSON only."""
 │    → _filter_tables(tables, ...)                        │
 │    │                                                    │
 │    │ STEP 5: Score Tables for Relevance                 │
-│    │ → For each table:                                  │
-│    │   → _score_table_relevance()                       │
+│    │ → _score_tables_relevance(tables, ...)             │
+│    │   → All tables packed in few calls (generate_many) │
 │    │     → Uses SELECTOR_TABLE_SCORING_TEMPLATE         │
 │    │     → System: None (table scoring is standalone)   │
-│    │     → Returns: score (0-10)                        │
+│    │     → Returns: score (0-10) per table              │
 │    │ → Keep if: relevance_score >= 7.0                  │
 │    │ → Discard if: relevance_score < 7.0                │
 │    │                                                    │
@@ -1285,13 +1286,13 @@ Respond with valid JSON only."""
 │                                                         │
 │ 3. SELECTOR_TABLE_SCORING_TEMPLATE                      │
 │    → Standalone prompt for table relevance scoring      │
-│    → Used in: _score_table_relevance()                  │
+│    → Used in: _score_tables_relevance()                 │
 │    → System prompt: None (self-contained)               │
 │    → Contains: problem_statement, user_config,          │
-│                selected_actions (for context),          │
-│                table_summary                            │
+│                selected_actions (for context); table    │
+│                summaries are packed after it            │
 │    → Format: get_selector_table_scoring_prompt()        │
-│    → Returns: Single number (0-10)                      │
+│    → Returns: A number (0-10) per table                 │
 │    → Note: Table selection runs after action selection, │
 │            so selected actions are provided as context  │
 │                                                         │
@@ -1481,9 +1482,6 @@ The following actions have already been selected as relevant to this problem sta
 
 {selected_actions_summary}
 
-TABLE TO SCORE:
-{table_summary}
-
 ## Evaluation Criteria
 
 Evaluate the table's relevance based on:
@@ -1537,24 +1535,9 @@ Rate on a scale of 0-10:
   - No operational value for the stated problem
 
 
-## Output Format
-
-**CRITICAL**: Your response must be ONLY a single number between 0 and 10, with no additional text, explanation, or formatting.
+## Result
 
-Examples of correct responses:
-- 8
-- 7.5
-- 10
-- 3
-
-Examples of INCORRECT responses (DO NOT use these formats):
-- "The relevance score is 8"
-- "Score: 8"
-- "8.0 (relevant)"
-- "{{"relevance_score": 8}}"
-- Any text before or after the number
-
-Provide ONLY the number."""
+Each table to score is given below as an item. Its result is the relevance score as a number between 0 and 10 (e.g. 8 or 7.5), with no text."""
 
 
 
@@ -1882,18 +1865,6 @@ TIMING_USER_PROMPT_TEMPLATE = """Your task is to assign a TRIGGER and a TIME WIN
 The final output will combine these into the `when` field, but for generation, you should think about them as two separate, precise components.
 
 
-## Context
-**Problem Statement:**
-{problem_statement}
-
-**User Configuration:**
-{config_text}
-
-## Actions to Process
-{actions_text}
-
-
-
 ## Output Format
 Return a JSON object with a single key "actions" containing the list of all actions, including the updated ones and the ones that were not updated. 
 YOU MUST NOT CHANGE THE OTHER FIELDS OF THE ACTIONS OTHER THAN THE `when` FIELD.
@@ -1907,13 +1878,22 @@ Example:
       "action": "Activate the hospital's emergency communication plan",
       "who": "Communications Officer",
       "when": "trigger | time_window",
-      "reference": {...},
+      "reference": {{...}},
       "timing_flagged": false,
       "actor_flagged": false,
     }}
   ]
 }}
 
+## Context
+**Problem Statement:**
+{problem_statement}
+
+**User Configuration:**
+{config_text}
+
+## Actions to Process
+{actions_text}
 """
 
 
@@ -1971,18 +1951,6 @@ Be specific. Use context to infer appropriate roles when not explicitly stated.
 
 ASSIGNER_USER_PROMPT_TEMPLATE = """Assign the 'who' field for each action.
 
-## Context
-- Organizational Level: {org_level}
-- Phase: {phase}
-- Subject: {subject}
-
-## Actions
-
-{actions_text}
-
-## Reference Document
-{reference_doc}
-
 ## Instructions
 1. For each action, assign or update the 'who' field based on the action content and reference document
 2. Output a JSON object with key "actions" whose value is a list with the same number of elements as the input actions
@@ -1990,7 +1958,19 @@ ASSIGNER_USER_PROMPT_TEMPLATE = """Assign the 'who' field for each action.
 4. YOU MUST NOT ADD OR REMOVE ANY ACTION
 5. Output must be valid JSON
 
-Return JSON: {{ "actions": [...] }}"""
+Return JSON: {{ "actions": [...] }}
+
+## Reference Document
+{reference_doc}
+
+## Context
+- Organizational Level: {org_level}
+- Phase: {phase}
+- Subject: {subject}
+
+## Actions
+
+{actions_text}"""
 
 
 # ===================================================================================
@@ -2712,6 +2692,9 @@ ASSIGNING_TRANSLATOR_USER_PROMPT_TEMPLATE = """شما یک کارشناس تصح
 - تصحیح فقط موارد اشتباه، نه تغییر کل متن
 - اگر عنوانی در سند مرجع وجود ندارد، نزدیک‌ترین معادل رسمی را انتخاب کنید
 
+طرح تصحیح‌شده را بدون هیچ توضیح اضافی ارائه دهید.
+فقط متن نهایی تصحیح‌شده را برگردانید.
+
 سند مرجع ساختار سازمانی:
 ```
 {reference_document}
@@ -2720,10 +2703,7 @@ ASSIGNING_TRANSLATOR_USER_PROMPT_TEMPLATE = """شما یک کارشناس تصح
 طرح فارسی که باید تصحیح شود:
 ```
 {final_persian_plan}
-```
-
-طرح تصحیح‌شده را بدون هیچ توضیح اضافی ارائه دهید.
-فقط متن نهایی تصحیح‌شده را برگردانید."""
+```"""
 
 
 
@@ -2881,13 +2861,71 @@ English Action Plan:
 {final_plan}"""
 
 
+PACKED_ITEMS_TEMPLATE = """{instructions}
+
+## Output Format
+
+The items below are independent: judge each one on its own, as if it were the only item. Each starts with "### Item <index>".
+
+Return a JSON object with one entry per item, in any order:
+{{
+  "results": [
+    {{"index": 1, "result": <result for item 1>}},
+    {{"index": 2, "result": <result for item 2>}}
+  ]
+}}
+
+Every item index must appear exactly once. Each "result" must follow this schema:
+{item_schema}
+
+## Items
+{items_text}"""
+
+
 # ===================================================================================
 # USER PROMPT TEMPLATE HELPER FUNCTIONS
 # ===================================================================================
 
+class PromptText(str):
+    """
+    A user prompt split into a static prefix and a dynamic suffix.
+
+    Batched agents send many prompts that differ only in their last part (the
+    batch of actions or nodes). Ollama and OpenAI-compatible servers reuse the
+    KV / prefix cache of a prompt only up to its first differing token, so
+    these templates put instructions, reference documents and per-run context
+    first and the per-call data last. static_prefix is that shared head; the
+    LLM client hashes it (with the system prompt) to record prefix reuse.
+    """
+
+    static_prefix: str
+
+    def __new__(cls, static_prefix: str, dynamic_suffix: str):
+        text = super().__new__(cls, static_prefix + dynamic_suffix)
+        text.static_prefix = static_prefix
+        return text
+
+
+def _format_prefixed(template: str, dynamic_field: str, **values) -> PromptText:
+    """Format a template whose dynamic_field comes last; the text before it is the static prefix."""
+    head, tail = template.split("{" + dynamic_field + "}")
+    return PromptText(head.format(**values), str(values[dynamic_field]) + tail.format(**values))
+
+
+def get_packed_items_prompt(instructions: str, item_schema: dict, items_text: str) -> PromptText:
+    """Get formatted prompt answering several independent items in one call (the items form the dynamic suffix)."""
+    return _format_prefixed(
+        PACKED_ITEMS_TEMPLATE, "items_text",
+        instructions=instructions,
+        item_schema=json.dumps(item_schema, indent=2),
+        items_text=items_text
+    )
+
+
 def get_timing_user_prompt(problem_statement: str, config_text: str, actions_text: str) -> str:
-    """Get formatted timing user prompt with dynamic data."""
-    return TIMING_USER_PROMPT_TEMPLATE.format(
+    """Get formatted timing user prompt with dynamic data (the actions form the dynamic suffix)."""
+    return _format_prefixed(
+        TIMING_USER_PROMPT_TEMPLATE, "actions_text",
         problem_statement=problem_statement,
         config_text=config_text,
         actions_text=actions_text
@@ -2902,9 +2940,10 @@ def _format_subject_with_explanation(subject: str) -> str:
 
 
 def get_assigner_user_prompt(org_level: str, phase: str, subject: str, actions_text: str, reference_doc: str) -> str:
-    """Get formatted assigner user prompt with dynamic data."""
+    """Get formatted assigner user prompt with dynamic data (the actions form the dynamic suffix)."""
     formatted_subject = _format_subject_with_explanation(subject)
-    return ASSIGNER_USER_PROMPT_TEMPLATE.format(
+    return _format_prefixed(
+        ASSIGNER_USER_PROMPT_TEMPLATE, "actions_text",
         org_level=org_level,
         phase=phase,
         subject=formatted_subject,
@@ -2982,8 +3021,9 @@ def get_analyzer_refined_queries_prompt(problem_statement: str, doc_toc: str, in
 
 
 def get_analyzer_node_evaluation_prompt(problem_statement: str, node_context: str, phase: str = "", level: str = "") -> str:
-    """Get formatted analyzer node evaluation prompt."""
-    return ANALYZER_NODE_EVALUATION_TEMPLATE.format(
+    """Get formatted analyzer node evaluation prompt (the nodes form the dynamic suffix)."""
+    return _format_prefixed(
+        ANALYZER_NODE_EVALUATION_TEMPLATE, "node_context",
         problem_statement=problem_statement,
         node_context=node_context,
         phase=phase,
@@ -2992,9 +3032,10 @@ def get_analyzer_node_evaluation_prompt(problem_statement: str, node_context: st
 
 
 def get_extractor_user_prompt(subject: str, node_title: str, node_id: str, start_line: int, end_line: int, content: str) -> str:
-    """Get formatted extractor user prompt with dynamic data."""
+    """Get formatted extractor user prompt with dynamic data (the node from its title on is the dynamic suffix)."""
     formatted_subject = _format_subject_with_explanation(subject)
-    return EXTRACTOR_USER_PROMPT_TEMPLATE.format(
+    return _format_prefixed(
+        EXTRACTOR_USER_PROMPT_TEMPLATE, "node_title",
         subject=formatted_subject,
         node_title=node_title,
         node_id=node_id,
@@ -3062,15 +3103,16 @@ def get_formula_integration_prompt(formulas: List[Dict], actions: List[Dict]) ->
 
 
 def get_assigning_translator_user_prompt(reference_document: str, final_persian_plan: str) -> str:
-    """Get formatted assigning translator user prompt with dynamic data."""
-    return ASSIGNING_TRANSLATOR_USER_PROMPT_TEMPLATE.format(
+    """Get formatted assigning translator user prompt with dynamic data (the plan forms the dynamic suffix)."""
+    return _format_prefixed(
+        ASSIGNING_TRANSLATOR_USER_PROMPT_TEMPLATE, "final_persian_plan",
         reference_document=reference_document,
         final_persian_plan=final_persian_plan
     )
 
 
-def get_selector_table_scoring_prompt(problem_statement: str, user_config: dict, table_summary: str, selected_actions: list = None) -> str:
-    """Get formatted selector table relevance scoring prompt."""
+def get_selector_table_scoring_prompt(problem_statement: str, user_config: dict, selected_actions: list = None) -> str:
+    """Get formatted selector table relevance scoring instructions (the tables are packed after them by LLMClient.generate_many)."""
     subject_value = user_config.get('subject', 'unknown')
     formatted_subject = _format_subject_with_explanation(subject_value)
     
@@ -3095,8 +3137,7 @@ def get_selector_table_scoring_prompt(problem_statement: str, user_config: dict,
         level=user_config.get('level', 'unknown'),
         phase=user_config.get('phase', 'unknown'),
         subject=formatted_subject,
-        selected_actions_summary=selected_actions_summary,
-        table_summary=table_summary
+        selected_actions_summary=selected_actions_summary
     )
 
 
@@ -3146,8 +3187,8 @@ def get_quality_repair_user_prompt(final_plan: str, repair_actions: list) -> str
 
 
 def get_translator_user_prompt(final_plan: str) -> str:
-    """Get formatted translator user prompt."""
-    return TRANSLATOR_USER_PROMPT_TEMPLATE.format(final_plan=final_plan)
+    """Get formatted translator user prompt (the plan, or one chunk of it, forms the dynamic suffix)."""
+    return _format_prefixed(TRANSLATOR_USER_PROMPT_TEMPLATE, "final_plan", final_plan=final_plan)
 
 
 def get_prompt(agent_name: str, include_examples: bool = False, config: dict = None) -> str:
@@ -1,9 +1,10 @@
 """Configuration settings for the LLM Agent Orchestration System."""
 
 import os
-from typing import Optional
+from contextvars import ContextVar
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import BaseModel, Field
 
 
 class Settings(BaseSettings):
@@ -13,6 +14,15 @@ class Settings(BaseSettings):
     neo4j_uri: str = Field(default="bolt://localhost:7687", env="NEO4J_URI")
     neo4j_user: str = Field(default="neo4j", env="NEO4J_USER")
     neo4j_password: str = Field(default="cardiosmartai", env="NEO4J_PASSWORD")
+    neo4j_max_connection_pool_size: int = Field(default=50, env="NEO4J_MAX_CONNECTION_POOL_SIZE")
+    neo4j_connection_acquisition_timeout: float = Field(default=30.0, env="NEO4J_CONNECTION_ACQUISITION_TIMEOUT")
+    neo4j_max_connection_lifetime: int = Field(default=3600, env="NEO4J_MAX_CONNECTION_LIFETIME")
+    neo4j_fetch_size: int = Field(default=2000, env="NEO4J_FETCH_SIZE")  # Records per Bolt pull
+    neo4j_max_transaction_retry_time: float = Field(default=10.0, env="NEO4J_MAX_TRANSACTION_RETRY_TIME")
+
+    # Graph Backend Configuration ("neo4j" or "embedded" SQLite + in-memory tree)
+    graph_backend: str = Field(default="neo4j", env="GRAPH_BACKEND")
+    embedded_graph_path: str = Field(default="./graph_storage/graph.db", env="EMBEDDED_GRAPH_PATH")
     
     # ChromaDB Configuration
     chroma_path: str = Field(default="./chroma_storage", env="CHROMA_PATH")
@@ -22,6 +32,24 @@ class Settings(BaseSettings):
     ollama_model: str = Field(default="gpt-oss:20b", env="OLLAMA_MODEL")
     ollama_temperature: float = Field(default=0.1, env="OLLAMA_TEMPERATURE")
     ollama_timeout: int = Field(default=3000, env="OLLAMA_TIMEOUT")
+    # Ollama host pool (utils/ollama_pool.py)
+    ollama_base_urls: List[str] = Field(default_factory=list, env="OLLAMA_BASE_URLS")  # JSON list of hosts; empty = OLLAMA_BASE_URL only
+    ollama_sticky_slack: int = Field(default=2, env="OLLAMA_STICKY_SLACK")  # Extra in-flight requests a model's host takes before spilling over
+    ollama_eject_after_failures: int = Field(default=3, env="OLLAMA_EJECT_AFTER_FAILURES")  # Consecutive failures that eject a host
+    ollama_eject_seconds: float = Field(default=30.0, env="OLLAMA_EJECT_SECONDS")  # How long an ejected host gets no requests
+    ollama_health_check_interval: float = Field(default=15.0, env="OLLAMA_HEALTH_CHECK_INTERVAL")  # Seconds between /api/tags probes (0 = off)
+
+    # Prompt Token Budget (utils/token_budget.py)
+    model_context_windows: Dict[str, int] = Field(default_factory=dict, env="MODEL_CONTEXT_WINDOWS")  # JSON: {"model": tokens}
+    default_context_window: int = Field(default=8192, env="DEFAULT_CONTEXT_WINDOW")  # Models not in the built-in table
+    ollama_num_ctx: int = Field(default=8192, env="OLLAMA_NUM_CTX")  # Context pinned per Ollama model (capped at its window)
+    ollama_max_num_ctx: int = Field(default=32768, env="OLLAMA_MAX_NUM_CTX")  # Largest context a pin may grow to
+    llm_output_reserve_tokens: int = Field(default=2048, env="LLM_OUTPUT_RESERVE_TOKENS")  # Kept free for the reply
+    node_summary_tokens: int = Field(default=100, env="NODE_SUMMARY_TOKENS")  # Per node in analyzer evaluation prompts
+    prompt_prefix_ttl_seconds: float = Field(default=600.0, env="PROMPT_PREFIX_TTL_SECONDS")  # How long a sent prompt prefix counts as cached
+    prefix_truncation_step_tokens: int = Field(default=512, env="PREFIX_TRUNCATION_STEP_TOKENS")  # Reference docs are cut in steps of this
+    llm_pack_max_items: int = Field(default=20, env="LLM_PACK_MAX_ITEMS")  # Items per generate_many call
+    llm_pack_item_reply_tokens: int = Field(default=150, env="LLM_PACK_ITEM_REPLY_TOKENS")  # Reply tokens reserved per packed item
 
     # OpenAI-compatible API Configuration (Legacy - for backward compatibility)
     gapgpt_api_key: Optional[str] = Field(default=None, env="GAPGPT_API_KEY")
@@ -160,7 +188,50 @@ class Settings(BaseSettings):
     rag_context_window: bool = Field(default=True, env="RAG_CONTEXT_WINDOW")  # Include parent/child context
     
     # Workflow Configuration
+    execution_profile: str = Field(default="thorough", env="EXECUTION_PROFILE")  # fast | balanced | thorough (see EXECUTION_PROFILES)
+    action_batch_size: int = Field(default=15, env="ACTION_BATCH_SIZE")  # Actions per selector/deduplicator LLM call
+    analyzer_node_batch_size: int = Field(default=6, env="ANALYZER_NODE_BATCH_SIZE")  # Nodes per analyzer evaluation call
     max_retries: int = Field(default=2, env="MAX_RETRIES")
+    enable_checkpointing: bool = Field(default=True, env="ENABLE_CHECKPOINTING")  # Per-node state checkpoints for --resume
+    checkpoint_path: str = Field(default="./checkpoints/workflow_checkpoints.db", env="CHECKPOINT_PATH")
+    checkpoint_retention_days: int = Field(default=7, env="CHECKPOINT_RETENTION_DAYS")  # Unfinished runs kept for --resume (0 = forever)
+    enable_stage_reuse: bool = Field(default=True, env="ENABLE_STAGE_REUSE")  # Reuse stage outputs whose inputs are unchanged
+    stage_cache_path: str = Field(default="./checkpoints/stage_outputs.db", env="STAGE_CACHE_PATH")
+    stage_cache_retention_days: int = Field(default=7, env="STAGE_CACHE_RETENTION_DAYS")  # Stored stage outputs kept for reuse (0 = forever)
+    batch_max_parallel_plans: int = Field(default=4, env="BATCH_MAX_PARALLEL_PLANS")  # Plans run concurrently by `main.py batch`
+    llm_max_concurrency: int = Field(default=8, env="LLM_MAX_CONCURRENCY")  # Process-wide in-flight LLM request budget
+    # LLM scheduler (utils/llm_client.py LLMScheduler)
+    ollama_max_concurrency_per_model: int = Field(default=2, env="OLLAMA_MAX_CONCURRENCY_PER_MODEL")
+    openai_max_concurrency_per_model: int = Field(default=8, env="OPENAI_MAX_CONCURRENCY_PER_MODEL")
+    llm_concurrency_limits: Dict[str, int] = Field(default_factory=dict, env="LLM_CONCURRENCY_LIMITS")  # JSON: {"ollama:cogito:8b": 3, "openai": 16}
+    llm_requests_per_minute: Dict[str, float] = Field(default_factory=dict, env="LLM_REQUESTS_PER_MINUTE")  # JSON per provider: {"openai": 120}
+    llm_rate_burst: int = Field(default=5, env="LLM_RATE_BURST")  # Requests a provider's bucket allows at once
+    ollama_max_loaded_models: int = Field(default=1, env="OLLAMA_MAX_LOADED_MODELS")  # Models the Ollama host holds at once
+    ollama_affinity_max_wait: float = Field(default=30.0, env="OLLAMA_AFFINITY_MAX_WAIT")  # Seconds a request waits for a model swap
+    ollama_keep_alive_seconds: int = Field(default=1800, env="OLLAMA_KEEP_ALIVE_SECONDS")  # Sent as keep_alive
+    enable_model_prewarm: bool = Field(default=True, env="ENABLE_MODEL_PREWARM")  # Load the next stage's model ahead of time
+    # Tail latency (utils/latency.py)
+    llm_adaptive_timeouts: bool = Field(default=True, env="LLM_ADAPTIVE_TIMEOUTS")  # Timeouts from observed p99 per (model, agent)
+    llm_latency_min_samples: int = Field(default=20, env="LLM_LATENCY_MIN_SAMPLES")  # Requests seen before percentiles are used
+    llm_timeout_multiplier: float = Field(default=3.0, env="LLM_TIMEOUT_MULTIPLIER")  # Adaptive timeout = p99 x this
+    llm_min_timeout: float = Field(default=60.0, env="LLM_MIN_TIMEOUT")  # Floor of the adaptive timeout (seconds)
+    enable_hedged_requests: bool = Field(default=False, env="ENABLE_HEDGED_REQUESTS")  # Race a duplicate on a second Ollama host
+    llm_hedge_percentile: float = Field(default=0.95, env="LLM_HEDGE_PERCENTILE")  # Latency after which a request is hedged
+    llm_breaker_failures: int = Field(default=5, env="LLM_BREAKER_FAILURES")  # Consecutive failures that open a provider's circuit
+    llm_breaker_cooldown: float = Field(default=60.0, env="LLM_BREAKER_COOLDOWN")  # Seconds an open circuit fails fast
+    llm_cassette_mode: str = Field(default="off", env="LLM_CASSETTE_MODE")  # off | record | replay (see utils/llm_cassette.py)
+    llm_cassette_path: str = Field(default="./cassettes/llm_cassette.jsonl", env="LLM_CASSETTE_PATH")
+    llm_cassette_latency: str = Field(default="none", env="LLM_CASSETTE_LATENCY")  # Replay delay: none | recorded | <seconds>
+    run_deadline_seconds: int = Field(default=0, env="RUN_DEADLINE_SECONDS")  # Per-run time budget (0 = no deadline)
+    run_degrade_reduced_at: float = Field(default=0.5, env="RUN_DEGRADE_REDUCED_AT")  # Budget share left when agents start degrading
+    run_degrade_minimal_at: float = Field(default=0.2, env="RUN_DEGRADE_MINIMAL_AT")  # Budget share left for minimal mode
+    
+    # Plan Service Configuration (`main.py serve`)
+    service_host: str = Field(default="127.0.0.1", env="SERVICE_HOST")
+    service_port: int = Field(default=8765, env="SERVICE_PORT")
+    service_max_concurrent_jobs: int = Field(default=2, env="SERVICE_MAX_CONCURRENT_JOBS")
+    service_max_retained_jobs: int = Field(default=200, env="SERVICE_MAX_RETAINED_JOBS")
+    plan_service_url: str = Field(default="", env="PLAN_SERVICE_URL")  # e.g. http://127.0.0.1:8765 or unix:///tmp/plans.sock
     quality_threshold: float = Field(default=0.7, env="QUALITY_THRESHOLD")
     
     # Validator Configuration
@@ -183,6 +254,10 @@ class Settings(BaseSettings):
     
     # Logging
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
+    markdown_log_verbosity: str = Field(default="verbose", env="MARKDOWN_LOG_VERBOSITY")  # minimal | normal | verbose (plan logs)
+    markdown_log_flush_bytes: int = Field(default=65536, env="MARKDOWN_LOG_FLUSH_BYTES")  # Buffered plan log size that triggers a flush
+    markdown_log_flush_interval: float = Field(default=1.0, env="MARKDOWN_LOG_FLUSH_INTERVAL")  # Max seconds a plan log entry stays buffered
+    enable_tracing: bool = Field(default=True, env="ENABLE_TRACING")  # JSONL span trace next to each plan (<plan>_trace.jsonl)
     
     # phase3 Configuration (Multi-Phase Deep Analysis)
     phase3_score_threshold: float = Field(default=0.5, env="PHASE3_SCORE_THRESHOLD")
@@ -223,3 +298,90 @@ def get_settings() -> Settings:
         _settings = Settings()
     return _settings
 
+
+class ExecutionProfile(BaseModel):
+    """Throughput knobs of one plan run, set together by a named profile."""
+
+    name: str
+    top_k_results: int  # Retrieval size per analyzer query
+    analyzer_node_batch_size: int  # Candidate nodes per analyzer evaluation call
+    action_batch_size: int  # Actions per selector / deduplicator LLM call
+    assigner_batch_size: int
+    assigner_batch_threshold: int  # Assigner batches only above this many actions
+    rag_use_mmr: bool  # MMR diversity re-ranking in hybrid retrieval
+    rag_graph_expansion_depth: int  # Relationship hops for graph-expanded retrieval
+    sibling_expansion: bool  # Analyzer Phase 2 Step 2
+    table_scoring: bool  # Selector LLM relevance score per table
+    max_validator_retries: int  # Agent re-runs the comprehensive validator may request
+
+
+# Named profiles. "thorough" is the configured settings (publication runs);
+# "fast" is for draft plans that should take minutes.
+EXECUTION_PROFILES = ("fast", "balanced", "thorough")
+
+
+def get_execution_profile(name: Optional[str] = None) -> ExecutionProfile:
+    """
+    Build a named execution profile.
+
+    Args:
+        name: One of EXECUTION_PROFILES (default: settings.execution_profile)
+
+    Raises:
+        ValueError: Unknown profile name
+    """
+    settings = get_settings()
+    name = name or settings.execution_profile
+    profiles: Dict[str, Dict] = {
+        "fast": dict(
+            top_k_results=5, analyzer_node_batch_size=20, action_batch_size=40,
+            assigner_batch_size=40, assigner_batch_threshold=60, rag_use_mmr=False,
+            rag_graph_expansion_depth=1, sibling_expansion=False, table_scoring=False,
+            max_validator_retries=0
+        ),
+        "balanced": dict(
+            top_k_results=10, analyzer_node_batch_size=10, action_batch_size=25,
+            assigner_batch_size=25, assigner_batch_threshold=40, rag_use_mmr=True,
+            rag_graph_expansion_depth=1, sibling_expansion=False, table_scoring=True,
+            max_validator_retries=1
+        ),
+        "thorough": dict(
+            top_k_results=settings.top_k_results,
+            analyzer_node_batch_size=settings.analyzer_node_batch_size,
+            action_batch_size=settings.action_batch_size,
+            assigner_batch_size=settings.assigner_batch_size,
+            assigner_batch_threshold=settings.assigner_batch_threshold,
+            rag_use_mmr=settings.rag_use_mmr,
+            rag_graph_expansion_depth=settings.rag_graph_expansion_depth,
+            sibling_expansion=True,
+            table_scoring=True,
+            max_validator_retries=settings.max_validator_retries
+        ),
+    }
+    if name not in profiles:
+        raise ValueError(f"Unknown execution profile: {name} (expected one of: {', '.join(EXECUTION_PROFILES)})")
+    return ExecutionProfile(name=name, **profiles[name])
+
+
+_current_execution_profile: ContextVar[Optional[ExecutionProfile]] = ContextVar("execution_profile", default=None)
+
+
+def current_execution_profile() -> ExecutionProfile:
+    """Get the profile bound to the current plan run (settings.execution_profile outside a run)."""
+    return _current_execution_profile.get() or get_execution_profile()
+
+
+def bind_execution_profile(profile: Optional[ExecutionProfile]):
+    """
+    Bind a profile to the current plan run's context.
+
+    Returns:
+        Token for reset_execution_profile
+    """
+    return _current_execution_profile.set(profile)
+
+
+def reset_execution_profile(token):
+    """Restore the profile bound before bind_execution_profile."""
+    _current_execution_profile.reset(token)
+
@@ -4,11 +4,11 @@ import logging
 import os
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from neo4j import GraphDatabase
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from config.settings import get_settings
 from utils.ollama_embeddings import OllamaEmbeddingsClient
+from utils.neo4j_client import get_neo4j_driver, neo4j_session
 
 logger = logging.getLogger(__name__)
 
@@ -47,11 +47,8 @@ class DictionaryIngestionPipeline:
             self.dictionary_collection_name
         )
         
-        # Neo4j connection
-        self.neo4j_driver = GraphDatabase.driver(
-            self.settings.neo4j_uri,
-            auth=(self.settings.neo4j_user, self.settings.neo4j_password)
-        )
+        # Neo4j connection (borrowed from the shared driver registry)
+        self.neo4j_driver = get_neo4j_driver()
         
         logger.info(
             f"Initialized DictionaryIngestionPipeline: "
@@ -60,8 +57,8 @@ class DictionaryIngestionPipeline:
         )
     
     def close(self):
-        """Close database connections."""
-        self.neo4j_driver.close()
+        """Release database connections (the shared Neo4j driver is closed at process exit)."""
+        pass
     
     def ingest_dictionary(
         self,
@@ -111,7 +108,7 @@ class DictionaryIngestionPipeline:
         
         # Clear Neo4j graph nodes
         try:
-            with self.neo4j_driver.session() as session:
+            with neo4j_session(write=True) as session:
                 result = session.run(f"""
                     MATCH (n)
                     WHERE n.id STARTS WITH '{self.dictionary_graph_prefix}_'
@@ -220,7 +217,7 @@ class DictionaryIngestionPipeline:
         """
         logger.info("Creating Neo4j graph structure for dictionary")
         
-        with self.neo4j_driver.session() as session:
+        with neo4j_session(write=True) as session:
             # Create document node
             session.run(f"""
                 MERGE (doc:Document {{
@@ -334,7 +331,7 @@ Explanation: {entry['explanation']}
             entry_ids: List of entry IDs
             embeddings: List of embedding vectors
         """
-        with self.neo4j_driver.session() as session:
+        with neo4j_session(write=True) as session:
             for entry_id, embedding in zip(entry_ids, embeddings):
                 try:
                     session.run("""
@@ -355,7 +352,7 @@ Explanation: {entry['explanation']}
         
         # Neo4j stats
         try:
-            with self.neo4j_driver.session() as session:
+            with neo4j_session() as session:
                 result = session.run("""
                     MATCH (term:DictionaryTerm)
                     WHERE term.id STARTS WITH $prefix
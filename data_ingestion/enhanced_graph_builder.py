@@ -5,9 +5,10 @@ import os
 import re
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from neo4j import GraphDatabase
 from config.settings import get_settings
 from utils.llm_client import LLMClient
+from utils.db_init import ensure_neo4j_schema
+from utils.neo4j_client import get_neo4j_driver, neo4j_session, execute_write_transaction
 
 logger = logging.getLogger(__name__)
 
@@ -33,10 +34,7 @@ class EnhancedGraphBuilder:
         """
         self.settings = get_settings()
         self.collection_name = collection_name
-        self.driver = GraphDatabase.driver(
-            self.settings.neo4j_uri,
-            auth=(self.settings.neo4j_user, self.settings.neo4j_password)
-        )
+        self.driver = get_neo4j_driver()
         self.llm_client = LLMClient.create_for_agent("summarizer", dynamic_settings)
         
         # Ensure database exists and is accessible
@@ -47,20 +45,13 @@ class EnhancedGraphBuilder:
     def _initialize_database(self):
         """Initialize Neo4j database and verify connectivity."""
         try:
-            with self.driver.session() as session:
+            with neo4j_session(write=True) as session:
                 # Verify connectivity
                 result = session.run("RETURN 1 as test")
                 result.single()
                 
-                # Create indexes for better performance
-                session.run("""
-                    CREATE INDEX heading_id IF NOT EXISTS 
-                    FOR (h:Heading) ON (h.id)
-                """)
-                session.run("""
-                    CREATE INDEX document_name IF NOT EXISTS 
-                    FOR (d:Document) ON (d.name)
-                """)
+                # Create constraints and indexes for direct node lookups
+                ensure_neo4j_schema(session)
                 
                 logger.info("Neo4j database initialized successfully")
         except Exception as e:
@@ -301,6 +292,11 @@ Formatting guidelines:
         source_file = self._escape_cypher_string(str(file_path))
         doc_summary = self._escape_cypher_string(doc_tree.get('summary', ''))
         
+        # Replace headings from a previous ingestion of the same document
+        # (heading ids are derived from the document name and must stay unique)
+        cypher_commands.append(
+            f"MATCH (h:Heading {{doc_name: '{doc_name}'}}) DETACH DELETE h"
+        )
         cypher_commands.append(
             f"MERGE (d:Document {{name: '{doc_name}'}}) "
             f"SET d.source = '{source_file}', d.summary = '{doc_summary}'"
@@ -317,39 +313,45 @@ Formatting guidelines:
             for child in reversed(children):
                 nodes_to_visit.append(child)
         
-        # Phase 1: Create all heading nodes with unique IDs
+        # Assign unique IDs and resolve parent/depth for denormalized properties
+        parent_stack = [{'id': 'doc', 'level': 0}]
+        
         for i, item in enumerate(flat_nodes):
-            node_id = f"{doc_prefix}_h{i + 1}"
+            item['id'] = f"{doc_prefix}_h{i + 1}"
+            
+            while parent_stack[-1]['level'] >= item['level']:
+                parent_stack.pop()
+            
+            item['parent_id'] = parent_stack[-1]['id']
+            item['depth'] = len(parent_stack)
+            parent_stack.append(item)
+        
+        # Phase 1: Create all heading nodes
+        for item in flat_nodes:
             title = self._escape_cypher_string(item['title'])
             summary = self._escape_cypher_string(item.get('summary', ''))
-            item['id'] = node_id  # Store for relationship phase
+            parent_property = (
+                "" if item['parent_id'] == 'doc' else f", parent_id: '{item['parent_id']}'"
+            )
             
             cypher_commands.append(
-                f"CREATE (h:Heading {{id: '{node_id}', title: '{title}', level: {item['level']}, "
-                f"start_line: {item['start_line']}, end_line: {item['end_line']}, summary: '{summary}'}})"
+                f"CREATE (h:Heading {{id: '{item['id']}', title: '{title}', level: {item['level']}, "
+                f"start_line: {item['start_line']}, end_line: {item['end_line']}, summary: '{summary}', "
+                f"doc_name: '{doc_name}', source: '{source_file}', depth: {item['depth']}{parent_property}}})"
             )
         
         # Phase 2: Create relationships
-        parent_stack = [{'id': 'doc', 'level': 0}]
-        
         for item in flat_nodes:
-            while parent_stack[-1]['level'] >= item['level']:
-                parent_stack.pop()
-            
-            parent_id = parent_stack[-1]['id']
-            
-            if parent_id == 'doc':
+            if item['parent_id'] == 'doc':
                 cypher_commands.append(
                     f"MATCH (p:Document {{name: '{doc_name}'}}), (c:Heading {{id: '{item['id']}'}}) "
                     f"CREATE (p)-[:HAS_SUBSECTION]->(c)"
                 )
             else:
                 cypher_commands.append(
-                    f"MATCH (p:Heading {{id: '{parent_id}'}}), (c:Heading {{id: '{item['id']}'}}) "
+                    f"MATCH (p:Heading {{id: '{item['parent_id']}'}}), (c:Heading {{id: '{item['id']}'}}) "
                     f"CREATE (p)-[:HAS_SUBSECTION]->(c)"
                 )
-            
-            parent_stack.append(item)
         
         return cypher_commands
     
@@ -360,21 +362,22 @@ Formatting guidelines:
         return value.replace('\\', '\\\\').replace("'", "\\'").replace('"', '\\"')
     
     def _execute_cypher_transaction(self, statements: List[str]):
-        """Execute list of Cypher statements in a single transaction."""
-        with self.driver.session() as session:
-            logger.debug(f"Executing {len(statements)} Cypher statements in transaction")
-            
-            with session.begin_transaction() as tx:
-                for statement in statements:
-                    if statement:
-                        try:
-                            tx.run(statement)
-                        except Exception as e:
-                            logger.error(f"Error in statement: {e}")
-                            logger.debug(f"Statement: {statement}...")
-                            raise
-            
-            logger.debug("Transaction completed successfully")
+        """Execute list of Cypher statements in a single (retried, writer-routed) transaction."""
+        logger.debug(f"Executing {len(statements)} Cypher statements in transaction")
+        
+        def _run_statements(tx):
+            for statement in statements:
+                if statement:
+                    try:
+                        tx.run(statement).consume()
+                    except Exception as e:
+                        logger.error(f"Error in statement: {e}")
+                        logger.debug(f"Statement: {statement}...")
+                        raise
+        
+        execute_write_transaction(_run_statements)
+        
+        logger.debug("Transaction completed successfully")
     
     def clear_collection(self) -> None:
         """Clear all nodes for this collection."""
@@ -386,7 +389,7 @@ Formatting guidelines:
         DETACH DELETE d, h
         """
         
-        with self.driver.session() as session:
+        with neo4j_session(write=True) as session:
             session.run(query, collection_type=self.collection_name)
         
         logger.info(f"Collection cleared: {self.collection_name}")
@@ -395,14 +398,14 @@ Formatting guidelines:
         """Clear all nodes and relationships from the entire database."""
         logger.warning("Clearing ENTIRE Neo4j database...")
         
-        with self.driver.session() as session:
+        with neo4j_session(write=True) as session:
             session.run("MATCH (n) DETACH DELETE n")
         
         logger.info("Database cleared")
     
     def get_statistics(self) -> Dict[str, int]:
         """Get statistics about the graph."""
-        with self.driver.session() as session:
+        with neo4j_session() as session:
             # Count documents
             doc_result = session.run(
                 "MATCH (d:Document {type: $type}) RETURN count(d) as count",
@@ -431,9 +434,8 @@ Formatting guidelines:
         }
     
     def close(self):
-        """Close Neo4j connection."""
-        self.driver.close()
-        logger.info("Neo4j connection closed")
+        """Release Neo4j connection (the shared driver is closed at process exit)."""
+        logger.info("Neo4j connection released")
 
 
 def main():
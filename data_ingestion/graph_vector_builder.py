@@ -5,11 +5,11 @@ import os
 from pathlib import Path
 from typing import List, Dict, Any, Tuple, Optional
 import hashlib
-from neo4j import GraphDatabase
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from config.settings import get_settings
 from utils.ollama_embeddings import OllamaEmbeddingsClient
+from utils.neo4j_client import get_neo4j_driver, neo4j_session, execute_read, execute_write
 # from rag_tools.graph_aware_rag import GraphAwareRAG # This is no longer needed directly
 
 logger = logging.getLogger(__name__)
@@ -44,17 +44,13 @@ class GraphVectorBuilder:
         self.summary_collection = self.chroma_client.get_or_create_collection(self.summary_collection_name)
         self.content_collection = self.chroma_client.get_or_create_collection(self.content_collection_name)
         
-        # Neo4j connection
-        self.neo4j_driver = GraphDatabase.driver(
-            self.settings.neo4j_uri,
-            auth=(self.settings.neo4j_user, self.settings.neo4j_password)
-        )
+        # Neo4j connection (borrowed from the shared driver registry)
+        self.neo4j_driver = get_neo4j_driver()
         
         logger.info(f"Initialized GraphVectorBuilder for collections: summary='{self.summary_collection_name}', content='{self.content_collection_name}'")
     
     def close(self):
-        """Close database connections."""
-        self.neo4j_driver.close()
+        """Release database connections (the shared Neo4j driver is closed at process exit)."""
         # self.graph_rag.close() # This line is no longer needed
     
     def build_from_graph(self, docs_dir: str, clear_existing: bool = False) -> None:
@@ -125,9 +121,7 @@ class GraphVectorBuilder:
         RETURN doc.name as name
         """
         
-        with self.neo4j_driver.session() as session:
-            result = session.run(query)
-            return [record['name'] for record in result]
+        return [record['name'] for record in execute_read(query)]
     
     def _get_document_nodes(self, doc_name: str) -> List[Dict[str, Any]]:
         """
@@ -140,26 +134,25 @@ class GraphVectorBuilder:
             List of node dictionaries
         """
         query = """
-        MATCH (doc:Document {name: $doc_name})-[:HAS_SUBSECTION*]->(h:Heading)
+        MATCH (h:Heading {doc_name: $doc_name})
         RETURN h.id as node_id, h.title as title, h.level as level,
                h.start_line as start_line, h.end_line as end_line,
                h.summary as summary
         ORDER BY h.start_line
         """
         
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, doc_name=doc_name)
-            nodes = []
-            for record in result:
-                nodes.append({
-                    'node_id': record['node_id'],
-                    'title': record['title'],
-                    'level': record['level'],
-                    'start_line': record['start_line'],
-                    'end_line': record['end_line'],
-                    'summary': record['summary'] or ''
-                })
-            return nodes
+        result = execute_read(query, doc_name=doc_name)
+        nodes = []
+        for record in result:
+            nodes.append({
+                'node_id': record['node_id'],
+                'title': record['title'],
+                'level': record['level'],
+                'start_line': record['start_line'],
+                'end_line': record['end_line'],
+                'summary': record['summary'] or ''
+            })
+        return nodes
     
     def _find_md_file(self, docs_dir: str, doc_name: str) -> Optional[str]:
         """Find markdown file corresponding to document name."""
@@ -395,25 +388,28 @@ class GraphVectorBuilder:
         """
         # Track which nodes we've already updated in this batch
         updated_nodes = set()
+        rows = []
         
-        with self.neo4j_driver.session() as session:
-            for metadata, embedding in zip(metadatas, embeddings):
-                node_id = metadata.get('node_id')
-                chunk_index = metadata.get('chunk_index', 0)
-                
-                # Only update for the first chunk of each node
-                if node_id and chunk_index == 0 and node_id not in updated_nodes:
-                    try:
-                        session.run("""
-                            MATCH (h:Heading {id: $node_id})
-                            SET h.summary_embedding = $embedding
-                        """, node_id=node_id, embedding=embedding)
-                        
-                        updated_nodes.add(node_id)
-                        logger.debug(f"Updated embedding for node: {node_id}")
-                        
-                    except Exception as e:
-                        logger.warning(f"Failed to update Neo4j embedding for {node_id}: {e}")
+        for metadata, embedding in zip(metadatas, embeddings):
+            node_id = metadata.get('node_id')
+            chunk_index = metadata.get('chunk_index', 0)
+            
+            # Only update for the first chunk of each node
+            if node_id and chunk_index == 0 and node_id not in updated_nodes:
+                rows.append({'node_id': node_id, 'embedding': embedding})
+                updated_nodes.add(node_id)
+        
+        if rows:
+            # One write transaction for the whole batch instead of one round trip per node
+            try:
+                execute_write("""
+                    UNWIND $rows as row
+                    MATCH (h:Heading {id: row.node_id})
+                    SET h.summary_embedding = row.embedding
+                """, rows=rows)
+            except Exception as e:
+                logger.warning(f"Failed to update Neo4j embeddings for {len(rows)} nodes: {e}")
+                updated_nodes.clear()
         
         if updated_nodes:
             logger.info(f"    Updated {len(updated_nodes)} Neo4j nodes with embeddings")
@@ -436,7 +432,7 @@ class GraphVectorBuilder:
             
             # Add Neo4j embedding stats
             try:
-                with self.neo4j_driver.session() as session:
+                with neo4j_session() as session:
                     # Total nodes
                     result = session.run("MATCH (h:Heading) RETURN count(h) as total")
                     total_nodes = result.single()['total']
@@ -7,10 +7,10 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress TensorFlow INFO and WARNING
 import logging
 import argparse
 import sys
+import time
 from datetime import datetime
-from pathlib import Path
 
-from config.settings import get_settings
+from config.settings import get_settings, EXECUTION_PROFILES
 from utils.llm_client import LLMClient
 # Lazy imports to avoid loading sentence-transformers unnecessarily
 # from workflows.orchestration import create_workflow
@@ -111,7 +111,14 @@ def generate_action_plan(
     responsible_party: str = None,
     process_owner: str = None,
     special_protocols_node_ids: list = None,
-    save_agent_output: bool = False
+    save_agent_output: bool = False,
+    run_id: str = None,
+    resume_run_id: str = None,
+    reuse_stage_outputs: bool = True,
+    description: str = None,
+    workflow=None,
+    deadline_seconds: float = None,
+    execution_profile: str = None
 ):
     """
     Generate action plan using template-based orchestration.
@@ -128,138 +135,207 @@ def generate_action_plan(
         responsible_party: Optional responsible party
         process_owner: Optional process owner
         special_protocols_node_ids: Optional list of node IDs for special protocols
+        run_id: Optional run id for checkpoints (default: generated)
+        resume_run_id: Resume a checkpointed run from its failed node; all other
+            arguments are restored from the run record
+        reuse_stage_outputs: Reuse stored outputs of stages whose inputs did not change
+            (e.g. only the formatter reruns after a responsible-party change)
+        description: Optional user-provided description appended to the generated one
+        workflow: Optional workflow shared across plans (see run_batch); it must have been
+            created with a ContextMarkdownLogger so each plan logs to its own file
+        deadline_seconds: Run time budget (default: RUN_DEADLINE_SECONDS setting, 0 = none)
+        execution_profile: fast | balanced | thorough (default: EXECUTION_PROFILE setting)
+    
+    Returns:
+        Path of the English plan, or None on failure
     """
-    logger = logging.getLogger(__name__)
+    from workflows.plan_runner import run_plan_generation
+    
+    summary = run_plan_generation(
+        name=name,
+        timing=timing,
+        level=level,
+        phase=phase,
+        subject=subject,
+        output_path=output_path,
+        document_filter=document_filter,
+        trigger=trigger,
+        responsible_party=responsible_party,
+        process_owner=process_owner,
+        special_protocols_node_ids=special_protocols_node_ids,
+        save_agent_output=save_agent_output,
+        run_id=run_id,
+        resume_run_id=resume_run_id,
+        reuse_stage_outputs=reuse_stage_outputs,
+        description=description,
+        workflow=workflow,
+        deadline_seconds=deadline_seconds,
+        execution_profile=execution_profile
+    )
+    return summary["output_path"] if summary["status"] == "completed" else None
+
+
+def run_batch(
+    plans_file: str,
+    report_path: str = None,
+    max_parallel: int = None,
+    reuse_stage_outputs: bool = True,
+    deadline_seconds: float = None,
+    execution_profile: str = None
+):
+    """
+    Generate many plans with one compiled workflow and shared RAG/LLM resources.
     
-    logger.info(f"Generating action plan: {name}")
+    Plans run concurrently (bounded by max_parallel); LLM requests from all plans
+    share the process-wide LLM scheduler at batch priority. Each plan logs to its own
+    markdown file through a ContextMarkdownLogger bound per plan.
     
-    # Lazy import to avoid sentence-transformers issues
+    Args:
+        plans_file: JSONL file, one plan per line with name, timing, level, phase, subject
+            and optional output, description, trigger, responsible_party, process_owner,
+            document_filter, special_protocols_node_ids, deadline_seconds, execution_profile
+        report_path: Summary report path (default: action_plans/batch_report_<timestamp>.json)
+        max_parallel: Plans generated at the same time (default: settings.batch_max_parallel_plans)
+        reuse_stage_outputs: Reuse stored stage outputs whose inputs are unchanged
+        deadline_seconds: Time budget of each plan unless the plan sets its own
+            (default: RUN_DEADLINE_SECONDS setting, 0 = none)
+        execution_profile: Execution profile of each plan unless the plan sets its own
+            (default: EXECUTION_PROFILE setting)
+    
+    Returns:
+        Report dictionary with per-plan summaries
+    """
+    import json
+    from concurrent.futures import ThreadPoolExecutor
     from workflows.orchestration import create_workflow
-    from workflows.graph_state import ActionPlanState
-    from utils.markdown_logger import MarkdownLogger
-    from utils.input_validator import InputValidator
-    from config.settings import get_settings
-    
-    # Build user configuration dict
-    user_config = {
-        "name": name,
-        "timing": timing,
-        "level": level,
-        "phase": phase,
-        "subject": subject
-    }
+    from workflows.checkpointing import get_checkpointer
+    from workflows.plan_runner import run_plan_generation
+    from utils.markdown_logger import ContextMarkdownLogger
+    
+    logger = logging.getLogger(__name__)
+    settings = get_settings()
+    max_parallel = max_parallel or settings.batch_max_parallel_plans
+    
+    plans = []
+    with open(plans_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                plans.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping invalid JSON on line {line_number} of {plans_file}: {e}")
+    
+    logger.info(f"Batch: {len(plans)} plans, {max_parallel} in parallel, LLM concurrency {settings.llm_max_concurrency}")
+    started_at = datetime.now()
+    started = time.monotonic()
+    
+    # Compile once: agents, RAG tools, Chroma handles and indexes are shared by every plan
+    workflow = create_workflow(
+        markdown_logger=ContextMarkdownLogger(),
+        dynamic_settings=None,
+        checkpointer=get_checkpointer(),
+        reuse_stage_outputs=reuse_stage_outputs
+    )
     
-    # Validate configuration
-    is_valid, errors = InputValidator.validate_user_config(user_config)
-    if not is_valid:
-        logger.error(f"Invalid configuration: {'; '.join(errors)}")
-        print(f"Configuration validation failed:")
-        for error in errors:
-            print(f"  - {error}")
-        print(InputValidator.get_validation_help())
-        return None
-    
-    # Normalize configuration
-    user_config = InputValidator.normalize_config(user_config)
-    logger.info(f"Configuration validated: level={level}, phase={phase}, subject={subject}")
-    
-    # No separate guideline documents - treat all documents equally
-    guideline_documents = []
-    
-    # Generate output paths
-    if output_path is None:
-        # Generate default output path
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in name)
-        safe_name = safe_name.replace(' ', '_')[:50]
-        output_path = f"action_plans/{safe_name}_{timestamp}.md"
-    
-    # Generate log path
-    log_path = output_path.replace('.md', '_log.md')
-    
-    # Initialize markdown logger
-    markdown_logger = MarkdownLogger(log_path)
-    markdown_logger.log_workflow_start(name)
-    logger.info(f"Logging to: {log_path}")
-    
-    # Create workflow with logger (dynamic_settings=None uses defaults from .env)
-    workflow = create_workflow(markdown_logger=markdown_logger, dynamic_settings=None)
-    
-    # Initialize state with new parameters
-    initial_state: ActionPlanState = {
-        "user_config": user_config,
-        "subject": name,  # For backward compatibility
-        "current_stage": "start",
-        "retry_count": {},
-        "errors": [],
-        "metadata": {},
-        "documents_to_query": document_filter,
-        "guideline_documents": guideline_documents,
-        "timing": timing,
-        "trigger": trigger,
-        "responsible_party": responsible_party,
-        "process_owner": process_owner,
-        "special_protocols_node_ids": special_protocols_node_ids
+    def run_one(plan: dict) -> dict:
+        try:
+            return run_plan_generation(
+                name=plan.get("name"),
+                timing=plan.get("timing"),
+                level=plan.get("level"),
+                phase=plan.get("phase"),
+                subject=plan.get("subject"),
+                output_path=plan.get("output"),
+                document_filter=plan.get("document_filter"),
+                trigger=plan.get("trigger"),
+                responsible_party=plan.get("responsible_party"),
+                process_owner=plan.get("process_owner"),
+                special_protocols_node_ids=plan.get("special_protocols_node_ids"),
+                description=plan.get("description"),
+                reuse_stage_outputs=reuse_stage_outputs,
+                workflow=workflow,
+                deadline_seconds=plan.get("deadline_seconds", deadline_seconds),
+                execution_profile=plan.get("execution_profile", execution_profile),
+                priority="batch"  # Interactive runs sharing the LLM servers are served first
+            )
+        except Exception as e:
+            logger.error(f"Batch plan '{plan.get('name')}' failed: {e}", exc_info=True)
+            return {"name": plan.get("name"), "status": "failed", "error": str(e)}
+    
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="plan") as executor:
+        results = list(executor.map(run_one, plans))
+    
+    for plan, result in zip(plans, results):
+        result.update({key: plan.get(key) for key in ("level", "phase", "subject", "timing")})
+    
+    report = {
+        "plans_file": plans_file,
+        "started_at": started_at.isoformat(),
+        "duration_seconds": round(time.monotonic() - started, 1),
+        "total": len(results),
+        "completed": sum(1 for r in results if r["status"] == "completed"),
+        "failed": sum(1 for r in results if r["status"] != "completed"),
+        "sum_of_plan_durations_seconds": round(sum(r.get("duration_seconds", 0.0) for r in results), 1),
+        "plans": results
     }
     
-    if save_agent_output:
-        # Create a directory for agent outputs
-        output_dir = Path(output_path).parent
-        agent_output_dir = output_dir / f"{Path(output_path).stem}_agent_outputs"
-        agent_output_dir.mkdir(exist_ok=True)
-        logger.info(f"Saving agent outputs to: {agent_output_dir}")
-        initial_state["agent_output_dir"] = str(agent_output_dir)
+    report_path = report_path or f"action_plans/batch_report_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    
+    print("\n" + "="*70)
+    print(f"Batch Report ({report['completed']}/{report['total']} completed in {report['duration_seconds']}s)")
+    print("="*70)
+    for result in results:
+        status = "✓" if result["status"] == "completed" else "✗"
+        detail = result.get("output_path") or result.get("error", "")
+        print(f"{status} {result.get('name')} [{result.get('duration_seconds', 0.0)}s] {detail}")
+    print("="*70)
+    logger.info(f"Batch report saved to: {report_path}")
+    
+    return report
 
-    # Execute workflow
-    logger.info("Executing workflow...")
-    try:
-        final_state = workflow.invoke(initial_state, config={"recursion_limit": 50})
-        
-        # Check for errors
-        if final_state.get("errors"):
-            logger.warning("Workflow completed with errors:")
-            for error in final_state["errors"]:
-                logger.warning(f"  - {error}")
-                markdown_logger.log_error("Workflow", error)
-        
-        # Get final plans (English and Persian)
-        final_plan = final_state.get("final_plan", "")
-        final_persian_plan = final_state.get("final_persian_plan", "")
-        
-        if not final_plan:
-            logger.error("No action plan generated")
-            markdown_logger.log_workflow_end(success=False, error_msg="No action plan generated")
-            markdown_logger.close()
-            return None
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Save English plan
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(final_plan)
-        
-        logger.info(f"✓ English action plan saved to: {output_path}")
-        
-        # Save Persian plan
-        if final_persian_plan:
-            persian_path = output_path.replace('.md', '_fa.md')
-            with open(persian_path, 'w', encoding='utf-8') as f:
-                f.write(final_persian_plan)
-            logger.info(f"✓ Persian action plan saved to: {persian_path}")
-        
-        # Log completion
-        markdown_logger.log_workflow_end(success=True)
-        markdown_logger.close()
-        logger.info(f"✓ Workflow log saved to: {log_path}")
-        
-        return output_path
+
+def submit_to_service(args) -> int:
+    """Generate a plan through a running plan service and print its progress."""
+    from workflows.plan_service import PlanServiceClient
+    
+    logger = logging.getLogger(__name__)
+    client = PlanServiceClient(args.server or None)
+    if not client.url or not client.health():
+        logger.error(f"Plan service not reachable at '{client.url}'. Start it with: python main.py serve")
+        return 1
     
-    except Exception as e:
-        logger.error(f"Workflow execution failed: {e}", exc_info=True)
-        markdown_logger.log_workflow_end(success=False, error_msg=str(e))
-        markdown_logger.close()
-        return None
+    job = client.submit({
+        "name": args.name,
+        "timing": args.timing,
+        "level": args.level,
+        "phase": args.phase,
+        "subject": args.subject,
+        "output": args.output,
+        "trigger": args.trigger,
+        "responsible_party": args.responsible_party,
+        "process_owner": args.process_owner,
+        "deadline_seconds": args.deadline,
+        "execution_profile": args.profile
+    })
+    logger.info(f"Submitted job {job['job_id']} to {client.url}")
+    
+    for event in client.iter_events(job["job_id"]):
+        if event["type"] == "stage_completed":
+            logger.info(f"✓ {event['node']} ({event['elapsed_seconds']}s)")
+        elif event["type"] in ("started", "run_started"):
+            logger.info(f"Job {job['job_id']} {event['type'].replace('_', ' ')}")
+    
+    summary = client.get_job(job["job_id"])["summary"] or {}
+    if summary.get("status") != "completed":
+        logger.error(f"Job failed: {summary.get('error', 'unknown error')}")
+        return 1
+    logger.info(f"✓ English action plan saved to: {summary['output_path']}")
+    return 0
 
 
 def main():
@@ -273,6 +349,47 @@ def main():
     # Init-db command
     subparsers.add_parser("init-db", help="Initialize Neo4j and ChromaDB databases")
     
+    # Migrate-db command
+    subparsers.add_parser(
+        "migrate-db",
+        help="Backfill denormalized Heading properties and create Neo4j constraints/indexes"
+    )
+    
+    # Export-graph command
+    export_graph_parser = subparsers.add_parser(
+        "export-graph",
+        help="Export the Neo4j hierarchy and summary embeddings to the embedded graph backend"
+    )
+    export_graph_parser.add_argument(
+        "--path",
+        help="Target SQLite file (default: EMBEDDED_GRAPH_PATH setting)"
+    )
+    
+    # Snapshot commands
+    export_snapshot_parser = subparsers.add_parser(
+        "export-snapshot",
+        help="Export the knowledge base (graph, summaries, embeddings, Chroma chunks) to one file"
+    )
+    export_snapshot_parser.add_argument(
+        "--output",
+        required=True,
+        help="Snapshot file to write (e.g. kb_snapshot.zip)"
+    )
+    import_snapshot_parser = subparsers.add_parser(
+        "import-snapshot",
+        help="Replace the knowledge base with the contents of a snapshot file"
+    )
+    import_snapshot_parser.add_argument(
+        "--input",
+        required=True,
+        help="Snapshot file created by export-snapshot"
+    )
+    import_snapshot_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Import even if the snapshot was embedded with a different model/dimension"
+    )
+    
     # Stats command
     subparsers.add_parser("stats", help="Show database statistics")
     
@@ -296,29 +413,24 @@ def main():
     generate_parser = subparsers.add_parser("generate", help="Generate action plan")
     generate_parser.add_argument(
         "--name",
-        required=True,
         help="Action plan title (e.g., 'Emergency Triage Protocol for Mass Casualty Events')"
     )
     generate_parser.add_argument(
         "--timing",
-        required=True,
         help="Time period and/or trigger (e.g., 'Immediate activation upon Code Orange declaration')"
     )
     generate_parser.add_argument(
         "--level",
-        required=True,
         choices=["ministry", "university", "center"],
         help="Organizational level: ministry, university, or center"
     )
     generate_parser.add_argument(
         "--phase",
-        required=True,
         choices=["preparedness", "response"],
         help="Plan phase: preparedness or response"
     )
     generate_parser.add_argument(
         "--subject",
-        required=True,
         choices=["war", "sanction"],
         help="Crisis subject: war or sanction"
     )
@@ -343,6 +455,140 @@ def main():
         action="store_true",
         help="Save the output of each agent to a file for debugging."
     )
+    generate_parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Resume a failed run from its last checkpoint (other arguments are taken from the run)"
+    )
+    generate_parser.add_argument(
+        "--no-reuse",
+        action="store_true",
+        help="Re-execute every stage instead of reusing outputs whose inputs are unchanged"
+    )
+    generate_parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Run time budget; agents degrade as it runs out and the run stops when it passes "
+             "(default: RUN_DEADLINE_SECONDS setting, 0 = none)"
+    )
+    generate_parser.add_argument(
+        "--profile",
+        choices=EXECUTION_PROFILES,
+        help="Execution profile: retrieval depth, batch sizes and optional LLM steps "
+             "(default: EXECUTION_PROFILE setting)"
+    )
+    generate_parser.add_argument(
+        "--server",
+        nargs="?",
+        const="",
+        metavar="URL",
+        help="Submit to a running plan service instead of generating in-process "
+             "(default URL: PLAN_SERVICE_URL setting)"
+    )
+    
+    # Serve command
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run the plan generation service (warm workflow, job queue, local HTTP API)"
+    )
+    serve_parser.add_argument("--host", help="Bind address (default: SERVICE_HOST setting)")
+    serve_parser.add_argument("--port", type=int, help="TCP port (default: SERVICE_PORT setting)")
+    serve_parser.add_argument("--socket", help="Listen on this UNIX socket instead of TCP")
+    serve_parser.add_argument(
+        "--max-jobs",
+        type=int,
+        help="Jobs generated concurrently (default: SERVICE_MAX_CONCURRENT_JOBS setting)"
+    )
+    
+    # Batch command
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Generate many plans from a JSONL file with one shared workflow"
+    )
+    batch_parser.add_argument(
+        "plans",
+        help="JSONL file, one plan per line (name, timing, level, phase, subject, optional output/trigger/...)"
+    )
+    batch_parser.add_argument(
+        "--report",
+        help="Summary report path (default: action_plans/batch_report_<timestamp>.json)"
+    )
+    batch_parser.add_argument(
+        "--max-parallel",
+        type=int,
+        help="Plans generated concurrently (default: BATCH_MAX_PARALLEL_PLANS setting)"
+    )
+    batch_parser.add_argument(
+        "--no-reuse",
+        action="store_true",
+        help="Re-execute every stage instead of reusing outputs whose inputs are unchanged"
+    )
+    batch_parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Time budget of each plan (default: RUN_DEADLINE_SECONDS setting, 0 = none)"
+    )
+    batch_parser.add_argument(
+        "--profile",
+        choices=EXECUTION_PROFILES,
+        help="Execution profile of each plan unless the plan sets its own (default: EXECUTION_PROFILE setting)"
+    )
+    
+    # Fake LLM server command
+    fake_llm_parser = subparsers.add_parser(
+        "fake-llm",
+        help="Run a fake Ollama/OpenAI-compatible server with synthetic latency and canned replies"
+    )
+    fake_llm_parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    fake_llm_parser.add_argument("--port", type=int, default=11435, help="TCP port (default: 11435)")
+    fake_llm_parser.add_argument(
+        "--config",
+        help="JSON file overriding DEFAULT_FAKE_LLM_CONFIG (latency, tokens_per_second, error_rate, ...)"
+    )
+    
+    # Load test command
+    load_test_parser = subparsers.add_parser(
+        "load-test",
+        help="Generate a plan many times concurrently and report throughput and latency percentiles"
+    )
+    load_test_parser.add_argument("--plans", type=int, default=8, help="Plan generations (default: 8)")
+    load_test_parser.add_argument("--concurrency", type=int, default=4, help="Plans generated at once (default: 4)")
+    load_test_parser.add_argument(
+        "--server",
+        help="LLM server URL to use instead of an in-process fake server (e.g. one started with fake-llm)"
+    )
+    load_test_parser.add_argument("--fake-config", help="JSON file configuring the in-process fake server")
+    load_test_parser.add_argument(
+        "--report",
+        help="Report path (default: action_plans/load_test_<timestamp>/report.json)"
+    )
+    load_test_parser.add_argument(
+        "--reuse",
+        action="store_true",
+        help="Reuse stored stage outputs (off by default: every plan has the same inputs)"
+    )
+    load_test_parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Time budget of each plan (default: RUN_DEADLINE_SECONDS setting, 0 = none)"
+    )
+    load_test_parser.add_argument(
+        "--profile",
+        choices=EXECUTION_PROFILES,
+        help="Execution profile of each plan (default: EXECUTION_PROFILE setting)"
+    )
+    
+    # Trace command
+    trace_parser = subparsers.add_parser(
+        "trace",
+        help="Summarize a run trace: per-stage latency and the slowest calls"
+    )
+    trace_parser.add_argument("trace_file", help="Trace written next to the plan (<plan>_trace.jsonl)")
+    trace_parser.add_argument("--top", type=int, default=10, help="Number of slowest calls to list (default: 10)")
+    trace_parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
     
     # Check command
     subparsers.add_parser("check", help="Check prerequisites and connections")
@@ -365,13 +611,60 @@ def main():
         return 1
     
     # Execute command
-    if args.command == "init-db":
+    if args.command == "trace":
+        import json
+        from utils.tracing import load_trace, summarize_trace, render_trace_summary
+        if not os.path.exists(args.trace_file):
+            logger.error(f"Trace file not found: {args.trace_file}")
+            return 1
+        summary = summarize_trace(load_trace(args.trace_file), top=args.top)
+        print(json.dumps(summary, indent=2, ensure_ascii=False) if args.json else render_trace_summary(summary))
+        return 0
+    
+    elif args.command == "init-db":
         from utils.db_init import initialize_all_databases
         if initialize_all_databases():
             return 0
         else:
             return 1
     
+    elif args.command == "migrate-db":
+        from utils.db_init import migrate_neo4j_schema
+        success, msg = migrate_neo4j_schema()
+        if success:
+            logger.info(msg)
+            return 0
+        else:
+            logger.error(msg)
+            return 1
+    
+    elif args.command == "export-graph":
+        from rag_tools.graph_store import export_neo4j_to_embedded
+        success, msg = export_neo4j_to_embedded(args.path)
+        if success:
+            logger.info(msg)
+            logger.info("Set GRAPH_BACKEND=embedded to serve the hierarchy from this file")
+            return 0
+        else:
+            logger.error(msg)
+            return 1
+    
+    elif args.command in ("export-snapshot", "import-snapshot"):
+        from utils.kb_snapshot import export_snapshot, import_snapshot
+        from workflows.stage_cache import clear_stage_cache
+        if args.command == "export-snapshot":
+            success, msg = export_snapshot(args.output)
+        else:
+            success, msg = import_snapshot(args.input, force=args.force)
+            if success:
+                clear_stage_cache()
+        if success:
+            logger.info(msg)
+            return 0
+        else:
+            logger.error(msg)
+            return 1
+    
     elif args.command == "stats":
         from utils.db_init import get_database_statistics
         stats = get_database_statistics()
@@ -391,6 +684,7 @@ def main():
     
     elif args.command == "clear-db":
         from utils.db_init import clear_neo4j_database, clear_chromadb
+        from workflows.stage_cache import clear_stage_cache
         
         response = input(f"Are you sure you want to clear {args.database}? (yes/no): ")
         if response.lower() != 'yes':
@@ -409,6 +703,8 @@ def main():
             if not success:
                 return 1
         
+        # Stored stage outputs were retrieved from the old knowledge base
+        clear_stage_cache()
         return 0
     
     elif args.command == "check":
@@ -424,7 +720,9 @@ def main():
         
         docs_dir = args.docs_dir or settings.docs_dir
         if os.path.exists(docs_dir):
+            from workflows.stage_cache import clear_stage_cache
             run_ingestion(docs_dir)
+            clear_stage_cache()
         else:
             logger.error(f"Documents directory not found: {docs_dir}")
             return 1
@@ -432,6 +730,17 @@ def main():
         return 0
     
     elif args.command == "generate":
+        if not args.resume:
+            missing = [
+                f"--{field}" for field in ("name", "timing", "level", "phase", "subject")
+                if not getattr(args, field)
+            ]
+            if missing:
+                generate_parser.error(f"the following arguments are required: {', '.join(missing)}")
+        
+        if args.server is not None:
+            return submit_to_service(args)
+        
         if not check_prerequisites():
             logger.error("Prerequisites check failed. Run 'python main.py check' for details.")
             return 1
@@ -446,13 +755,86 @@ def main():
             trigger=args.trigger if hasattr(args, 'trigger') else None,
             responsible_party=getattr(args, 'responsible_party', None),
             process_owner=getattr(args, 'process_owner', None),
-            save_agent_output=args.save_agent_output
+            save_agent_output=args.save_agent_output,
+            resume_run_id=args.resume,
+            reuse_stage_outputs=not args.no_reuse,
+            deadline_seconds=args.deadline,
+            execution_profile=args.profile
         )
         if result:
             return 0
         else:
             return 1
     
+    elif args.command == "serve":
+        from workflows.plan_service import PlanService, serve
+        from workflows.plan_runner import run_plan_generation
+        
+        if not check_prerequisites():
+            logger.error("Prerequisites check failed. Run 'python main.py check' for details.")
+            return 1
+        
+        service = PlanService(run_plan_generation, max_concurrent_jobs=args.max_jobs)
+        service.start()
+        serve(service, host=args.host, port=args.port, socket_path=args.socket)
+        return 0
+    
+    elif args.command == "batch":
+        if not os.path.exists(args.plans):
+            logger.error(f"Plans file not found: {args.plans}")
+            return 1
+        
+        if not check_prerequisites():
+            logger.error("Prerequisites check failed. Run 'python main.py check' for details.")
+            return 1
+        
+        report = run_batch(
+            args.plans,
+            report_path=args.report,
+            max_parallel=args.max_parallel,
+            reuse_stage_outputs=not args.no_reuse,
+            deadline_seconds=args.deadline,
+            execution_profile=args.profile
+        )
+        return 0 if report["failed"] == 0 else 1
+    
+    elif args.command == "fake-llm":
+        import json
+        from utils.fake_llm_server import FakeLLMServer
+        
+        config = None
+        if args.config:
+            with open(args.config, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        server = FakeLLMServer(config, host=args.host, port=args.port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info(f"Fake LLM server stopped: {server.stats()}")
+        finally:
+            server.stop()
+        return 0
+    
+    elif args.command == "load-test":
+        import json
+        from workflows.load_test import run_load_test
+        
+        fake_config = None
+        if args.fake_config:
+            with open(args.fake_config, 'r', encoding='utf-8') as f:
+                fake_config = json.load(f)
+        report = run_load_test(
+            plans=args.plans,
+            concurrency=args.concurrency,
+            server_url=args.server,
+            fake_config=fake_config,
+            report_path=args.report,
+            reuse_stage_outputs=args.reuse,
+            deadline_seconds=args.deadline,
+            execution_profile=args.profile
+        )
+        return 0 if report["failed"] == 0 else 1
+    
     return 0
 
 
@@ -1,13 +1,14 @@
 """Advanced Graph-Aware RAG with multiple retrieval modes and dual embeddings."""
 
 import logging
-import re
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Optional, Literal, Tuple
+import numpy as np
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from neo4j import GraphDatabase
-from config.settings import get_settings
+from config.settings import get_settings, current_execution_profile
 from utils.ollama_embeddings import OllamaEmbeddingsClient
+from utils.tracing import trace_span
+from rag_tools.graph_store import get_graph_store
 
 logger = logging.getLogger(__name__)
 
@@ -39,11 +40,8 @@ class GraphAwareRAG:
         self.summary_collection_name = summary_collection
         self.content_collection_name = content_collection
         
-        # Initialize Neo4j connection
-        self.neo4j_driver = GraphDatabase.driver(
-            self.settings.neo4j_uri,
-            auth=(self.settings.neo4j_user, self.settings.neo4j_password)
-        )
+        # Hierarchy and summary-embedding reads go through the configured graph backend
+        self.graph_store = get_graph_store()
         
         # Initialize ChromaDB client with telemetry disabled
         self.chroma_client = chromadb.PersistentClient(
@@ -56,11 +54,16 @@ class GraphAwareRAG:
         # Initialize embedding client
         self.embedding_client = OllamaEmbeddingsClient()
         
+        # In-memory summary embedding index (loaded lazily on first summary query)
+        self._summary_index: Optional[Dict[str, Any]] = None
+        # Heading adjacency for graph-expanded retrieval (loaded lazily with the index)
+        self._hierarchy: Optional[Dict[str, List[str]]] = None
+        
         logger.info(f"Initialized GraphAwareRAG with collections: summary='{summary_collection}', content='{content_collection}'")
     
     def close(self):
-        """Close database connections."""
-        self.neo4j_driver.close()
+        """Release resources (the shared graph store and Neo4j driver stay open for the process)."""
+        pass
     
     def create_collection(self):
         """Create ChromaDB collections (already handled in __init__)."""
@@ -97,7 +100,8 @@ class GraphAwareRAG:
         query: str,
         mode: RetrievalMode = "automatic",
         top_k: int = 5,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        document_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant documents using specified mode.
@@ -107,6 +111,8 @@ class GraphAwareRAG:
             mode: Retrieval mode (node_name, summary, content, automatic)
             top_k: Number of results
             filter_metadata: Optional metadata filters
+            document_names: Optional list of document names to restrict the search to
+                (None = all documents). Applied inside each retriever, not afterwards.
             
         Returns:
             List of retrieved documents with metadata
@@ -120,14 +126,14 @@ class GraphAwareRAG:
         
         # Route to appropriate retrieval method
         if mode == "node_name":
-            return self._retrieve_by_node_name(query, top_k)
+            return self._retrieve_by_node_name(query, top_k, document_names)
         elif mode == "summary":
-            return self._retrieve_by_summary(query, top_k, filter_metadata)
+            return self._retrieve_by_summary(query, top_k, filter_metadata, document_names)
         elif mode == "content":
-            return self._retrieve_by_content(query, top_k, filter_metadata)
+            return self._retrieve_by_content(query, top_k, filter_metadata, document_names)
         else:
             logger.warning(f"Unknown mode: {mode}, falling back to content")
-            return self._retrieve_by_content(query, top_k, filter_metadata)
+            return self._retrieve_by_content(query, top_k, filter_metadata, document_names)
     
     def _select_mode(self, query: str) -> RetrievalMode:
         """
@@ -163,7 +169,8 @@ class GraphAwareRAG:
     def _retrieve_by_node_name(
         self,
         query: str,
-        top_k: int
+        top_k: int,
+        document_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve by matching node titles/names in Neo4j graph.
@@ -171,6 +178,8 @@ class GraphAwareRAG:
         Args:
             query: Search query
             top_k: Number of results
+            document_names: Optional list of document names (filtered in the WHERE clause
+                so LIMIT applies to matching documents only)
             
         Returns:
             List of matching nodes
@@ -178,47 +187,152 @@ class GraphAwareRAG:
         # Extract keywords from query
         keywords = self._extract_keywords(query)
         
-        # Build regex pattern for case-insensitive matching
-        keyword_pattern = '|'.join([f"(?i).*{re.escape(kw)}.*" for kw in keywords])
-        
-        cypher_query = """
-        MATCH (h:Heading)
-        WHERE h.title =~ $pattern OR h.summary =~ $pattern
-        RETURN h.id as node_id, h.title as title, h.level as level,
-               h.start_line as start_line, h.end_line as end_line,
-               h.summary as summary
-        LIMIT $top_k
-        """
-        
-        with self.neo4j_driver.session() as session:
-            result = session.run(cypher_query, pattern=keyword_pattern, top_k=top_k)
-            nodes = []
-            
-            for record in result:
-                nodes.append({
-                    'node_id': record['node_id'],
+        result = self.graph_store.search_headings(
+            keywords,
+            top_k=top_k,
+            document_names=document_names
+        )
+        nodes = []
+        
+        for record in result:
+            nodes.append({
+                'node_id': record['id'],
+                'title': record['title'],
+                'level': record['level'],
+                'start_line': record['start_line'],
+                'end_line': record['end_line'],
+                'text': record['summary'] or record['title'],
+                'score': 1.0,  # Graph search doesn't provide similarity scores
+                'retrieval_mode': 'node_name',
+                'metadata': {
+                    'node_id': record['id'],
                     'title': record['title'],
-                    'level': record['level'],
-                    'start_line': record['start_line'],
-                    'end_line': record['end_line'],
-                    'text': record['summary'] or record['title'],
-                    'score': 1.0,  # Graph search doesn't provide similarity scores
-                    'retrieval_mode': 'node_name',
-                    'metadata': {
-                        'node_id': record['node_id'],
-                        'title': record['title'],
-                        'line_range': f"{record['start_line']}-{record['end_line']}"
-                    }
-                })
+                    'line_range': f"{record['start_line']}-{record['end_line']}",
+                    'source': record['doc_name'] or ''
+                }
+            })
         
         logger.info(f"Node name retrieval found {len(nodes)} results")
         return nodes
     
+    def _load_summary_index(self) -> Dict[str, Any]:
+        """
+        Load all summary embeddings from the graph backend into an in-memory matrix.
+        
+        The matrix is L2-normalised so similarity is a single matrix-vector product,
+        and a parallel array of document names allows pre-filtering with a boolean mask.
+        
+        Returns:
+            Index dictionary with 'matrix', 'doc_names', 'nodes' and 'positions'
+        """
+        if self._summary_index is not None:
+            return self._summary_index
+        
+        records, vectors = self.graph_store.get_summary_embeddings()
+        nodes = [
+            {
+                'node_id': record['id'],
+                'title': record['title'],
+                'level': record['level'],
+                'start_line': record['start_line'],
+                'end_line': record['end_line'],
+                'summary': record['summary'],
+                'doc_name': record['doc_name'] or ''
+            }
+            for record in records
+        ]
+        
+        if len(nodes):
+            matrix = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        
+        self._summary_index = {
+            'matrix': matrix,
+            'doc_names': np.asarray([n['doc_name'] for n in nodes], dtype=object),
+            'nodes': nodes,
+            'positions': {n['node_id']: i for i, n in enumerate(nodes)}
+        }
+        logger.info(f"Loaded summary index with {len(nodes)} embeddings")
+        return self._summary_index
+    
+    def refresh_summary_index(self):
+        """Drop the in-memory summary index so it is reloaded on next use (e.g. after ingestion)."""
+        self._summary_index = None
+        self._hierarchy = None
+    
+    def _load_hierarchy(self) -> Dict[str, List[str]]:
+        """Load the heading tree from the graph backend as undirected adjacency (parent and children)."""
+        if self._hierarchy is None:
+            neighbors: Dict[str, List[str]] = {}
+            for child_id, parent_id in self.graph_store.get_parent_map().items():
+                neighbors.setdefault(child_id, []).append(parent_id)
+                neighbors.setdefault(parent_id, []).append(child_id)
+            self._hierarchy = neighbors
+        return self._hierarchy
+    
+    def _graph_expansion(
+        self,
+        query_embedding: List[float],
+        min_hops: int,
+        max_hops: int
+    ) -> List[Tuple[Dict[str, Any], float, List[Tuple[Dict[str, Any], float]]]]:
+        """
+        Score every heading with a summary embedding and collect its related headings.
+        
+        Related headings are min_hops..max_hops HAS_SUBSECTION hops away in either
+        direction and have a summary embedding themselves (min_hops=0 includes the
+        heading itself).
+        
+        Args:
+            query_embedding: Query vector
+            min_hops: Closest related distance
+            max_hops: Farthest related distance
+            
+        Returns:
+            List of (index node, query similarity, [(related index node, query similarity), ...])
+        """
+        index = self._load_summary_index()
+        matrix = index['matrix']
+        if matrix.shape[0] == 0 or not query_embedding:
+            return []
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vec)
+        if query_norm == 0:
+            return []
+        scores = matrix @ (query_vec / query_norm)
+        
+        neighbors = self._load_hierarchy()
+        positions = index['positions']
+        expanded = []
+        for position, node in enumerate(index['nodes']):
+            hops = {node['node_id']: 0}
+            frontier = [node['node_id']]
+            for hop in range(1, max_hops + 1):
+                next_frontier = []
+                for current in frontier:
+                    for other in neighbors.get(current, ()):
+                        if other not in hops:
+                            hops[other] = hop
+                            next_frontier.append(other)
+                frontier = next_frontier
+            related = [
+                (index['nodes'][positions[other]], float(scores[positions[other]]))
+                for other, distance in hops.items()
+                if distance >= min_hops and other in positions
+            ]
+            expanded.append((node, float(scores[position]), related))
+        return expanded
+    
     def _retrieve_by_summary(
         self,
         query: str,
         top_k: int,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        document_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve using summary embeddings stored in Neo4j (lighter, faster).
@@ -227,6 +341,7 @@ class GraphAwareRAG:
             query: Search query
             top_k: Number of results
             filter_metadata: Optional metadata filters (currently not used with Neo4j)
+            document_names: Optional list of document names used as a pre-filter mask
             
         Returns:
             List of results from summary embeddings
@@ -234,47 +349,55 @@ class GraphAwareRAG:
         query_embedding = self.embedding_client.embed(query)
         
         try:
-            # Query Neo4j for nodes with embeddings and compute cosine similarity
-            cypher_query = """
-            MATCH (h:Heading)
-            WHERE h.summary_embedding IS NOT NULL
-            RETURN h.id as node_id, h.title as title, h.level as level,
-                   h.start_line as start_line, h.end_line as end_line,
-                   h.summary as summary, h.summary_embedding as embedding
-            """
-            
-            with self.neo4j_driver.session() as session:
-                result = session.run(cypher_query)
-                nodes_with_scores = []
-                
-                for record in result:
-                    # Compute cosine similarity
-                    stored_embedding = record['embedding']
-                    similarity = self.embedding_client.cosine_similarity(
-                        query_embedding,
-                        stored_embedding
-                    )
-                    
-                    nodes_with_scores.append({
-                        'node_id': record['node_id'],
-                        'title': record['title'],
-                        'level': record['level'],
-                        'start_line': record['start_line'],
-                        'end_line': record['end_line'],
-                        'text': record['summary'] or record['title'],
-                        'score': similarity,
-                        'retrieval_mode': 'summary',
-                        'metadata': {
-                            'node_id': record['node_id'],
-                            'title': record['title'],
-                            'line_range': f"{record['start_line']}-{record['end_line']}",
-                            'summary': record['summary']
-                        }
-                    })
-                
-                # Sort by similarity score and return top_k
-                nodes_with_scores.sort(key=lambda x: x['score'], reverse=True)
-                formatted_results = nodes_with_scores[:top_k]
+            index = self._load_summary_index()
+            matrix = index['matrix']
+            if matrix.shape[0] == 0 or not query_embedding:
+                logger.info("Summary retrieval found 0 results from Neo4j embeddings")
+                return []
+            
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            if query_vec.shape[0] != matrix.shape[1]:
+                logger.error(f"Query embedding dimension {query_vec.shape[0]} does not match index dimension {matrix.shape[1]}")
+                return []
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                return []
+            query_vec = query_vec / query_norm
+            
+            # Pre-filter candidate rows before scoring
+            candidates = np.arange(matrix.shape[0])
+            if document_names is not None:
+                mask = np.isin(index['doc_names'], list(document_names))
+                candidates = candidates[mask]
+                if candidates.size == 0:
+                    logger.info("Summary retrieval: no embeddings in the requested documents")
+                    return []
+            
+            scores = matrix[candidates] @ query_vec
+            k = min(top_k, candidates.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            
+            formatted_results = []
+            for pos in top:
+                node = index['nodes'][candidates[pos]]
+                formatted_results.append({
+                    'node_id': node['node_id'],
+                    'title': node['title'],
+                    'level': node['level'],
+                    'start_line': node['start_line'],
+                    'end_line': node['end_line'],
+                    'text': node['summary'] or node['title'],
+                    'score': float(scores[pos]),
+                    'retrieval_mode': 'summary',
+                    'metadata': {
+                        'node_id': node['node_id'],
+                        'title': node['title'],
+                        'line_range': f"{node['start_line']}-{node['end_line']}",
+                        'summary': node['summary'],
+                        'source': node['doc_name']
+                    }
+                })
             
             logger.info(f"Summary retrieval found {len(formatted_results)} results from Neo4j embeddings")
             return formatted_results
@@ -287,7 +410,8 @@ class GraphAwareRAG:
         self,
         query: str,
         top_k: int,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        document_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve using content embeddings (comprehensive).
@@ -296,18 +420,24 @@ class GraphAwareRAG:
             query: Search query
             top_k: Number of results
             filter_metadata: Optional metadata filters
+            document_names: Optional list of document names (ChromaDB 'source' metadata)
             
         Returns:
             List of results from content embeddings
         """
+        if document_names is not None and not document_names:
+            return []
+        
         query_embedding = self.embedding_client.embed(query)
         
         try:
-            results = self.content_collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k,
-                where=filter_metadata
-            )
+            with trace_span("chroma", self.content_collection.name, top_k=top_k) as span:
+                results = self.content_collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=top_k,
+                    where=self._build_filter(filter_metadata, document_names)
+                )
+                span.set(result_count=len(results['ids'][0]) if results and results.get('ids') else 0)
             
             formatted_results = []
             if results and results['ids'] and len(results['ids'][0]) > 0:
@@ -330,9 +460,20 @@ class GraphAwareRAG:
             logger.error(f"Error in content retrieval: {e}")
             return []
     
-    def _build_filter(self, filter_metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """Build ChromaDB where filter from metadata dictionary."""
-        return filter_metadata # ChromaDB uses the dict directly
+    def _build_filter(
+        self,
+        filter_metadata: Optional[Dict[str, Any]],
+        document_names: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Build ChromaDB where filter from metadata dictionary and document names."""
+        if document_names is None:
+            return filter_metadata or None # ChromaDB uses the dict directly
+        
+        names = list(document_names)
+        source_filter = {"source": names[0]} if len(names) == 1 else {"source": {"$in": names}}
+        if not filter_metadata:
+            return source_filter
+        return {"$and": [filter_metadata, source_filter]}
     
     def _extract_keywords(self, query: str) -> List[str]:
         """Extract meaningful keywords from query."""
@@ -369,44 +510,24 @@ class GraphAwareRAG:
         """
         context = {'node': None, 'parent': None, 'children': []}
         
-        with self.neo4j_driver.session() as session:
-            # Get node itself
-            node_query = """
-            MATCH (h:Heading {id: $node_id})
-            RETURN h.id as id, h.title as title, h.level as level,
-                   h.start_line as start_line, h.end_line as end_line,
-                   h.summary as summary
-            """
-            result = session.run(node_query, node_id=node_id)
-            record = result.single()
-            if record:
-                context['node'] = dict(record)
-            
-            # Get parent if requested (can be a Heading or a Document)
-            if include_parent:
-                parent_query = """
-                MATCH (parent:Heading)-[:HAS_SUBSECTION]->(child:Heading {id: $node_id})
-                RETURN parent.id as id, parent.title as title,
-                       parent.level as level, parent.summary as summary
-                UNION
-                MATCH (parent:Document)-[:HAS_SUBSECTION]->(child:Heading {id: $node_id})
-                RETURN parent.name as id, parent.name as title,
-                       0 as level, "" as summary
-                """
-                result = session.run(parent_query, node_id=node_id)
-                record = result.single()
-                if record:
-                    context['parent'] = dict(record)
-            
-            # Get children if requested
-            if include_children:
-                children_query = """
-                MATCH (parent:Heading {id: $node_id})-[:HAS_SUBSECTION]->(child)
-                RETURN child.id as id, child.title as title,
-                       child.level as level, child.summary as summary
-                """
-                result = session.run(children_query, node_id=node_id)
-                context['children'] = [dict(record) for record in result]
+        node = self.graph_store.get_node_by_id(node_id)
+        if node:
+            context['node'] = {key: node[key] for key in ('id', 'title', 'level', 'start_line', 'end_line', 'summary')}
+        
+        # Get parent if requested (a Heading, or the Document of a top-level heading)
+        if include_parent and node:
+            parents = self.graph_store.navigate_upward(node_id, 1)
+            if parents:
+                context['parent'] = {key: parents[0][key] for key in ('id', 'title', 'level', 'summary')}
+            elif node.get('doc_name'):
+                context['parent'] = {'id': node['doc_name'], 'title': node['doc_name'], 'level': 0, 'summary': ""}
+        
+        # Get children if requested
+        if include_children:
+            context['children'] = [
+                {key: child[key] for key in ('id', 'title', 'level', 'summary')}
+                for child in self.graph_store.get_children(node_id)
+            ]
         
         return context
     
@@ -417,7 +538,8 @@ class GraphAwareRAG:
         use_rrf: bool = True,
         use_mmr: bool = True,
         graph_weight: float = 0.3,
-        vector_weight: float = 0.7
+        vector_weight: float = 0.7,
+        document_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Advanced hybrid retrieval with RRF and MMR.
@@ -438,6 +560,7 @@ class GraphAwareRAG:
             use_mmr: Apply MMR for diversity (recommended: True for varied results)
             graph_weight: Weight for graph-based keyword results (legacy mode)
             vector_weight: Weight for embedding similarity results (legacy mode)
+            document_names: Optional list of document names pushed down to both retrievers
             
         Returns:
             Reranked combined results with optional diversity
@@ -445,8 +568,8 @@ class GraphAwareRAG:
         logger.info(f"Hybrid retrieval (RRF={use_rrf}, MMR={use_mmr})")
         
         # Get results from multiple strategies
-        semantic_results = self._retrieve_by_summary(query, top_k=top_k * 2)
-        keyword_results = self._retrieve_by_node_name(query, top_k=top_k * 2)
+        semantic_results = self._retrieve_by_summary(query, top_k=top_k * 2, document_names=document_names)
+        keyword_results = self._retrieve_by_node_name(query, top_k=top_k * 2, document_names=document_names)
         
         # Apply RRF fusion (recommended)
         if use_rrf:
@@ -530,7 +653,7 @@ class GraphAwareRAG:
         self,
         query: str,
         top_k: int = 5,
-        expansion_depth: int = 1
+        expansion_depth: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Advanced hybrid retrieval with graph expansion.
@@ -543,83 +666,50 @@ class GraphAwareRAG:
         Args:
             query: Search query
             top_k: Number of results
-            expansion_depth: How many hops to expand in the graph (1-2 recommended)
+            expansion_depth: How many hops to expand in the graph (1-2 recommended;
+                default: the run's execution profile)
             
         Returns:
             Expanded and reranked results
         """
+        if expansion_depth is None:
+            expansion_depth = current_execution_profile().rag_graph_expansion_depth
         query_embedding = self.embedding_client.embed(query)
         
-        # Cypher query that retrieves nodes and their relationships
-        cypher_query = """
-        MATCH (h:Heading)
-        WHERE h.summary_embedding IS NOT NULL
-        WITH h, h.summary_embedding as embedding
-        OPTIONAL MATCH (h)-[:HAS_SUBSECTION*0..{depth}]-(related:Heading)
-        WHERE related.summary_embedding IS NOT NULL
-        RETURN DISTINCT h.id as node_id, h.title as title, h.level as level,
-               h.start_line as start_line, h.end_line as end_line,
-               h.summary as summary, h.summary_embedding as embedding,
-               collect(DISTINCT {{id: related.id, title: related.title, 
-                       embedding: related.summary_embedding}}) as related_nodes
-        """.replace('{depth}', str(expansion_depth))
-        
         try:
-            with self.neo4j_driver.session() as session:
-                result = session.run(cypher_query)
-                nodes_with_scores = []
+            nodes_with_scores = []
+            
+            # Each heading with its related headings up to expansion_depth hops away (itself included)
+            for node, primary_similarity, related_nodes in self._graph_expansion(query_embedding, 0, expansion_depth):
+                # Related nodes similarity (boost factor): max similarity from related nodes
+                related_boost = max((score for _, score in related_nodes), default=0.0) * 0.3
                 
-                for record in result:
-                    # Compute primary similarity
-                    stored_embedding = record['embedding']
-                    primary_similarity = self.embedding_client.cosine_similarity(
-                        query_embedding,
-                        stored_embedding
-                    )
-                    
-                    # Compute related nodes similarity (boost factor)
-                    related_boost = 0.0
-                    related_nodes = record.get('related_nodes', [])
-                    if related_nodes:
-                        related_similarities = []
-                        for related in related_nodes:
-                            if related.get('embedding'):
-                                rel_sim = self.embedding_client.cosine_similarity(
-                                    query_embedding,
-                                    related['embedding']
-                                )
-                                related_similarities.append(rel_sim)
-                        
-                        if related_similarities:
-                            # Use max similarity from related nodes as boost
-                            related_boost = max(related_similarities) * 0.3
-                    
-                    # Combined score: primary similarity + related boost
-                    combined_score = primary_similarity + related_boost
-                    
-                    nodes_with_scores.append({
-                        'node_id': record['node_id'],
-                        'title': record['title'],
-                        'level': record['level'],
-                        'start_line': record['start_line'],
-                        'end_line': record['end_line'],
-                        'text': record['summary'] or record['title'],
-                        'score': combined_score,
-                        'primary_score': primary_similarity,
-                        'related_boost': related_boost,
-                        'retrieval_mode': 'hybrid_expanded',
-                        'metadata': {
-                            'node_id': record['node_id'],
-                            'title': record['title'],
-                            'line_range': f"{record['start_line']}-{record['end_line']}",
-                            'summary': record['summary'],
-                            'related_count': len([r for r in related_nodes if r.get('id')])
-                        }
-                    })
+                # Combined score: primary similarity + related boost
+                combined_score = primary_similarity + related_boost
                 
-                # Sort by combined score and return top_k
-                nodes_with_scores.sort(key=lambda x: x['score'], reverse=True)
-                final_results = nodes_with_scores[:top_k]
+                nodes_with_scores.append({
+                    'node_id': node['node_id'],
+                    'title': node['title'],
+                    'level': node['level'],
+                    'start_line': node['start_line'],
+                    'end_line': node['end_line'],
+                    'text': node['summary'] or node['title'],
+                    'score': combined_score,
+                    'primary_score': primary_similarity,
+                    'related_boost': related_boost,
+                    'retrieval_mode': 'hybrid_expanded',
+                    'metadata': {
+                        'node_id': node['node_id'],
+                        'title': node['title'],
+                        'line_range': f"{node['start_line']}-{node['end_line']}",
+                        'summary': node['summary'],
+                        'related_count': len(related_nodes)
+                    }
+                })
+            
+            # Sort by combined score and return top_k
+            nodes_with_scores.sort(key=lambda x: x['score'], reverse=True)
+            final_results = nodes_with_scores[:top_k]
             
             logger.info(f"Hybrid expanded retrieval found {len(final_results)} results")
             return final_results
@@ -767,7 +857,7 @@ class GraphAwareRAG:
         
         Tries multiple strategies:
         1. Direct 'embedding' field
-        2. Fetch from Neo4j by node_id
+        2. Fetch from the graph store by node_id
         3. Generate from text content
         
         Args:
@@ -780,21 +870,20 @@ class GraphAwareRAG:
         if 'embedding' in result:
             return result['embedding']
         
-        # Strategy 2: Fetch from Neo4j
+        # Strategy 2: Look up in the in-memory summary index, then the graph store
         node_id = result.get('node_id') or result.get('id')
+        if node_id and self._summary_index is not None:
+            position = self._summary_index['positions'].get(node_id)
+            if position is not None:
+                return self._summary_index['matrix'][position].tolist()
+        
         if node_id:
             try:
-                with self.neo4j_driver.session() as session:
-                    neo4j_result = session.run("""
-                        MATCH (h:Heading {id: $node_id})
-                        WHERE h.summary_embedding IS NOT NULL
-                        RETURN h.summary_embedding as embedding
-                    """, node_id=node_id)
-                    record = neo4j_result.single()
-                    if record and record['embedding']:
-                        return record['embedding']
+                _, vectors = self.graph_store.get_summary_embeddings([node_id])
+                if len(vectors):
+                    return vectors[0].tolist()
             except Exception as e:
-                logger.debug(f"Could not fetch embedding from Neo4j: {e}")
+                logger.debug(f"Could not fetch embedding from graph store: {e}")
         
         # Strategy 3: Generate from summary/text
         text = result.get('summary') or result.get('text') or result.get('content')
@@ -810,7 +899,7 @@ class GraphAwareRAG:
         self,
         query: str,
         top_k: int = 5,
-        expansion_depth: int = 1,
+        expansion_depth: Optional[int] = None,
         expansion_boost: float = 0.3
     ) -> List[Dict[str, Any]]:
         """
@@ -822,72 +911,46 @@ class GraphAwareRAG:
         Args:
             query: Search query
             top_k: Number of final results
-            expansion_depth: How many relationship hops to expand (1-2 recommended)
+            expansion_depth: How many relationship hops to expand (1-2 recommended;
+                default: the run's execution profile)
             expansion_boost: Score boost multiplier from related node matches (0.0-1.0)
         
         Returns:
             Results with graph-boosted scores
         """
+        if expansion_depth is None:
+            expansion_depth = current_execution_profile().rag_graph_expansion_depth
         logger.info(f"Graph-expanded retrieval with depth={expansion_depth}, boost={expansion_boost}")
         
         query_embedding = self.embedding_client.embed(query)
         
-        # Cypher query with graph expansion
-        cypher = f"""
-        MATCH (h:Heading)
-        WHERE h.summary_embedding IS NOT NULL
-        OPTIONAL MATCH (h)-[:HAS_SUBSECTION*1..{expansion_depth}]-(related:Heading)
-        WHERE related.summary_embedding IS NOT NULL
-        RETURN h.id as id, h.title as title, h.summary as summary, h.level as level,
-               h.start_line as start_line, h.end_line as end_line,
-               h.summary_embedding as embedding,
-               collect({{id: related.id, title: related.title, embedding: related.summary_embedding}}) as related
-        """
-        
         results = []
         try:
-            with self.neo4j_driver.session() as session:
-                for record in session.run(cypher):
-                    # Primary similarity
-                    primary_score = self._cosine_similarity(
-                        query_embedding,
-                        record['embedding']
-                    )
-                    
-                    # Boost from related nodes
-                    boost = 0.0
-                    related_matches = []
-                    if record['related']:
-                        related_scores = []
-                        for r in record['related']:
-                            if r and r.get('embedding'):
-                                rel_score = self._cosine_similarity(query_embedding, r['embedding'])
-                                related_scores.append(rel_score)
-                                if rel_score > 0.5:  # Track high-scoring related nodes
-                                    related_matches.append({
-                                        'id': r.get('id'),
-                                        'title': r.get('title'),
-                                        'score': rel_score
-                                    })
-                        
-                        if related_scores:
-                            boost = max(related_scores) * expansion_boost
-                    
-                    final_score = primary_score + boost
-                    
-                    results.append({
-                        'node_id': record['id'],
-                        'title': record['title'],
-                        'summary': record['summary'],
-                        'level': record['level'],
-                        'start_line': record['start_line'],
-                        'end_line': record['end_line'],
-                        'score': final_score,
-                        'primary_score': primary_score,
-                        'graph_boost': boost,
-                        'related_matches': related_matches,
-                        'retrieval_mode': 'graph_expanded'
-                    })
+            # Each heading with its related headings 1..expansion_depth hops away
+            for node, primary_score, related in self._graph_expansion(query_embedding, 1, expansion_depth):
+                # Boost from related nodes
+                boost = max((score for _, score in related), default=0.0) * expansion_boost
+                related_matches = [
+                    {'id': other['node_id'], 'title': other['title'], 'score': score}
+                    for other, score in related
+                    if score > 0.5  # Track high-scoring related nodes
+                ]
+                
+                final_score = primary_score + boost
+                
+                results.append({
+                    'node_id': node['node_id'],
+                    'title': node['title'],
+                    'summary': node['summary'],
+                    'level': node['level'],
+                    'start_line': node['start_line'],
+                    'end_line': node['end_line'],
+                    'score': final_score,
+                    'primary_score': primary_score,
+                    'graph_boost': boost,
+                    'related_matches': related_matches,
+                    'retrieval_mode': 'graph_expanded'
+                })
             
             # Sort and return top_k
             results.sort(key=lambda x: x['score'], reverse=True)
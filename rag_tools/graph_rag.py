@@ -1,18 +1,24 @@
-"""Graph-based RAG using Neo4j for structural document retrieval."""
+"""Graph-based RAG over the document hierarchy for structural retrieval."""
 
 import logging
-import re
 from typing import List, Dict, Any, Optional
-from neo4j import GraphDatabase
+import numpy as np
 from config.settings import get_settings
+from utils.neo4j_client import get_neo4j_driver, execute_read
 from utils.document_parser import DocumentParser
+from rag_tools.graph_store import get_graph_store
 from utils.ollama_embeddings import OllamaEmbeddingsClient
 
 logger = logging.getLogger(__name__)
 
 
 class GraphRAG:
-    """Structural graph-based RAG using Neo4j with semantic search support."""
+    """
+    Structural graph-based RAG with semantic search support.
+    
+    Hierarchy lookups go through the configured GraphStore (Neo4j or the
+    embedded backend); the remaining ad-hoc Cypher helpers require Neo4j.
+    """
     
     def __init__(self, collection_name: str = "rules", markdown_logger=None):
         """
@@ -25,22 +31,23 @@ class GraphRAG:
         self.settings = get_settings()
         self.collection_name = collection_name
         self.markdown_logger = markdown_logger
-        self.driver = GraphDatabase.driver(
-            self.settings.neo4j_uri,
-            auth=(self.settings.neo4j_user, self.settings.neo4j_password)
-        )
+        # Borrow the process-wide driver (shared connection pool)
+        self.driver = get_neo4j_driver()
+        # Hierarchy reads go through the configured graph backend
+        self.store = get_graph_store()
         # Initialize embedding client for semantic search
         self.embedding_client = OllamaEmbeddingsClient()
         logger.info(f"Initialized GraphRAG for collection: {collection_name}")
     
     def close(self):
-        """Close Neo4j connection."""
-        self.driver.close()
+        """Release Neo4j connection (the shared driver is closed at process exit)."""
+        pass
     
     def traverse_by_keywords(
         self,
         keywords: List[str],
-        top_k: int = 5
+        top_k: int = 5,
+        document_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Find nodes by keyword matching in title or summary.
@@ -48,24 +55,14 @@ class GraphRAG:
         Args:
             keywords: List of keywords to search for
             top_k: Maximum number of results
+            document_names: Optional list of document names to restrict matches to
             
         Returns:
             List of matching nodes with metadata
         """
-        # Build keyword search pattern (case-insensitive)
-        keyword_pattern = '|'.join([f"(?i).*{kw}.*" for kw in keywords])
-        
-        query = """
-        MATCH (h:Heading)
-        WHERE h.title =~ $pattern OR h.summary =~ $pattern
-        RETURN h.id as id, h.title as title, h.level as level, 
-               h.line as line, h.summary as summary
-        LIMIT $top_k
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, pattern=keyword_pattern, top_k=top_k)
-            nodes = [dict(record) for record in result]
+        nodes = self.store.search_headings(keywords, top_k=top_k, document_names=document_names)
+        for node in nodes:
+            node['line'] = node.get('start_line')
         
         logger.info(f"Found {len(nodes)} nodes matching keywords: {keywords}")
         return nodes
@@ -91,9 +88,7 @@ class GraphRAG:
                sub.line as line, sub.summary as summary
         """
         
-        with self.driver.session() as session:
-            result = session.run(query, node_id=node_id)
-            subsections = [dict(record) for record in result]
+        subsections = execute_read(query, node_id=node_id)
         
         logger.debug(f"Found {len(subsections)} subsections for node {node_id}")
         return subsections
@@ -114,29 +109,22 @@ class GraphRAG:
             Content text
         """
         # Get node metadata with start_line and end_line
-        query = """
-        MATCH (h:Heading {id: $node_id})
-        RETURN h.start_line as start_line, h.end_line as end_line
-        """
+        record = self.store.get_node_by_id(node_id)
         
-        with self.driver.session() as session:
-            result = session.run(query, node_id=node_id)
-            record = result.single()
-            
-            if not record:
-                logger.warning(f"Node {node_id} not found")
-                return ""
-            
-            start_line = record['start_line']
-            end_line = record['end_line']
-            
-            if start_line is None or end_line is None:
-                logger.warning(f"Missing line info for node {node_id}")
-                return ""
-            
-            # Retrieve content using line range
-            content = DocumentParser.get_content_by_lines(file_path, start_line, end_line)
-            return content
+        if not record:
+            logger.warning(f"Node {node_id} not found")
+            return ""
+        
+        start_line = record['start_line']
+        end_line = record['end_line']
+        
+        if start_line is None or end_line is None:
+            logger.warning(f"Missing line info for node {node_id}")
+            return ""
+        
+        # Retrieve content using line range
+        content = DocumentParser.get_content_by_lines(file_path, start_line, end_line)
+        return content
     
     def retrieve_content_by_lines(
         self,
@@ -160,7 +148,8 @@ class GraphRAG:
     def hybrid_search(
         self,
         query: str,
-        top_k: int = 5
+        top_k: int = 5,
+        document_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Combine keyword search with graph traversal.
@@ -168,6 +157,7 @@ class GraphRAG:
         Args:
             query: Search query
             top_k: Number of results
+            document_names: Optional list of document names to restrict matches to
             
         Returns:
             List of results with citations
@@ -189,7 +179,7 @@ class GraphRAG:
         keywords = keywords[:10]
         
         # Find matching nodes
-        nodes = self.traverse_by_keywords(keywords, top_k=top_k)
+        nodes = self.traverse_by_keywords(keywords, top_k=top_k, document_names=document_names)
         
         results = []
         for node in nodes:
@@ -199,7 +189,7 @@ class GraphRAG:
                 'level': node['level'],
                 'line': node['line'],
                 'summary': node.get('summary', ''),
-                'source': self.collection_name
+                'source': node.get('doc_name') or self.collection_name
             }
             results.append(result)
         
@@ -225,10 +215,9 @@ class GraphRAG:
         LIMIT 1
         """
         
-        with self.driver.session() as session:
-            result = session.run(query, node_id=node_id)
-            record = result.single()
-            return dict(record) if record else None
+        result = execute_read(query, node_id=node_id)
+        record = result[0] if result else None
+        return dict(record) if record else None
     
     def get_document_root(self, doc_name: str) -> Optional[Dict[str, Any]]:
         """Get root document node."""
@@ -237,10 +226,9 @@ class GraphRAG:
         RETURN doc.name as name, doc.type as type
         """
         
-        with self.driver.session() as session:
-            result = session.run(query, doc_name=doc_name)
-            record = result.single()
-            return dict(record) if record else None
+        result = execute_read(query, doc_name=doc_name)
+        record = result[0] if result else None
+        return dict(record) if record else None
     
     # ========================================================================
     # NEW METHODS FOR MULTI-PHASE ANALYZER SYSTEM
@@ -269,9 +257,7 @@ class GraphRAG:
         RETURN doc.name as name, doc.source as source
         """
         
-        with self.driver.session() as session:
-            result = session.run(query, pattern=topic_pattern)
-            documents = [dict(record) for record in result]
+        documents = execute_read(query, pattern=topic_pattern)
         
         logger.info(f"Found {len(documents)} documents matching topics: {topics}")
         return documents
@@ -288,17 +274,7 @@ class GraphRAG:
         Returns:
             List of direct child heading nodes (TOC entries)
         """
-        query = """
-        MATCH (doc:Document {name: $doc_name})-[:HAS_SUBSECTION]->(h:Heading)
-        RETURN h.id as id, h.title as title, h.level as level,
-               h.start_line as start_line, h.end_line as end_line,
-               h.summary as summary
-        ORDER BY h.start_line
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, doc_name=document_name)
-            nodes = [dict(record) for record in result]
+        nodes = self.store.get_document_toc(document_name)
         
         logger.debug(f"Found {len(nodes)} TOC entries for document {document_name}")
         return nodes
@@ -317,38 +293,28 @@ class GraphRAG:
         Returns:
             List of matching heading nodes with metadata
         """
-        # Create a pattern for case-insensitive partial matching
-        # Escape special regex characters and allow partial matches
-        pattern = f"(?i).*{re.escape(section_title)}.*"
-        
-        query = """
-        MATCH (doc:Document {name: $doc_name})-[:HAS_SUBSECTION*]->(h:Heading)
-        WHERE h.title =~ $pattern
-        RETURN h.id as id, h.title as title, h.level as level,
-               h.start_line as start_line, h.end_line as end_line,
-               h.summary as summary, doc.source as source, doc.name as document_name
-        ORDER BY h.start_line
-        LIMIT 10
-        """
-        
         try:
-            with self.driver.session() as session:
-                result = session.run(query, doc_name=document_name, pattern=pattern)
-                nodes = []
-                for record in result:
-                    nodes.append({
-                        'id': record['id'],
-                        'title': record['title'],
-                        'level': record['level'],
-                        'start_line': record['start_line'],
-                        'end_line': record['end_line'],
-                        'summary': record.get('summary', ''),
-                        'source': record.get('source', ''),
-                        'document_name': record.get('document_name', document_name)
-                    })
-                
-                logger.debug(f"Found {len(nodes)} nodes matching '{section_title}' in document '{document_name}'")
-                return nodes
+            result = self.store.search_headings(
+                [section_title],
+                top_k=10,
+                document_names=[document_name],
+                title_only=True
+            )
+            nodes = []
+            for record in result:
+                nodes.append({
+                    'id': record['id'],
+                    'title': record['title'],
+                    'level': record['level'],
+                    'start_line': record['start_line'],
+                    'end_line': record['end_line'],
+                    'summary': record.get('summary') or '',
+                    'source': record.get('source') or '',
+                    'document_name': record.get('doc_name') or document_name
+                })
+            
+            logger.debug(f"Found {len(nodes)} nodes matching '{section_title}' in document '{document_name}'")
+            return nodes
         except Exception as e:
             logger.error(f"Error searching for section '{section_title}' in document '{document_name}': {e}")
             return []
@@ -363,18 +329,7 @@ class GraphRAG:
         Returns:
             List of first-level heading nodes
         """
-        query = """
-        MATCH (doc:Document {name: $doc_name})-[:HAS_SUBSECTION]->(h:Heading)
-        WHERE h.level = 1
-        RETURN h.id as id, h.title as title, h.level as level,
-               h.start_line as start_line, h.end_line as end_line,
-               h.summary as summary
-        ORDER BY h.start_line
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, doc_name=document_name)
-            nodes = [dict(record) for record in result]
+        nodes = self.store.get_introduction_nodes(document_name)
         
         logger.debug(f"Found {len(nodes)} introduction nodes for document {document_name}")
         return nodes
@@ -389,23 +344,25 @@ class GraphRAG:
         Returns:
             Node metadata or None if not found
         """
-        query = """
-        MATCH (doc:Document)-[:HAS_SUBSECTION*]->(h:Heading {id: $node_id})
-        RETURN h.id as id, h.title as title, h.level as level,
-               h.start_line as start_line, h.end_line as end_line,
-               h.summary as summary, doc.source as source
-        LIMIT 1
+        node = self.store.get_node_by_id(node_id)
+        
+        if not node:
+            logger.warning(f"Node {node_id} not found")
+            return None
+        
+        return node
+    
+    def get_nodes_by_ids(self, node_ids: List[str]) -> List[Dict[str, Any]]:
         """
+        Retrieve several nodes in one lookup.
         
-        with self.driver.session() as session:
-            result = session.run(query, node_id=node_id)
-            record = result.single()
-            
-            if not record:
-                logger.warning(f"Node {node_id} not found")
-                return None
+        Args:
+            node_ids: Node identifiers
             
-            return dict(record)
+        Returns:
+            Nodes in input order (missing ids are skipped)
+        """
+        return self.store.get_nodes_by_ids(node_ids)
     
     def navigate_upward(self, node_id: str, levels: int = 1) -> List[Dict[str, Any]]:
         """
@@ -422,21 +379,7 @@ class GraphRAG:
             logger.warning("levels must be >= 1")
             return []
         
-        # Build dynamic query for upward navigation with document source
-        query = f"""
-        MATCH (doc:Document)-[:HAS_SUBSECTION*]->(h:Heading {{id: $node_id}})
-        MATCH path = (ancestor)-[:HAS_SUBSECTION*1..{levels}]->(h)
-        WITH doc, ancestor, length(path) as depth
-        WHERE depth = {levels}
-        RETURN ancestor.id as id, ancestor.title as title, 
-               ancestor.level as level, ancestor.start_line as start_line,
-               ancestor.end_line as end_line, ancestor.summary as summary,
-               doc.source as source
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, node_id=node_id)
-            parents = [dict(record) for record in result]
+        parents = self.store.navigate_upward(node_id, levels)
         
         logger.debug(f"Navigated {levels} levels up from {node_id}, found {len(parents)} parent(s)")
         return parents
@@ -475,18 +418,7 @@ class GraphRAG:
         Returns:
             List of direct child nodes
         """
-        query = """
-        MATCH (doc:Document)-[:HAS_SUBSECTION*]->(parent:Heading {id: $node_id})
-        MATCH (parent)-[:HAS_SUBSECTION]->(child:Heading)
-        RETURN child.id as id, child.title as title, child.level as level,
-               child.start_line as start_line, child.end_line as end_line,
-               child.summary as summary, doc.source as source
-        ORDER BY child.start_line
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, node_id=node_id)
-            children = [dict(record) for record in result]
+        children = self.store.get_children(node_id)
         
         logger.debug(f"Found {len(children)} children for node {node_id}")
         return children
@@ -528,23 +460,9 @@ class GraphRAG:
         Returns:
             Hierarchical path as string
         """
-        query = """
-        MATCH path = (doc:Document)-[:HAS_SUBSECTION*]->(target:Heading {id: $node_id})
-        WITH nodes(path) as pathNodes
-        RETURN [n in pathNodes | COALESCE(n.name, n.title)] as hierarchy
-        LIMIT 1
-        """
-        
         try:
-            with self.driver.session() as session:
-                result = session.run(query, node_id=node_id)
-                record = result.single()
-                
-                if record and record['hierarchy']:
-                    hierarchy = record['hierarchy']
-                    return ' > '.join(hierarchy)
-                else:
-                    return ""
+            hierarchy = self.store.get_section_path(node_id)
+            return ' > '.join(h for h in hierarchy if h) if hierarchy else ""
         except Exception as e:
             logger.error(f"Error getting hierarchy for {node_id}: {e}")
             return ""
@@ -563,16 +481,7 @@ class GraphRAG:
         Returns:
             List of all Document nodes with name and summary
         """
-        query = """
-        MATCH (doc:Document)
-        RETURN doc.name as name, doc.summary as summary, 
-               doc.source as source
-        ORDER BY doc.name
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query)
-            documents = [dict(record) for record in result]
+        documents = self.store.get_all_documents()
         
         logger.info(f"Retrieved {len(documents)} document nodes from knowledge graph")
         return documents
@@ -610,7 +519,7 @@ class GraphRAG:
         """
         Query introduction-level nodes (level=1) using SEMANTIC SEARCH.
         
-        Uses Neo4j-stored summary embeddings for precise retrieval.
+        Uses stored summary embeddings for precise retrieval.
         This method replaces keyword-based regex matching with semantic similarity,
         providing much better precision and recall.
         
@@ -630,29 +539,37 @@ class GraphRAG:
             logger.error(f"Failed to generate query embedding: {e}")
             return []
         
-        # Cypher query to retrieve level 1 nodes with embeddings
-        query = """
-        MATCH (doc:Document)-[:HAS_SUBSECTION]->(h:Heading)
-        WHERE h.level = 1 AND h.summary_embedding IS NOT NULL
-        RETURN h.id as id, h.title as title, h.level as level,
-               h.start_line as start_line, h.end_line as end_line,
-               h.summary as summary, h.summary_embedding as embedding,
-               doc.name as document_name, doc.source as source
-        """
-        
         try:
-            # Fetch all level 1 nodes and compute cosine similarity
-            with self.driver.session() as session:
-                result = session.run(query)
-                nodes = []
-                for record in result:
-                    node = dict(record)
-                    embedding = node.pop('embedding')
-                    
-                    # Compute cosine similarity
-                    similarity = self._cosine_similarity(query_embedding, embedding)
-                    node['score'] = similarity
-                    nodes.append(node)
+            # Score every top-level, level-1 heading against the query in one pass
+            candidates, matrix = self.store.get_summary_embeddings()
+            rows = [
+                i for i, node in enumerate(candidates)
+                if node.get('level') == 1 and not node.get('parent_id')
+            ]
+            if not rows:
+                logger.info("Found 0 introduction nodes with summary embeddings")
+                return []
+            
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            vectors = matrix[rows]
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vec)
+            norms[norms == 0] = 1.0
+            scores = (vectors @ query_vec) / norms
+            
+            nodes = []
+            for row, score in zip(rows, scores):
+                node = candidates[row]
+                nodes.append({
+                    'id': node['id'],
+                    'title': node['title'],
+                    'level': node['level'],
+                    'start_line': node['start_line'],
+                    'end_line': node['end_line'],
+                    'summary': node['summary'],
+                    'document_name': node['doc_name'],
+                    'source': node['source'],
+                    'score': float(score)
+                })
             
             # Sort by similarity and return top_k
             nodes.sort(key=lambda x: x['score'], reverse=True)
@@ -667,4 +584,3 @@ class GraphRAG:
         except Exception as e:
             logger.error(f"Error in semantic search for introduction nodes: {e}")
             return []
-
@@ -0,0 +1,638 @@
+"""Graph storage backends for the document hierarchy (Neo4j or embedded SQLite)."""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDED_GRAPH_SCHEMA_VERSION = 1
+
+# Fields every heading dictionary returned by a store carries
+HEADING_FIELDS = (
+    "id", "title", "level", "start_line", "end_line",
+    "summary", "source", "doc_name", "parent_id", "depth"
+)
+
+
+def _keyword_regex(keywords: List[str]) -> Optional["re.Pattern"]:
+    """Compile a case-insensitive 'any keyword' pattern (None when no keywords)."""
+    keywords = [kw for kw in keywords if kw]
+    if not keywords:
+        return None
+    return re.compile('|'.join(re.escape(kw) for kw in keywords), re.IGNORECASE)
+
+
+class GraphStore(ABC):
+    """
+    Read interface over the document hierarchy used by the agents.
+
+    Headings are returned as dictionaries with the keys in HEADING_FIELDS;
+    documents as dictionaries with 'name', 'summary' and 'source'.
+    """
+
+    @abstractmethod
+    def get_node_by_id(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single heading by id (None if missing)."""
+
+    @abstractmethod
+    def get_nodes_by_ids(self, node_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get headings for a list of ids, in input order, skipping missing ids."""
+
+    @abstractmethod
+    def get_children(self, node_id: str) -> List[Dict[str, Any]]:
+        """Get direct child headings ordered by start_line."""
+
+    @abstractmethod
+    def navigate_upward(self, node_id: str, levels: int = 1) -> List[Dict[str, Any]]:
+        """Get the heading exactly `levels` hops above a node (empty at the top)."""
+
+    @abstractmethod
+    def get_section_path(self, node_id: str) -> List[str]:
+        """Get [doc_name, top title, ..., node title] for a heading (empty if missing)."""
+
+    @abstractmethod
+    def get_descendants(self, node_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get every heading below the given headings (at any depth, without duplicates) ordered by start_line."""
+
+    @abstractmethod
+    def get_parent_map(self) -> Dict[str, str]:
+        """Get heading id -> parent heading id for every heading below the top level."""
+
+    @abstractmethod
+    def get_document_toc(self, document_name: str) -> List[Dict[str, Any]]:
+        """Get top-level headings of a document ordered by start_line."""
+
+    @abstractmethod
+    def get_document_headings(self, document_name: str) -> List[Dict[str, Any]]:
+        """Get all headings of a document (any depth) ordered by start_line."""
+
+    @abstractmethod
+    def get_all_documents(self) -> List[Dict[str, Any]]:
+        """Get all documents ordered by name."""
+
+    @abstractmethod
+    def get_introduction_nodes(self, document_name: str) -> List[Dict[str, Any]]:
+        """Get top-level, level-1 headings of a document."""
+
+    @abstractmethod
+    def search_headings(
+        self,
+        keywords: List[str],
+        top_k: int = 5,
+        document_names: Optional[List[str]] = None,
+        title_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Find headings whose title (or summary) contains any keyword."""
+
+    @abstractmethod
+    def get_summary_embeddings(
+        self,
+        node_ids: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Get summary embeddings.
+
+        Args:
+            node_ids: Restrict to these headings (default: all with an embedding)
+
+        Returns:
+            Tuple of (heading dictionaries, float32 matrix with one row per heading)
+        """
+
+    def close(self):
+        """Release backend resources."""
+        pass
+
+
+class Neo4jGraphStore(GraphStore):
+    """GraphStore backed by Neo4j through the shared driver."""
+
+    _HEADING_RETURN = """
+        RETURN h.id as id, h.title as title, h.level as level,
+               h.start_line as start_line, h.end_line as end_line,
+               h.summary as summary, h.source as source, h.doc_name as doc_name,
+               h.parent_id as parent_id, h.depth as depth
+    """
+
+    def __init__(self):
+        from utils.neo4j_client import get_neo4j_driver, execute_read
+        self.driver = get_neo4j_driver()
+        self._execute_read = execute_read
+
+    def _headings(self, match: str, tail: str = "", **params) -> List[Dict[str, Any]]:
+        """Run `match` (binding `h`) and return headings in the common shape."""
+        return self._execute_read(match + self._HEADING_RETURN + tail, **params)
+
+    def get_node_by_id(self, node_id: str) -> Optional[Dict[str, Any]]:
+        result = self._headings("MATCH (h:Heading {id: $node_id})", node_id=node_id, tail=" LIMIT 1")
+        return result[0] if result else None
+
+    def get_nodes_by_ids(self, node_ids: List[str]) -> List[Dict[str, Any]]:
+        if not node_ids:
+            return []
+        result = self._headings("MATCH (h:Heading) WHERE h.id IN $node_ids", node_ids=list(node_ids))
+        by_id = {}
+        for record in result:
+            by_id.setdefault(record['id'], record)
+        return [by_id[node_id] for node_id in node_ids if node_id in by_id]
+
+    def get_children(self, node_id: str) -> List[Dict[str, Any]]:
+        return self._headings(
+            "MATCH (h:Heading {parent_id: $node_id})",
+            node_id=node_id,
+            tail=" ORDER BY h.start_line"
+        )
+
+    def navigate_upward(self, node_id: str, levels: int = 1) -> List[Dict[str, Any]]:
+        # Seek the start node by id, then walk a fixed number of hops upward
+        return self._headings(
+            f"MATCH (start:Heading {{id: $node_id}}) "
+            f"MATCH (h:Heading)-[:HAS_SUBSECTION*{int(levels)}]->(start)",
+            node_id=node_id
+        )
+
+    def get_section_path(self, node_id: str) -> List[str]:
+        query = """
+        MATCH (target:Heading {id: $node_id})
+        MATCH path = (top:Heading {depth: 1})-[:HAS_SUBSECTION*0..]->(target)
+        RETURN [target.doc_name] + [n in nodes(path) | n.title] as hierarchy
+        LIMIT 1
+        """
+        result = self._execute_read(query, node_id=node_id)
+        return list(result[0]['hierarchy']) if result and result[0]['hierarchy'] else []
+
+    def get_descendants(self, node_ids: List[str]) -> List[Dict[str, Any]]:
+        if not node_ids:
+            return []
+        # One traversal for all roots instead of one per node
+        return self._headings(
+            "MATCH (parent:Heading) WHERE parent.id IN $node_ids "
+            "MATCH (parent)-[:HAS_SUBSECTION*]->(h:Heading) WITH DISTINCT h",
+            node_ids=list(node_ids),
+            tail=" ORDER BY h.start_line"
+        )
+
+    def get_parent_map(self) -> Dict[str, str]:
+        query = """
+        MATCH (h:Heading) WHERE h.parent_id IS NOT NULL
+        RETURN h.id as id, h.parent_id as parent_id
+        """
+        return {record['id']: record['parent_id'] for record in self._execute_read(query)}
+
+    def get_document_toc(self, document_name: str) -> List[Dict[str, Any]]:
+        return self._headings(
+            "MATCH (doc:Document {name: $doc_name})-[:HAS_SUBSECTION]->(h:Heading)",
+            doc_name=document_name,
+            tail=" ORDER BY h.start_line"
+        )
+
+    def get_document_headings(self, document_name: str) -> List[Dict[str, Any]]:
+        return self._headings(
+            "MATCH (h:Heading {doc_name: $doc_name})",
+            doc_name=document_name,
+            tail=" ORDER BY h.start_line"
+        )
+
+    def get_all_documents(self) -> List[Dict[str, Any]]:
+        query = """
+        MATCH (doc:Document)
+        RETURN doc.name as name, doc.summary as summary,
+               doc.source as source
+        ORDER BY doc.name
+        """
+        return self._execute_read(query)
+
+    def get_introduction_nodes(self, document_name: str) -> List[Dict[str, Any]]:
+        return self._headings(
+            "MATCH (doc:Document {name: $doc_name})-[:HAS_SUBSECTION]->(h:Heading) WHERE h.level = 1",
+            doc_name=document_name,
+            tail=" ORDER BY h.start_line"
+        )
+
+    def search_headings(
+        self,
+        keywords: List[str],
+        top_k: int = 5,
+        document_names: Optional[List[str]] = None,
+        title_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        keywords = [kw for kw in keywords if kw]
+        if not keywords:
+            return []
+        pattern = '|'.join(f"(?i).*{re.escape(kw)}.*" for kw in keywords)
+        match_clause = "h.title =~ $pattern" if title_only else "(h.title =~ $pattern OR h.summary =~ $pattern)"
+        return self._headings(
+            f"MATCH (h:Heading) WHERE {match_clause} "
+            f"AND ($document_names IS NULL OR h.doc_name IN $document_names)",
+            pattern=pattern,
+            document_names=document_names,
+            top_k=top_k,
+            tail=" ORDER BY h.doc_name, h.start_line LIMIT $top_k"
+        )
+
+    def get_summary_embeddings(
+        self,
+        node_ids: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        query = """
+        MATCH (h:Heading)
+        WHERE h.summary_embedding IS NOT NULL
+          AND ($node_ids IS NULL OR h.id IN $node_ids)
+        RETURN h.id as id, h.title as title, h.level as level,
+               h.start_line as start_line, h.end_line as end_line,
+               h.summary as summary, h.source as source, h.doc_name as doc_name,
+               h.parent_id as parent_id, h.depth as depth,
+               h.summary_embedding as embedding
+        """
+        nodes = []
+        vectors = []
+        for record in self._execute_read(query, node_ids=list(node_ids) if node_ids is not None else None):
+            vectors.append(record.pop('embedding'))
+            nodes.append(record)
+        matrix = np.asarray(vectors, dtype=np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return nodes, matrix
+
+
+class EmbeddedGraphStore(GraphStore):
+    """
+    GraphStore for single-node deployments without a Neo4j server.
+
+    The hierarchy is persisted in one SQLite file and loaded once into an
+    in-memory tree (id -> heading, parent -> children, document -> TOC) plus
+    a float32 NumPy matrix of summary embeddings, so every read is a dict
+    lookup or a slice.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS documents (
+        name TEXT PRIMARY KEY, source TEXT, summary TEXT, type TEXT
+    );
+    CREATE TABLE IF NOT EXISTS headings (
+        id TEXT PRIMARY KEY, doc_name TEXT NOT NULL, parent_id TEXT, depth INTEGER,
+        title TEXT, level INTEGER, start_line INTEGER, end_line INTEGER,
+        summary TEXT, source TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_headings_parent ON headings(parent_id);
+    CREATE INDEX IF NOT EXISTS idx_headings_doc ON headings(doc_name);
+    CREATE TABLE IF NOT EXISTS embeddings (node_id TEXT PRIMARY KEY, vector BLOB NOT NULL);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the embedded store.
+
+        Args:
+            path: SQLite file (default: settings.embedded_graph_path)
+        """
+        self.path = path or get_settings().embedded_graph_path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        self._children: Dict[str, List[str]] = {}
+        self._toc: Dict[str, List[str]] = {}
+        self._documents: List[Dict[str, Any]] = []
+        self._embedding_ids: List[str] = []
+        self._embedding_positions: Dict[str, int] = {}
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(self._SCHEMA)
+        return conn
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._load()
+            self._loaded = True
+
+    def _load(self):
+        """Read the SQLite file into the in-memory tree and embedding matrix."""
+        conn = self._connect()
+        try:
+            self._documents = [
+                {'name': name, 'summary': summary, 'source': source}
+                for name, source, summary in conn.execute(
+                    "SELECT name, source, summary FROM documents ORDER BY name"
+                )
+            ]
+
+            nodes: Dict[str, Dict[str, Any]] = {}
+            children: Dict[str, List[str]] = {}
+            toc: Dict[str, List[str]] = {}
+            rows = conn.execute(
+                "SELECT id, title, level, start_line, end_line, summary, source, doc_name, parent_id, depth "
+                "FROM headings ORDER BY doc_name, start_line"
+            )
+            for row in rows:
+                node = dict(zip(HEADING_FIELDS, row))
+                nodes[node['id']] = node
+                if node['parent_id']:
+                    children.setdefault(node['parent_id'], []).append(node['id'])
+                else:
+                    toc.setdefault(node['doc_name'], []).append(node['id'])
+
+            ids = []
+            vectors = []
+            for node_id, blob in conn.execute("SELECT node_id, vector FROM embeddings ORDER BY node_id"):
+                if node_id in nodes:
+                    ids.append(node_id)
+                    vectors.append(np.frombuffer(blob, dtype=np.float32))
+        finally:
+            conn.close()
+
+        self._nodes = nodes
+        self._children = children
+        self._toc = toc
+        self._embedding_ids = ids
+        self._embedding_positions = {node_id: i for i, node_id in enumerate(ids)}
+        self._matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        logger.info(
+            f"Loaded embedded graph from {self.path}: {len(self._documents)} documents, "
+            f"{len(nodes)} headings, {len(ids)} embeddings"
+        )
+
+    def reload(self):
+        """Drop the in-memory tree so the file is re-read on next access."""
+        with self._lock:
+            self._loaded = False
+
+    def bulk_load(
+        self,
+        documents: List[Dict[str, Any]],
+        headings: List[Dict[str, Any]],
+        embeddings: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> Dict[str, int]:
+        """
+        Replace the stored graph in a single transaction.
+
+        Args:
+            documents: Dictionaries with 'name', 'source', 'summary' (optional 'type')
+            headings: Dictionaries with the keys in HEADING_FIELDS
+            embeddings: node_id -> vector (list or array), stored as float32
+            metadata: Extra key/value pairs recorded alongside the schema version
+
+        Returns:
+            Row counts per table
+        """
+        embeddings = embeddings or {}
+        meta = {
+            'schema_version': str(EMBEDDED_GRAPH_SCHEMA_VERSION),
+            'written_at': datetime.now().isoformat()
+        }
+        meta.update(metadata or {})
+
+        conn = self._connect()
+        try:
+            with conn:
+                for table in ("metadata", "documents", "headings", "embeddings"):
+                    conn.execute(f"DELETE FROM {table}")
+                conn.executemany("INSERT INTO metadata VALUES (?, ?)", list(meta.items()))
+                conn.executemany(
+                    "INSERT INTO documents VALUES (?, ?, ?, ?)",
+                    [(d['name'], d.get('source'), d.get('summary'), d.get('type')) for d in documents]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO headings "
+                    "(id, title, level, start_line, end_line, summary, source, doc_name, parent_id, depth) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [tuple(h.get(field) for field in HEADING_FIELDS) for h in headings]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                    [
+                        (node_id, np.asarray(vector, dtype=np.float32).tobytes())
+                        for node_id, vector in embeddings.items()
+                        if vector is not None
+                    ]
+                )
+        finally:
+            conn.close()
+
+        self.reload()
+        counts = {'documents': len(documents), 'headings': len(headings), 'embeddings': len(embeddings)}
+        logger.info(f"Wrote embedded graph to {self.path}: {counts}")
+        return counts
+
+    def dump(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, np.ndarray]]:
+        """
+        Read the stored graph in the shape bulk_load accepts.
+
+        Returns:
+            Tuple of (documents, headings, node_id -> float32 embedding)
+        """
+        conn = self._connect()
+        try:
+            documents = [
+                {'name': name, 'source': source, 'summary': summary, 'type': doc_type}
+                for name, source, summary, doc_type in conn.execute(
+                    "SELECT name, source, summary, type FROM documents ORDER BY name"
+                )
+            ]
+            headings = [
+                dict(zip(HEADING_FIELDS, row))
+                for row in conn.execute(
+                    "SELECT id, title, level, start_line, end_line, summary, source, doc_name, parent_id, depth "
+                    "FROM headings ORDER BY doc_name, start_line"
+                )
+            ]
+            embeddings = {
+                node_id: np.frombuffer(blob, dtype=np.float32)
+                for node_id, blob in conn.execute("SELECT node_id, vector FROM embeddings ORDER BY node_id")
+            }
+        finally:
+            conn.close()
+        return documents, headings, embeddings
+
+    def get_node_by_id(self, node_id: str) -> Optional[Dict[str, Any]]:
+        self._ensure_loaded()
+        node = self._nodes.get(node_id)
+        return dict(node) if node else None
+
+    def get_nodes_by_ids(self, node_ids: List[str]) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return [dict(self._nodes[node_id]) for node_id in node_ids if node_id in self._nodes]
+
+    def get_children(self, node_id: str) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return [dict(self._nodes[child_id]) for child_id in self._children.get(node_id, [])]
+
+    def navigate_upward(self, node_id: str, levels: int = 1) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        node = self._nodes.get(node_id)
+        for _ in range(levels):
+            if not node or not node.get('parent_id'):
+                return []
+            node = self._nodes.get(node['parent_id'])
+        return [dict(node)] if node else []
+
+    def get_section_path(self, node_id: str) -> List[str]:
+        self._ensure_loaded()
+        node = self._nodes.get(node_id)
+        if not node:
+            return []
+        titles = []
+        current = node
+        while current:
+            titles.append(current['title'])
+            current = self._nodes.get(current['parent_id']) if current.get('parent_id') else None
+        return [node['doc_name']] + titles[::-1]
+
+    def get_descendants(self, node_ids: List[str]) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        found = set()
+        pending = list(node_ids)
+        while pending:
+            for child_id in self._children.get(pending.pop(), []):
+                if child_id not in found:
+                    found.add(child_id)
+                    pending.append(child_id)
+        nodes = [dict(self._nodes[node_id]) for node_id in found]
+        return sorted(nodes, key=lambda node: node['start_line'] or 0)
+
+    def get_parent_map(self) -> Dict[str, str]:
+        self._ensure_loaded()
+        return {node_id: node['parent_id'] for node_id, node in self._nodes.items() if node['parent_id']}
+
+    def get_document_toc(self, document_name: str) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return [dict(self._nodes[node_id]) for node_id in self._toc.get(document_name, [])]
+
+    def get_document_headings(self, document_name: str) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        # The tree is loaded ordered by doc_name, start_line
+        return [dict(node) for node in self._nodes.values() if node['doc_name'] == document_name]
+
+    def get_all_documents(self) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return [dict(doc) for doc in self._documents]
+
+    def get_introduction_nodes(self, document_name: str) -> List[Dict[str, Any]]:
+        return [node for node in self.get_document_toc(document_name) if node['level'] == 1]
+
+    def search_headings(
+        self,
+        keywords: List[str],
+        top_k: int = 5,
+        document_names: Optional[List[str]] = None,
+        title_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        pattern = _keyword_regex(keywords)
+        if pattern is None:
+            return []
+        allowed = set(document_names) if document_names is not None else None
+        matches = []
+        for node in self._nodes.values():
+            if allowed is not None and node['doc_name'] not in allowed:
+                continue
+            if pattern.search(node['title'] or '') or (
+                not title_only and pattern.search(node['summary'] or '')
+            ):
+                matches.append(dict(node))
+                if len(matches) >= top_k:
+                    break
+        return matches
+
+    def get_summary_embeddings(
+        self,
+        node_ids: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        self._ensure_loaded()
+        if node_ids is None:
+            ids = self._embedding_ids
+            matrix = self._matrix
+        else:
+            positions = [self._embedding_positions[n] for n in node_ids if n in self._embedding_positions]
+            ids = [self._embedding_ids[p] for p in positions]
+            matrix = self._matrix[positions] if positions else np.zeros((0, 0), dtype=np.float32)
+        return [dict(self._nodes[node_id]) for node_id in ids], matrix
+
+
+_graph_store: Optional[GraphStore] = None
+_graph_store_lock = threading.Lock()
+
+
+def get_graph_store() -> GraphStore:
+    """
+    Get the process-wide graph store selected by settings.graph_backend.
+
+    Returns:
+        Neo4jGraphStore ("neo4j") or EmbeddedGraphStore ("embedded")
+    """
+    global _graph_store
+    if _graph_store is None:
+        with _graph_store_lock:
+            if _graph_store is None:
+                backend = get_settings().graph_backend
+                if backend == "embedded":
+                    _graph_store = EmbeddedGraphStore()
+                elif backend == "neo4j":
+                    _graph_store = Neo4jGraphStore()
+                else:
+                    raise ValueError(f"Unknown graph backend: {backend}")
+                logger.info(f"Using {backend} graph backend")
+    return _graph_store
+
+
+def export_neo4j_to_embedded(path: Optional[str] = None) -> Tuple[bool, str]:
+    """
+    Copy the Neo4j document hierarchy and summary embeddings into an embedded store file.
+
+    Args:
+        path: Target SQLite file (default: settings.embedded_graph_path)
+
+    Returns:
+        Tuple of (success, message)
+    """
+    from utils.neo4j_client import execute_read
+
+    try:
+        documents = execute_read("""
+        MATCH (doc:Document)
+        RETURN doc.name as name, doc.source as source, doc.summary as summary, doc.type as type
+        ORDER BY doc.name
+        """)
+        headings = execute_read("""
+        MATCH (h:Heading)
+        RETURN h.id as id, h.title as title, h.level as level,
+               h.start_line as start_line, h.end_line as end_line,
+               h.summary as summary, h.source as source, h.doc_name as doc_name,
+               h.parent_id as parent_id, h.depth as depth
+        """)
+        embeddings = {
+            record['id']: record['embedding']
+            for record in execute_read("""
+            MATCH (h:Heading)
+            WHERE h.summary_embedding IS NOT NULL
+            RETURN h.id as id, h.summary_embedding as embedding
+            """)
+        }
+
+        missing = sum(1 for h in headings if not h.get('doc_name'))
+        if missing:
+            return False, f"{missing} headings lack doc_name; run 'python main.py migrate-db' first"
+
+        store = EmbeddedGraphStore(path)
+        counts = store.bulk_load(documents, headings, embeddings, metadata={'exported_from': 'neo4j'})
+        return True, (
+            f"Exported {counts['documents']} documents, {counts['headings']} headings and "
+            f"{counts['embeddings']} summary embeddings to {store.path}"
+        )
+    except Exception as e:
+        return False, f"Graph export failed: {e}"
@@ -5,6 +5,7 @@ from typing import List, Dict, Any, Optional, Literal
 from .graph_rag import GraphRAG
 from .vector_rag import VectorRAG
 from .graph_aware_rag import GraphAwareRAG
+from config.settings import current_execution_profile
 
 logger = logging.getLogger(__name__)
 
@@ -82,40 +83,52 @@ class HybridRAG:
         if self.markdown_logger:
             self.markdown_logger.log_rag_query(query_text, strategy, top_k, "HybridRAG")
         
+        # Document filtering is pushed down into each retriever so top_k is
+        # filled from the allowed documents instead of being trimmed afterwards
+        document_names = self._resolve_document_names(document_filter, guideline_documents)
+        
         # If using GraphAwareRAG, support all modes
         if self.use_graph_aware:
             if strategy in ["node_name", "summary", "content", "automatic"]:
                 # Use GraphAwareRAG with specific mode
-                results = self.graph_aware_rag.retrieve(query_text, mode=strategy, top_k=top_k)
+                results = self.graph_aware_rag.retrieve(
+                    query_text, mode=strategy, top_k=top_k, document_names=document_names
+                )
             elif strategy == "graph":
-                results = self._graph_only(query_text, top_k)
+                results = self._graph_only(query_text, top_k, document_names)
             elif strategy == "vector":
                 # Use content mode for vector-only
-                results = self.graph_aware_rag.retrieve(query_text, mode="content", top_k=top_k)
+                results = self.graph_aware_rag.retrieve(
+                    query_text, mode="content", top_k=top_k, document_names=document_names
+                )
             else:
-                # Hybrid: use GraphAwareRAG's hybrid method
-                results = self.graph_aware_rag.hybrid_retrieve(query_text, top_k=top_k)
+                # Hybrid: use GraphAwareRAG's hybrid method (MMR per the run's execution profile)
+                results = self.graph_aware_rag.hybrid_retrieve(
+                    query_text, top_k=top_k, use_mmr=current_execution_profile().rag_use_mmr,
+                    document_names=document_names
+                )
         else:
             # Legacy mode
             if strategy == "graph":
-                results = self._graph_only(query_text, top_k)
+                results = self._graph_only(query_text, top_k, document_names)
             elif strategy == "vector":
-                results = self._vector_only(query_text, top_k)
+                results = self._vector_only(query_text, top_k, document_names)
             else:
-                results = self._hybrid_search(query_text, top_k)
-        
-        # Apply document filtering if specified
-        if document_filter is not None or guideline_documents is not None:
-            results = self._filter_by_documents(results, document_filter, guideline_documents)
+                results = self._hybrid_search(query_text, top_k, document_names)
         
         if self.markdown_logger:
             self.markdown_logger.log_rag_results(len(results), results[:3])
         
         return results
     
-    def _graph_only(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+    def _graph_only(
+        self,
+        query: str,
+        top_k: int,
+        document_names: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Graph-only search."""
-        results = self.graph_rag.hybrid_search(query, top_k=top_k)
+        results = self.graph_rag.hybrid_search(query, top_k=top_k, document_names=document_names)
         
         # Format results
         formatted = []
@@ -135,9 +148,14 @@ class HybridRAG:
         
         return formatted
     
-    def _vector_only(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+    def _vector_only(
+        self,
+        query: str,
+        top_k: int,
+        document_names: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Vector-only search."""
-        results = self.vector_rag.semantic_search(query, top_k=top_k)
+        results = self.vector_rag.semantic_search(query, top_k=top_k, document_names=document_names)
         
         # Format results
         formatted = []
@@ -151,11 +169,16 @@ class HybridRAG:
         
         return formatted
     
-    def _hybrid_search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+    def _hybrid_search(
+        self,
+        query: str,
+        top_k: int,
+        document_names: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Combined hybrid search."""
         # Get results from both
-        graph_results = self._graph_only(query, top_k=top_k)
-        vector_results = self._vector_only(query, top_k=top_k)
+        graph_results = self._graph_only(query, top_k=top_k, document_names=document_names)
+        vector_results = self._vector_only(query, top_k=top_k, document_names=document_names)
         
         # Combine and rerank
         combined = self._rerank_results(graph_results, vector_results, top_k)
@@ -263,50 +286,27 @@ class HybridRAG:
         logger.info(f"Graph-guided search returned {len(final_results)} results")
         return final_results
     
-    def _filter_by_documents(
-        self,
-        results: List[Dict[str, Any]],
+    @staticmethod
+    def _resolve_document_names(
         document_filter: Optional[List[str]],
         guideline_documents: Optional[List[str]]
-    ) -> List[Dict[str, Any]]:
+    ) -> Optional[List[str]]:
         """
-        Filter results by document names.
+        Resolve the set of document names a query may draw from.
         
         Args:
-            results: Results to filter
             document_filter: List of allowed document names (None = all documents)
             guideline_documents: List of guideline documents (always included)
             
         Returns:
-            Filtered results
+            Sorted list of allowed document names, or None when all documents are allowed
         """
-        if document_filter is None and guideline_documents is None:
-            return results
-        
-        guideline_set = set(guideline_documents or [])
-        filter_set = set(document_filter or [])
-        
-        # Combine: if document_filter is specified, use it + guidelines
-        # If document_filter is None, allow all documents
-        allowed_documents = filter_set | guideline_set if document_filter is not None else None
-        
-        filtered = []
-        for result in results:
-            metadata = result.get('metadata', {})
-            doc_name = metadata.get('source', metadata.get('document', ''))
-            
-            # Always include if it's a guideline document
-            if doc_name in guideline_set:
-                filtered.append(result)
-            # Include if no filter specified (allow all)
-            elif allowed_documents is None:
-                filtered.append(result)
-            # Include if in the allowed set
-            elif doc_name in allowed_documents:
-                filtered.append(result)
+        if document_filter is None:
+            return None
         
-        logger.info(f"Document filtering: {len(results)} -> {len(filtered)} results")
-        return filtered
+        allowed_documents = set(document_filter) | set(guideline_documents or [])
+        logger.info(f"Document filter pushed down to retrievers: {len(allowed_documents)} documents")
+        return sorted(allowed_documents)
     
     def close(self):
         """Close connections."""
@@ -9,6 +9,7 @@ from chromadb.config import Settings as ChromaSettings
 from config.settings import get_settings
 from utils.ollama_embeddings import OllamaEmbeddingsClient
 from utils.chroma_client import get_chroma_client
+from utils.tracing import trace_span
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,7 +49,8 @@ class VectorRAG:
         self,
         query: str,
         top_k: int = 5,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        document_names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Perform semantic search using embeddings.
@@ -57,19 +59,31 @@ class VectorRAG:
             query: Search query text
             top_k: Number of results
             filter_metadata: Optional metadata filters
+            document_names: Optional list of document names ('source' metadata) to search within
             
         Returns:
             List of search results with metadata
         """
+        if document_names is not None and not document_names:
+            return []
+        
+        where = filter_metadata or None
+        if document_names is not None:
+            names = list(document_names)
+            source_filter = {"source": names[0]} if len(names) == 1 else {"source": {"$in": names}}
+            where = {"$and": [where, source_filter]} if where else source_filter
+        
         # Use Ollama embeddings instead of sentence-transformers
         query_vector = self.embedding_client.embed(query)
         
         try:
-            results = self.collection.query(
-                query_embeddings=[query_vector],
-                n_results=top_k,
-                where=filter_metadata
-            )
+            with trace_span("chroma", self.collection.name, top_k=top_k) as span:
+                results = self.collection.query(
+                    query_embeddings=[query_vector],
+                    n_results=top_k,
+                    where=where
+                )
+                span.set(result_count=len(results['ids'][0]) if results and results.get('ids') else 0)
             
             formatted_results = []
             if results and results['ids'] and len(results['ids'][0]) > 0:
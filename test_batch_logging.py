@@ -0,0 +1,72 @@
+"""
+Test script for per-plan logging in a shared workflow.
+
+Runs one compiled LangGraph graph for two plans in parallel threads and
+checks that the ContextMarkdownLogger routes each node's log entries to the
+log file of the plan that triggered it (as `main.py batch` does).
+"""
+
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
+
+from langgraph.graph import StateGraph, END
+
+from utils.markdown_logger import (
+    MarkdownLogger, ContextMarkdownLogger, bind_markdown_logger, reset_markdown_logger
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _PlanState(TypedDict):
+    name: str
+
+
+def _build_workflow(markdown_logger):
+    def stage(state):
+        if markdown_logger:
+            markdown_logger.log_processing_step(f"stage ran for {state['name']}")
+        return state
+
+    graph = StateGraph(_PlanState)
+    graph.add_node("stage", stage)
+    graph.set_entry_point("stage")
+    graph.add_edge("stage", END)
+    return graph.compile()
+
+
+def test_shared_workflow_logs_per_plan():
+    """Test that concurrent plans on one workflow write to their own logs."""
+    proxy = ContextMarkdownLogger()
+    assert not proxy
+    proxy.log_processing_step("dropped: no plan bound")
+
+    workflow = _build_workflow(proxy)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def run_plan(name):
+            markdown_logger = MarkdownLogger(os.path.join(tmp, f"{name}_log.md"))
+            token = bind_markdown_logger(markdown_logger)
+            try:
+                workflow.invoke({"name": name})
+            finally:
+                reset_markdown_logger(token)
+            markdown_logger.close()
+            return markdown_logger.log_file_path
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            paths = list(executor.map(run_plan, ["triage", "evacuation"]))
+
+        triage_log = open(paths[0], encoding='utf-8').read()
+        evacuation_log = open(paths[1], encoding='utf-8').read()
+        assert "stage ran for triage" in triage_log and "evacuation" not in triage_log
+        assert "stage ran for evacuation" in evacuation_log and "triage" not in evacuation_log
+
+        logger.info("✓ Each plan's node logs went to its own file")
@@ -0,0 +1,115 @@
+"""
+Test script for durable workflow checkpoints.
+
+Runs a small LangGraph chain against the SQLite checkpoint saver, fails it
+midway, and resumes it from a fresh saver instance (simulating a new
+process) to check that completed nodes are not executed again.
+"""
+
+import logging
+import os
+import tempfile
+from typing import List, TypedDict
+
+from langgraph.graph import StateGraph, END
+
+from workflows.checkpointing import SqliteCheckpointSaver, get_run_config, get_resume_point
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _ChainState(TypedDict):
+    trail: List[str]
+
+
+def _build_chain(checkpointer, calls, fail_at=None):
+    def make_node(name):
+        def node(state):
+            calls.append(name)
+            if name == fail_at:
+                raise RuntimeError(f"{name} failed")
+            return {"trail": state["trail"] + [name]}
+        return node
+
+    graph = StateGraph(_ChainState)
+    for name in ("orchestrator", "analyzer", "formatter"):
+        graph.add_node(name, make_node(name))
+    graph.set_entry_point("orchestrator")
+    graph.add_edge("orchestrator", "analyzer")
+    graph.add_edge("analyzer", "formatter")
+    graph.add_edge("formatter", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_resume_from_failed_node():
+    """Test that a resumed run restarts at the failed node with earlier outputs restored."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.db")
+        config = get_run_config("run-1")
+
+        saver = SqliteCheckpointSaver(path)
+        saver.register_run("run-1", {"name": "Triage plan", "timing": "0-2h"})
+        calls = []
+        workflow = _build_chain(saver, calls, fail_at="analyzer")
+        try:
+            workflow.invoke({"trail": []}, config)
+            raise AssertionError("analyzer should have failed")
+        except RuntimeError:
+            saver.update_run_status("run-1", "failed", error="analyzer failed",
+                                    next_node=", ".join(get_resume_point(workflow, "run-1")))
+        assert calls == ["orchestrator", "analyzer"]
+
+        # New saver instance = new process reading the same file
+        resumed_saver = SqliteCheckpointSaver(path)
+        run = resumed_saver.get_run("run-1")
+        assert run["status"] == "failed" and run["next_node"] == "analyzer"
+        assert run["params"]["timing"] == "0-2h"
+        assert [r["run_id"] for r in resumed_saver.list_runs(statuses=["failed"])] == ["run-1"]
+
+        calls = []
+        workflow = _build_chain(resumed_saver, calls)
+        assert get_resume_point(workflow, "run-1") == ["analyzer"]
+        final_state = workflow.invoke(None, config)
+        assert calls == ["analyzer", "formatter"]
+        assert final_state["trail"] == ["orchestrator", "analyzer", "formatter"]
+        assert get_resume_point(workflow, "run-1") == []
+        assert get_resume_point(workflow, "unknown-run") is None
+
+        logger.info("✓ Resumed run skipped completed nodes and restored their outputs")
+
+
+def test_completed_and_expired_runs_are_pruned():
+    """Test that completing a run drops its checkpoints and old runs are pruned."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.db")
+        saver = SqliteCheckpointSaver(path, retention_days=7)
+        assert not hasattr(saver, "storage")  # Nothing is kept in memory
+
+        for run_id in ("run-done", "run-failed", "run-old"):
+            saver.register_run(run_id, {"name": run_id})
+            _build_chain(saver, []).invoke({"trail": []}, get_run_config(run_id))
+        assert len(list(saver.list(get_run_config("run-done")))) == 5
+        assert len(list(saver.list(get_run_config("run-done"), limit=2))) == 2
+        assert [c.metadata["step"] for c in saver.list(None, filter={"step": 3})] == [3, 3, 3]
+
+        saver.update_run_status("run-done", "completed")
+        saver.update_run_status("run-failed", "failed", error="stopped")
+        assert list(saver.list(get_run_config("run-done"))) == []
+        assert saver.get_run("run-done")["status"] == "completed"
+        assert saver.get_tuple(get_run_config("run-failed")).checkpoint["channel_values"]["trail"] == [
+            "orchestrator", "analyzer", "formatter"
+        ]
+
+        # A run not updated within the retention window is pruned with its checkpoints
+        with saver.cursor() as cur:
+            cur.execute("UPDATE runs SET updated_at = '2000-01-01T00:00:00' WHERE run_id = 'run-old'")
+        assert saver.prune_runs() == 1
+        assert saver.get_run("run-old") is None and list(saver.list(get_run_config("run-old"))) == []
+        assert saver.get_run("run-failed") is not None
+        assert SqliteCheckpointSaver(path, retention_days=0).prune_runs() == 0
+
+        logger.info("✓ Completed runs drop their checkpoints and expired runs are pruned")
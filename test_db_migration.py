@@ -0,0 +1,153 @@
+"""
+Test script for the Neo4j schema migration (migrate-db).
+
+Runs ensure_neo4j_schema, backfill_heading_properties and
+migrate_neo4j_schema against a mocked session that keeps a small heading
+hierarchy in memory, and checks the constraint / index Cypher, the
+denormalized Heading properties and that migrating twice changes nothing.
+"""
+
+import logging
+
+import utils.db_init as db_init
+from utils.db_init import backfill_heading_properties, ensure_neo4j_schema, migrate_neo4j_schema
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _Result:
+    def __init__(self, record=None):
+        self.record = record
+
+    def single(self):
+        return self.record
+
+    def consume(self):
+        return None
+
+
+class _MockSession:
+    """
+    Answers the migration's Cypher from an in-memory graph.
+
+    Document "Triage Guide" -> h1 -> h2 -> h3, plus an orphan heading h9.
+    Constraints and indexes are kept by name; a constraint on a property
+    with a plain index (or on duplicated data) fails like Neo4j does.
+    """
+
+    def __init__(self, duplicate_ids=False):
+        self.documents = {"Triage Guide": {"source": "triage.md", "children": ["h1"]}}
+        self.headings = {
+            "h1": {"id": "h1", "parent_id": "stale", "children": ["h2"]},
+            "h2": {"id": "h2", "children": ["h3"]},
+            "h3": {"id": "h3", "children": []},
+            "h9": {"id": "h9", "children": []},
+        }
+        self.constraints = set()
+        self.indexes = {"heading_id", "document_name"}  # Legacy plain indexes
+        self.duplicate_ids = duplicate_ids
+        self.queries = []
+
+    def run(self, query, **params):
+        text = " ".join(query.split())
+        self.queries.append(text)
+        if text.startswith("CREATE CONSTRAINT"):
+            name = text.split()[2]
+            legacy = {"heading_id_unique": "heading_id", "document_name_unique": "document_name"}[name]
+            if name not in self.constraints:
+                if legacy in self.indexes or (self.duplicate_ids and name == "heading_id_unique"):
+                    raise RuntimeError(f"constraint {name} conflicts with existing index or data")
+                self.constraints.add(name)
+            return _Result()
+        if text.startswith("DROP INDEX"):
+            self.indexes.discard(text.split()[2])
+            return _Result()
+        if text.startswith("CREATE INDEX"):
+            self.indexes.add(text.split()[2])
+            return _Result()
+        if text.startswith("MATCH (d:Document)-[:HAS_SUBSECTION]->(h:Heading)"):
+            updated = 0
+            for name, document in self.documents.items():
+                for child in document["children"]:
+                    heading = self.headings[child]
+                    heading.update(doc_name=name, source=document["source"], depth=1)
+                    heading.pop("parent_id", None)
+                    updated += 1
+            return _Result({"updated": updated})
+        if text.startswith("MATCH (p:Heading {depth: $depth})"):
+            updated = 0
+            for parent in [h for h in self.headings.values() if h.get("depth") == params["depth"]]:
+                for child in parent["children"]:
+                    self.headings[child].update(
+                        doc_name=parent["doc_name"], source=parent["source"],
+                        parent_id=parent["id"], depth=params["depth"] + 1
+                    )
+                    updated += 1
+            return _Result({"updated": updated})
+        if "WHERE h.doc_name IS NULL" in text:
+            return _Result({"orphans": sum(1 for h in self.headings.values() if h.get("doc_name") is None)})
+        raise AssertionError(f"unexpected query: {text}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _MockDriver:
+    def __init__(self, session):
+        self._session = session
+
+    def session(self):
+        return self._session
+
+
+def test_schema_cypher():
+    """Test constraint / index creation, including the legacy-index and duplicate-data fallbacks."""
+    session = _MockSession()
+    report = ensure_neo4j_schema(session)
+    assert report == {"constraints": ["heading_id_unique", "document_name_unique"], "fallback_indexes": []}
+    assert "CREATE CONSTRAINT heading_id_unique IF NOT EXISTS FOR (n:Heading) REQUIRE n.id IS UNIQUE" in session.queries
+    assert "DROP INDEX heading_id IF EXISTS" in session.queries
+    assert {"heading_doc_name", "heading_parent_id"} <= session.indexes
+    assert "heading_id" not in session.indexes and "document_name" not in session.indexes
+
+    session = _MockSession(duplicate_ids=True)
+    report = ensure_neo4j_schema(session)
+    assert report == {"constraints": ["document_name_unique"], "fallback_indexes": ["heading_id"]}
+    assert "CREATE INDEX heading_id IF NOT EXISTS FOR (n:Heading) ON (n.id)" in session.queries
+    logger.info("✓ Constraints replace legacy indexes and fall back to plain indexes on duplicates")
+
+
+def test_backfill_heading_properties():
+    """Test that doc_name, source, parent_id and depth are copied down the hierarchy."""
+    session = _MockSession()
+    assert backfill_heading_properties(session) == 3
+    h1, h3 = session.headings["h1"], session.headings["h3"]
+    assert h1["doc_name"] == "Triage Guide" and h1["depth"] == 1 and "parent_id" not in h1
+    assert (h3["doc_name"], h3["source"], h3["parent_id"], h3["depth"]) == ("Triage Guide", "triage.md", "h2", 3)
+    assert "doc_name" not in session.headings["h9"]
+    logger.info("✓ Heading properties backfilled level by level")
+
+
+def test_migrate_is_idempotent():
+    """Test that a second migrate-db run leaves the graph and schema unchanged."""
+    session = _MockSession()
+    previous = db_init.get_neo4j_driver
+    db_init.get_neo4j_driver = lambda: _MockDriver(session)
+    try:
+        ok, first = migrate_neo4j_schema()
+        state = ({k: dict(v) for k, v in session.headings.items()}, set(session.constraints), set(session.indexes))
+        ok_again, second = migrate_neo4j_schema()
+    finally:
+        db_init.get_neo4j_driver = previous
+    assert ok and ok_again and first == second
+    assert "3 headings updated" in first and "1 headings not reachable" in first
+    assert state == (session.headings, session.constraints, session.indexes)
+    assert session.constraints == {"heading_id_unique", "document_name_unique"}
+    logger.info("✓ migrate-db is idempotent")
@@ -0,0 +1,95 @@
+"""
+Test script for document filter pushdown.
+
+Checks that HybridRAG resolves the allowed documents once (document filter
+plus guideline documents, None = all documents) and that the vector and
+graph-aware retrievers turn them into a ChromaDB where clause, skipping the
+query entirely when no document is allowed.
+"""
+
+import logging
+
+from rag_tools.graph_aware_rag import GraphAwareRAG
+from rag_tools.hybrid_rag import HybridRAG
+from rag_tools.vector_rag import VectorRAG
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _Collection:
+    """Records the arguments of ChromaDB queries."""
+
+    name = "documents"
+
+    def __init__(self):
+        self.queries = []
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        return {"ids": [["c1"]], "distances": [[0.25]], "metadatas": [[{"text": "Open triage", "source": "a.md"}]]}
+
+
+class _Embeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, text):
+        self.calls += 1
+        return [0.1, 0.2]
+
+
+def test_resolve_document_names():
+    """Test the allowed document set: None means every document, guidelines are always added."""
+    assert HybridRAG._resolve_document_names(None, ["guide.md"]) is None
+    assert HybridRAG._resolve_document_names(["b.md", "a.md"], ["guide.md", "a.md"]) == ["a.md", "b.md", "guide.md"]
+    assert HybridRAG._resolve_document_names([], ["guide.md"]) == ["guide.md"]
+    assert HybridRAG._resolve_document_names([], None) == []
+    logger.info("✓ Document names resolved from the filter and guideline documents")
+
+
+def test_vector_rag_where_clause():
+    """Test the where clause of VectorRAG.semantic_search, including the empty-list case."""
+    rag = VectorRAG.__new__(VectorRAG)
+    rag.collection = _Collection()
+    rag.embedding_client = _Embeddings()
+
+    rag.semantic_search("triage", top_k=3)
+    rag.semantic_search("triage", top_k=3, document_names=["a.md"])
+    rag.semantic_search("triage", top_k=3, document_names=["a.md", "b.md"])
+    results = rag.semantic_search("triage", top_k=3, filter_metadata={"level": "center"}, document_names=["a.md", "b.md"])
+    assert [query["where"] for query in rag.collection.queries] == [
+        None,
+        {"source": "a.md"},
+        {"source": {"$in": ["a.md", "b.md"]}},
+        {"$and": [{"level": "center"}, {"source": {"$in": ["a.md", "b.md"]}}]},
+    ]
+    assert all(query["n_results"] == 3 for query in rag.collection.queries)
+    assert results[0]["id"] == "c1"
+
+    # No allowed document: nothing is embedded or queried
+    assert rag.semantic_search("triage", document_names=[]) == []
+    assert len(rag.collection.queries) == 4 and rag.embedding_client.calls == 4
+    logger.info("✓ VectorRAG pushes the document filter into the where clause")
+
+
+def test_graph_aware_rag_filter():
+    """Test GraphAwareRAG._build_filter and the empty-list short cut of content retrieval."""
+    rag = GraphAwareRAG.__new__(GraphAwareRAG)
+    assert rag._build_filter(None) is None
+    assert rag._build_filter({}) is None
+    assert rag._build_filter({"level": "center"}) == {"level": "center"}
+    assert rag._build_filter(None, ["a.md"]) == {"source": "a.md"}
+    assert rag._build_filter(None, ["a.md", "b.md"]) == {"source": {"$in": ["a.md", "b.md"]}}
+    assert rag._build_filter({"level": "center"}, ["a.md"]) == {"$and": [{"level": "center"}, {"source": "a.md"}]}
+
+    rag.content_collection = _Collection()
+    rag.embedding_client = _Embeddings()
+    assert rag._retrieve_by_content("triage", 5, document_names=[]) == []
+    assert rag.content_collection.queries == [] and rag.embedding_client.calls == 0
+    rag._retrieve_by_content("triage", 5, document_names=["a.md", "b.md"])
+    assert rag.content_collection.queries[0]["where"] == {"source": {"$in": ["a.md", "b.md"]}}
+    logger.info("✓ GraphAwareRAG builds the document where clause and skips empty filters")
@@ -0,0 +1,70 @@
+"""
+Test script for execution profiles.
+
+Checks that the named profiles are ordered from cheapest to most thorough,
+that an unknown name is rejected, that a profile bound to a run is the one
+agents read, and that stage fingerprints only change with the profile knobs
+a stage declares.
+"""
+
+import logging
+
+from config.settings import (
+    EXECUTION_PROFILES, get_execution_profile, current_execution_profile,
+    bind_execution_profile, reset_execution_profile
+)
+from workflows.orchestration import NODE_INPUTS
+from workflows.stage_cache import compute_stage_fingerprint
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def test_profiles_trade_depth_for_speed():
+    """Test that fast does the least work per plan and thorough the most."""
+    fast, balanced, thorough = (get_execution_profile(name) for name in EXECUTION_PROFILES)
+
+    assert fast.top_k_results <= balanced.top_k_results <= thorough.top_k_results
+    assert fast.action_batch_size >= balanced.action_batch_size >= thorough.action_batch_size
+    assert fast.max_validator_retries <= balanced.max_validator_retries <= thorough.max_validator_retries
+    assert not fast.table_scoring and thorough.table_scoring and thorough.sibling_expansion
+
+    try:
+        get_execution_profile("turbo")
+        raise AssertionError("an unknown profile should be rejected")
+    except ValueError:
+        pass
+    logger.info("✓ Profiles are ordered from fast to thorough")
+
+
+def test_bound_profile_is_used():
+    """Test that agents read the profile bound to the run."""
+    token = bind_execution_profile(get_execution_profile("fast"))
+    try:
+        assert current_execution_profile().name == "fast"
+    finally:
+        reset_execution_profile(token)
+    assert current_execution_profile().name == get_execution_profile().name
+    logger.info("✓ The bound profile applies to the run only")
+
+
+def test_fingerprint_follows_declared_profile_knobs():
+    """Test that a profile change invalidates only the stages that read its knobs."""
+    state = {"user_config": {"name": "Plan", "level": "center", "phase": "response", "subject": "war"}}
+    fast, thorough = get_execution_profile("fast"), get_execution_profile("thorough")
+
+    for node, inputs in NODE_INPUTS.items():
+        knobs = inputs.get("profile", ())
+        fingerprints = [
+            compute_stage_fingerprint(
+                node, state, inputs["state"], inputs["user_config"],
+                profile={knob: getattr(profile, knob) for knob in knobs}
+            )
+            for profile in (fast, thorough)
+        ]
+        changed = any(getattr(fast, knob) != getattr(thorough, knob) for knob in knobs)
+        assert (fingerprints[0] != fingerprints[1]) == changed, node
+    logger.info("✓ Only profile-dependent stages are re-executed after a profile change")
@@ -0,0 +1,163 @@
+"""
+Test script for the fake LLM server.
+
+Checks the Ollama routes (schema-valid and packed JSON replies, streamed
+NDJSON, model loads, embeddings), the OpenAI chat route with the canned
+replies of agent prompts, injected failures and the concurrency limit.
+"""
+
+import http.client
+import json
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from config.prompts import get_extractor_user_prompt, get_packed_items_prompt, get_timing_user_prompt
+from utils.fake_llm_server import FakeLLMServer
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+FAST = {"latency": {"distribution": "fixed", "median": 0.0}, "tokens_per_second": 0, "seed": 7}
+
+
+def _request(server, method, path, payload=None):
+    """Send one request; returns (status, headers, body bytes)."""
+    url = urlparse(server.url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+    try:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def _chat(server, prompt, **payload):
+    status, _, body = _request(server, "POST", "/api/chat", {
+        "model": "cogito:8b", "messages": [{"role": "user", "content": prompt}], "stream": False, **payload
+    })
+    assert status == 200
+    return json.loads(body)
+
+
+def test_ollama_routes():
+    """Test schema, packed and streamed chat replies, model loads and embeddings."""
+    server = FakeLLMServer({**FAST, "text_reply_tokens": 30})
+    server.start()
+    try:
+        schema = {
+            "type": "object",
+            "properties": {
+                "actions": {"type": "array", "items": {"type": "object", "properties": {
+                    "id": {"type": "integer"}, "who": {"type": "string"}, "priority": {"enum": ["high", "low"]}
+                }}, "minItems": 2, "maxItems": 2},
+                "score": {"anyOf": [{"type": "number"}, {"type": "null"}]}
+            },
+            "required": ["actions"]
+        }
+        reply = json.loads(_chat(server, "Assign the actions.", format=schema)["message"]["content"])
+        assert reply == {"actions": [{"id": 1, "who": "fake", "priority": "high"}] * 2, "score": 8.0}
+
+        prompt = get_packed_items_prompt(
+            "Score each table.", {"type": "number"}, "### Item 1\nBeds\n\n### Item 2\nStaff\n\n### Item 3\nFuel"
+        )
+        packed = json.loads(_chat(server, prompt, format={
+            "type": "object", "properties": {"results": {"type": "array"}}
+        })["message"]["content"])
+        assert packed == {"results": [{"index": n, "result": 8.0} for n in (1, 2, 3)]}
+
+        status, headers, body = _request(server, "POST", "/api/chat", {
+            "model": "cogito:8b", "messages": [{"role": "user", "content": "Summarize the section."}]
+        })
+        chunks = [json.loads(line) for line in body.decode("utf-8").splitlines() if line]
+        assert status == 200 and headers["Content-Type"] == "application/x-ndjson" and len(chunks) > 2
+        assert "".join(chunk["message"]["content"] for chunk in chunks).startswith("Coordinate the response")
+        assert chunks[-1]["done"] and chunks[-1]["eval_count"] > 0 and chunks[-1]["prompt_eval_count"] > 0
+
+        load = json.loads(_request(server, "POST", "/api/chat", {"model": "gpt-oss:20b", "messages": []})[2])
+        assert load["done_reason"] == "load"
+        assert "gpt-oss:20b" in [model["name"] for model in json.loads(_request(server, "GET", "/api/ps")[2])["models"]]
+        assert "cogito:8b" in [model["name"] for model in json.loads(_request(server, "GET", "/api/tags")[2])["models"]]
+
+        first = json.loads(_request(server, "POST", "/api/embeddings", {"model": "embeddinggemma", "prompt": "triage"})[2])
+        batch = json.loads(_request(server, "POST", "/api/embed", {"model": "embeddinggemma", "input": ["triage", "fuel"]})[2])
+        assert batch["embeddings"][0] == first["embedding"] and batch["embeddings"][1] != first["embedding"]
+        assert len(first["embedding"]) == server.config["embedding_dimension"]
+        assert abs(sum(value * value for value in first["embedding"]) - 1.0) < 1e-6
+        assert server.stats()["POST /api/chat"] == 4
+    finally:
+        server.stop()
+    logger.info("✓ Ollama routes return schema-valid, packed, streamed and embedding replies")
+
+
+def test_openai_route_and_agent_replies():
+    """Test the chat completions route and the canned replies of agent prompts without a schema."""
+    server = FakeLLMServer({**FAST, "actions_per_node": 2, "canned": {"Translate the plan": {"translation": "ok"}}})
+    server.start()
+    try:
+        actions = [{"action": "Open the EOC", "who": "Director"}, {"action": "Count beds", "who": "Nurse"}]
+        timing_prompt = get_timing_user_prompt("War response", "level: center", json.dumps(actions, indent=2))
+        status, _, body = _request(server, "POST", "/v1/chat/completions", {
+            "model": "gemini-2.5-flash",
+            "messages": [{"role": "system", "content": "You assign timing."}, {"role": "user", "content": timing_prompt}],
+            "response_format": {"type": "json_object"}
+        })
+        completion = json.loads(body)
+        assert status == 200 and completion["object"] == "chat.completion" and completion["usage"]["total_tokens"] > 0
+        timed = json.loads(completion["choices"][0]["message"]["content"])["actions"]
+        assert [action["action"] for action in timed] == ["Open the EOC", "Count beds"]
+        assert all(action["trigger"] and action["time_window"] for action in timed)
+
+        extractor_prompt = get_extractor_user_prompt("war", "Hospital Surge", "n12", 1, 40, "Open surge wards.")
+        extracted = json.loads(_chat(server, extractor_prompt, format="json")["message"]["content"])
+        assert len(extracted["actions"]) == 2 and extracted["formulas"] == [] and "Hospital Surge" in extracted["actions"][0]["action"]
+
+        assert json.loads(_chat(server, "Translate the plan into Persian.", format="json")["message"]["content"]) == {"translation": "ok"}
+        assert json.loads(_chat(server, "Something unknown.", format="json")["message"]["content"]) == {}
+
+        status, _, body = _request(server, "POST", "/v1/embeddings", {"model": "embed", "input": ["a", "b"]})
+        assert status == 200 and [item["index"] for item in json.loads(body)["data"]] == [0, 1]
+        assert "gemini-2.5-flash" in [model["id"] for model in json.loads(_request(server, "GET", "/v1/models")[2])["data"]]
+    finally:
+        server.stop()
+    logger.info("✓ OpenAI route and agent prompts get replies of the shape the agents expect")
+
+
+def test_failures_and_concurrency_limit():
+    """Test injected errors and rate limits and that at most max_concurrency requests generate at once."""
+    server = FakeLLMServer({**FAST, "error_rate": 1.0})
+    server.start()
+    try:
+        status, _, body = _request(server, "POST", "/api/chat", {"model": "m", "messages": [{"role": "user", "content": "x"}]})
+        assert status == 500 and json.loads(body)["error"] == "injected error"
+        server.config.update(error_rate=0.0, rate_limit_rate=1.0)
+        status, headers, body = _request(server, "POST", "/v1/chat/completions", {"model": "m", "messages": [{"role": "user", "content": "x"}]})
+        assert status == 429 and headers["Retry-After"] == "1" and "rate limit" in json.loads(body)["error"]["message"]
+        assert server.stats()["injected_error"] == 1 and server.stats()["injected_rate_limit"] == 1
+    finally:
+        server.stop()
+
+    server = FakeLLMServer({"latency": {"distribution": "fixed", "median": 0.2}, "tokens_per_second": 0, "max_concurrency": 2})
+    server.start()
+    try:
+        threads = [
+            threading.Thread(target=_chat, args=(server, f"Question {idx}")) for idx in range(4)
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        stats = server.stats()
+        assert stats["max_in_flight"] == 2 and 0.4 <= elapsed < 0.8
+        assert stats["latency_seconds"]["max"] >= 0.4 and stats["latency_seconds"]["p50"] >= 0.2
+    finally:
+        server.stop()
+    logger.info("✓ Failures are injected at the configured rates and concurrency is capped")
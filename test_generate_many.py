@@ -0,0 +1,91 @@
+"""
+Test script for multi-item prompt packing.
+
+Checks that LLMClient.generate_many answers independent items in one packed
+call, asks again only for the items whose result is missing or invalid, and
+falls back to one item per call before giving up on an item.
+"""
+
+import json
+import logging
+import re
+
+from utils.llm_client import LLMClient, packing_stats
+from utils.structured_output import StructuredOutputError
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _Settings:
+    llm_pack_max_items = 20
+    llm_pack_item_reply_tokens = 150
+
+
+def _client(reply_for):
+    """A client whose generate_json answers each packed prompt with reply_for(item texts)."""
+    client = LLMClient(provider="ollama", model="cogito:8b")
+    client.settings = _Settings()
+    calls = []
+
+    def fake_generate_json(prompt, system_prompt=None, schema=None, temperature=None, model_override=None, json_mode=False, reserve_tokens=None):
+        items = re.findall(r"### Item \d+\n(.*?)(?=\n\n### Item |\Z)", prompt.split("## Items\n", 1)[1], re.S)
+        calls.append(items)
+        assert "results" in schema["properties"] and reserve_tokens == len(items) * 150
+        return reply_for(items)
+
+    client.generate_json = fake_generate_json
+    return client, calls
+
+
+def test_single_packed_call():
+    """Test that all items are answered by one call, in the original order."""
+    client, calls = _client(lambda items: {"results": [
+        {"index": number, "result": len(text)} for number, text in reversed(list(enumerate(items, 1)))
+    ]})
+    before = packing_stats()
+    results = client.generate_many(["a", "bb", "ccc"], "Count the letters of each item.", {"type": "integer"})
+    assert results == [1, 2, 3] and len(calls) == 1
+    assert calls[0] == ["a", "bb", "ccc"]
+    after = packing_stats()
+    assert after["items"] - before["items"] == 3 and after["calls"] - before["calls"] == 1
+    logger.info("✓ Independent items are answered in one packed call")
+
+
+def test_reissues_missing_and_invalid_items():
+    """Test that only missing or invalid results are asked again, then one item per call."""
+    def reply_for(items):
+        if len(items) == 4:
+            # Item 2 has the wrong type, item 3 is missing and item 4 is answered twice
+            return {"results": [
+                {"index": 1, "result": "title one"},
+                {"index": 2, "result": 7},
+                {"index": 4, "result": "title four"},
+                {"index": 4, "result": "duplicate"},
+                {"index": 9, "result": "out of range"},
+            ]}
+        if len(items) == 2:
+            return {"results": [{"index": 1, "result": "title two"}]}
+        if items == ["table three"]:
+            raise StructuredOutputError("not JSON")
+        raise AssertionError(f"unexpected call: {items}")
+
+    client, calls = _client(reply_for)
+    tables = ["table one", "table two", "table three", "table four"]
+    results = client.generate_many(tables, "Infer a title for each table.", {"type": "string"})
+    assert results == ["title one", "title two", None, "title four"]
+    assert calls == [tables, ["table two", "table three"], ["table three"]]
+    logger.info("✓ Missing and invalid items are re-issued, then asked one per call")
+
+
+def test_max_items_per_call():
+    """Test that items are split into calls of at most max_items."""
+    client, calls = _client(lambda items: {"results": [{"index": n, "result": True} for n in range(1, len(items) + 1)]})
+    results = client.generate_many([f"node {idx}" for idx in range(7)], "Is each node relevant?", {"type": "boolean"}, max_items=3)
+    assert results == [True] * 7
+    assert [len(items) for items in calls] == [3, 3, 1]
+    assert json.dumps(calls[1]) == json.dumps(["node 3", "node 4", "node 5"])
+    logger.info("✓ Packed calls respect max_items")
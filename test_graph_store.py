@@ -0,0 +1,150 @@
+"""
+Test script for the embedded graph backend.
+
+Builds a small hierarchy in a temporary SQLite file and checks the
+GraphStore lookups the agents rely on (no Neo4j required).
+"""
+
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from rag_tools.graph_store import EmbeddedGraphStore
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _heading(node_id, title, start, end, parent_id=None, depth=1, level=1, summary=""):
+    return {
+        'id': node_id, 'title': title, 'level': level,
+        'start_line': start, 'end_line': end, 'summary': summary,
+        'source': 'docs/triage.md', 'doc_name': 'triage',
+        'parent_id': parent_id, 'depth': depth
+    }
+
+
+def _build_store(path):
+    store = EmbeddedGraphStore(path)
+    store.bulk_load(
+        documents=[{'name': 'triage', 'source': 'docs/triage.md', 'summary': 'Triage guide'}],
+        headings=[
+            _heading('h1', 'Introduction', 1, 10, summary="Scope of mass casualty triage"),
+            _heading('h2', 'Procedures', 11, 40),
+            _heading('h2.1', 'START Triage', 12, 25, parent_id='h2', depth=2, level=2),
+            _heading('h2.1.1', 'Red Tags', 13, 18, parent_id='h2.1', depth=3, level=3),
+        ],
+        embeddings={'h1': [1.0, 0.0], 'h2.1': [0.0, 2.0]}
+    )
+    return EmbeddedGraphStore(path)
+
+
+def test_embedded_graph_store():
+    """Test hierarchy navigation, search and embeddings on the embedded backend."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _build_store(os.path.join(tmp, "graph.db"))
+
+        assert [d['name'] for d in store.get_all_documents()] == ['triage']
+        assert [n['id'] for n in store.get_document_toc('triage')] == ['h1', 'h2']
+        assert [n['id'] for n in store.get_introduction_nodes('triage')] == ['h1', 'h2']
+        assert [n['id'] for n in store.get_children('h2')] == ['h2.1']
+        assert store.get_node_by_id('h2.1.1')['source'] == 'docs/triage.md'
+        assert store.get_node_by_id('missing') is None
+        assert [n['id'] for n in store.get_nodes_by_ids(['h2.1', 'missing', 'h1'])] == ['h2.1', 'h1']
+
+        assert [n['id'] for n in store.navigate_upward('h2.1.1', 2)] == ['h2']
+        assert store.navigate_upward('h2', 1) == []
+        assert store.get_section_path('h2.1.1') == ['triage', 'Procedures', 'START Triage', 'Red Tags']
+
+        assert [n['id'] for n in store.search_headings(['casualty'])] == ['h1']
+        assert store.search_headings(['casualty'], title_only=True) == []
+        assert store.search_headings(['triage'], document_names=['other']) == []
+
+        nodes, matrix = store.get_summary_embeddings()
+        assert [n['id'] for n in nodes] == ['h1', 'h2.1']
+        assert matrix.dtype == np.float32 and matrix.shape == (2, 2)
+        nodes, matrix = store.get_summary_embeddings(['h2.1'])
+        assert matrix.tolist() == [[0.0, 2.0]]
+
+        logger.info("✓ Embedded graph store lookups match the expected hierarchy")
+
+
+class _NoNeo4j:
+    """Stands in for neo4j.GraphDatabase: any attempt to open a driver fails the test."""
+
+    def driver(self, *args, **kwargs):
+        raise AssertionError("the embedded backend must not open a Neo4j driver")
+
+
+def test_embedded_backend_without_neo4j():
+    """Test special protocols, input validation and graph-expanded retrieval on the embedded backend."""
+    import rag_tools.graph_store as graph_store_module
+    import utils.neo4j_client as neo4j_client
+    from rag_tools.graph_aware_rag import GraphAwareRAG
+    from utils.document_hierarchy_loader import DocumentHierarchyLoader
+    from utils.input_validator import InputValidator
+
+    class _Embeddings:
+        def embed(self, text):
+            return [0.0, 1.0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "graph.db")
+        _build_store(path).bulk_load(
+            documents=[{'name': 'triage', 'source': 'docs/triage.md', 'summary': 'Triage guide'}],
+            headings=[
+                _heading('h1', 'Introduction', 1, 10),
+                _heading('h2', 'Procedures', 11, 40),
+                _heading('h2.1', 'START Triage', 12, 25, parent_id='h2', depth=2, level=2),
+                _heading('h2.1.1', 'Red Tags', 13, 18, parent_id='h2.1', depth=3, level=3),
+            ],
+            embeddings={'h1': [1.0, 0.0], 'h2': [0.6, 0.8], 'h2.1': [0.0, 1.0], 'h2.1.1': [0.8, 0.6]}
+        )
+        saved = (graph_store_module._graph_store, neo4j_client.GraphDatabase, dict(neo4j_client.SharedNeo4jDriver._drivers))
+        graph_store_module._graph_store = EmbeddedGraphStore(path)
+        neo4j_client.GraphDatabase = _NoNeo4j()
+        neo4j_client.SharedNeo4jDriver._drivers.clear()
+        try:
+            # Special protocols node and input validation
+            loader = DocumentHierarchyLoader()
+            assert loader.expand_node_ids_with_subsections(['h2']) == ['h2', 'h2.1', 'h2.1.1']
+            assert loader.get_nested_subsections('h2') == ['h2.1', 'h2.1.1']
+            assert [n['id'] for n in loader.format_for_extractor(['h2.1.1', 'h2'])] == ['h2', 'h2.1.1']
+            assert loader.format_for_extractor(['h2'])[0]['document'] == 'triage'
+            assert [s['node_id'] for s in loader.get_document_sections('triage')] == ['h1', 'h2', 'h2.1', 'h2.1.1']
+            assert loader.get_all_documents() == [{'name': 'triage', 'source': 'docs/triage.md'}]
+            assert InputValidator.validate_special_protocols(['h2', 'h2.1']) == (True, [])
+            is_valid, errors = InputValidator.validate_special_protocols(['h2', 'missing'])
+            assert not is_valid and 'missing' in errors[0]
+
+            # Node context and graph-expanded retrieval
+            rag = GraphAwareRAG.__new__(GraphAwareRAG)
+            rag.graph_store = graph_store_module.get_graph_store()
+            rag.embedding_client = _Embeddings()
+            rag._summary_index = None
+            rag._hierarchy = None
+            context = rag.get_node_context('h2.1', include_children=True)
+            assert context['node']['title'] == 'START Triage' and context['parent']['id'] == 'h2'
+            assert [child['id'] for child in context['children']] == ['h2.1.1']
+            assert rag.get_node_context('h1')['parent'] == {'id': 'triage', 'title': 'triage', 'level': 0, 'summary': ""}
+
+            results = rag.graph_expanded_retrieve("triage", top_k=4, expansion_depth=1, expansion_boost=0.3)
+            assert [r['node_id'] for r in results] == ['h2.1', 'h2', 'h2.1.1', 'h1']
+            assert abs(results[0]['score'] - 1.24) < 1e-5 and results[-1]['graph_boost'] == 0.0
+            assert [m['id'] for m in results[0]['related_matches']] == ['h2', 'h2.1.1']
+            deeper = {r['node_id']: r for r in rag.graph_expanded_retrieve("triage", top_k=4, expansion_depth=2)}
+            assert abs(deeper['h2.1.1']['graph_boost'] - 0.3) < 1e-5
+
+            hybrid = {r['node_id']: r for r in rag.hybrid_retrieve_with_graph_expansion("triage", top_k=4, expansion_depth=1)}
+            assert hybrid['h2.1']['metadata']['related_count'] == 3 and hybrid['h1']['metadata']['related_count'] == 1
+            assert abs(hybrid['h2.1']['score'] - 1.3) < 1e-5
+        finally:
+            graph_store_module._graph_store, neo4j_client.GraphDatabase, drivers = saved
+            neo4j_client.SharedNeo4jDriver._drivers.update(drivers)
+
+        logger.info("✓ Special protocols, validation and graph expansion run without Neo4j")
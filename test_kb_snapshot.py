@@ -0,0 +1,220 @@
+"""
+Test script for knowledge-base snapshots.
+
+Exports an embedded graph and a Chroma store (both in a temporary
+directory, no Neo4j or Ollama required) and imports the snapshot into
+empty stores, then checks that a corrupt or inconsistent snapshot is
+rejected before anything is replaced.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import zipfile
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings as ChromaSettings
+
+from config.settings import get_settings
+from rag_tools.graph_store import EmbeddedGraphStore
+from utils.chroma_client import SharedChromaClient
+from utils.kb_snapshot import export_snapshot, import_snapshot
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _heading(node_id, title, start, parent_id=None, depth=1):
+    return {
+        'id': node_id, 'title': title, 'level': depth,
+        'start_line': start, 'end_line': start + 5, 'summary': f"{title} summary",
+        'source': 'docs/triage.md', 'doc_name': 'triage',
+        'parent_id': parent_id, 'depth': depth
+    }
+
+
+class _Stores:
+    """Point the settings and the shared Chroma client at a directory of empty stores."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __enter__(self):
+        settings = get_settings()
+        self.saved = (settings.graph_backend, settings.embedded_graph_path, SharedChromaClient()._client)
+        settings.graph_backend = "embedded"
+        settings.embedded_graph_path = os.path.join(self.directory, "graph.db")
+        SharedChromaClient()._client = chromadb.PersistentClient(
+            path=os.path.join(self.directory, "chroma"),
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+        return SharedChromaClient()._client
+
+    def __exit__(self, *exc):
+        settings = get_settings()
+        settings.graph_backend, settings.embedded_graph_path, SharedChromaClient()._client = self.saved
+        return False
+
+
+def _populate(client):
+    EmbeddedGraphStore().bulk_load(
+        documents=[{'name': 'triage', 'source': 'docs/triage.md', 'summary': 'Triage guide', 'type': 'guideline'}],
+        headings=[
+            _heading('h1', 'Introduction', 1),
+            _heading('h2', 'Procedures', 10),
+            _heading('h2.1', 'START Triage', 12, parent_id='h2', depth=2),
+        ],
+        embeddings={'h1': [1.0, 0.0, 0.0], 'h2.1': [0.0, 0.6, 0.8]}
+    )
+    collection = client.create_collection("documents", metadata={"hnsw:space": "cosine"})
+    collection.add(
+        ids=["c1", "c2"],
+        embeddings=[[0.1, 0.2, 0.3], [0.3, 0.2, 0.1]],
+        metadatas=[{"source": "docs/triage.md", "node_id": "h1"}, {"source": "docs/triage.md", "node_id": "h2.1"}],
+        documents=["Open the triage area", "Tag red, yellow, green"]
+    )
+
+
+def _rewrite(path, target, name, data):
+    """Copy a snapshot, replacing one entry."""
+    with zipfile.ZipFile(path) as source, zipfile.ZipFile(target, "w") as archive:
+        for item in source.infolist():
+            archive.writestr(item, data if item.filename == name else source.read(item.filename))
+
+
+def test_round_trip():
+    """Test that exporting and importing reproduces the graph, embeddings and collections."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kb.snapshot")
+        with _Stores(os.path.join(tmp, "source")) as client:
+            _populate(client)
+            ok, message = export_snapshot(path)
+            assert ok, message
+            assert "4 nodes, 3 relationships, 2 node embeddings and 2 vectors in 1 collections" in message
+
+        with _Stores(os.path.join(tmp, "target")) as client:
+            ok, message = import_snapshot(path)
+            assert ok, message
+            documents, headings, embeddings = EmbeddedGraphStore().dump()
+            assert documents == [{'name': 'triage', 'source': 'docs/triage.md', 'summary': 'Triage guide', 'type': 'guideline'}]
+            assert headings == [
+                _heading('h1', 'Introduction', 1),
+                _heading('h2', 'Procedures', 10),
+                _heading('h2.1', 'START Triage', 12, parent_id='h2', depth=2),
+            ]
+            assert sorted(embeddings) == ['h1', 'h2.1']
+            assert np.allclose(embeddings['h2.1'], [0.0, 0.6, 0.8])
+
+            assert [c.name for c in client.list_collections()] == ["documents"]
+            collection = client.get_collection("documents")
+            assert collection.metadata["hnsw:space"] == "cosine"
+            records = collection.get(ids=["c2"], include=["embeddings", "metadatas", "documents"])
+            assert records["documents"] == ["Tag red, yellow, green"]
+            assert records["metadatas"][0]["node_id"] == "h2.1"
+            assert np.allclose(records["embeddings"][0], [0.3, 0.2, 0.1])
+    logger.info("✓ Snapshot round trip reproduces the embedded graph and Chroma collections")
+
+
+def test_invalid_snapshot_leaves_stores_untouched():
+    """Test that a corrupt or inconsistent snapshot is rejected before anything is replaced."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kb.snapshot")
+        with _Stores(os.path.join(tmp, "source")) as client:
+            _populate(client)
+            ok, message = export_snapshot(path)
+            assert ok, message
+
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read("manifest.json"))
+            records = json.loads(archive.read("chroma/documents/records.json"))
+        manifest['graph']['nodes'] += 1
+        records['ids'].append("c3")
+        broken = {
+            "manifest": ("manifest.json", json.dumps(manifest)),
+            "records": ("chroma/documents/records.json", json.dumps(records)),
+            "edges": ("graph/edges.json", json.dumps([{'start': 'x', 'end': 'y', 'type': 'HAS_SUBSECTION', 'props': {}}])),
+        }
+
+        with _Stores(os.path.join(tmp, "target")) as client:
+            EmbeddedGraphStore().bulk_load(
+                documents=[{'name': 'current', 'source': 'docs/current.md', 'summary': ''}],
+                headings=[dict(_heading('c1', 'Current', 1), doc_name='current')]
+            )
+            client.create_collection("documents").add(ids=["keep"], embeddings=[[1.0, 1.0, 1.0]])
+
+            for name, (entry, data) in broken.items():
+                target = os.path.join(tmp, f"{name}.snapshot")
+                _rewrite(path, target, entry, data)
+                ok, message = import_snapshot(target)
+                assert not ok and "Snapshot import failed" in message, message
+
+            assert [d['name'] for d in EmbeddedGraphStore().dump()[0]] == ['current']
+            assert [c.name for c in client.list_collections()] == ["documents"]
+            assert client.get_collection("documents").get()["ids"] == ["keep"]
+    logger.info("✓ Invalid snapshots are rejected without touching the current stores")
+
+
+def test_neo4j_import_is_staged():
+    """Test that the Neo4j import deletes the current graph only after staging succeeded."""
+    import utils.db_init as db_init
+    import utils.kb_snapshot as kb_snapshot
+    import utils.neo4j_client as neo4j_client
+
+    nodes = [
+        {'key': 'd', 'labels': ['Document'], 'props': {'name': 'triage'}},
+        {'key': 'h', 'labels': ['Heading'], 'props': {'id': 'h1', 'summary_embedding': np.ones(2, dtype=np.float32)}},
+    ]
+    edges = [{'start': 'd', 'end': 'h', 'type': 'HAS_SUBSECTION', 'props': {}}]
+
+    def run(fail_on):
+        queries = []
+
+        def execute_write(query, **params):
+            text = " ".join(query.split())
+            queries.append(text)
+            if fail_on and fail_on in text:
+                raise RuntimeError("write failed")
+            if text.endswith("as deleted") or text.endswith("as promoted"):
+                return [{'deleted': 0, 'promoted': 0}]
+            return []
+
+        saved = neo4j_client.execute_write
+        neo4j_client.execute_write = execute_write
+        try:
+            kb_snapshot._import_neo4j(nodes, edges)
+        except RuntimeError:
+            pass
+        finally:
+            neo4j_client.execute_write = saved
+        return queries
+
+    failed = run("CREATE (a)-[r:`HAS_SUBSECTION`]")
+    assert not any("WHERE NOT n:`_SnapshotStaging`" in q for q in failed)
+    assert failed[-2].startswith("MATCH (n:`_SnapshotStaging`) WITH n LIMIT 10000 DETACH DELETE n")
+    assert failed[-1] == "DROP INDEX snapshot_staging_key IF EXISTS"
+
+    previous = (db_init.ensure_neo4j_schema, neo4j_client.neo4j_session)
+
+    class _Session:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    db_init.ensure_neo4j_schema = lambda session: None
+    neo4j_client.neo4j_session = lambda write=False: _Session()
+    try:
+        succeeded = run(None)
+    finally:
+        db_init.ensure_neo4j_schema, neo4j_client.neo4j_session = previous
+    staged = max(i for i, q in enumerate(succeeded) if "CREATE (a)-[r:`HAS_SUBSECTION`]" in q)
+    swapped = succeeded.index("MATCH (n) WHERE NOT n:`_SnapshotStaging` WITH n LIMIT 10000 DETACH DELETE n RETURN count(*) as deleted")
+    assert staged < swapped
+    assert any("SET n:`Heading` REMOVE n:`_SnapshotStaging`" in q for q in succeeded[swapped:])
+    logger.info("✓ Neo4j import stages the snapshot before deleting the current graph")
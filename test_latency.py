@@ -0,0 +1,172 @@
+"""
+Test script for tail-latency control.
+
+Checks that timeouts follow the observed p99 per (model, agent) and widen
+after a timeout, that the circuit breaker fails fast and lets one trial call
+through after its cooldown, that a slow Ollama request is hedged on a
+second host with the first reply kept, and that latency and the hedge delay
+count from scheduler admission rather than from queueing.
+"""
+
+import logging
+import threading
+import time
+
+import utils.ollama_pool as ollama_pool
+from utils.latency import LatencyTracker, CircuitBreaker, CircuitOpenError, get_latency_tracker
+from utils.llm_client import LLMClient, llm_request_slot
+from utils.ollama_pool import OllamaEndpointPool
+from utils.run_budget import current_run_budget
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _Settings:
+    ollama_timeout = 3000
+    llm_adaptive_timeouts = True
+    llm_latency_min_samples = 5
+    llm_timeout_multiplier = 3.0
+    llm_min_timeout = 1.0
+    enable_hedged_requests = True
+    llm_hedge_percentile = 0.95
+    llm_breaker_failures = 2
+    llm_breaker_cooldown = 0.2
+    ollama_base_url = "http://localhost:11434"
+    ollama_base_urls = []
+    ollama_sticky_slack = 2
+    ollama_eject_after_failures = 3
+    ollama_eject_seconds = 30.0
+    ollama_health_check_interval = 0
+
+
+def test_adaptive_timeout():
+    """Test that the timeout is the configured one until enough samples, then p99 x multiplier."""
+    tracker = LatencyTracker(_Settings())
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        tracker.record("cogito:8b", "assigner", seconds)
+    assert tracker.timeout("cogito:8b", "assigner", 3000) == 3000
+    assert tracker.hedge_delay("cogito:8b", "assigner") is None
+
+    tracker.record("cogito:8b", "assigner", 2.0)
+    assert tracker.timeout("cogito:8b", "assigner", 3000) == 6.0
+    assert tracker.timeout("cogito:8b", "assigner", 4) == 4  # Never above the configured timeout
+    assert tracker.timeout("cogito:8b", "analyzer", 3000) == 3000  # Per agent
+
+    tracker.record("cogito:8b", "assigner", 6.0, timed_out=True)
+    assert tracker.timeout("cogito:8b", "assigner", 3000) == 18.0
+    stats = tracker.stats()["cogito:8b/assigner"]
+    assert stats["count"] == 6 and stats["timeouts"] == 1 and stats["p50"] == 0.3
+    logger.info("✓ Timeouts follow observed latency per (model, agent)")
+
+
+def test_circuit_breaker():
+    """Test that repeated failures open the circuit and a trial call closes it."""
+    breaker = CircuitBreaker("https://api.example/v1", _Settings())
+    breaker.check()
+    breaker.record_failure(ConnectionError("refused"))
+    breaker.check()
+    breaker.record_failure(ConnectionError("refused"))
+    try:
+        breaker.check()
+        raise AssertionError("an open circuit should fail fast")
+    except CircuitOpenError:
+        pass
+    assert breaker.stats()["open"] and breaker.stats()["opened"] == 1
+
+    time.sleep(0.25)
+    breaker.check()  # The trial call
+    try:
+        breaker.check()
+        raise AssertionError("only one trial call should pass while half-open")
+    except CircuitOpenError:
+        pass
+    breaker.record_success()
+    breaker.check()
+    assert breaker.stats() == {"open": False, "failures": 0, "opened": 1}
+    logger.info("✓ The circuit breaker fails fast and recovers after a trial call")
+
+
+def test_hedged_request():
+    """Test that a request past its hedge delay is raced on another host and the first reply wins."""
+    previous_pool = ollama_pool._pool
+    ollama_pool._pool = OllamaEndpointPool(["http://cpu-1:11434", "http://cpu-2:11434"], _Settings())
+    client = LLMClient(provider="ollama", model="cogito:8b")
+    client.settings = _Settings()
+    client.agent_name = "test-hedge"
+    for _ in range(20):
+        get_latency_tracker().record("cogito:8b", "test-hedge", 0.05)
+
+    calls = []
+    primary_cancelled = threading.Event()
+
+    def fake_post(endpoint, payload, timeout, budget, failed_hosts=None, cancel=None, chosen_hosts=None, hedge=False,
+                  inflight=None, on_admitted=None):
+        calls.append((hedge, set(failed_hosts or ())))
+        if on_admitted is not None:
+            on_admitted()
+        if hedge:
+            return {"message": {"content": "from the hedge"}}
+        if chosen_hosts is not None:
+            chosen_hosts.append("http://cpu-1:11434")
+        if cancel is not None and cancel.wait(2):
+            primary_cancelled.set()
+            return {}
+        return {"message": {"content": "from the primary"}}
+
+    client._post = fake_post
+    try:
+        started = time.monotonic()
+        reply = client._post_hedged("/api/chat", {"model": "cogito:8b"}, 10, current_run_budget(), set())
+        assert reply["message"]["content"] == "from the hedge"
+        assert time.monotonic() - started < 1.5
+        assert primary_cancelled.wait(1)
+        # The hedge avoided the primary's host
+        assert calls[1] == (True, {"http://cpu-1:11434"})
+
+        client.settings.enable_hedged_requests = False
+        calls.clear()
+        reply = client._post_hedged("/api/chat", {"model": "cogito:8b"}, 10, current_run_budget(), set())
+        assert reply["message"]["content"] == "from the primary" and len(calls) == 1
+    finally:
+        ollama_pool._pool = previous_pool
+    logger.info("✓ Slow requests are hedged on a second host")
+
+
+def test_latency_counts_from_admission():
+    """Test that queue wait is neither recorded as latency nor counted toward the hedge delay."""
+    previous_pool = ollama_pool._pool
+    ollama_pool._pool = OllamaEndpointPool(["http://cpu-1:11434", "http://cpu-2:11434"], _Settings())
+    client = LLMClient(provider="ollama", model="cogito:8b")
+    client.settings = _Settings()
+    client.agent_name = "test-admission"
+    for _ in range(20):
+        get_latency_tracker().record("cogito:8b", "test-admission", 0.2)
+
+    hedges = []
+
+    def fake_post(endpoint, payload, timeout, budget, failed_hosts=None, cancel=None, chosen_hosts=None, hedge=False,
+                  inflight=None, on_admitted=None):
+        if hedge:
+            hedges.append(time.monotonic())
+            return {"message": {"content": "from the hedge"}}
+        time.sleep(0.5)  # Queued behind other requests
+        with llm_request_slot("ollama", "cogito:8b"):
+            if on_admitted is not None:
+                on_admitted()
+            time.sleep(0.1)
+            return {"message": {"content": "from the primary"}}
+
+    client._post = fake_post
+    try:
+        reply = client._make_request("/api/chat", {"model": "cogito:8b"})
+        assert reply["message"]["content"] == "from the primary"
+        assert not hedges  # 0.5s queued + 0.1s running, under the 0.2s hedge delay once admitted
+        stats = get_latency_tracker().stats()["cogito:8b/test-admission"]
+        assert stats["count"] == 21 and stats["p99"] < 0.4
+    finally:
+        ollama_pool._pool = previous_pool
+    logger.info("✓ Latency and the hedge delay count from scheduler admission")
@@ -0,0 +1,112 @@
+"""
+Test script for LLM cassettes.
+
+Checks that record mode writes each generate / generate_json reply with its
+timing, that replay mode serves the replies in recorded order without
+calling the provider, with recorded or synthetic latency, and that a request
+that was never recorded fails loudly.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+
+import utils.llm_cassette as llm_cassette
+from utils.llm_cassette import Cassette, CassetteMissError
+from utils.llm_client import LLMClient
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _client(replies):
+    """An Ollama client whose provider calls return the given replies in order."""
+    client = LLMClient(provider="ollama", model="cogito:8b")
+    calls = []
+
+    def fake_generate(*args):
+        calls.append(args[0])
+        time.sleep(0.05)
+        return replies.pop(0)
+
+    client._generate_ollama = fake_generate
+    client._generate_json_ollama = fake_generate
+    return client, calls
+
+
+def _use(cassette, action):
+    previous = llm_cassette._cassette
+    llm_cassette._cassette = cassette
+    try:
+        return action()
+    finally:
+        llm_cassette._cassette = previous
+
+
+def test_record_then_replay():
+    """Test that recorded replies are replayed in order without calling the provider."""
+    path = os.path.join(tempfile.mkdtemp(), "cassettes", "run.jsonl")
+    client, calls = _client(["first", "second", {"score": 8}])
+
+    def run():
+        return [
+            client.generate("Summarize the node.", system_prompt="You summarize."),
+            client.generate("Summarize the node.", system_prompt="You summarize."),
+            client.generate_json("Score the table.", schema={"type": "object"}),
+        ]
+
+    assert _use(Cassette(path, "record"), run) == ["first", "second", {"score": 8}]
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry["kind"] for entry in entries] == ["generate", "generate", "generate_json"]
+    assert entries[0]["key"] == entries[1]["key"] and entries[0]["seconds"] >= 0.05
+    assert entries[2]["request"]["schema"] == {"type": "object"} and entries[2]["request"]["model"] == "cogito:8b"
+
+    replay = Cassette(path, "replay")
+    client, calls = _client([])
+    results = _use(replay, run)
+    assert results == ["first", "second", {"score": 8}] and calls == []
+    # Once a request's recordings run out, its last reply repeats
+    assert _use(replay, lambda: client.generate("Summarize the node.", system_prompt="You summarize.")) == "second"
+    assert _use(replay, client.check_connection) is True
+    assert replay.stats()["replayed"] == 4
+    logger.info("✓ Recorded replies are replayed in order without the provider")
+
+
+def test_replay_latency_and_misses():
+    """Test recorded and synthetic replay latency and the error for unrecorded requests."""
+    path = os.path.join(tempfile.mkdtemp(), "run.jsonl")
+    recorder = Cassette(path, "record")
+    recorder.record("embedding", {"model": "embeddinggemma", "prompt": "triage"}, [0.1, 0.2], 0.2)
+
+    started = time.monotonic()
+    assert Cassette(path, "replay").replay("embedding", {"model": "embeddinggemma", "prompt": "triage"}) == [0.1, 0.2]
+    assert time.monotonic() - started < 0.1
+
+    started = time.monotonic()
+    Cassette(path, "replay", latency="recorded").replay("embedding", {"model": "embeddinggemma", "prompt": "triage"})
+    assert time.monotonic() - started >= 0.2
+
+    started = time.monotonic()
+    Cassette(path, "replay", latency="0.1").replay("embedding", {"model": "embeddinggemma", "prompt": "triage"})
+    assert 0.1 <= time.monotonic() - started < 0.2
+
+    replay = Cassette(path, "replay")
+    try:
+        replay.replay("embedding", {"model": "embeddinggemma", "prompt": "evacuation"})
+        raise AssertionError("an unrecorded request should fail")
+    except CassetteMissError as e:
+        assert "LLM_CASSETTE_MODE=record" in str(e)
+    assert replay.stats()["missed"] == 1
+
+    try:
+        Cassette(path, "rewind")
+        raise AssertionError("an unknown mode should be rejected")
+    except ValueError:
+        pass
+    logger.info("✓ Replays wait as configured and unrecorded requests fail loudly")
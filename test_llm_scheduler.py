@@ -0,0 +1,180 @@
+"""
+Test script for the LLM request scheduler.
+
+Checks that per-model concurrency caps hold, that interactive runs are
+admitted ahead of batch runs, that waiting requests are shared fairly across
+concurrent runs, that the token bucket paces requests, that requests for the
+loaded Ollama model go first and a swap drains it, and that queue metrics
+and model loads are reported.
+"""
+
+import logging
+import threading
+import time
+
+from utils.llm_client import (
+    LLMScheduler, OllamaModelTracker, get_model_tracker, bind_llm_request_context, reset_llm_request_context
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _Settings:
+    llm_max_concurrency = 8
+    ollama_max_concurrency_per_model = 2
+    openai_max_concurrency_per_model = 8
+    llm_concurrency_limits = {}
+    llm_requests_per_minute = {}
+    llm_rate_burst = 1
+    ollama_max_loaded_models = 1
+    ollama_affinity_max_wait = 30.0
+    ollama_keep_alive_seconds = 1800
+
+
+def _request(scheduler, run, priority, admitted, hold=0.0, model="cogito:8b"):
+    token = bind_llm_request_context(run, priority)
+    try:
+        with scheduler.slot("ollama", model):
+            admitted.append(run if model == "cogito:8b" else f"{run}@{model}")
+            time.sleep(hold)
+    finally:
+        reset_llm_request_context(token)
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def _wait_queued(scheduler, count):
+    deadline = time.monotonic() + 5
+    while scheduler.stats()["queued"] < count:
+        assert time.monotonic() < deadline, "requests were not queued"
+        time.sleep(0.01)
+
+
+def test_per_model_cap():
+    """Test that no more than the per-model cap run at once."""
+    scheduler = LLMScheduler(_Settings())
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def request():
+        with scheduler.slot("ollama", "cogito:8b"):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    threads = [_start(request) for _ in range(6)]
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+    stats = scheduler.stats()["by_model"]["ollama:cogito:8b"]
+    assert stats["requests"] == 6 and stats["queued"] >= 4 and stats["max_wait_seconds"] > 0
+    logger.info("✓ Concurrency is capped per (provider, model)")
+
+
+def test_priority_and_fairness():
+    """Test that interactive requests go first and runs share the queue fairly."""
+    settings = _Settings()
+    settings.ollama_max_concurrency_per_model = 1
+    scheduler = LLMScheduler(settings)
+    admitted = []
+
+    blocker = _start(_request, scheduler, "batch-a", "batch", admitted, 0.3)
+    while not admitted:
+        time.sleep(0.01)
+    threads = []
+    for run in ("batch-a", "batch-a", "batch-b"):
+        threads.append(_start(_request, scheduler, run, "batch", admitted))
+        _wait_queued(scheduler, len(threads))
+    threads.append(_start(_request, scheduler, "ui", "interactive", admitted))
+    _wait_queued(scheduler, len(threads))
+
+    blocker.join()
+    for thread in threads:
+        thread.join()
+    # The interactive run jumps the queue; batch-b is not starved behind batch-a's backlog
+    assert admitted[1] == "ui"
+    assert admitted.index("batch-b") < len(admitted) - 1
+    logger.info("✓ Interactive runs go first and runs are queued fairly")
+
+
+def test_rate_limit_and_throttle():
+    """Test token-bucket pacing and the pause after a 429."""
+    settings = _Settings()
+    settings.llm_requests_per_minute = {"openai": 600}  # One request per 0.1s, burst of 1
+    scheduler = LLMScheduler(settings)
+
+    started = time.monotonic()
+    for _ in range(3):
+        with scheduler.slot("openai", "gemini-2.5-flash"):
+            pass
+    assert time.monotonic() - started >= 0.18
+
+    scheduler.throttle("openai", 0.3)
+    started = time.monotonic()
+    with scheduler.slot("openai", "gemini-2.5-flash"):
+        pass
+    assert time.monotonic() - started >= 0.25
+    assert scheduler.stats()["throttled"] == 1
+    logger.info("✓ Requests are paced per provider and paused after a 429")
+
+
+def test_model_affinity():
+    """Test that the loaded model's requests go first and a swap lets it drain."""
+    settings = _Settings()
+    settings.ollama_max_concurrency_per_model = 1
+    scheduler = LLMScheduler(settings)
+    get_model_tracker().note_reply("cogito:8b", {})  # cogito:8b was used last, so it is loaded
+    admitted = []
+
+    blocker = _start(_request, scheduler, "a", "batch", admitted, 0.3)
+    while not admitted:
+        time.sleep(0.01)
+    threads = [_start(_request, scheduler, "b", "batch", admitted, 0.0, "gemma3:27b")]
+    _wait_queued(scheduler, 1)
+    threads.append(_start(_request, scheduler, "c", "batch", admitted))
+    _wait_queued(scheduler, 2)
+    blocker.join()
+    for thread in threads:
+        thread.join()
+    # The later request for the loaded model runs before the one that needs a swap
+    assert admitted == ["a", "c", "b@gemma3:27b"]
+
+    settings.ollama_max_concurrency_per_model = 2
+    admitted.clear()
+    blocker = _start(_request, scheduler, "a", "batch", admitted, 0.3)
+    while not admitted:
+        time.sleep(0.01)
+    threads = [_start(_request, scheduler, "ui", "interactive", admitted, 0.0, "gemma3:27b")]
+    _wait_queued(scheduler, 1)
+    threads.append(_start(_request, scheduler, "c", "batch", admitted))
+    _wait_queued(scheduler, 2)
+    blocker.join()
+    for thread in threads:
+        thread.join()
+    # A held interactive request stops new batch requests to the loaded model until it swaps
+    assert admitted == ["a", "ui@gemma3:27b", "c"]
+    logger.info("✓ Requests are grouped by loaded model and swaps drain the current one")
+
+
+def test_model_load_tracking():
+    """Test that replies mark models resident and slow loads are counted."""
+    settings = _Settings()
+    settings.ollama_max_loaded_models = 2
+    tracker = OllamaModelTracker(settings)
+
+    assert tracker.note_reply("cogito:8b", {"load_duration": 5_000_000}) == 0.0
+    assert tracker.note_reply("gemma3:27b", {"load_duration": 4_200_000_000}) == 4.2
+    tracker.note_reply("gpt-oss:20b", {"load_duration": 0})
+    assert tracker.resident() == {"gemma3:27b", "gpt-oss:20b"}
+    assert tracker.stats()["loads"] == 1
+    logger.info("✓ Model residency and loads are tracked")
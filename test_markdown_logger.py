@@ -0,0 +1,90 @@
+"""
+Test script for the buffered MarkdownLogger.
+
+Checks that entries are buffered and written on flush, by the background
+flusher and on close, and that entries above the configured verbosity are
+dropped before their payload is formatted.
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+from utils.markdown_logger import MarkdownLogger, ContextMarkdownLogger, is_log_enabled
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _CountingPayload:
+    """Payload that records how often it is formatted."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "payload"
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_entries_are_buffered_until_flush():
+    """Test that writes go to memory first and all reach the file on close."""
+    with tempfile.TemporaryDirectory() as tmp:
+        markdown_logger = MarkdownLogger(os.path.join(tmp, "plan_log.md"))
+        for idx in range(1000):
+            markdown_logger.add_list_item(f"item {idx}")
+        markdown_logger.flush()
+        assert "item 999" in _read(markdown_logger.log_file_path)
+
+        markdown_logger.add_text("last entry")
+        markdown_logger.close()
+        content = _read(markdown_logger.log_file_path)
+        assert content.index("item 999") < content.index("last entry") < content.index("**Log closed:**")
+
+        markdown_logger.add_text("after close")
+        assert "after close" in _read(markdown_logger.log_file_path)
+    logger.info("✓ Buffered entries are written in order on flush and close")
+
+
+def test_background_flush():
+    """Test that buffered entries reach the file without an explicit flush."""
+    with tempfile.TemporaryDirectory() as tmp:
+        markdown_logger = MarkdownLogger(os.path.join(tmp, "plan_log.md"))
+        markdown_logger.add_text("flushed in the background")
+        deadline = time.monotonic() + 5
+        while "flushed in the background" not in _read(markdown_logger.log_file_path):
+            assert time.monotonic() < deadline, "the flusher did not write the entry"
+            time.sleep(0.1)
+        markdown_logger.close()
+    logger.info("✓ The background flusher writes pending entries")
+
+
+def test_verbosity_skips_formatting():
+    """Test that disabled entries are never formatted."""
+    with tempfile.TemporaryDirectory() as tmp:
+        payload = _CountingPayload()
+        markdown_logger = MarkdownLogger(os.path.join(tmp, "plan_log.md"), verbosity="normal")
+        markdown_logger.log_agent_start("Selector", payload)
+        markdown_logger.log_agent_output("Selector", payload)
+        markdown_logger.add_text("per-item detail", verbosity="verbose")
+        markdown_logger.log_error("Selector", "kept at every level")
+        markdown_logger.close()
+
+        content = _read(markdown_logger.log_file_path)
+        assert payload.formatted == 0
+        assert "## Selector Agent" in content and "per-item detail" not in content
+        assert "kept at every level" in content
+
+        assert not is_log_enabled(markdown_logger, "verbose") and is_log_enabled(markdown_logger, "normal")
+        assert not is_log_enabled(ContextMarkdownLogger(), "minimal")
+        assert is_log_enabled(object(), "verbose")
+    logger.info("✓ Entries above the verbosity are dropped before formatting")
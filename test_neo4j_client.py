@@ -0,0 +1,133 @@
+"""
+Test script for the shared Neo4j driver.
+
+Checks with a mocked neo4j driver that SharedNeo4jDriver keeps one driver
+per (uri, user) for the process, registers a single atexit close, that
+close_neo4j_drivers closes and forgets them, and that execute_read /
+execute_write route sessions and managed transactions to readers / writers.
+"""
+
+import logging
+
+import utils.neo4j_client as neo4j_client
+from neo4j import READ_ACCESS, WRITE_ACCESS
+from utils.neo4j_client import SharedNeo4jDriver, close_neo4j_drivers, execute_read, execute_write, get_neo4j_driver
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _Transaction:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def run(self, cypher, params):
+        self.calls.append((cypher, params))
+        return [{"id": "h1", "title": "Triage"}]
+
+
+class _Session:
+    def __init__(self, driver, kwargs):
+        self.driver = driver
+        self.kwargs = kwargs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_read(self, work):
+        self.driver.managed.append("read")
+        work(_Transaction(self.driver.calls))  # A transient error: the driver re-runs the function
+        return work(_Transaction(self.driver.calls))
+
+    def execute_write(self, work):
+        self.driver.managed.append("write")
+        return work(_Transaction(self.driver.calls))
+
+
+class _Driver:
+    def __init__(self, uri, **kwargs):
+        self.uri = uri
+        self.kwargs = kwargs
+        self.sessions = []
+        self.managed = []
+        self.calls = []
+        self.closed = False
+
+    def session(self, **kwargs):
+        self.sessions.append(kwargs)
+        return _Session(self, kwargs)
+
+    def close(self):
+        self.closed = True
+
+
+class _GraphDatabase:
+    def __init__(self):
+        self.created = []
+
+    def driver(self, uri, **kwargs):
+        driver = _Driver(uri, **kwargs)
+        self.created.append(driver)
+        return driver
+
+
+class _Patched:
+    """Swap in the mocked GraphDatabase and atexit and start from an empty registry."""
+
+    def __enter__(self):
+        self.saved = (
+            neo4j_client.GraphDatabase, neo4j_client.atexit.register,
+            dict(SharedNeo4jDriver._drivers), SharedNeo4jDriver._atexit_registered
+        )
+        self.graph_database = _GraphDatabase()
+        self.registered = []
+        neo4j_client.GraphDatabase = self.graph_database
+        neo4j_client.atexit.register = self.registered.append
+        SharedNeo4jDriver._drivers.clear()
+        SharedNeo4jDriver._atexit_registered = False
+        return self
+
+    def __exit__(self, *exc):
+        neo4j_client.GraphDatabase, neo4j_client.atexit.register, drivers, registered = self.saved
+        SharedNeo4jDriver._drivers.clear()
+        SharedNeo4jDriver._drivers.update(drivers)
+        SharedNeo4jDriver._atexit_registered = registered
+        return False
+
+
+def test_singleton_and_atexit_close():
+    """Test one driver per database, a single atexit registration and closing all drivers."""
+    with _Patched() as patched:
+        assert SharedNeo4jDriver() is SharedNeo4jDriver()
+        first = get_neo4j_driver()
+        assert get_neo4j_driver() is first and SharedNeo4jDriver().get_driver() is first
+        other = SharedNeo4jDriver().get_driver(uri="bolt://replica:7687", user="reader", password="secret")
+        assert other is not first and len(patched.graph_database.created) == 2
+        assert other.kwargs["auth"] == ("reader", "secret")
+        assert {"max_connection_pool_size", "connection_acquisition_timeout", "fetch_size"} <= set(first.kwargs)
+        assert patched.registered == [close_neo4j_drivers]
+
+        close_neo4j_drivers()
+        assert first.closed and other.closed and SharedNeo4jDriver._drivers == {}
+        assert get_neo4j_driver() is not first and patched.registered == [close_neo4j_drivers]
+    logger.info("✓ One shared driver per database, closed once at exit")
+
+
+def test_read_write_routing():
+    """Test that reads and writes use reader / writer sessions and managed transactions."""
+    with _Patched():
+        records = execute_read("MATCH (h:Heading {id: $id}) RETURN h.id AS id, h.title AS title", id="h1")
+        execute_write("MATCH (h:Heading {id: $id}) SET h.title = $title", id="h1", title="Triage")
+        driver = get_neo4j_driver()
+    assert records == [{"id": "h1", "title": "Triage"}]
+    assert [session["default_access_mode"] for session in driver.sessions] == [READ_ACCESS, WRITE_ACCESS]
+    assert all("fetch_size" in session for session in driver.sessions)
+    assert driver.managed == ["read", "write"]
+    assert driver.calls[0][1] == {"id": "h1"} and driver.calls[-1][1] == {"id": "h1", "title": "Triage"}
+    logger.info("✓ execute_read / execute_write route to readers and writers")
@@ -0,0 +1,124 @@
+"""
+Test script for the Ollama host pool.
+
+Checks that requests go to the least busy host that has the model, that a
+model sticks to one host until it is busier than the slack allows, that
+failing hosts are ejected and retries avoid them, and that the health probe
+discovers models and re-admits hosts.
+"""
+
+import logging
+
+import requests
+
+from utils.ollama_pool import OllamaEndpointPool
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+HOSTS = ["http://cpu-1:11434", "http://cpu-2:11434", "http://cpu-3:11434/"]
+
+
+class _Settings:
+    ollama_base_url = "http://localhost:11434"
+    ollama_base_urls = []
+    ollama_sticky_slack = 1
+    ollama_eject_after_failures = 2
+    ollama_eject_seconds = 30.0
+    ollama_health_check_interval = 0  # Probed explicitly below
+
+
+class _Reply:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        if self.payload is None:
+            raise requests.exceptions.ConnectionError("connection refused")
+
+    def json(self):
+        return self.payload
+
+
+class _Session:
+    """Answers /api/tags from a host -> model list map (None = host down)."""
+
+    def __init__(self, tags):
+        self.tags = tags
+
+    def get(self, url, timeout=None):
+        host = url.rsplit("/api/", 1)[0]
+        models = self.tags.get(host)
+        return _Reply(None if models is None else {"models": [{"name": name} for name in models]})
+
+
+def test_sticky_least_outstanding_routing():
+    """Test that a model sticks to a host and overflow goes to the least busy one."""
+    pool = OllamaEndpointPool(HOSTS, _Settings())
+    assert [endpoint.url for endpoint in pool.endpoints] == [host.rstrip("/") for host in HOSTS]
+
+    with pool.endpoint("cogito:8b") as first:
+        # The model's next request stays on its host while it is within the slack
+        with pool.endpoint("cogito:8b") as second:
+            assert second == first
+            # Now two in flight there against none elsewhere: spill over
+            with pool.endpoint("cogito:8b") as third:
+                assert third != first
+        # Another model starts on the least busy host
+        assert pool.choose("gemma3:27b").url != first
+    assert pool.choose("cogito:8b").url == first
+    assert sum(host["requests"] for host in pool.stats()) == 3
+    logger.info("✓ Requests stick to a model's host and spill to the least busy one")
+
+
+def test_passive_ejection_and_retry():
+    """Test that failing hosts are avoided on retry and ejected after repeated failures."""
+    pool = OllamaEndpointPool(HOSTS, _Settings())
+    failed = set()
+    bad = pool.choose("cogito:8b").url
+
+    for _ in range(2):
+        try:
+            with pool.endpoint("cogito:8b", failed) as url:
+                assert url == bad
+                raise requests.exceptions.ConnectionError("connection refused")
+        except requests.exceptions.ConnectionError:
+            pass
+        # The retry of the same request goes elsewhere
+        assert pool.choose("cogito:8b", failed).url != bad
+        failed.clear()
+
+    stats = {host["url"]: host for host in pool.stats()}
+    assert not stats[bad]["live"] and stats[bad]["ejections"] == 1
+    assert all(pool.choose("cogito:8b").url != bad for _ in range(5))
+    assert pool.capacity("cogito:8b") == 2
+    logger.info("✓ Failing hosts are ejected and retries avoid them")
+
+
+def test_health_probe_discovery_and_readmission():
+    """Test that probes learn each host's models, eject dead hosts and re-admit recovered ones."""
+    pool = OllamaEndpointPool(HOSTS, _Settings())
+    tags = {
+        "http://cpu-1:11434": ["cogito:8b", "nomic-embed-text:latest"],
+        "http://cpu-2:11434": ["gemma3:27b"],
+        "http://cpu-3:11434": None,
+    }
+    pool._session = _Session(tags)
+
+    assert pool.check_health() == 2
+    assert pool.choose("gemma3:27b").url == "http://cpu-2:11434"
+    assert pool.choose("nomic-embed-text").url == "http://cpu-1:11434"
+    assert pool.capacity("cogito:8b") == 1 and pool.capacity() == 2
+
+    tags["http://cpu-3:11434"] = ["gemma3:27b"]
+    assert pool.check_health() == 3
+    assert pool.capacity("gemma3:27b") == 2
+    assert all(host["live"] for host in pool.stats())
+
+    # A single host is always used, even when it fails
+    single = OllamaEndpointPool(None, _Settings())
+    assert single.choose("cogito:8b").url == "http://localhost:11434" and single.capacity() == 1
+    logger.info("✓ Health probes discover models, eject and re-admit hosts")
@@ -0,0 +1,93 @@
+"""
+Test script for parallel workflow branches.
+
+Builds the workflow's fan-out / fan-in shape (special_protocols next to
+orchestrator → analyzer, deferred extractor) on ActionPlanState with
+instrumented placeholder nodes, and checks the reducers merge both branches
+and the critical path follows the slower branch.
+"""
+
+import logging
+import time
+
+from langgraph.graph import StateGraph, START, END
+
+from workflows.critical_path import compute_critical_path, critical_path_gantt, render_timeline
+from workflows.graph_state import ActionPlanState
+from workflows.orchestration import _instrument_node
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _build_workflow(extractor_runs):
+    def orchestrator(state):
+        time.sleep(0.3)
+        state["problem_statement"] = "Hospitals must triage incoming casualties."
+        state["current_stage"] = "orchestrator"
+        return state
+
+    def analyzer(state):
+        time.sleep(0.3)
+        state["node_ids"] = ["h1", "h2"]
+        state["current_stage"] = "analyzer"
+        return state
+
+    def special_protocols(state):
+        state["special_protocols_nodes"] = [{"id": "sp1"}]
+        state["current_stage"] = "special_protocols"
+        state.setdefault("errors", []).append("Special Protocols: one node id not found")
+        return state
+
+    def extractor(state):
+        extractor_runs.append((list(state["node_ids"]), list(state["special_protocols_nodes"])))
+        state["actions"] = [{"action": "Open triage area"}]
+        state["current_stage"] = "extractor"
+        state.setdefault("errors", []).append("Extractor: one table skipped")
+        return state
+
+    graph = StateGraph(ActionPlanState)
+    graph.add_node("orchestrator", _instrument_node("orchestrator", orchestrator))
+    graph.add_node("analyzer", _instrument_node("analyzer", analyzer))
+    graph.add_node("special_protocols", _instrument_node("special_protocols", special_protocols))
+    graph.add_node("extractor", _instrument_node("extractor", extractor), defer=True)
+    graph.add_edge(START, "orchestrator")
+    graph.add_edge(START, "special_protocols")
+    graph.add_edge("orchestrator", "analyzer")
+    graph.add_edge("analyzer", "extractor")
+    graph.add_edge("special_protocols", "extractor")
+    graph.add_edge("extractor", END)
+    return graph.compile()
+
+
+def test_branches_merge_and_critical_path():
+    """Test that parallel branches merge once and the slow branch is the critical path."""
+    extractor_runs = []
+    workflow = _build_workflow(extractor_runs)
+
+    stages = []
+    final_state = None
+    for mode, chunk in workflow.stream({"errors": []}, stream_mode=["custom", "values"]):
+        if mode == "values":
+            final_state = chunk
+        elif chunk["type"] == "stage_completed":
+            stages.append(chunk)
+
+    # The extractor ran once, with both branches' outputs
+    assert extractor_runs == [(["h1", "h2"], [{"id": "sp1"}])]
+    assert final_state["errors"] == ["Special Protocols: one node id not found", "Extractor: one table skipped"]
+    assert final_state["current_stage"] == "extractor"
+
+    # special_protocols overlapped the orchestrator instead of delaying it
+    by_node = {stage["node"]: stage for stage in stages}
+    assert by_node["special_protocols"]["started_at"] < by_node["orchestrator"]["finished_at"]
+
+    critical = [stage["node"] for stage in compute_critical_path(stages)]
+    assert critical == ["orchestrator", "analyzer", "extractor"]
+    assert "special_protocols" in render_timeline(stages)
+    assert "    orchestrator :crit, " in critical_path_gantt(stages)
+
+    logger.info("✓ Branches ran in parallel, merged through the reducers and the critical path skipped the fast branch")
@@ -0,0 +1,79 @@
+"""
+Test script for the plan service job queue and HTTP API.
+
+Serves a PlanService over a UNIX socket with a lightweight plan runner
+(no LLM or databases) and drives it through PlanServiceClient: submit,
+stream progress events, and fetch the result; malformed event queries
+get a 400.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from workflows.plan_service import PlanService, PlanServiceClient, serve
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _make_runner(output_dir):
+    def run_plan(name, workflow, on_event, output_path=None, **kwargs):
+        on_event({"type": "run_started", "name": name})
+        for node in ("orchestrator", "analyzer", "formatter"):
+            on_event({"type": "stage_completed", "node": node, "elapsed_seconds": 0.0})
+        output_path = os.path.join(output_dir, f"{name.replace(' ', '_')}.md")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(f"# {name}\n\nWhen: {kwargs['timing']}\n")
+        return {"name": name, "status": "completed", "output_path": output_path}
+    return run_plan
+
+
+def test_plan_service_round_trip():
+    """Test submitting a job, streaming its stage events and reading the plan."""
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "plans.sock")
+        service = PlanService(_make_runner(tmp), max_concurrent_jobs=2)
+        service.workflow = "warm"  # Stands in for the compiled workflow built by start()
+        threading.Thread(target=serve, args=(service,), kwargs={"socket_path": socket_path}, daemon=True).start()
+
+        client = PlanServiceClient(f"unix://{socket_path}", timeout=10)
+        for _ in range(50):
+            if client.health():
+                break
+            time.sleep(0.1)
+        assert client.health()
+
+        try:
+            client.submit({"name": "Mass Casualty Triage"})
+            raise AssertionError("missing fields should be rejected")
+        except RuntimeError as e:
+            assert "timing" in str(e)
+
+        job = client.submit({
+            "name": "Mass Casualty Triage", "timing": "Immediately",
+            "level": "center", "phase": "response", "subject": "war"
+        })
+        events = list(client.iter_events(job["job_id"], wait=5))
+        stages = [e["node"] for e in events if e["type"] == "stage_completed"]
+        assert stages == ["orchestrator", "analyzer", "formatter"]
+        assert events[0]["type"] == "queued" and events[-1]["type"] == "completed"
+
+        result = client.get_result(job["job_id"])
+        assert result["status"] == "completed"
+        assert "When: Immediately" in result["final_plan"]
+        assert result["final_persian_plan"] is None
+
+        for query in ("since=abc", "wait=soon", "since=-1"):
+            try:
+                client._request("GET", f"/jobs/{job['job_id']}/events?{query}")
+                raise AssertionError(f"{query} should be rejected")
+            except RuntimeError as e:
+                assert "Invalid query parameter" in str(e)
+
+        logger.info("✓ Plan service queued the job, streamed stage events and returned the plan")
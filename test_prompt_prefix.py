@@ -0,0 +1,82 @@
+"""
+Test script for cache-friendly prompt layout.
+
+Checks that batched prompts put their per-call data last, so every batch of
+a run shares a byte-identical static prefix, and that prefix reuse is
+recorded per (provider, model) and summarized per stage in the trace.
+"""
+
+import logging
+
+from config.prompts import (
+    PromptText, get_assigner_user_prompt, get_analyzer_node_evaluation_prompt,
+    get_extractor_user_prompt, get_timing_user_prompt, get_assigning_translator_user_prompt
+)
+from utils.prompt_prefix import PrefixTracker, prompt_prefix
+from utils.tracing import summarize_trace
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _Settings:
+    prompt_prefix_ttl_seconds = 600.0
+
+
+def test_batches_share_static_prefix():
+    """Test that prompts for different batches differ only after their static prefix."""
+    reference = "Head of Emergency Department reports to the hospital director."
+    batches = ['[{"action": "Activate triage"}]', '[{"action": "Open the surge ward"}]']
+    prompts = [get_assigner_user_prompt("center", "response", "flood", batch, reference) for batch in batches]
+    assert all(isinstance(prompt, PromptText) for prompt in prompts)
+    assert prompts[0].static_prefix == prompts[1].static_prefix
+    assert reference in prompts[0].static_prefix and batches[0] not in prompts[0].static_prefix
+    assert prompts[0].endswith(batches[0])
+
+    nodes = [get_analyzer_node_evaluation_prompt("Flood response", f"Node ID: h{idx}", "response", "center") for idx in range(2)]
+    assert nodes[0].static_prefix == nodes[1].static_prefix and "Flood response" in nodes[0].static_prefix
+    assert nodes[0].endswith("Node ID: h0")
+
+    extracts = [get_extractor_user_prompt("flood", title, "h1", 1, 9, "content") for title in ("Triage", "Evacuation")]
+    assert extracts[0].static_prefix == extracts[1].static_prefix and "Triage" not in extracts[0].static_prefix
+
+    timing = get_timing_user_prompt("Flood response", "{}", "[]")
+    assert timing.static_prefix.rstrip().endswith("## Actions to Process") and '"reference": {...}' in timing
+
+    plan = get_assigning_translator_user_prompt("reference", "plan text")
+    assert plan.static_prefix.count("reference") == 1 and "plan text" not in plan.static_prefix
+    logger.info("✓ Batched prompts share a static prefix and end with their data")
+
+
+def test_prefix_reuse_tracking():
+    """Test that a prefix sent again to the same model counts as reused."""
+    tracker = PrefixTracker(_Settings())
+    first = get_assigner_user_prompt("center", "response", "flood", "[1]", "reference")
+    second = get_assigner_user_prompt("center", "response", "flood", "[2]", "reference")
+
+    attributes = tracker.observe("ollama", "cogito:8b", first, "system")
+    assert attributes["prefix_reused"] is False and attributes["prefix_tokens"] > 0
+    assert tracker.observe("ollama", "cogito:8b", second, "system")["prefix_reused"] is True
+    assert tracker.observe("ollama", "gemma3:27b", second, "system")["prefix_reused"] is False
+    assert tracker.observe("ollama", "cogito:8b", "plain prompt", None) == {}
+    assert prompt_prefix("plain prompt", "system") == "system\n\n"
+
+    stats = tracker.stats()
+    assert stats["calls"] == 3 and stats["reused"] == 1 and stats["reuse_rate"] == 0.333
+    logger.info("✓ Prompt prefix reuse is recorded per model")
+
+
+def test_trace_summary_counts_prefix_reuse():
+    """Test the per-stage prefix reuse count in the trace summary."""
+    spans = [
+        {"kind": "node", "stage": "assigner", "duration_ms": 10.0},
+        {"kind": "llm", "stage": "assigner", "duration_ms": 4.0, "prefix_hash": "abc", "prefix_reused": False},
+        {"kind": "llm", "stage": "assigner", "duration_ms": 3.0, "prefix_hash": "abc", "prefix_reused": True},
+        {"kind": "llm", "stage": "assigner", "duration_ms": 3.0},
+    ]
+    entry = summarize_trace(spans)["stages"][0]
+    assert entry["prefix_calls"] == 2 and entry["prefix_reused"] == 1
+    logger.info("✓ Prefix reuse is summarized per stage")
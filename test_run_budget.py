@@ -0,0 +1,121 @@
+"""
+Test script for the run-level time budget.
+
+Checks the degradation steps as the deadline approaches, that a stop
+interrupts a blocking call instead of waiting for it (and aborts a streamed
+Ollama reply, freeing its scheduler slot), and that the budget recorded in
+the workflow state is used when none is bound.
+"""
+
+import logging
+import threading
+import time
+
+import utils.ollama_pool as ollama_pool
+from utils.fake_llm_server import FakeLLMServer
+from utils.llm_client import LLMClient, get_llm_scheduler
+from utils.ollama_pool import OllamaEndpointPool
+from utils.run_budget import (
+    RunBudget, RunCancelled, DeadlineExceeded,
+    bind_run_budget, reset_run_budget, budget_for_state, current_run_budget
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _budget_with_share_left(share: float) -> RunBudget:
+    return RunBudget(deadline_at=time.time() + 100 * share, budget_seconds=100)
+
+
+def test_degradation_levels():
+    """Test that agents get smaller top_k, skipped steps and fewer retries as time runs out."""
+    normal, reduced, minimal = (_budget_with_share_left(share) for share in (0.9, 0.4, 0.1))
+
+    assert (normal.level, reduced.level, minimal.level) == ("normal", "reduced", "minimal")
+    assert [b.top_k(20) for b in (normal, reduced, minimal)] == [20, 10, 5]
+    assert [b.allows("sibling_expansion") for b in (normal, reduced, minimal)] == [True, False, False]
+    assert [b.allows("table_scoring") for b in (normal, reduced, minimal)] == [True, True, False]
+    assert [b.attempts(3) for b in (normal, reduced, minimal)] == [3, 2, 1]
+    assert [b.retries(2) for b in (normal, reduced, minimal)] == [2, 1, 0]
+    assert minimal.timeout(3000) <= 10
+
+    unlimited = RunBudget()
+    assert unlimited.level == "normal" and unlimited.top_k(20) == 20 and unlimited.timeout(3000) == 3000
+    logger.info("✓ Degradation steps follow the remaining budget")
+
+
+def test_stop_interrupts_blocking_call():
+    """Test that a stop returns control while an LLM request is still in flight."""
+    cancel = threading.Event()
+    budget = RunBudget.start(None, cancel)
+    threading.Timer(0.2, cancel.set).start()
+
+    started = time.monotonic()
+    try:
+        budget.call(lambda: time.sleep(5))
+        raise AssertionError("the call should have been interrupted")
+    except RunCancelled as e:
+        assert not isinstance(e, DeadlineExceeded)
+    assert time.monotonic() - started < 2
+
+    expired = RunBudget(deadline_at=time.time() - 1, budget_seconds=60)
+    try:
+        expired.call(lambda: "never")
+        raise AssertionError("an expired budget should refuse new calls")
+    except DeadlineExceeded:
+        pass
+    assert RunBudget().call(lambda: "ok") == "ok"
+    logger.info("✓ Stop and deadline interrupt blocking calls")
+
+
+def test_stop_aborts_streamed_request():
+    """Test that a stop shuts down a streamed reply at once and frees its scheduler slot."""
+    # Headers at once, then the first chunk only after ~5 seconds
+    server = FakeLLMServer({"latency": {"distribution": "fixed", "median": 0.0}, "tokens_per_second": 2, "seed": 1})
+    server.start()
+    previous_pool = ollama_pool._pool
+    ollama_pool._pool = OllamaEndpointPool([server.url])
+    try:
+        client = LLMClient(provider="ollama", model="cogito:8b")
+        cancel = threading.Event()
+        budget = RunBudget.start(None, cancel)
+        payload = {"model": "cogito:8b", "messages": [{"role": "user", "content": "Write a triage note"}]}
+        threading.Timer(0.5, cancel.set).start()
+
+        started = time.monotonic()
+        try:
+            budget.call(lambda: client._post("/api/chat", payload, 60, budget, set()))
+            raise AssertionError("the request should have been aborted")
+        except RunCancelled:
+            pass
+        assert time.monotonic() - started < 2
+
+        # The worker ends right away instead of waiting for the next chunk
+        deadline = time.monotonic() + 1
+        while get_llm_scheduler().stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert get_llm_scheduler().stats()["in_flight"] == 0
+        assert ollama_pool._pool.endpoints[0].failures == 0  # An abort is not a host failure
+    finally:
+        ollama_pool._pool = previous_pool
+        server.stop()
+    logger.info("✓ A stop aborts the streamed reply and frees its slot")
+
+
+def test_budget_from_state():
+    """Test that the deadline carried in the state applies when no budget is bound."""
+    state = {"deadline_at": time.time() + 30, "budget_seconds": 60}
+    assert budget_for_state(state).level == "reduced"
+    assert budget_for_state({}) is current_run_budget()
+
+    bound = RunBudget.start(600)
+    token = bind_run_budget(bound)
+    try:
+        assert budget_for_state(state) is bound
+    finally:
+        reset_run_budget(token)
+    logger.info("✓ The bound budget wins over the one recorded in the state")
@@ -0,0 +1,81 @@
+"""
+Test script for per-node progress events.
+
+Streams a small LangGraph graph whose nodes are wrapped like the real
+workflow's and checks the stage_started / stage_completed events carry the
+LLM request count, produced keys and output size.
+"""
+
+import logging
+from typing import List, TypedDict
+
+from langgraph.graph import StateGraph, END
+
+from utils.llm_client import llm_request_slot
+from workflows.orchestration import _instrument_node
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _PlanState(TypedDict, total=False):
+    problem_statement: str
+    actions: List[str]
+    errors: List[str]
+
+
+def _build_workflow():
+    def orchestrator(state):
+        with llm_request_slot():  # Stands in for one LLM request
+            state["problem_statement"] = "Hospitals must triage incoming casualties."
+        return state
+
+    def extractor(state):
+        for _ in range(2):
+            with llm_request_slot():
+                pass
+        state["actions"] = ["Open triage area", "Call in surge staff"]
+        state["errors"].append("extractor: one table skipped")
+        return state
+
+    graph = StateGraph(_PlanState)
+    graph.add_node("orchestrator", _instrument_node("orchestrator", orchestrator))
+    graph.add_node("extractor", _instrument_node("extractor", extractor))
+    graph.set_entry_point("orchestrator")
+    graph.add_edge("orchestrator", "extractor")
+    graph.add_edge("extractor", END)
+    return graph.compile()
+
+
+def test_stream_emits_stage_metrics():
+    """Test that each node reports its LLM calls and output through the stream."""
+    workflow = _build_workflow()
+
+    events = []
+    final_state = None
+    for mode, chunk in workflow.stream({"errors": []}, stream_mode=["custom", "values"]):
+        if mode == "custom":
+            events.append(chunk)
+        else:
+            final_state = chunk
+
+    assert [(e["type"], e["node"]) for e in events] == [
+        ("stage_started", "orchestrator"), ("stage_completed", "orchestrator"),
+        ("stage_started", "extractor"), ("stage_completed", "extractor")
+    ]
+    orchestrator, extractor = events[1], events[3]
+    assert orchestrator["llm_calls"] == 1 and extractor["llm_calls"] == 2
+    assert orchestrator["output_keys"] == ["problem_statement"]
+    assert extractor["output_keys"] == ["actions"]
+    assert extractor["output_size"] > len("Open triage area")
+    assert extractor["new_errors"] == ["extractor: one table skipped"]
+    assert not orchestrator["reused"]
+    assert final_state["actions"] == ["Open triage area", "Call in surge staff"]
+
+    # invoke drops the events but runs the same nodes
+    assert workflow.invoke({"errors": []})["problem_statement"]
+
+    logger.info("✓ Nodes streamed their timing, LLM call counts and output sizes")
@@ -0,0 +1,171 @@
+"""
+Test script for dependency-aware stage reuse.
+
+Checks that every user_config field a stage's prompt uses is one of its
+declared inputs (NODE_INPUTS), that a responsible-party-only change
+invalidates just the formatter, and that the stage output cache
+round-trips outputs.
+"""
+
+import logging
+import os
+import tempfile
+
+from agents.formatter import FormatterAgent
+from agents.timing import TimingAgent
+from config.prompts import get_assigner_user_prompt, get_selector_table_scoring_prompt, get_selector_user_prompt
+from utils.prompt_template_loader import assemble_orchestrator_prompt
+from workflows.orchestration import NODE_INPUTS
+from workflows.stage_cache import StageOutputCache, compute_stage_fingerprint
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _base_state():
+    return {
+        "user_config": {
+            "name": "Mass Casualty Triage",
+            "timing": "Immediate activation upon Code Orange",
+            "level": "center",
+            "phase": "response",
+            "subject": "war"
+        },
+        "subject": "Mass Casualty Triage",
+        "problem_statement": "Hospitals must triage incoming casualties.",
+        "documents_to_query": None,
+        "guideline_documents": [],
+        "node_ids": ["h1", "h2"],
+        "actions": [{"action": "Open triage area", "who": "ED head", "when": "T+0"}],
+        "tables": [],
+        "trigger": "Code Orange",
+        "responsible_party": "ED head",
+        "process_owner": None
+    }
+
+
+def _changed_stages(state, modified_state):
+    changed = []
+    for node, inputs in NODE_INPUTS.items():
+        before = compute_stage_fingerprint(node, state, inputs["state"], inputs["user_config"])
+        after = compute_stage_fingerprint(node, modified_state, inputs["state"], inputs["user_config"])
+        if before != after:
+            changed.append(node)
+    return changed
+
+
+class _PromptRecorder:
+    """Stands in for an agent's LLM client and keeps the prompts it is sent."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_json(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        raise RuntimeError("no LLM in this test")
+
+
+def _timing_prompt(user_config):
+    agent = TimingAgent.__new__(TimingAgent)
+    agent.llm = _PromptRecorder()
+    agent.system_prompt = ""
+    agent._get_timing_assignments([{"action": "Open triage area", "when": ""}], "Problem", user_config)
+    return agent.llm.prompts[0]
+
+
+def _formatter_specs(user_config):
+    agent = FormatterAgent.__new__(FormatterAgent)
+    return agent._create_checklist_specifications(
+        "Mass Casualty Triage", [{"action": "Open triage area", "who": "ED head"}], {}, "Problem", user_config
+    )
+
+
+# What each stage builds from user_config, through the same functions the agents use
+STAGE_PROMPTS = {
+    "orchestrator": assemble_orchestrator_prompt,
+    "selector": lambda config: get_selector_user_prompt("Problem", config, [{"action": "Open triage area"}])
+    + get_selector_table_scoring_prompt("Problem", config),
+    "timing_node": _timing_prompt,
+    "assigner": lambda config: get_assigner_user_prompt(
+        config.get('level', 'center'), config.get('phase', ''), config.get('subject', ''), "[]", ""
+    ),
+    "formatter": _formatter_specs,
+}
+
+
+def test_prompt_fields_are_declared_inputs():
+    """Test that changing a user_config field a stage's prompt uses invalidates that stage."""
+    config = dict(_base_state()["user_config"], description="Surge of casualties after an explosion")
+    changes = {
+        "name": "Chemical Exposure", "timing": "Within 2 hours of declaration", "level": "ministry",
+        "phase": "preparedness", "subject": "sanction", "description": "Blast injuries"
+    }
+    for stage, render in STAGE_PROMPTS.items():
+        prompt = render(dict(config))
+        used = [field for field, value in changes.items() if render(dict(config, **{field: value})) != prompt]
+        assert used, f"{stage} prompt reads no user_config field"
+        missing = set(used) - set(NODE_INPUTS[stage]["user_config"])
+        assert not missing, f"{stage} prompt uses {sorted(missing)}, not in its NODE_INPUTS"
+        logger.info(f"  {stage}: {', '.join(used)}")
+
+    # A timing-only change reaches the orchestrator, so every stage downstream of its problem statement reruns
+    modified = _base_state()
+    modified["user_config"]["timing"] = changes["timing"]
+    assert _changed_stages(_base_state(), modified) == ["orchestrator", "selector", "timing_node"]
+    logger.info("✓ Every user_config field a stage prompt uses is a declared input")
+
+
+def test_responsible_party_change_only_reformats():
+    """Test that a responsible-party change only invalidates the formatter."""
+    state = _base_state()
+    modified = _base_state()
+    modified["responsible_party"] = "Chief nursing officer"
+
+    assert _changed_stages(state, modified) == ["formatter"]
+
+
+def test_stage_output_cache_round_trip():
+    """Test storing, reusing and clearing stage outputs."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = StageOutputCache(os.path.join(tmp, "stages.db"))
+        inputs = NODE_INPUTS["analyzer"]
+        fingerprint = compute_stage_fingerprint("analyzer", _base_state(), inputs["state"], inputs["user_config"])
+
+        assert cache.get("analyzer", fingerprint) == (False, None)
+        cache.put("analyzer", fingerprint, {"node_ids": ["h1"], "refined_queries": ["triage"]})
+        assert cache.get("analyzer", fingerprint) == (True, {"node_ids": ["h1"], "refined_queries": ["triage"]})
+
+        other_model = compute_stage_fingerprint(
+            "analyzer", _base_state(), inputs["state"], inputs["user_config"], model="other-model"
+        )
+        assert other_model != fingerprint
+
+        assert cache.clear(["analyzer"]) == 1
+        assert cache.get("analyzer", fingerprint) == (False, None)
+
+        logger.info("✓ Stage outputs are reused only while their declared inputs are unchanged")
+
+
+def test_old_stage_outputs_are_pruned():
+    """Test that outputs stored before the retention window are pruned."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stages.db")
+        cache = StageOutputCache(path, retention_days=7)
+        cache.put("formatter", "old", {"plan": "old"})
+        cache.put("formatter", "new", {"plan": "new"})
+        with cache._conn:
+            cache._conn.execute("UPDATE stage_outputs SET created_at = '2000-01-01T00:00:00' WHERE fingerprint = 'old'")
+
+        assert cache.prune() == 1
+        assert cache.get("formatter", "old") == (False, None)
+        assert cache.get("formatter", "new") == (True, {"plan": "new"})
+
+        with cache._conn:
+            cache._conn.execute("UPDATE stage_outputs SET created_at = '2000-01-01T00:00:00'")
+        assert StageOutputCache(path, retention_days=0).prune() == 0
+        assert StageOutputCache(path, retention_days=7).get("formatter", "new") == (False, None)  # Pruned on open
+
+        logger.info("✓ Stage outputs older than the retention window are pruned")
@@ -0,0 +1,96 @@
+"""
+Test script for structured LLM output.
+
+Checks that malformed replies are repaired locally (code fences, surrounding
+text, trailing commas, truncation), that replies are validated against a
+JSON Schema or a pydantic model in one pass, and that generate_json outcomes
+are counted.
+"""
+
+import logging
+from typing import List
+
+from pydantic import BaseModel
+
+from utils.structured_output import (
+    StructuredOutputError, resolve_schema, repair_json, schema_errors,
+    parse_structured, record_structured_output, structured_output_stats
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+ASSIGNMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "actions": {
+            "type": "array",
+            "items": {"type": "object", "properties": {"who": {"type": "string"}}, "required": ["who"]},
+            "minItems": 2,
+            "maxItems": 2
+        }
+    },
+    "required": ["actions"]
+}
+
+
+class _RelevantNodes(BaseModel):
+    relevant_node_ids: List[str]
+
+
+def test_repair_json():
+    """Test local recovery of common malformed replies."""
+    assert repair_json('Here it is:\n```json\n{"a": 1}\n```\nDone.') == {"a": 1}
+    assert repair_json('Sure! {"a": [1, 2,], "b": "x",} Hope this helps') == {"a": [1, 2], "b": "x"}
+    assert repair_json('{"actions": [{"who": "Head of Nursing"}, {"who": "Emerg') == {
+        "actions": [{"who": "Head of Nursing"}, {"who": "Emerg"}]
+    }
+    assert repair_json('{"relevant_node_ids": ["h1", "h2",') == {"relevant_node_ids": ["h1", "h2"]}
+    assert repair_json("no json here") is None
+    logger.info("✓ Malformed replies are repaired without another LLM call")
+
+
+def test_schema_validation():
+    """Test JSON Schema and pydantic validation of parsed replies."""
+    valid = '{"actions": [{"who": "A"}, {"who": "B"}]}'
+    assert parse_structured(valid, ASSIGNMENT_SCHEMA) == ({"actions": [{"who": "A"}, {"who": "B"}]}, False)
+    assert parse_structured(valid.replace("}]}", "},]}"), ASSIGNMENT_SCHEMA)[1] is True
+
+    assert schema_errors({"actions": [{"who": "A"}]}, ASSIGNMENT_SCHEMA)
+    assert schema_errors({"actions": [{"who": "A"}, {"who": 3}]}, ASSIGNMENT_SCHEMA)
+    assert schema_errors({"flag": True}, {"properties": {"flag": {"type": "integer"}}})
+    try:
+        parse_structured('{"actions": []}', ASSIGNMENT_SCHEMA)
+        raise AssertionError("a reply with the wrong action count should be rejected")
+    except StructuredOutputError:
+        pass
+
+    json_schema, model = resolve_schema(_RelevantNodes)
+    assert model is _RelevantNodes and "relevant_node_ids" in json_schema["properties"]
+    assert parse_structured('{"relevant_node_ids": ["h1"]}', json_schema, model) == ({"relevant_node_ids": ["h1"]}, False)
+    try:
+        parse_structured('{"relevant_node_ids": "h1"}', json_schema, model)
+        raise AssertionError("a reply that does not match the model should be rejected")
+    except StructuredOutputError:
+        pass
+    logger.info("✓ Replies are validated against the schema in one pass")
+
+
+def test_outcome_counters():
+    """Test the re-call and repair rates."""
+    before = structured_output_stats()
+    record_structured_output(1, repaired=False)
+    record_structured_output(1, repaired=True)
+    record_structured_output(3, repaired=False, failed=True)
+    after = structured_output_stats()
+
+    assert after["calls"] - before["calls"] == 3
+    assert after["first_pass"] - before["first_pass"] == 1
+    assert after["repaired"] - before["repaired"] == 1
+    assert after["recalls"] - before["recalls"] == 2
+    assert after["failed"] - before["failed"] == 1
+    assert 0 < after["recall_rate"] and 0 < after["repair_rate"] <= 1
+    logger.info("✓ generate_json outcomes are counted")
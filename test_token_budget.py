@@ -0,0 +1,81 @@
+"""
+Test script for prompt token budgeting.
+
+Checks that components are packed by priority, that items are split into
+batches that fit the budget instead of being dropped, that context windows
+are resolved by model name, and that the Ollama num_ctx is pinned per model
+and only grows.
+"""
+
+import logging
+
+import utils.token_budget as token_budget
+from config.settings import get_settings
+from utils.token_budget import (
+    PromptBudget, count_tokens, truncate_to_tokens, fit_components, split_to_fit,
+    context_window, ollama_num_ctx
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def test_fit_components_by_priority():
+    """Test that higher-priority components are kept whole and the rest truncated or dropped."""
+    task = "Assign the responsible unit for each action. " * 10
+    reference = "Head of Emergency Department reports to the hospital director. " * 200
+    budget = count_tokens(task) + 100
+
+    fitted, cut = fit_components([("task", task), ("reference_doc", reference), ("examples", "example")], budget)
+    assert fitted["task"] == task
+    assert 0 < count_tokens(fitted["reference_doc"]) <= 100
+    assert fitted["examples"] == "" and cut == ["reference_doc", "examples"]
+
+    fitted, cut = fit_components([("task", task)], budget)
+    assert fitted["task"] == task and cut == []
+    assert truncate_to_tokens(reference, 50).endswith("context window ...]")
+    logger.info("✓ Prompt components are packed by priority")
+
+
+def test_split_to_fit_keeps_every_item():
+    """Test that items beyond one prompt go to additional batches."""
+    nodes = [f"Node ID: h{idx}\nTitle: Section {idx}\nSummary: " + "triage " * 40 for idx in range(30)]
+    per_node = count_tokens(nodes[0])
+    batches = split_to_fit(nodes, lambda node: node, per_node * 7)
+
+    assert [node for batch in batches for node in batch] == nodes
+    assert all(sum(count_tokens(node) for node in batch) <= per_node * 7 for batch in batches)
+    assert len(batches) >= 5
+    assert split_to_fit(["x" * 10000], lambda item: item, 10) == [["x" * 10000]]
+    logger.info("✓ Oversized prompts are split into batches")
+
+
+def test_context_windows_and_num_ctx():
+    """Test window lookup and the num_ctx pinned per Ollama model."""
+    assert context_window("gemini-2.5-flash") > context_window("gemma2:9b")
+    assert context_window("cogito:8b", "ollama") <= context_window("cogito:8b")
+    assert PromptBudget("gemma2:9b", reserve_output=1000).available < context_window("gemma2:9b") - 1000
+
+    settings = get_settings()
+    saved = (settings.ollama_num_ctx, settings.ollama_max_num_ctx, dict(token_budget._pinned_num_ctx))
+    settings.ollama_num_ctx, settings.ollama_max_num_ctx = 8192, 32768
+    token_budget._pinned_num_ctx.clear()
+    try:
+        assert ollama_num_ctx("cogito:8b") == 8192
+        assert ollama_num_ctx("gemma2:9b", 100000) == 8192  # Capped at the model's window
+        assert context_window("cogito:8b", "ollama") == 8192
+        assert PromptBudget("cogito:8b", "ollama", reserve_output=1000).available < 8192 - 1000
+
+        sizes = {ollama_num_ctx("cogito:8b", tokens) for tokens in range(0, 9000, 500)}
+        assert sizes == {8192, 16384}
+        assert ollama_num_ctx("cogito:8b", 100) == 16384  # The pin never shrinks
+        assert ollama_num_ctx("cogito:8b", 100000) == 32768
+        assert ollama_num_ctx("qwen2.5:7b") == 8192  # Pinned per model
+    finally:
+        settings.ollama_num_ctx, settings.ollama_max_num_ctx, pinned = saved
+        token_budget._pinned_num_ctx.clear()
+        token_budget._pinned_num_ctx.update(pinned)
+    logger.info("✓ Context windows and num_ctx are pinned per model")
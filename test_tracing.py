@@ -0,0 +1,101 @@
+"""
+Test script for run tracing.
+
+Checks that call spans nest under the workflow node that made them (also
+across the threads LangGraph and the run budget use), that failures are
+recorded, and that the trace summary attributes time to stages and lists
+the slowest calls.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import contextvars
+
+from utils.tracing import (
+    Tracer, trace_span, current_span, bind_tracer, reset_tracer,
+    load_trace, summarize_trace, render_trace_summary, NULL_SPAN
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _record_run(path):
+    tracer = Tracer(path, trace_id="run-1")
+    token = bind_tracer(tracer)
+    try:
+        with trace_span("run", "Mass Casualty Triage"):
+            with trace_span("node", "selector", stage="selector"):
+                with trace_span("llm", "cogito:8b", agent="selector", retries=0):
+                    current_span().add("prompt_tokens", 1200)
+                    current_span().add("completion_tokens", 300)
+                    current_span().add("retries")
+
+                # Calls made from another thread keep their parent (context copied)
+                context = contextvars.copy_context()
+
+                def worker():
+                    with trace_span("chroma", "documents", top_k=5) as span:
+                        span.set(result_count=5)
+
+                thread = threading.Thread(target=lambda: context.run(worker))
+                thread.start()
+                thread.join()
+
+            with trace_span("node", "assigner", stage="assigner"):
+                try:
+                    with trace_span("neo4j", "MATCH (h:Heading)"):
+                        raise RuntimeError("connection lost")
+                except RuntimeError:
+                    pass
+    finally:
+        reset_tracer(token)
+        tracer.close()
+
+
+def test_spans_nest_under_nodes():
+    """Test parent/child links, stage inheritance and error capture."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plan_trace.jsonl")
+        _record_run(path)
+        spans = {span["name"]: span for span in load_trace(path)}
+
+    run, selector = spans["Mass Casualty Triage"], spans["selector"]
+    llm, chroma, neo4j = spans["cogito:8b"], spans["documents"], spans["MATCH (h:Heading)"]
+    assert run["parent_id"] is None and selector["parent_id"] == run["span_id"]
+    assert llm["parent_id"] == selector["span_id"] and chroma["parent_id"] == selector["span_id"]
+    assert llm["stage"] == chroma["stage"] == "selector" and neo4j["stage"] == "assigner"
+    assert llm["prompt_tokens"] == 1200 and llm["retries"] == 1 and llm["trace_id"] == "run-1"
+    assert neo4j["status"] == "error" and "connection lost" in neo4j["error"]
+    logger.info("✓ Call spans nest under their workflow node")
+
+
+def test_no_tracer_records_nothing():
+    """Test that tracing is a no-op outside a traced run."""
+    with trace_span("llm", "cogito:8b") as span:
+        assert span is NULL_SPAN
+        current_span().add("prompt_tokens", 10)
+    logger.info("✓ Untraced calls are not recorded")
+
+
+def test_trace_summary():
+    """Test the per-stage breakdown and slowest-call list."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plan_trace.jsonl")
+        _record_run(path)
+        summary = summarize_trace(load_trace(path), top=2)
+
+    stages = {entry["stage"]: entry for entry in summary["stages"]}
+    assert stages["selector"]["calls"]["llm"]["count"] == 1
+    assert stages["selector"]["calls"]["chroma"]["count"] == 1
+    assert stages["selector"]["prompt_tokens"] == 1200
+    assert stages["assigner"]["calls"]["neo4j"]["count"] == 1
+    assert len(summary["slowest"]) == 2
+    assert all(span["kind"] not in ("run", "node") for span in summary["slowest"])
+    assert "selector" in render_trace_summary(summary)
+    logger.info("✓ The trace summary breaks latency down by stage")
@@ -4,8 +4,7 @@ import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 from utils.db_init import get_database_statistics
-from neo4j import GraphDatabase
-from config.settings import get_settings
+from utils.neo4j_client import execute_read
 import logging
 
 logger = logging.getLogger(__name__)
@@ -182,26 +181,15 @@ def render_visualizations():
 
 def get_neo4j_node_breakdown():
     """Get breakdown of nodes by type."""
-    settings = get_settings()
-    
     try:
-        driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password)
-        )
-        
-        with driver.session() as session:
-            # Get count by label
-            result = session.run("""
-                MATCH (n)
-                RETURN labels(n)[0] as label, count(*) as count
-                ORDER BY count DESC
-            """)
-            
-            breakdown = {record['label']: record['count'] for record in result}
+        # Get count by label
+        result = execute_read("""
+            MATCH (n)
+            RETURN labels(n)[0] as label, count(*) as count
+            ORDER BY count DESC
+        """)
         
-        driver.close()
-        return breakdown
+        return {record['label']: record['count'] for record in result}
         
     except Exception as e:
         logger.error(f"Error getting node breakdown: {e}")
@@ -210,25 +198,14 @@ def get_neo4j_node_breakdown():
 
 def get_document_type_distribution():
     """Get distribution of document types."""
-    settings = get_settings()
-    
     try:
-        driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password)
-        )
+        result = execute_read("""
+            MATCH (d:Document)
+            RETURN count(*) as count
+        """)
         
-        with driver.session() as session:
-            result = session.run("""
-                MATCH (d:Document)
-                RETURN count(*) as count
-            """)
-            
-            record = result.single()
-            distribution = {'Documents': record['count'] if record else 0}
-        
-        driver.close()
-        return distribution
+        record = result[0] if result else None
+        return {'Documents': record['count'] if record else 0}
         
     except Exception as e:
         logger.error(f"Error getting document distribution: {e}")
@@ -237,29 +214,19 @@ def get_document_type_distribution():
 
 def get_nodes_per_document():
     """Get node count per document."""
-    settings = get_settings()
-    
     try:
-        driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password)
-        )
-        
-        with driver.session() as session:
-            result = session.run("""
-                MATCH (d:Document)-[:HAS_SUBSECTION*]->(h:Heading)
-                RETURN d.name as name, count(h) as count
-                ORDER BY count DESC
-                LIMIT 20
-            """)
-            
-            nodes_per_doc = [
-                {'name': record['name'], 'count': record['count']}
-                for record in result
-            ]
-        
-        driver.close()
-        return nodes_per_doc
+        result = execute_read("""
+            MATCH (h:Heading)
+            WHERE h.doc_name IS NOT NULL
+            RETURN h.doc_name as name, count(h) as count
+            ORDER BY count DESC
+            LIMIT 20
+        """)
+        
+        return [
+            {'name': record['name'], 'count': record['count']}
+            for record in result
+        ]
         
     except Exception as e:
         logger.error(f"Error getting nodes per document: {e}")
@@ -5,12 +5,12 @@ import os
 import tempfile
 from pathlib import Path
 from datetime import datetime
-from neo4j import GraphDatabase
 from config.settings import get_settings
 from data_ingestion.enhanced_graph_builder import EnhancedGraphBuilder
 from data_ingestion.graph_vector_builder import GraphVectorBuilder
 from ui.utils.formatting import format_file_size, format_datetime
 from utils.db_init import clear_neo4j_database, clear_chromadb, get_database_statistics
+from utils.neo4j_client import execute_read, execute_write
 import logging
 
 logger = logging.getLogger(__name__)
@@ -259,58 +259,33 @@ def ingest_documents(uploaded_files, type_overrides):
 
 def fetch_ingested_documents():
     """Fetch list of ingested documents from Neo4j."""
-    settings = get_settings()
-    
-    driver = GraphDatabase.driver(
-        settings.neo4j_uri,
-        auth=(settings.neo4j_user, settings.neo4j_password)
-    )
+    result = execute_read("""
+        MATCH (d:Document)
+        OPTIONAL MATCH (h:Heading {doc_name: d.name})
+        RETURN d.name as name, d.source as source,
+               count(h) as node_count
+        ORDER BY d.name
+    """)
     
     documents = []
-    
-    try:
-        with driver.session() as session:
-            result = session.run("""
-                MATCH (d:Document)
-                OPTIONAL MATCH (d)-[:HAS_SUBSECTION*]->(h:Heading)
-                RETURN d.name as name, d.source as source,
-                       count(h) as node_count
-                ORDER BY d.name
-            """)
-            
-            for record in result:
-                documents.append({
-                    'name': record['name'],
-                    'source': record['source'],
-                    'node_count': record['node_count']
-                })
-    
-    finally:
-        driver.close()
+    for record in result:
+        documents.append({
+            'name': record['name'],
+            'source': record['source'],
+            'node_count': record['node_count']
+        })
     
     return documents
 
 
 def delete_document(doc_name: str):
     """Delete a document from the knowledge base."""
-    settings = get_settings()
-    
-    driver = GraphDatabase.driver(
-        settings.neo4j_uri,
-        auth=(settings.neo4j_user, settings.neo4j_password)
-    )
-    
-    try:
-        with driver.session() as session:
-            # Delete document and all its subsections
-            session.run("""
-                MATCH (d:Document {name: $name})
-                OPTIONAL MATCH (d)-[:HAS_SUBSECTION*]->(h:Heading)
-                DETACH DELETE d, h
-            """, name=doc_name)
-    
-    finally:
-        driver.close()
+    # Delete document and all its subsections
+    execute_write("""
+        MATCH (d:Document {name: $name})
+        OPTIONAL MATCH (h:Heading {doc_name: $name})
+        DETACH DELETE d, h
+    """, name=doc_name)
 
 
 def detect_document_type(filename: str) -> bool:
@@ -2,8 +2,7 @@
 
 import streamlit as st
 from streamlit_agraph import agraph, Node, Edge, Config
-from neo4j import GraphDatabase
-from config.settings import get_settings
+from utils.neo4j_client import neo4j_session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -169,13 +168,6 @@ def fetch_graph_data(search_query: str, max_nodes: int):
     Returns:
         Tuple of (nodes, edges)
     """
-    settings = get_settings()
-    
-    driver = GraphDatabase.driver(
-        settings.neo4j_uri,
-        auth=(settings.neo4j_user, settings.neo4j_password)
-    )
-    
     nodes = []
     edges = []
     node_ids = set()  # Will store custom 'id' property values for matching
@@ -187,7 +179,7 @@ def fetch_graph_data(search_query: str, max_nodes: int):
     simple_id_counter = 0
     
     try:
-        with driver.session() as session:
+        with neo4j_session() as session:
             # Step 1: Fetch nodes that have relationships (connected nodes)
             # This ensures we get nodes that are actually connected to each other
             if search_query:
@@ -548,9 +540,6 @@ def fetch_graph_data(search_query: str, max_nodes: int):
         logger.error(f"Error fetching graph data: {e}", exc_info=True)
         raise
     
-    finally:
-        driver.close()
-    
     logger.debug(f"Returning {len(nodes)} nodes and {len(edges)} edges")
     # Return reverse mapping (simple_id -> element_id) for node selection
     simple_id_to_element_id = {v: k for k, v in element_id_to_simple_id.items()}
@@ -692,66 +681,44 @@ def render_node_details(node_id: str):
 
 def fetch_node_details(node_id: str):
     """Fetch detailed information for a node."""
-    settings = get_settings()
-    
-    driver = GraphDatabase.driver(
-        settings.neo4j_uri,
-        auth=(settings.neo4j_user, settings.neo4j_password)
-    )
-    
-    try:
-        with driver.session() as session:
-            result = session.run("""
-                MATCH (n)
-                WHERE elementId(n) = $node_id
-                RETURN n, labels(n) as labels
-            """, node_id=node_id)
-            
-            record = result.single()
-            if not record:
-                return None
-            
-            node = record['n']
-            labels = record['labels']
-            
-            node_data = dict(node)
-            node_data['type'] = labels[0] if labels else 'Unknown'
-            
-            return node_data
-    
-    finally:
-        driver.close()
+    with neo4j_session() as session:
+        result = session.run("""
+            MATCH (n)
+            WHERE elementId(n) = $node_id
+            RETURN n, labels(n) as labels
+        """, node_id=node_id)
+        
+        record = result.single()
+        if not record:
+            return None
+        
+        node = record['n']
+        labels = record['labels']
+        
+        node_data = dict(node)
+        node_data['type'] = labels[0] if labels else 'Unknown'
+        
+        return node_data
 
 
 def fetch_node_relationships(node_id: str):
     """Fetch relationships for a node."""
-    settings = get_settings()
-    
-    driver = GraphDatabase.driver(
-        settings.neo4j_uri,
-        auth=(settings.neo4j_user, settings.neo4j_password)
-    )
-    
     relationships = []
     
-    try:
-        with driver.session() as session:
-            result = session.run("""
-                MATCH (n)-[r]->(m)
-                WHERE elementId(n) = $node_id
-                RETURN type(r) as rel_type, labels(m)[0] as target_type, 
-                       coalesce(m.title, m.name) as target_name
-                LIMIT 20
-            """, node_id=node_id)
-            
-            for record in result:
-                relationships.append({
-                    'type': record['rel_type'],
-                    'target': f"{record['target_type']}: {record['target_name']}"
-                })
-    
-    finally:
-        driver.close()
+    with neo4j_session() as session:
+        result = session.run("""
+            MATCH (n)-[r]->(m)
+            WHERE elementId(n) = $node_id
+            RETURN type(r) as rel_type, labels(m)[0] as target_type, 
+                   coalesce(m.title, m.name) as target_name
+            LIMIT 20
+        """, node_id=node_id)
+        
+        for record in result:
+            relationships.append({
+                'type': record['rel_type'],
+                'target': f"{record['target_type']}: {record['target_name']}"
+            })
     
     return relationships
 
@@ -1,16 +1,18 @@
 """Action plan generation component with live progress tracking."""
 
 import streamlit as st
-from datetime import datetime
 from pathlib import Path
 import time
 import os
-from workflows.orchestration import create_workflow
-from workflows.graph_state import ActionPlanState
+from workflows.checkpointing import get_checkpointer
+from workflows.critical_path import compute_critical_path, render_timeline
+from workflows.plan_service import PlanServiceClient
+from config.settings import get_settings, EXECUTION_PROFILES
 from ui.utils.state_manager import UIStateManager
+from ui.utils.generation_job import BackgroundGeneration
+from ui.utils.workflow_tracker import WorkflowTracker
 from ui.utils.formatting import render_quality_scores, render_action_table, render_timeline_visualization
 from ui.components.special_protocols_selector import render_special_protocols_selector, clear_special_protocols_selections
-from utils.markdown_logger import MarkdownLogger
 import logging
 import json
 from typing import List, Dict, Any
@@ -18,26 +20,37 @@ from typing import List, Dict, Any
 logger = logging.getLogger(__name__)
 
 
-def execute_workflow_with_tracking(workflow, initial_state, container):
+def render_execution_details(final_state: dict, stages: List[Dict[str, Any]] = None):
     """
-    Execute workflow and display each stage's progress.
+    Display each stage's output and timing after a run.
     
     Args:
-        workflow: Compiled LangGraph workflow
-        initial_state: Initial workflow state
-        container: Streamlit container for displaying progress
-        
-    Returns:
-        Final workflow state
+        final_state: Final workflow state
+        stages: Per-stage metrics from the run summary (stage_completed events)
     """
-    # Execute the workflow
-    with st.spinner("🔄 Executing workflow..."):
-        final_state = workflow.invoke(initial_state, config={"recursion_limit": 50})
-    
-    # Now display all the captured outputs
-    st.success("✅ Workflow execution complete!")
-    
     with st.expander("📋 Detailed Execution Log", expanded=True):
+        if stages:
+            critical = {id(stage) for stage in compute_critical_path(stages)}
+            st.markdown("### ⏱️ Stage Timings")
+            st.dataframe(
+                [
+                    {
+                        "Stage": stage["node"],
+                        "Seconds": stage["duration_seconds"],
+                        "LLM calls": stage["llm_calls"],
+                        "Output (chars)": stage["output_size"],
+                        "Reused": "✓" if stage.get("reused") else "",
+                        "Degraded": stage["degradation"] if stage.get("degradation", "normal") != "normal" else "",
+                        "Critical path": "✓" if id(stage) in critical else ""
+                    }
+                    for stage in stages
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+            st.code(render_timeline(stages), language=None)
+            st.divider()
+        
         # Display retry information
         if final_state.get("retry_count"):
             st.markdown("### 🔄 Retry Information")
@@ -74,8 +87,6 @@ def execute_workflow_with_tracking(workflow, initial_state, container):
                 "retry_count": final_state.get("retry_count", {}),
                 "metadata": final_state.get("metadata", {})
             })
-    
-    return final_state
 
 
 def display_stage_details(stage_name: str, state: dict):
@@ -193,10 +204,17 @@ def render_plan_generator():
     # Input section
     render_input_section()
     
+    # Interrupted runs that can continue from their last checkpoint
+    render_resumable_runs()
+    
     st.divider()
     
+    # Re-attach to a plan still generating in the background (e.g. after a rerun)
+    if st.session_state.get('active_generation'):
+        render_active_generation()
+    
     # Show completed generation if available
-    if st.session_state.get('generation_complete'):
+    elif st.session_state.get('generation_complete'):
         render_completed_generation()
 
 
@@ -285,6 +303,24 @@ def render_input_section():
         st.markdown("<br>", unsafe_allow_html=True)
         use_custom_name = st.checkbox("Use custom name", value=False)
     
+    # Someone is waiting on the page, so the UI always proposes a time budget
+    time_budget_minutes = st.number_input(
+        "Time Budget (minutes)",
+        min_value=0,
+        value=get_settings().run_deadline_seconds // 60 or 30,
+        step=5,
+        help="Agents use smaller retrievals and skip optional steps as the budget runs out; "
+             "the run stops when it is exhausted (0 = no limit)"
+    )
+    
+    execution_profile = st.selectbox(
+        "Execution Profile",
+        options=list(EXECUTION_PROFILES),
+        index=EXECUTION_PROFILES.index(get_settings().execution_profile),
+        help="fast: shallow retrieval, large batches, no optional LLM steps; "
+             "balanced: moderate retrieval and batches; thorough: full retrieval and every step"
+    )
+    
     # Generate button
     col1, col2, col3 = st.columns([1, 1, 2])
     
@@ -311,7 +347,9 @@ def render_input_section():
                     "trigger": None,
                     "responsible_party": None,
                     "process_owner": None,
-                    "special_protocols_node_ids": special_protocols_node_ids if special_protocols_node_ids else None
+                    "special_protocols_node_ids": special_protocols_node_ids if special_protocols_node_ids else None,
+                    "deadline_seconds": int(time_budget_minutes) * 60,
+                    "execution_profile": execution_profile
                 }
                 start_generation(**generation_params)
     
@@ -326,6 +364,72 @@ def render_input_section():
             st.rerun()
 
 
+def render_resumable_runs():
+    """Render failed/interrupted runs with a button to resume each from its last checkpoint."""
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return
+    
+    try:
+        runs = checkpointer.list_runs(statuses=["failed", "running"], limit=10)
+    except Exception as e:
+        logger.error(f"Error listing resumable runs: {e}")
+        return
+    
+    if not runs:
+        return
+    
+    with st.expander(f"⏯️ Resume Interrupted Runs ({len(runs)})", expanded=False):
+        st.caption("Completed stages are restored from checkpoints; execution restarts at the failed stage.")
+        for run in runs:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.markdown(f"**{run['name']}** · `{run['run_id']}` · {run['status']}")
+                details = f"Last update: {run['updated_at'][:19]}"
+                if run.get('next_node'):
+                    details += f" · restarts at: {run['next_node']}"
+                if run.get('error'):
+                    details += f" · error: {run['error'][:120]}"
+                st.caption(details)
+            with col2:
+                if st.button("▶️ Resume", key=f"resume_{run['run_id']}", use_container_width=True):
+                    resume_generation(run['run_id'])
+
+
+def resume_generation(run_id: str):
+    """
+    Resume a checkpointed run with its original parameters.
+    
+    Args:
+        run_id: Run id recorded in the checkpoint store
+    """
+    run = get_checkpointer().get_run(run_id)
+    if run is None:
+        st.error(f"❌ Unknown run: {run_id}")
+        return
+    
+    params = run["params"]
+    UIStateManager.reset_progress()
+    st.session_state.current_subject = params.get("name")
+    st.session_state.current_output = params.get("output_path")
+    
+    run_generation_workflow(
+        params["name"],
+        params["timing"],
+        params["level"],
+        params["phase"],
+        params["subject"],
+        params.get("description"),
+        params.get("output_path"),
+        params.get("document_filter"),
+        params.get("trigger"),
+        params.get("responsible_party"),
+        params.get("process_owner"),
+        params.get("special_protocols_node_ids"),
+        resume_run_id=run_id
+    )
+
+
 def start_generation(
     name: str,
     timing: str,
@@ -338,7 +442,9 @@ def start_generation(
     trigger: str = None,
     responsible_party: str = None,
     process_owner: str = None,
-    special_protocols_node_ids: list = None
+    special_protocols_node_ids: list = None,
+    deadline_seconds: int = None,
+    execution_profile: str = None
 ):
     """
     Start action plan generation.
@@ -356,13 +462,41 @@ def start_generation(
         responsible_party: Optional responsible party
         process_owner: Optional process owner
         special_protocols_node_ids: Optional list of node IDs for special protocols
+        deadline_seconds: Run time budget in seconds (None = RUN_DEADLINE_SECONDS setting, 0 = none)
+        execution_profile: fast | balanced | thorough (None = EXECUTION_PROFILE setting)
     """
     # Initialize progress tracking
     UIStateManager.reset_progress()
     st.session_state.current_subject = name  # Use name as display subject
     st.session_state.current_output = output_filename
     
-    # Run generation directly (synchronous)
+    # Thin-client mode: hand the plan to a running plan service (warm workflow)
+    if get_settings().plan_service_url:
+        client = PlanServiceClient()
+        if client.health():
+            service_output = None
+            if output_filename:
+                service_output = f"action_plans/{output_filename if output_filename.endswith('.md') else output_filename + '.md'}"
+            run_generation_via_service(client, {
+                "name": name,
+                "timing": timing,
+                "level": level,
+                "phase": phase,
+                "subject": subject,
+                "description": description,
+                "output": service_output,
+                "document_filter": document_filter,
+                "trigger": trigger,
+                "responsible_party": responsible_party,
+                "process_owner": process_owner,
+                "special_protocols_node_ids": special_protocols_node_ids,
+                "deadline_seconds": deadline_seconds,
+                "execution_profile": execution_profile
+            })
+            return
+        st.warning(f"⚠️ Plan service not reachable at {client.url}; generating in this session instead.")
+    
+    # Run generation in this session (background thread)
     run_generation_workflow(
         name,
         timing,
@@ -375,7 +509,60 @@ def start_generation(
         trigger,
         responsible_party,
         process_owner,
-        special_protocols_node_ids
+        special_protocols_node_ids,
+        deadline_seconds=deadline_seconds,
+        execution_profile=execution_profile
+    )
+
+
+def run_generation_via_service(client: PlanServiceClient, params: Dict[str, Any]):
+    """
+    Generate a plan on the plan service and render its stage events as they arrive.
+    
+    Args:
+        client: Connected PlanServiceClient
+        params: Plan fields (see workflows.plan_service.PLAN_FIELDS)
+    """
+    st.subheader("⏳ Workflow Execution Progress")
+    st.caption(f"Running on plan service {client.url} (service-side agent settings apply)")
+    
+    try:
+        job = client.submit(params)
+        with st.status(f"Job `{job['job_id']}` queued...", expanded=True) as status:
+            tracker = WorkflowTracker(st.empty())
+            for event in client.iter_events(job["job_id"]):
+                if event["type"] == "started":
+                    status.update(label=f"Job `{job['job_id']}` running...")
+                tracker.handle_event(event)
+            result = client.get_result(job["job_id"])
+            summary = result.get("summary") or {}
+            if result.get("status") != "completed":
+                status.update(label="Generation failed", state="error")
+                st.error(f"❌ Generation failed: {summary.get('error', 'unknown error')}")
+                return
+            status.update(label="✅ Action Plan Generated Successfully!", state="complete")
+    except Exception as e:
+        logger.error(f"Plan service generation failed: {e}", exc_info=True)
+        st.error(f"❌ Generation failed: {str(e)}")
+        return
+    
+    output_filename = summary["output_path"]
+    st.session_state.generation_result = {
+        'final_state': {"final_plan": result["final_plan"], "final_persian_plan": result.get("final_persian_plan")},
+        'output_file': output_filename,
+        'log_file': summary.get("log_path"),
+        'subject': params.get("subject")
+    }
+    st.session_state.generation_complete = True
+    
+    st.success(f"✅ Action plan generated and saved:\n- Plan: `{output_filename}`\n- Log: `{summary.get('log_path')}`")
+    st.subheader("📄 Generated Action Plan")
+    st.markdown(result["final_plan"])
+    st.download_button(
+        "📥 Download Plan",
+        data=result["final_plan"],
+        file_name=Path(output_filename).name,
+        mime="text/markdown"
     )
 
 
@@ -391,10 +578,13 @@ def run_generation_workflow(
     trigger: str = None,
     responsible_party: str = None,
     process_owner: str = None,
-    special_protocols_node_ids: list = None
+    special_protocols_node_ids: list = None,
+    resume_run_id: str = None,
+    deadline_seconds: int = None,
+    execution_profile: str = None
 ):
     """
-    Run the workflow and display detailed progress.
+    Start the workflow in a background thread and display its progress.
     
     Args:
         name: Action plan title
@@ -409,223 +599,183 @@ def run_generation_workflow(
         responsible_party: Optional responsible party
         process_owner: Optional process owner
         special_protocols_node_ids: Optional list of node IDs for special protocols
+        resume_run_id: Resume this checkpointed run (its recorded parameters are used)
+        deadline_seconds: Run time budget in seconds (None = RUN_DEADLINE_SECONDS setting, 0 = none)
+        execution_profile: fast | balanced | thorough (None = EXECUTION_PROFILE setting)
     """
-    markdown_logger = None
-    log_path = None
-    try:
-        logger.info(f"Starting workflow for: {name}")
-        
-        # Create expandable progress section
-        st.subheader("⏳ Workflow Execution Progress")
-        
-        # Create containers for each stage
-        progress_placeholder = st.empty()
-        details_container = st.container()
-        
-        with progress_placeholder.container():
-            st.write("📝 Initializing workflow...")
-            
-        # Get dynamic settings from session state
-        dynamic_settings = st.session_state.get('dynamic_settings')
-        
-        # Generate output paths early to create log file path
-        if output_filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in name)
-            safe_name = safe_name.replace(' ', '_')[:50]
-            output_filename = f"action_plans/{safe_name}_{timestamp}.md"
-        else:
-            if not output_filename.endswith('.md'):
-                output_filename = f"{output_filename}.md"
-            output_filename = f"action_plans/{output_filename}"
-        
-        # Ensure directory exists
-        Path(output_filename).parent.mkdir(parents=True, exist_ok=True)
-        
-        # Generate log path and initialize markdown logger
-        log_path = output_filename.replace('.md', '_log.md')
-        markdown_logger = MarkdownLogger(log_path)
-        markdown_logger.log_workflow_start(name)
-        logger.info(f"Logging to: {log_path}")
-        
-        # Create workflow WITH markdown logger
-        workflow = create_workflow(markdown_logger=markdown_logger, dynamic_settings=dynamic_settings)
-        
-        # No separate guideline documents - treat all documents equally
-        guideline_documents = []
-        
-        # Build user configuration dict
-        user_config = {
+    if st.session_state.get('active_generation'):
+        st.warning("⚠️ A plan is already being generated; wait for it to finish.")
+        render_active_generation()
+        return
+    
+    # Resolve the output path (a resumed run keeps its recorded path)
+    if output_filename is not None and not resume_run_id:
+        if not output_filename.endswith('.md'):
+            output_filename = f"{output_filename}.md"
+        output_filename = f"action_plans/{output_filename}"
+    
+    logger.info(f"Starting workflow for: {name}")
+    job = BackgroundGeneration(
+        {
             "name": name,
             "timing": timing,
             "level": level,
             "phase": phase,
             "subject": subject,
-            "description": description
-        }
-        
-        # Initial state with new parameters
-        initial_state: ActionPlanState = {
-            "user_config": user_config,
-            "subject": name,  # For backward compatibility
-            "current_stage": "start",
-            "retry_count": {},
-            "errors": [],
-            "metadata": {},
-            "documents_to_query": document_filter,
-            "guideline_documents": guideline_documents,
-            "timing": timing,
+            "description": description,
+            "output_path": output_filename,
+            "document_filter": document_filter,
             "trigger": trigger,
             "responsible_party": responsible_party,
             "process_owner": process_owner,
-            "special_protocols_node_ids": special_protocols_node_ids
-        }
-        
-        # Track stages
-        stages_status = {}
-        stage_outputs = {}
-        
-        # Execute workflow with manual state tracking
-        with details_container:
-            st.markdown("### 🔄 Agent Execution")
-            
-            # Progress tracking
-            current_state = initial_state
-            
-            # Manually invoke each stage and capture outputs
-            final_state = execute_workflow_with_tracking(
-                workflow,
-                initial_state,
-                details_container
-            )
-            
-        # Check for errors
-        if final_state.get("errors"):
-            logger.warning(f"Workflow completed with errors: {final_state['errors']}")
-            st.warning(f"⚠️ Completed with {len(final_state['errors'])} warning(s)")
-            for error in final_state['errors']:
-                st.caption(f"- {error}")
-                markdown_logger.log_error("Workflow", error)
-        
-        # Get final plans (English and Persian)
-        final_plan = final_state.get("final_plan", "")
-        final_persian_plan = final_state.get("final_persian_plan", "")
-        
-        if not final_plan:
-            logger.error("No action plan generated")
-            markdown_logger.log_workflow_end(success=False, error_msg="No action plan generated")
-            markdown_logger.close()
-            st.error("❌ No action plan was generated")
-            return
-        
-        with progress_placeholder:
-            st.success("💾 Saving action plans...")
-        
-        # Save English plan
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            f.write(final_plan)
-        
-        logger.info(f"English plan saved to: {output_filename}")
-        
-        # Save Persian plan
-        if final_persian_plan:
-            persian_filename = output_filename.replace('.md', '_fa.md')
-            with open(persian_filename, 'w', encoding='utf-8') as f:
-                f.write(final_persian_plan)
-            logger.info(f"Persian plan saved to: {persian_filename}")
-        
-        # Log completion and close logger
-        markdown_logger.log_workflow_end(success=True)
-        markdown_logger.close()
-        logger.info(f"✓ Workflow log saved to: {log_path}")
-        
-        with progress_placeholder:
-            st.success("✅ Action Plan Generated Successfully!")
-        
-        # Store results (including log path)
-        st.session_state.generation_result = {
-            'final_state': final_state,
-            'output_file': output_filename,
-            'log_file': log_path,
-            'subject': subject
-        }
-        
-        # Mark complete
-        st.session_state.generation_complete = True
-        
-        # Display success message
-        if final_persian_plan:
-            persian_filename = output_filename.replace('.md', '_fa.md')
-            st.success(f"✅ Action plans generated and saved:\n- English: `{output_filename}`\n- Persian: `{persian_filename}`\n- Log: `{log_path}`")
+            "special_protocols_node_ids": special_protocols_node_ids,
+            "resume_run_id": resume_run_id,
+            "deadline_seconds": deadline_seconds,
+            "execution_profile": execution_profile
+        },
+        dynamic_settings=st.session_state.get('dynamic_settings')
+    )
+    st.session_state.active_generation = job.start()
+    render_active_generation()
+
+
+def render_active_generation():
+    """
+    Show the live progress of the background generation until it finishes.
+    
+    Widget interactions rerun the script and interrupt this loop but not the
+    generation; the next run re-attaches and replays the recorded events.
+    """
+    job = st.session_state.get('active_generation')
+    if job is None:
+        return
+    
+    st.subheader("⏳ Workflow Execution Progress")
+    if job.cancel_requested:
+        st.caption("⏹️ Stopping...")
+    elif st.button("⏹️ Stop Generation", key="stop_generation"):
+        job.stop()
+        st.caption("⏹️ Stopping...")
+    tracker = WorkflowTracker(st.empty())
+    seen = 0
+    while True:
+        done = job.done
+        for event in job.events_since(seen):
+            seen += 1
+            if event["type"] == "run_started" and event.get("run_id"):
+                st.caption(f"Run id: `{event['run_id']}`")
+            tracker.handle_event(event)
+        if done:
+            break
+        time.sleep(0.5)
+    
+    del st.session_state.active_generation
+    result = job.result
+    final_state = result.pop("final_state", {}) or {}
+    
+    if result["status"] != "completed":
+        if result.get("stopped") == "cancelled":
+            st.warning("⏹️ Generation stopped")
         else:
-            st.success(f"✅ Action plan generated and saved:\n- Plan: `{output_filename}`\n- Log: `{log_path}`")
-        
-        # Show the generated plan
-        st.subheader("📄 Generated Action Plan")
-        
-        # Display the plan content directly from state (avoid re-reading file)
-        st.markdown(final_plan)
-        
-        # Also provide file content for download
-        plan_content = final_plan
-        
-        st.divider()
-        
-        # Action buttons
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.download_button(
-                "📥 Download Plan",
-                data=plan_content,
-                file_name=Path(output_filename).name,
-                mime="text/markdown",
-                use_container_width=True
-            )
-        
-        with col2:
-            # Read log file content for download
-            if log_path and os.path.exists(log_path):
-                try:
-                    with open(log_path, 'r', encoding='utf-8') as f:
-                        log_content = f.read()
-                    st.download_button(
-                        "📋 Download Log",
-                        data=log_content,
-                        file_name=Path(log_path).name,
-                        mime="text/markdown",
-                        use_container_width=True
-                    )
-                except Exception as e:
-                    logger.error(f"Error reading log file: {e}")
-                    st.error("Log file not available")
-            else:
-                st.info("Log file not available")
-        
-        with col3:
-            if st.button("📚 View in History", use_container_width=True):
-                st.session_state.selected_plan = output_filename
-                st.info("Switch to 'Plan History' tab to browse all plans")
-        
-        with col4:
-            if st.button("🔄 Generate Another", use_container_width=True):
-                if 'generation_result' in st.session_state:
-                    del st.session_state.generation_result
-                if 'generation_complete' in st.session_state:
-                    del st.session_state.generation_complete
-                st.rerun()
-        
-    except Exception as e:
-        logger.error(f"Workflow execution failed: {e}", exc_info=True)
-        # Log error and close logger if it was created
-        if markdown_logger is not None:
+            st.error(f"❌ Generation failed: {result.get('error', 'unknown error')}")
+        if result.get("run_id") and get_checkpointer() is not None:
+            st.info(f"⏯️ Completed stages were checkpointed; resume run `{result['run_id']}` from the list above.")
+        return
+    
+    if final_state.get("errors"):
+        st.warning(f"⚠️ Completed with {len(final_state['errors'])} warning(s)")
+        for error in final_state['errors']:
+            st.caption(f"- {error}")
+    
+    if result.get("execution_profile"):
+        st.caption(f"Execution profile: {result['execution_profile']}")
+    if result.get("degraded_stages"):
+        st.info(f"⏱️ Degraded to meet the time budget: {', '.join(result['degraded_stages'])}")
+    
+    render_execution_details(final_state, result.get("stages"))
+    
+    # Store results (including log path)
+    st.session_state.generation_result = {
+        'final_state': final_state,
+        'output_file': result["output_path"],
+        'log_file': result["log_path"],
+        'subject': job.params.get("subject")
+    }
+    st.session_state.generation_complete = True
+    
+    render_generation_result(final_state, result["output_path"], result["log_path"])
+
+
+def render_generation_result(final_state: dict, output_filename: str, log_path: str):
+    """
+    Show the generated plan with download and navigation buttons.
+    
+    Args:
+        final_state: Final workflow state
+        output_filename: Path of the saved English plan
+        log_path: Path of the workflow log
+    """
+    final_plan = final_state.get("final_plan", "")
+    final_persian_plan = final_state.get("final_persian_plan", "")
+    
+    # Display success message
+    if final_persian_plan:
+        persian_filename = output_filename.replace('.md', '_fa.md')
+        st.success(f"✅ Action plans generated and saved:\n- English: `{output_filename}`\n- Persian: `{persian_filename}`\n- Log: `{log_path}`")
+    else:
+        st.success(f"✅ Action plan generated and saved:\n- Plan: `{output_filename}`\n- Log: `{log_path}`")
+    
+    # Show the generated plan
+    st.subheader("📄 Generated Action Plan")
+    
+    # Display the plan content directly from state (avoid re-reading file)
+    st.markdown(final_plan)
+    
+    st.divider()
+    
+    # Action buttons
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.download_button(
+            "📥 Download Plan",
+            data=final_plan,
+            file_name=Path(output_filename).name,
+            mime="text/markdown",
+            use_container_width=True
+        )
+    
+    with col2:
+        # Read log file content for download
+        if log_path and os.path.exists(log_path):
             try:
-                markdown_logger.log_workflow_end(success=False, error_msg=str(e))
-                markdown_logger.close()
-            except Exception as log_error:
-                logger.error(f"Error closing logger: {log_error}")
-        st.error(f"❌ Generation failed: {str(e)}")
-        st.exception(e)
+                with open(log_path, 'r', encoding='utf-8') as f:
+                    log_content = f.read()
+                st.download_button(
+                    "📋 Download Log",
+                    data=log_content,
+                    file_name=Path(log_path).name,
+                    mime="text/markdown",
+                    use_container_width=True
+                )
+            except Exception as e:
+                logger.error(f"Error reading log file: {e}")
+                st.error("Log file not available")
+        else:
+            st.info("Log file not available")
+    
+    with col3:
+        if st.button("📚 View in History", use_container_width=True):
+            st.session_state.selected_plan = output_filename
+            st.info("Switch to 'Plan History' tab to browse all plans")
+    
+    with col4:
+        if st.button("🔄 Generate Another", use_container_width=True):
+            if 'generation_result' in st.session_state:
+                del st.session_state.generation_result
+            if 'generation_complete' in st.session_state:
+                del st.session_state.generation_complete
+            st.rerun()
 
 
 def render_completed_generation():
@@ -0,0 +1,76 @@
+"""Plan generation in a background thread, polled by the Streamlit script."""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from workflows.plan_runner import run_plan_generation
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundGeneration:
+    """
+    Run workflows.plan_runner.run_plan_generation off the Streamlit script thread.
+
+    The job lives in st.session_state, so a rerun (any widget interaction) does not
+    interrupt generation: the next script run re-attaches and replays the events.
+    Streamlit calls are never made from the worker thread.
+    """
+
+    def __init__(self, params: Dict[str, Any], dynamic_settings=None):
+        """
+        Initialize the job.
+
+        Args:
+            params: Keyword arguments for run_plan_generation (name, timing, level, ...)
+            dynamic_settings: Optional DynamicSettingsManager from the session
+        """
+        self.params = params
+        self.dynamic_settings = dynamic_settings
+        self.events: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="plan-generation", daemon=True)
+
+    def start(self) -> "BackgroundGeneration":
+        """Start generating; returns self."""
+        self._thread.start()
+        return self
+
+    @property
+    def done(self) -> bool:
+        """Whether generation has finished (successfully or not)."""
+        return self.result is not None
+
+    @property
+    def cancel_requested(self) -> bool:
+        """Whether stop() was called."""
+        return self._cancel.is_set()
+
+    def stop(self):
+        """Stop generation: in-flight LLM requests are abandoned and the run fails at once."""
+        self._cancel.set()
+
+    def events_since(self, index: int) -> List[Dict[str, Any]]:
+        """Get the events recorded after the first `index` ones."""
+        with self._lock:
+            return self.events[index:]
+
+    def _on_event(self, event: Dict[str, Any]):
+        with self._lock:
+            self.events.append(event)
+
+    def _run(self):
+        try:
+            result = run_plan_generation(
+                **self.params,
+                dynamic_settings=self.dynamic_settings,
+                on_event=self._on_event,
+                include_final_state=True,
+                cancel_event=self._cancel
+            )
+        except Exception as e:
+            logger.error(f"Background generation failed: {e}", exc_info=True)
+            result = {"name": self.params.get("name"), "status": "failed", "error": str(e), "final_state": {}}
+        self.result = result
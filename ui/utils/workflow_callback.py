@@ -52,6 +52,28 @@ class StreamlitWorkflowCallback:
             self.stages[stage_name]['status'] = 'retry'
         self._update_display()
     
+    def handle_event(self, event: Dict[str, Any]):
+        """
+        Dispatch a workflow progress event (see workflows.plan_runner) to the stage callbacks.
+        
+        A node that starts again after finishing (validator re-run) is reported as a retry.
+        """
+        event_type = event.get("type")
+        stage_name = event.get("node")
+        if event_type == "stage_started":
+            previous = self.stages.get(stage_name)
+            if previous and previous['status'] in ('completed', 'failed'):
+                self.on_stage_retry(stage_name, previous['retries'] + 1)
+            else:
+                self.on_stage_start(stage_name)
+        elif event_type == "stage_completed":
+            self.on_stage_complete(stage_name, {
+                key: event.get(key)
+                for key in ("duration_seconds", "llm_calls", "output_size", "output_keys", "reused")
+            })
+        elif event_type == "stage_failed":
+            self.on_stage_error(stage_name, event.get("error", ""))
+    
     def _update_display(self):
         """Update the Streamlit display with current progress."""
         with self.container:
@@ -35,6 +35,36 @@ class WorkflowTracker:
         }
         self._render()
     
+    def handle_event(self, event: Dict[str, Any]):
+        """
+        Update the display from a workflow progress event (see workflows.plan_runner).
+        
+        Args:
+            event: Event dict with "type" stage_started, stage_completed or stage_failed
+        """
+        event_type = event.get("type")
+        node = event.get("node")
+        if event_type == "stage_started":
+            previous = self.stages.get(node, {}).get('status')
+            self.update_stage(node, 'retry' if previous in ('completed', 'failed') else 'in_progress')
+        elif event_type == "stage_completed":
+            message = (
+                f"{event['duration_seconds']}s · {event['llm_calls']} LLM calls · "
+                f"{event['output_size']:,} chars"
+            )
+            if event.get("reused"):
+                message += " · reused stored output"
+            details = {"output_keys": event.get("output_keys", [])}
+            if event.get("new_errors"):
+                details["errors"] = event["new_errors"]
+            self.update_stage(
+                node,
+                'failed' if event.get("new_errors") else 'completed',
+                {'message': message, 'details': details}
+            )
+        elif event_type == "stage_failed":
+            self.update_stage(node, 'failed', {'message': event.get("error", "")})
+    
     def _render(self):
         """Render the workflow progress visualization."""
         with self.placeholder.container():
@@ -1,15 +1,159 @@
 """Database initialization utilities for Neo4j and ChromaDB."""
 
 import logging
-from typing import Tuple
-from neo4j import GraphDatabase
+from typing import Any, Dict, Tuple
 from neo4j.exceptions import ServiceUnavailable, AuthError
 import chromadb
 from config.settings import get_settings
+from utils.neo4j_client import get_neo4j_driver
 
 logger = logging.getLogger(__name__)
 
 
+# Uniqueness constraints: (constraint name, label, property, legacy index name)
+NEO4J_UNIQUE_CONSTRAINTS = [
+    ("heading_id_unique", "Heading", "id", "heading_id"),
+    ("document_name_unique", "Document", "name", "document_name"),
+]
+
+# Secondary indexes on denormalized Heading properties
+NEO4J_INDEXES = [
+    ("heading_doc_name", "Heading", "doc_name"),
+    ("heading_parent_id", "Heading", "parent_id"),
+]
+
+
+def ensure_neo4j_schema(session) -> Dict[str, Any]:
+    """
+    Create uniqueness constraints and indexes used by direct node lookups.
+    
+    A uniqueness constraint cannot coexist with a plain index on the same
+    property, so the legacy `heading_id` / `document_name` indexes are dropped
+    before the constraint is created. If the data still contains duplicates
+    the constraint cannot be created and the plain index is restored instead.
+    
+    Args:
+        session: Open Neo4j session
+        
+    Returns:
+        Dictionary with 'constraints' (created) and 'fallback_indexes' (used instead)
+    """
+    report = {'constraints': [], 'fallback_indexes': []}
+    
+    for constraint_name, label, prop, legacy_index in NEO4J_UNIQUE_CONSTRAINTS:
+        create_constraint = (
+            f"CREATE CONSTRAINT {constraint_name} IF NOT EXISTS "
+            f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+        )
+        try:
+            session.run(create_constraint).consume()
+            report['constraints'].append(constraint_name)
+            continue
+        except Exception as e:
+            logger.debug(f"Constraint {constraint_name} not created on first attempt: {e}")
+        
+        session.run(f"DROP INDEX {legacy_index} IF EXISTS").consume()
+        try:
+            session.run(create_constraint).consume()
+            report['constraints'].append(constraint_name)
+        except Exception as e:
+            logger.warning(
+                f"Could not create uniqueness constraint on :{label}({prop}): {e}. "
+                f"Using a plain index; remove duplicates and run 'python main.py migrate-db'."
+            )
+            session.run(
+                f"CREATE INDEX {legacy_index} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+            ).consume()
+            report['fallback_indexes'].append(legacy_index)
+    
+    for index_name, label, prop in NEO4J_INDEXES:
+        session.run(
+            f"CREATE INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+        ).consume()
+    
+    return report
+
+
+def backfill_heading_properties(session) -> int:
+    """
+    Denormalize doc_name, source, parent_id and depth onto every Heading.
+    
+    Walks the hierarchy one level at a time from each Document so that every
+    statement is a single-hop match, then copies the values downward.
+    
+    Args:
+        session: Open Neo4j session
+        
+    Returns:
+        Number of Heading nodes updated
+    """
+    result = session.run("""
+        MATCH (d:Document)-[:HAS_SUBSECTION]->(h:Heading)
+        SET h.doc_name = d.name, h.source = d.source, h.depth = 1
+        REMOVE h.parent_id
+        RETURN count(h) as updated
+    """)
+    total = result.single()['updated']
+    
+    depth = 1
+    while True:
+        result = session.run("""
+            MATCH (p:Heading {depth: $depth})-[:HAS_SUBSECTION]->(h:Heading)
+            SET h.doc_name = p.doc_name, h.source = p.source,
+                h.parent_id = p.id, h.depth = $depth + 1
+            RETURN count(h) as updated
+        """, depth=depth)
+        updated = result.single()['updated']
+        if not updated:
+            break
+        total += updated
+        depth += 1
+    
+    return total
+
+
+def migrate_neo4j_schema() -> Tuple[bool, str]:
+    """
+    Migrate an existing graph to the denormalized Heading schema.
+    
+    Backfills Heading properties and creates constraints/indexes. Safe to run
+    repeatedly; graphs built by the current ingestion builders are already
+    up to date.
+    
+    Returns:
+        Tuple of (success: bool, message: str)
+    """
+    try:
+        driver = get_neo4j_driver()
+        
+        with driver.session() as session:
+            updated = backfill_heading_properties(session)
+            
+            result = session.run("""
+                MATCH (h:Heading) WHERE h.doc_name IS NULL
+                RETURN count(h) as orphans
+            """)
+            orphans = result.single()['orphans']
+            
+            report = ensure_neo4j_schema(session)
+        
+        msg = (
+            f"Neo4j schema migrated: {updated} headings updated, "
+            f"constraints={report['constraints']}"
+        )
+        if orphans:
+            msg += f", {orphans} headings not reachable from any Document"
+        if report['fallback_indexes']:
+            msg += f", duplicate keys prevented constraints (plain indexes: {report['fallback_indexes']})"
+        logger.info(msg)
+        return True, msg
+        
+    except Exception as e:
+        msg = f"Neo4j schema migration failed: {e}"
+        logger.error(msg)
+        return False, msg
+
+
 def initialize_neo4j() -> Tuple[bool, str]:
     """
     Initialize and verify Neo4j database connection.
@@ -20,34 +164,19 @@ def initialize_neo4j() -> Tuple[bool, str]:
     settings = get_settings()
     
     try:
-        driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password)
-        )
+        driver = get_neo4j_driver()
         
         # Verify connectivity
         driver.verify_connectivity()
         
-        # Create indexes for better performance
+        # Create constraints and indexes for direct node lookups
         with driver.session() as session:
-            # Index on Heading ID
-            session.run("""
-                CREATE INDEX heading_id IF NOT EXISTS 
-                FOR (h:Heading) ON (h.id)
-            """)
-            
-            # Index on Document name
-            session.run("""
-                CREATE INDEX document_name IF NOT EXISTS 
-                FOR (d:Document) ON (d.name)
-            """)
+            ensure_neo4j_schema(session)
             
             # Check database statistics
             result = session.run("MATCH (n) RETURN count(n) as node_count")
             node_count = result.single()['node_count']
         
-        driver.close()
-        
         logger.info("Neo4j database initialized successfully")
         return True, f"Neo4j connected successfully ({node_count} nodes in database)"
         
@@ -57,7 +186,7 @@ def initialize_neo4j() -> Tuple[bool, str]:
         return False, msg
         
     except ServiceUnavailable:
-        msg = "Neo4j service unavailable - is it running on {settings.neo4j_uri}?"
+        msg = f"Neo4j service unavailable - is it running on {settings.neo4j_uri}?"
         logger.error(msg)
         return False, msg
         
@@ -99,13 +228,8 @@ def clear_neo4j_database() -> Tuple[bool, str]:
     Returns:
         Tuple of (success: bool, message: str)
     """
-    settings = get_settings()
-    
     try:
-        driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password)
-        )
+        driver = get_neo4j_driver()
         
         with driver.session() as session:
             # Get count before deletion
@@ -119,8 +243,6 @@ def clear_neo4j_database() -> Tuple[bool, str]:
             result = session.run("MATCH (n) RETURN count(n) as count")
             after_count = result.single()['count']
         
-        driver.close()
-        
         msg = f"Neo4j database cleared: {before_count} nodes deleted"
         logger.info(msg)
         return True, msg
@@ -209,7 +331,6 @@ def get_database_statistics() -> dict:
     Returns:
         Dictionary with database statistics
     """
-    settings = get_settings()
     stats = {
         'neo4j': {'status': 'unknown', 'nodes': 0, 'relationships': 0},
         'chromadb': {'status': 'unknown', 'collections': 0, 'documents': 0}
@@ -217,10 +338,7 @@ def get_database_statistics() -> dict:
     
     # Neo4j stats
     try:
-        driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password)
-        )
+        driver = get_neo4j_driver()
         
         with driver.session() as session:
             # Count nodes
@@ -233,8 +351,6 @@ def get_database_statistics() -> dict:
             
             stats['neo4j']['status'] = 'connected'
         
-        driver.close()
-        
     except Exception as e:
         stats['neo4j']['status'] = f'error: {str(e)[:50]}'
     
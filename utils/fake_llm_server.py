@@ -0,0 +1,512 @@
+"""Fake Ollama / OpenAI-compatible LLM server for load and concurrency tests."""
+
+import copy
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import prompts
+from config.dynamic_settings import DynamicSettingsManager
+from config.settings import get_settings
+from utils.latency import sample_percentile
+from utils.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAKE_LLM_CONFIG: Dict[str, Any] = {
+    # Time to first token in seconds: "fixed" (median), "uniform" (min..max) or "lognormal" (median, sigma)
+    "latency": {"distribution": "lognormal", "median": 0.5, "sigma": 0.5, "min": 0.1, "max": 2.0},
+    "tokens_per_second": 50.0,  # Generation speed after the first token (0 = instant)
+    "text_reply_tokens": 200,  # Length of free-text (non-JSON) replies
+    "max_concurrency": 4,  # Requests generated at once, like OLLAMA_NUM_PARALLEL; the rest wait in line
+    "max_loaded_models": 3,  # Models kept loaded; a request for another one pays load_seconds
+    "load_seconds": 0.0,
+    "error_rate": 0.0,  # Share of requests answered with HTTP 500
+    "rate_limit_rate": 0.0,  # Share answered with HTTP 429 and Retry-After
+    "timeout_rate": 0.0,  # Share that hang for hang_seconds, so the client times out
+    "hang_seconds": 600.0,
+    "actions_per_node": 3,  # Actions in each canned extractor reply
+    "embedding_dimension": None,  # Default: EMBEDDING_DIMENSION
+    "models": [],  # Models listed by /api/tags and /v1/models besides those requested (default: the configured models)
+    "canned": {},  # Prompt substring -> JSON reply, checked before the built-in replies
+    "seed": None,
+}
+
+
+def _marker(template: str) -> str:
+    """The fixed opening of a prompt template (up to its first field), used to recognize the prompt."""
+    return template.split("{", 1)[0].strip()[:80]
+
+
+def _schema_instance(schema: Any, root: Optional[Dict[str, Any]] = None) -> Any:
+    """A minimal value valid for a JSON Schema (type, properties, items, enum, min/maxItems, anyOf and $ref)."""
+    if not isinstance(schema, dict):
+        return {}
+    root = root or schema
+    if "$ref" in schema:
+        target = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target.get(part, {})
+        return _schema_instance(target, root)
+    if "enum" in schema:
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if schema.get(key):
+            return _schema_instance(schema[key][0], root)
+    kind = schema.get("type", "object" if "properties" in schema else None)
+    if isinstance(kind, list):
+        kind = next((name for name in kind if name != "null"), "null")
+    if kind == "object":
+        return {name: _schema_instance(sub, root) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = max(schema.get("minItems", 1), 1)
+        if "maxItems" in schema:
+            count = min(count, schema["maxItems"])
+        return [_schema_instance(schema.get("items", {}), root) for _ in range(count)]
+    return {"string": "fake", "integer": 1, "number": 8.0, "boolean": True, "null": None}.get(kind, {})
+
+
+def _json_after(text: str, heading: str) -> Any:
+    """The JSON value that follows a heading in a prompt (None if absent or invalid)."""
+    start = text.find(heading)
+    if start < 0:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text[start + len(heading):].lstrip())
+        return value
+    except ValueError:
+        return None
+
+
+class FakeLLMServer:
+    """
+    A local stand-in for Ollama and OpenAI-compatible servers.
+
+    Ollama: POST /api/chat (streamed NDJSON or one reply; no messages = model
+    load), /api/embeddings and /api/embed; GET /api/tags and /api/ps.
+    OpenAI: POST /v1/chat/completions and /v1/embeddings; GET /v1/models.
+
+    Replies wait for a sampled time to first token plus the reply length at
+    tokens_per_second, with at most max_concurrency generating at once. JSON
+    requests get a reply that is valid for the request's schema; prompts of
+    the pipeline's agents without a schema get a canned reply of the shape the
+    agent expects. Failures, rate limits and hangs are injected at the
+    configured rates. See DEFAULT_FAKE_LLM_CONFIG.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = copy.deepcopy(DEFAULT_FAKE_LLM_CONFIG)
+        for key, value in (config or {}).items():
+            if isinstance(value, dict) and isinstance(self.config.get(key), dict):
+                self.config[key].update(value)
+            else:
+                self.config[key] = value
+        settings = get_settings()
+        if self.config["embedding_dimension"] is None:
+            self.config["embedding_dimension"] = settings.embedding_dimension
+        if not self.config["models"]:
+            configured = [settings.ollama_model, settings.ollama_embedding_model]
+            configured += [getattr(settings, f"{agent}_model", None) for agent in DynamicSettingsManager.AGENT_NAMES]
+            self.config["models"] = [model for model in configured if model]
+        self._random = random.Random(self.config["seed"])
+        self._random_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, int(self.config["max_concurrency"])))
+        self._lock = threading.Lock()
+        self._loaded: "OrderedDict[str, float]" = OrderedDict()
+        self._seen_models = set(self.config["models"])
+        self._counts: Counter = Counter()
+        self._durations: List[float] = []
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._builtin_replies = [
+            (_marker(prompts.ANALYZER_QUERY_GENERATION_TEMPLATE), self._query_reply),
+            (_marker(prompts.ANALYZER_REFINED_QUERIES_TEMPLATE), self._queries_reply),
+            (_marker(prompts.EXTRACTOR_USER_PROMPT_TEMPLATE), self._extractor_reply),
+            (_marker(prompts.TIMING_USER_PROMPT_TEMPLATE), self._timing_reply),
+            (_marker(prompts.QUALITY_CHECKER_EVALUATION_TEMPLATE), self._quality_reply),
+            (_marker(prompts.COMPREHENSIVE_VALIDATION_TEMPLATE), self._validation_reply),
+        ]
+        self.httpd = ThreadingHTTPServer((host, port), _FakeLLMHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Serve in a background thread; returns the base URL (OpenAI routes are under /v1)."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        logger.info(f"Fake LLM server listening on {self.url}")
+        return self.url
+
+    def serve_forever(self):
+        logger.info(f"Fake LLM server listening on {self.url}")
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    # --- Timing and failures ---
+
+    def _uniform(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    def first_token_delay(self) -> float:
+        latency = self.config["latency"]
+        distribution = latency.get("distribution", "fixed")
+        if distribution == "uniform":
+            return latency["min"] + (latency["max"] - latency["min"]) * self._uniform()
+        if distribution == "lognormal":
+            with self._random_lock:
+                return self._random.lognormvariate(math.log(max(latency["median"], 1e-6)), latency.get("sigma", 0.5))
+        return latency["median"]
+
+    def generation_seconds(self, tokens: int) -> float:
+        rate = self.config["tokens_per_second"]
+        return tokens / rate if rate else 0.0
+
+    def injected_failure(self) -> Optional[str]:
+        """"error", "rate_limit", "timeout" or None for one request, drawn at the configured rates."""
+        draw = self._uniform()
+        for failure in ("error", "rate_limit", "timeout"):
+            rate = self.config[f"{failure}_rate"]
+            if draw < rate:
+                self.count(f"injected_{failure}")
+                return failure
+            draw -= rate
+        return None
+
+    def load_model(self, model: str) -> float:
+        """Mark a model loaded (evicting the least recently used); returns the load time to charge."""
+        with self._lock:
+            self._seen_models.add(model)
+            resident = model in self._loaded
+            self._loaded[model] = time.time()
+            self._loaded.move_to_end(model)
+            while len(self._loaded) > max(1, int(self.config["max_loaded_models"])):
+                self._loaded.popitem(last=False)
+        if resident:
+            return 0.0
+        self.count("model_loads")
+        return float(self.config["load_seconds"])
+
+    @contextmanager
+    def generating(self):
+        """Hold one of the max_concurrency generation slots."""
+        with self._slots:
+            with self._lock:
+                self._in_flight += 1
+                self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def record_duration(self, seconds: float):
+        with self._lock:
+            self._durations.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests per route, injected failures, model loads, peak concurrency and request latency percentiles."""
+        with self._lock:
+            durations = list(self._durations)
+            stats: Dict[str, Any] = dict(self._counts)
+            stats["max_in_flight"] = self._max_in_flight
+        if durations:
+            stats["latency_seconds"] = {
+                name: round(sample_percentile(durations, q), 3)
+                for name, q in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+            }
+        return stats
+
+    def models(self) -> List[str]:
+        with self._lock:
+            return sorted(self._seen_models)
+
+    def loaded_models(self) -> List[Tuple[str, float]]:
+        with self._lock:
+            return list(self._loaded.items())
+
+    # --- Replies ---
+
+    def embedding(self, text: str) -> List[float]:
+        """A deterministic unit vector for a text."""
+        rng = random.Random(hashlib.sha256((text or "").encode("utf-8")).hexdigest())
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.config["embedding_dimension"])]
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def text_reply(self) -> str:
+        words = ("Coordinate", "the", "response", "with", "the", "incident", "command", "team", "and", "report", "status.")
+        return " ".join(words[idx % len(words)] for idx in range(self.config["text_reply_tokens"]))
+
+    def json_reply(self, messages: List[Dict[str, Any]], schema: Optional[Dict[str, Any]]) -> Any:
+        """A reply valid for the schema, or the canned reply of the agent prompt (empty object if unknown)."""
+        prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        text = "\n".join(m.get("content", "") for m in messages)
+        for marker, reply in self.config["canned"].items():
+            if marker in text:
+                return copy.deepcopy(reply)
+        if isinstance(schema, dict) and "results" in schema.get("properties", {}) and "### Item " in prompt:
+            return self._packed_reply(prompt)
+        if isinstance(schema, dict):
+            return _schema_instance(schema)
+        for marker, build in self._builtin_replies:
+            if marker and marker in prompt:
+                return build(prompt)
+        return {}
+
+    def _packed_reply(self, prompt: str) -> Dict[str, Any]:
+        """One schema-valid result per "### Item <n>" of an LLMClient.generate_many prompt."""
+        item_schema = _json_after(prompt, 'Each "result" must follow this schema:')
+        items = prompt.split("## Items", 1)[-1].count("### Item ")
+        return {"results": [{"index": n, "result": _schema_instance(item_schema)} for n in range(1, items + 1)]}
+
+    @staticmethod
+    def _query_reply(prompt: str) -> Dict[str, Any]:
+        return {"query": "emergency response coordination procedures and responsibilities"}
+
+    @staticmethod
+    def _queries_reply(prompt: str) -> Dict[str, Any]:
+        return {"queries": [f"health emergency operational procedure {idx}" for idx in range(1, 13)]}
+
+    def _extractor_reply(self, prompt: str) -> Dict[str, Any]:
+        node = prompt.split("Source Node:", 1)[-1].split("\n", 1)[0].strip() or "section"
+        actions = [
+            {
+                "action": f"Carry out step {idx} of {node}",
+                "who": "Incident Commander",
+                "when": "Within 1 hour of plan activation",
+                "timing_flagged": False,
+                "actor_flagged": False,
+            }
+            for idx in range(1, self.config["actions_per_node"] + 1)
+        ]
+        return {"actions": actions, "formulas": [], "tables": [], "dependencies": []}
+
+    @staticmethod
+    def _timing_reply(prompt: str) -> Dict[str, Any]:
+        actions = _json_after(prompt, "## Actions to Process")
+        if not isinstance(actions, list):
+            return {"actions": []}
+        return {"actions": [
+            {**action, "trigger": "Plan activation", "time_window": "0-1 hours"}
+            for action in actions if isinstance(action, dict)
+        ]}
+
+    @staticmethod
+    def _quality_reply(prompt: str) -> Dict[str, Any]:
+        scores = dict.fromkeys(("accuracy", "completeness", "source_traceability", "actionability"), 0.9)
+        return {"status": "pass", "overall_score": 0.9, "scores": scores, "feedback": "", "issues": [], "recommendations": []}
+
+    @staticmethod
+    def _validation_reply(prompt: str) -> Dict[str, Any]:
+        criteria = (
+            "structural_completeness", "action_traceability", "logical_sequencing", "guideline_compliance",
+            "formatting_quality", "actionability", "metadata_completeness"
+        )
+        return {
+            "status": "pass", "overall_score": 0.9, "criteria_scores": dict.fromkeys(criteria, 0.9),
+            "issues_found": [], "strengths": [], "detailed_report": ""
+        }
+
+
+class _FakeLLMHandler(BaseHTTPRequestHandler):
+    """HTTP routes of FakeLLMServer."""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def fake(self) -> FakeLLMServer:
+        return self.server.fake
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s" % (self.address_string(), format % args))
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_failure(self, failure: str, openai: bool):
+        """Answer with an injected failure (a hang ends in a 500 the client has usually stopped waiting for)."""
+        if failure == "timeout":
+            time.sleep(self.fake.config["hang_seconds"])
+        status, message = (429, "injected rate limit") if failure == "rate_limit" else (500, f"injected {failure}")
+        payload = {"error": {"message": message, "type": "server_error"}} if openai else {"error": message}
+        self._send_json(status, payload, {"Retry-After": "1"} if status == 429 else None)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/api/tags":
+            self._send_json(200, {"models": [{"name": name, "model": name} for name in self.fake.models()]})
+        elif path == "/api/ps":
+            self._send_json(200, {"models": [
+                {"name": name, "model": name, "expires_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(used + 300))}
+                for name, used in self.fake.loaded_models()
+            ]})
+        elif path == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [
+                {"id": name, "object": "model", "created": 0, "owned_by": "fake"} for name in self.fake.models()
+            ]})
+        elif path in ("/", "/health"):
+            self._send_json(200, {"status": "ok", **self.fake.stats()})
+        else:
+            self._send_json(404, {"error": f"unknown route {path}"})
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+        self.fake.count(f"POST {path}")
+        started = time.monotonic()
+        if path == "/api/chat":
+            self._ollama_chat(payload)
+        elif path in ("/api/embeddings", "/api/embed"):
+            self._ollama_embed(path, payload)
+        elif path == "/v1/chat/completions":
+            self._openai_chat(payload)
+        elif path == "/v1/embeddings":
+            self._openai_embed(payload)
+        else:
+            self._send_json(404, {"error": f"unknown route {path}"})
+            return
+        self.fake.record_duration(time.monotonic() - started)
+
+    def _generate(self, model: str, messages: List[Dict[str, Any]], schema: Any) -> Tuple[str, int, int, float]:
+        """Build a reply; returns (content, prompt tokens, reply tokens, seconds spent loading the model)."""
+        if schema is not None:
+            content = json.dumps(self.fake.json_reply(messages, schema if isinstance(schema, dict) else None), ensure_ascii=False)
+        else:
+            content = self.fake.text_reply()
+        prompt_tokens = sum(count_tokens(message.get("content", "")) for message in messages)
+        return content, prompt_tokens, count_tokens(content), self.fake.load_model(model)
+
+    def _ollama_chat(self, payload: Dict[str, Any]):
+        model = payload.get("model", "")
+        messages = payload.get("messages") or []
+        if not messages:
+            # A chat request without messages only loads the model
+            load_seconds = self.fake.load_model(model)
+            time.sleep(load_seconds)
+            self._send_json(200, {
+                "model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "load",
+                "load_duration": int(load_seconds * 1e9)
+            })
+            return
+        failure = self.fake.injected_failure()
+        if failure:
+            self._send_failure(failure, openai=False)
+            return
+        with self.fake.generating():
+            content, prompt_tokens, reply_tokens, load_seconds = self._generate(model, messages, payload.get("format"))
+            first_token = self.fake.first_token_delay()
+            time.sleep(load_seconds + first_token)
+            final = {
+                "model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "done": True, "done_reason": "stop",
+                "load_duration": int(load_seconds * 1e9),
+                "prompt_eval_count": prompt_tokens, "eval_count": reply_tokens,
+                "eval_duration": int(self.fake.generation_seconds(reply_tokens) * 1e9),
+            }
+            if not payload.get("stream", True):
+                time.sleep(self.fake.generation_seconds(reply_tokens))
+                self._send_json(200, {**final, "message": {"role": "assistant", "content": content}})
+                return
+            # Streamed NDJSON, one chunk per ~10 tokens at the configured rate
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            pieces = max(1, reply_tokens // 10)
+            step = math.ceil(len(content) / pieces) or 1
+            try:
+                for start in range(0, len(content), step):
+                    time.sleep(self.fake.generation_seconds(reply_tokens) / pieces)
+                    self._write_chunk({"model": model, "message": {"role": "assistant", "content": content[start:start + step]}, "done": False})
+                self._write_chunk({**final, "message": {"role": "assistant", "content": ""}})
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.fake.count("streams_abandoned")  # The client closed a cancelled or hedged request
+
+    def _write_chunk(self, chunk: Dict[str, Any]):
+        data = (json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _ollama_embed(self, path: str, payload: Dict[str, Any]):
+        failure = self.fake.injected_failure()
+        if failure:
+            self._send_failure(failure, openai=False)
+            return
+        self.fake.load_model(payload.get("model", ""))
+        if path == "/api/embeddings":
+            self._send_json(200, {"embedding": self.fake.embedding(payload.get("prompt", ""))})
+            return
+        texts = payload.get("input", "")
+        texts = [texts] if isinstance(texts, str) else texts
+        self._send_json(200, {"model": payload.get("model"), "embeddings": [self.fake.embedding(text) for text in texts]})
+
+    def _openai_chat(self, payload: Dict[str, Any]):
+        failure = self.fake.injected_failure()
+        if failure:
+            self._send_failure(failure, openai=True)
+            return
+        model = payload.get("model", "")
+        response_format = payload.get("response_format") or {}
+        schema = None
+        if response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema", {})
+        elif response_format.get("type") == "json_object":
+            schema = "json"
+        with self.fake.generating():
+            content, prompt_tokens, reply_tokens, load_seconds = self._generate(model, payload.get("messages") or [], schema)
+            time.sleep(load_seconds + self.fake.first_token_delay() + self.fake.generation_seconds(reply_tokens))
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": reply_tokens, "total_tokens": prompt_tokens + reply_tokens},
+        })
+
+    def _openai_embed(self, payload: Dict[str, Any]):
+        failure = self.fake.injected_failure()
+        if failure:
+            self._send_failure(failure, openai=True)
+            return
+        texts = payload.get("input", "")
+        texts = [texts] if isinstance(texts, str) else texts
+        self._send_json(200, {
+            "object": "list", "model": payload.get("model"),
+            "data": [{"object": "embedding", "index": idx, "embedding": self.fake.embedding(text)} for idx, text in enumerate(texts)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        })
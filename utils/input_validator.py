@@ -104,7 +104,7 @@ class InputValidator:
         if errors:
             return False, errors
         
-        # Validate node IDs exist in Neo4j
+        # Validate node IDs exist in the graph (Neo4j or the embedded store)
         try:
             from utils.document_hierarchy_loader import DocumentHierarchyLoader
             
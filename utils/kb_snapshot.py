@@ -0,0 +1,611 @@
+"""Knowledge-base snapshots: export/import the graph and vector stores as one file."""
+
+import io
+import json
+import logging
+import os
+import time
+import zipfile
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "actionplan-kb-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Settings that determine how the knowledge base was built (recorded in the manifest)
+SNAPSHOT_SETTINGS = (
+    "ollama_embedding_model",
+    "embedding_dimension",
+    "chunk_size",
+    "chunk_overlap",
+    "summary_collection_name",
+    "content_collection_name",
+    "dictionary_collection",
+    "graph_prefix",
+    "dictionary_graph_prefix",
+    "ollama_model",
+)
+
+# Node property holding the summary embedding; stored as a float32 matrix, not JSON
+EMBEDDING_PROPERTY = "summary_embedding"
+
+# Temporary label / properties of nodes loaded but not yet swapped in during a Neo4j import
+STAGING_LABEL = "_SnapshotStaging"
+SNAPSHOT_KEY = "_snapshot_key"
+SNAPSHOT_GROUP = "_snapshot_group"
+
+# Suffix of Chroma collections loaded but not yet swapped in during an import
+CHROMA_STAGING_SUFFIX = "_snapshot_import"
+
+GRAPH_ENTRIES = (
+    "graph/nodes.json",
+    "graph/edges.json",
+    "graph/embedding_keys.json",
+    "graph/embeddings.npy",
+)
+
+NEO4J_BATCH_SIZE = 5000
+
+
+def _write_json(archive: zipfile.ZipFile, name: str, data: Any):
+    archive.writestr(name, json.dumps(data, ensure_ascii=False, default=str))
+
+
+def _write_matrix(archive: zipfile.ZipFile, name: str, matrix: np.ndarray):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(matrix, dtype=np.float32), allow_pickle=False)
+    archive.writestr(name, buffer.getvalue())
+
+
+def _read_json(archive: zipfile.ZipFile, name: str) -> Any:
+    return json.loads(archive.read(name))
+
+
+def _read_matrix(archive: zipfile.ZipFile, name: str) -> np.ndarray:
+    return np.load(io.BytesIO(archive.read(name)), allow_pickle=False)
+
+
+def _to_matrix(vectors: List[Any]) -> np.ndarray:
+    if not len(vectors):
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _quote(name: str) -> str:
+    """Quote a label or relationship type for Cypher."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _batches(rows: List[Any], size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def _neo4j_graph_records() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Read every Neo4j node and relationship."""
+    from utils.neo4j_client import execute_read
+
+    nodes = execute_read("""
+    MATCH (n)
+    RETURN elementId(n) as key, labels(n) as labels, properties(n) as props
+    """)
+    edges = execute_read("""
+    MATCH (a)-[r]->(b)
+    RETURN elementId(a) as start, elementId(b) as end, type(r) as type, properties(r) as props
+    """)
+    return nodes, edges
+
+
+def _embedded_graph_records() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Read the embedded store as Document/Heading nodes and HAS_SUBSECTION relationships."""
+    from rag_tools.graph_store import EmbeddedGraphStore
+
+    documents, headings, embeddings = EmbeddedGraphStore().dump()
+    nodes = []
+    edges = []
+    for document in documents:
+        props = {name: value for name, value in document.items() if value is not None}
+        nodes.append({'key': f"Document:{document['name']}", 'labels': ['Document'], 'props': props})
+    for heading in headings:
+        props = {name: value for name, value in heading.items() if value is not None}
+        if heading['id'] in embeddings:
+            props[EMBEDDING_PROPERTY] = embeddings[heading['id']]
+        key = f"Heading:{heading['id']}"
+        nodes.append({'key': key, 'labels': ['Heading'], 'props': props})
+        parent = f"Heading:{heading['parent_id']}" if heading['parent_id'] else f"Document:{heading['doc_name']}"
+        edges.append({'start': parent, 'end': key, 'type': 'HAS_SUBSECTION', 'props': {}})
+    return nodes, edges
+
+
+def _export_graph(archive: zipfile.ZipFile) -> Dict[str, int]:
+    """Write all graph nodes, relationships and summary embeddings of the configured backend."""
+    if get_settings().graph_backend == "embedded":
+        nodes, edges = _embedded_graph_records()
+    else:
+        nodes, edges = _neo4j_graph_records()
+
+    embedding_keys = []
+    vectors = []
+    for node in nodes:
+        vector = node['props'].pop(EMBEDDING_PROPERTY, None)
+        if vector is not None:
+            embedding_keys.append(node['key'])
+            vectors.append(vector)
+
+    _write_json(archive, "graph/nodes.json", nodes)
+    _write_json(archive, "graph/edges.json", edges)
+    _write_json(archive, "graph/embedding_keys.json", embedding_keys)
+    _write_matrix(archive, "graph/embeddings.npy", _to_matrix(vectors))
+    return {'nodes': len(nodes), 'edges': len(edges), 'embeddings': len(embedding_keys)}
+
+
+def _export_chroma(archive: zipfile.ZipFile) -> Dict[str, int]:
+    """Write every Chroma collection (ids, metadata, documents, float32 embeddings)."""
+    from utils.chroma_client import get_chroma_client
+
+    client = get_chroma_client()
+    page_size = client.get_max_batch_size()
+    counts = {}
+    collections = []
+
+    for collection in client.list_collections():
+        ids, metadatas, documents, vectors = [], [], [], []
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "metadatas", "documents"],
+                limit=page_size,
+                offset=offset
+            )
+            if not page['ids']:
+                break
+            ids.extend(page['ids'])
+            metadatas.extend(page['metadatas'] or [None] * len(page['ids']))
+            documents.extend(page['documents'] or [None] * len(page['ids']))
+            if page['embeddings'] is not None:
+                vectors.extend(page['embeddings'])
+            offset += len(page['ids'])
+
+        base = f"chroma/{collection.name}"
+        _write_json(archive, f"{base}/records.json", {
+            'ids': ids,
+            'metadatas': metadatas,
+            'documents': documents
+        })
+        _write_matrix(archive, f"{base}/embeddings.npy", _to_matrix(vectors))
+        collections.append({'name': collection.name, 'metadata': collection.metadata})
+        counts[collection.name] = len(ids)
+
+    _write_json(archive, "chroma/collections.json", collections)
+    return counts
+
+
+def export_snapshot(path: str) -> Tuple[bool, str]:
+    """
+    Export the knowledge base (graph + Chroma collections) to one snapshot file.
+
+    The graph is read from the configured backend (settings.graph_backend).
+    The snapshot is a zip archive with a JSON manifest, graph nodes/edges as
+    JSON, and every embedding matrix as a float32 .npy entry.
+
+    Args:
+        path: Output file path
+
+    Returns:
+        Tuple of (success, message)
+    """
+    settings = get_settings()
+    started = time.time()
+
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            graph_counts = _export_graph(archive)
+            chroma_counts = _export_chroma(archive)
+            _write_json(archive, "manifest.json", {
+                'format': SNAPSHOT_FORMAT,
+                'version': SNAPSHOT_VERSION,
+                'created_at': datetime.now().isoformat(),
+                'settings': {name: getattr(settings, name) for name in SNAPSHOT_SETTINGS},
+                'graph': graph_counts,
+                'chroma': chroma_counts
+            })
+    except Exception as e:
+        return False, f"Snapshot export failed: {e}"
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    return True, (
+        f"Exported {graph_counts['nodes']} nodes, {graph_counts['edges']} relationships, "
+        f"{graph_counts['embeddings']} node embeddings and {sum(chroma_counts.values())} vectors "
+        f"in {len(chroma_counts)} collections to {path} ({size_mb:.1f} MB, {time.time() - started:.1f}s)"
+    )
+
+
+# ============================================================================
+# IMPORT
+# ============================================================================
+
+def _read_manifest(archive: zipfile.ZipFile) -> Dict[str, Any]:
+    manifest = _read_json(archive, "manifest.json")
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError("Not a knowledge-base snapshot")
+    if manifest.get('version', 0) > SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Snapshot version {manifest['version']} is newer than supported version {SNAPSHOT_VERSION}"
+        )
+    return manifest
+
+
+def _settings_mismatches(manifest: Dict[str, Any]) -> List[str]:
+    """List embedding settings that differ from the current configuration."""
+    settings = get_settings()
+    recorded = manifest.get('settings', {})
+    mismatches = []
+    for name in ("ollama_embedding_model", "embedding_dimension"):
+        if name in recorded and recorded[name] != getattr(settings, name):
+            mismatches.append(f"{name}: snapshot={recorded[name]!r}, current={getattr(settings, name)!r}")
+    return mismatches
+
+
+def _load_graph_nodes(archive: zipfile.ZipFile) -> List[Dict[str, Any]]:
+    """Read nodes and re-attach summary embeddings to their properties."""
+    nodes = _read_json(archive, "graph/nodes.json")
+    keys = _read_json(archive, "graph/embedding_keys.json")
+    matrix = _read_matrix(archive, "graph/embeddings.npy")
+    if len(matrix) != len(keys):
+        raise ValueError(f"graph/embeddings.npy has {len(matrix)} rows for {len(keys)} embedding keys")
+    vectors = dict(zip(keys, matrix))
+    for node in nodes:
+        vector = vectors.pop(node['key'], None)
+        if vector is not None:
+            node['props'][EMBEDDING_PROPERTY] = vector
+    if vectors:
+        raise ValueError(f"{len(vectors)} graph embeddings reference unknown nodes")
+    return nodes
+
+
+def _check_snapshot(
+    archive: zipfile.ZipFile,
+    manifest: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Read and cross-check every snapshot entry before anything is replaced.
+
+    Verifies the zip CRCs, that every entry is present, that embedding
+    matrices line up with their ids and that the counts match the manifest.
+
+    Returns:
+        Tuple of (graph nodes with embeddings attached, graph edges)
+
+    Raises:
+        ValueError: If the snapshot is incomplete or inconsistent
+    """
+    corrupt = archive.testzip()
+    if corrupt:
+        raise ValueError(f"Corrupt snapshot entry: {corrupt}")
+
+    names = set(archive.namelist())
+    collections = _read_json(archive, "chroma/collections.json") if "chroma/collections.json" in names else []
+    required = list(GRAPH_ENTRIES) + ["chroma/collections.json"]
+    for info in collections:
+        required += [f"chroma/{info['name']}/records.json", f"chroma/{info['name']}/embeddings.npy"]
+    missing = [name for name in required if name not in names]
+    if missing:
+        raise ValueError(f"Snapshot is missing {', '.join(missing)}")
+
+    nodes = _load_graph_nodes(archive)
+    edges = _read_json(archive, "graph/edges.json")
+    keys = {node['key'] for node in nodes}
+    if len(keys) != len(nodes):
+        raise ValueError("Snapshot has duplicate graph node keys")
+    dangling = sum(1 for edge in edges if edge['start'] not in keys or edge['end'] not in keys)
+    if dangling:
+        raise ValueError(f"{dangling} graph relationships reference unknown nodes")
+    graph_counts = {
+        'nodes': len(nodes),
+        'edges': len(edges),
+        'embeddings': sum(1 for node in nodes if EMBEDDING_PROPERTY in node['props'])
+    }
+    if manifest.get('graph') != graph_counts:
+        raise ValueError(f"Graph entries {graph_counts} do not match the manifest {manifest.get('graph')}")
+
+    chroma_counts = {}
+    for info in collections:
+        base = f"chroma/{info['name']}"
+        records = _read_json(archive, f"{base}/records.json")
+        rows = len(_read_matrix(archive, f"{base}/embeddings.npy"))
+        ids = records['ids']
+        if len(records['metadatas']) != len(ids) or len(records['documents']) != len(ids) or rows != len(ids):
+            raise ValueError(f"Collection {info['name']} has inconsistent ids, records and embeddings")
+        chroma_counts[info['name']] = len(ids)
+    if manifest.get('chroma') != chroma_counts:
+        raise ValueError(f"Chroma entries {chroma_counts} do not match the manifest {manifest.get('chroma')}")
+
+    return nodes, edges
+
+
+def _delete_nodes(match: str):
+    """DETACH DELETE the nodes bound to n by a MATCH clause, in bounded batches."""
+    from utils.neo4j_client import execute_write
+
+    # Bounded batches keep each transaction small
+    while True:
+        deleted = execute_write(f"""
+        {match} WITH n LIMIT 10000
+        DETACH DELETE n
+        RETURN count(*) as deleted
+        """)
+        if not deleted or deleted[0]['deleted'] == 0:
+            break
+
+
+def _import_neo4j(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Replace the Neo4j graph with the snapshot using batched UNWIND writes.
+
+    The snapshot is first loaded as nodes carrying only the staging label
+    (so the unique constraints on Heading/Document cannot clash with the
+    current graph) and wired up. The current graph is deleted only once
+    staging succeeded; a failure while staging removes the staged nodes and
+    leaves the current graph untouched.
+    """
+    from utils.neo4j_client import execute_write, neo4j_session
+    from utils.db_init import ensure_neo4j_schema
+
+    staging = _quote(STAGING_LABEL)
+    staged = f"MATCH (n:{staging})"
+
+    nodes_by_labels = defaultdict(list)
+    for node in nodes:
+        props = dict(node['props'])
+        if EMBEDDING_PROPERTY in props:
+            props[EMBEDDING_PROPERTY] = [float(x) for x in props[EMBEDDING_PROPERTY]]
+        nodes_by_labels[tuple(sorted(node['labels']))].append({'key': node['key'], 'props': props})
+
+    edges_by_type = defaultdict(list)
+    for edge in edges:
+        edges_by_type[edge['type']].append(edge)
+
+    execute_write(
+        f"CREATE INDEX snapshot_staging_key IF NOT EXISTS FOR (n:{staging}) ON (n.{SNAPSHOT_KEY})"
+    )
+    execute_write("CALL db.awaitIndexes()")
+    _delete_nodes(staged)  # Leftovers of an interrupted import
+
+    try:
+        for group, rows in enumerate(nodes_by_labels.values()):
+            for batch in _batches(rows, NEO4J_BATCH_SIZE):
+                execute_write(
+                    f"UNWIND $rows as row CREATE (n:{staging}) "
+                    f"SET n = row.props, n.{SNAPSHOT_KEY} = row.key, n.{SNAPSHOT_GROUP} = $group",
+                    rows=batch, group=group
+                )
+
+        for rel_type, rows in edges_by_type.items():
+            for batch in _batches(rows, NEO4J_BATCH_SIZE):
+                execute_write(
+                    f"UNWIND $rows as row "
+                    f"MATCH (a:{staging} {{{SNAPSHOT_KEY}: row.start}}) "
+                    f"MATCH (b:{staging} {{{SNAPSHOT_KEY}: row.end}}) "
+                    f"CREATE (a)-[r:{_quote(rel_type)}]->(b) SET r = row.props",
+                    rows=batch
+                )
+    except Exception:
+        _delete_nodes(staged)
+        execute_write("DROP INDEX snapshot_staging_key IF EXISTS")
+        raise
+
+    # Swap: drop the current graph, then give the staged nodes their real labels
+    _delete_nodes(f"MATCH (n) WHERE NOT n:{staging}")
+    with neo4j_session(write=True) as session:
+        ensure_neo4j_schema(session)
+
+    for group, labels in enumerate(nodes_by_labels):
+        set_labels = f"SET n{''.join(f':{_quote(label)}' for label in labels)} " if labels else ""
+        while True:
+            promoted = execute_write(
+                f"{staged} WHERE n.{SNAPSHOT_GROUP} = $group WITH n LIMIT {NEO4J_BATCH_SIZE} "
+                f"{set_labels}REMOVE n:{staging}, n.{SNAPSHOT_KEY}, n.{SNAPSHOT_GROUP} "
+                f"RETURN count(*) as promoted",
+                group=group
+            )
+            if not promoted or promoted[0]['promoted'] == 0:
+                break
+    execute_write("DROP INDEX snapshot_staging_key IF EXISTS")
+
+    return {'nodes': len(nodes), 'edges': len(edges)}
+
+
+def _import_embedded(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Load Document/Heading nodes into the embedded graph backend."""
+    from rag_tools.graph_store import EmbeddedGraphStore, HEADING_FIELDS
+
+    by_key = {node['key']: node for node in nodes}
+    parent_of = {}
+    doc_of = {}
+    for edge in edges:
+        if edge['type'] != 'HAS_SUBSECTION':
+            continue
+        start = by_key.get(edge['start'])
+        if not start:
+            continue
+        if 'Document' in start['labels']:
+            doc_of[edge['end']] = start['props'].get('name')
+        elif 'Heading' in start['labels']:
+            parent_of[edge['end']] = edge['start']
+
+    documents = []
+    headings = []
+    embeddings = {}
+    for node in nodes:
+        props = node['props']
+        if 'Document' in node['labels']:
+            documents.append(props)
+        elif 'Heading' in node['labels']:
+            parent_key = parent_of.get(node['key'])
+            heading = {field: props.get(field) for field in HEADING_FIELDS}
+            if heading['parent_id'] is None and parent_key:
+                heading['parent_id'] = by_key[parent_key]['props'].get('id')
+            if heading['doc_name'] is None:
+                root = node['key']
+                while root in parent_of:
+                    root = parent_of[root]
+                heading['doc_name'] = doc_of.get(root)
+            if heading['depth'] is None:
+                depth, current = 1, node['key']
+                while current in parent_of:
+                    depth, current = depth + 1, parent_of[current]
+                heading['depth'] = depth
+            headings.append(heading)
+            if props.get(EMBEDDING_PROPERTY) is not None:
+                embeddings[heading['id']] = props[EMBEDDING_PROPERTY]
+
+    skipped = len(nodes) - len(documents) - len(headings)
+    if skipped:
+        logger.warning(f"Embedded graph backend stores documents and headings only; skipped {skipped} other nodes")
+
+    counts = EmbeddedGraphStore().bulk_load(
+        documents, headings, embeddings, metadata={'imported_from': 'snapshot'}
+    )
+    return {'nodes': counts['documents'] + counts['headings'], 'edges': len(parent_of) + len(doc_of)}
+
+
+def _stage_chroma(archive: zipfile.ZipFile) -> Dict[str, Any]:
+    """
+    Load every snapshot collection under a staging name.
+
+    The current collections are not touched; _swap_chroma replaces them.
+
+    Returns:
+        Collection name -> staged collection
+    """
+    from utils.chroma_client import get_chroma_client
+
+    client = get_chroma_client()
+    batch_size = client.get_max_batch_size()
+    existing = {collection.name for collection in client.list_collections()}
+    staged = {}
+
+    try:
+        for info in _read_json(archive, "chroma/collections.json"):
+            name = info['name']
+            base = f"chroma/{name}"
+            records = _read_json(archive, f"{base}/records.json")
+            matrix = _read_matrix(archive, f"{base}/embeddings.npy")
+
+            staging_name = name + CHROMA_STAGING_SUFFIX
+            if staging_name in existing:
+                client.delete_collection(staging_name)  # Leftover of an interrupted import
+            collection = client.create_collection(staging_name, metadata=info.get('metadata') or None)
+            staged[name] = collection
+
+            ids = records['ids']
+            has_documents = any(doc is not None for doc in records['documents'])
+            has_metadata = any(meta for meta in records['metadatas'])
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                collection.add(
+                    ids=ids[start:end],
+                    embeddings=matrix[start:end],
+                    metadatas=records['metadatas'][start:end] if has_metadata else None,
+                    documents=records['documents'][start:end] if has_documents else None
+                )
+    except Exception:
+        _drop_staged_chroma(staged)
+        raise
+
+    return staged
+
+
+def _drop_staged_chroma(staged: Dict[str, Any]):
+    """Delete staged collections after a failed import."""
+    from utils.chroma_client import get_chroma_client
+
+    client = get_chroma_client()
+    for collection in staged.values():
+        try:
+            client.delete_collection(collection.name)
+        except Exception as e:
+            logger.warning(f"Could not delete staged collection {collection.name}: {e}")
+
+
+def _swap_chroma(staged: Dict[str, Any]) -> Dict[str, int]:
+    """Replace the current collections with the staged ones."""
+    from utils.chroma_client import get_chroma_client
+
+    client = get_chroma_client()
+    existing = {collection.name for collection in client.list_collections()}
+    counts = {}
+    for name, collection in staged.items():
+        if name in existing:
+            client.delete_collection(name)
+        collection.modify(name=name)
+        counts[name] = collection.count()
+    return counts
+
+
+def import_snapshot(path: str, force: bool = False) -> Tuple[bool, str]:
+    """
+    Replace the knowledge base with the contents of a snapshot file.
+
+    The graph is loaded into the configured backend (settings.graph_backend)
+    and every Chroma collection in the snapshot is recreated. The whole
+    archive is validated first, and the new graph and collections are
+    loaded next to the current ones, which are replaced only once loading
+    succeeded.
+
+    Args:
+        path: Snapshot file path
+        force: Import even if the snapshot's embedding model differs from the current one
+
+    Returns:
+        Tuple of (success, message)
+    """
+    settings = get_settings()
+    started = time.time()
+
+    if not os.path.exists(path):
+        return False, f"Snapshot not found: {path}"
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            manifest = _read_manifest(archive)
+            mismatches = _settings_mismatches(manifest)
+            if mismatches and not force:
+                return False, (
+                    "Snapshot embeddings were built with different settings "
+                    f"({'; '.join(mismatches)}); re-run with --force to import anyway"
+                )
+            for mismatch in mismatches:
+                logger.warning(f"Importing despite settings mismatch: {mismatch}")
+
+            nodes, edges = _check_snapshot(archive, manifest)
+            staged = _stage_chroma(archive)
+            try:
+                if settings.graph_backend == "embedded":
+                    graph_counts = _import_embedded(nodes, edges)
+                else:
+                    graph_counts = _import_neo4j(nodes, edges)
+            except Exception:
+                _drop_staged_chroma(staged)
+                raise
+            chroma_counts = _swap_chroma(staged)
+    except Exception as e:
+        return False, f"Snapshot import failed: {e}"
+
+    return True, (
+        f"Imported {graph_counts['nodes']} nodes, {graph_counts['edges']} relationships "
+        f"({settings.graph_backend}) and {sum(chroma_counts.values())} vectors in "
+        f"{len(chroma_counts)} collections from snapshot created {manifest.get('created_at', 'unknown')} "
+        f"in {time.time() - started:.1f}s"
+    )
@@ -0,0 +1,194 @@
+"""Observed LLM latency per (model, agent): adaptive timeouts, hedge delays and provider circuit breakers."""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_shared_lock = threading.Lock()
+_tracker: Optional["LatencyTracker"] = None
+_breakers: Dict[str, "CircuitBreaker"] = {}
+
+# Recent request durations kept per (model, agent)
+LATENCY_WINDOW = 200
+
+
+class CircuitOpenError(RuntimeError):
+    """An LLM provider failed repeatedly and is not being called until its cooldown ends."""
+
+
+def sample_percentile(samples, q: float) -> float:
+    """Nearest-rank q-quantile (0-1) of a non-empty sample."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class LatencyTracker:
+    """
+    Request durations per (model, agent), and the timeouts and hedge delays derived from them.
+
+    Until LLM_LATENCY_MIN_SAMPLES requests have been seen for a (model, agent),
+    its configured timeout applies. After that the timeout is the observed p99
+    times LLM_TIMEOUT_MULTIPLIER, at least LLM_MIN_TIMEOUT and at most the
+    configured timeout, so one stuck generation no longer stalls a stage for
+    the full OLLAMA_TIMEOUT. A request that times out is recorded at the time
+    it waited, which widens the next timeout instead of shrinking it.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._timeouts: Dict[Tuple[str, str], int] = {}
+
+    def record(self, model: str, agent: Optional[str], seconds: float, timed_out: bool = False):
+        """Record one request's duration (or the time a timed-out request waited)."""
+        key = (model, agent or "default")
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+            if timed_out:
+                self._timeouts[key] = self._timeouts.get(key, 0) + 1
+
+    def percentile(self, model: str, agent: Optional[str], q: float) -> Optional[float]:
+        """The q-quantile of recent durations, or None below LLM_LATENCY_MIN_SAMPLES samples."""
+        with self._lock:
+            samples = list(self._samples.get((model, agent or "default"), ()))
+        if len(samples) < self.settings.llm_latency_min_samples:
+            return None
+        return sample_percentile(samples, q)
+
+    def timeout(self, model: str, agent: Optional[str], default: float) -> float:
+        """Request timeout for a (model, agent); the default until enough requests were seen."""
+        if not self.settings.llm_adaptive_timeouts:
+            return default
+        p99 = self.percentile(model, agent, 0.99)
+        if p99 is None:
+            return default
+        return min(default, max(self.settings.llm_min_timeout, p99 * self.settings.llm_timeout_multiplier))
+
+    def hedge_delay(self, model: str, agent: Optional[str]) -> Optional[float]:
+        """Seconds after which a request is hedged (the LLM_HEDGE_PERCENTILE latency), or None."""
+        return self.percentile(model, agent, self.settings.llm_hedge_percentile)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per "model/agent": count, p50, p95, p99, timeouts and the current adaptive timeout (seconds)."""
+        with self._lock:
+            snapshot = {key: list(samples) for key, samples in self._samples.items()}
+            timeouts = dict(self._timeouts)
+        return {
+            f"{model}/{agent}": {
+                "count": len(samples),
+                "p50": round(sample_percentile(samples, 0.5), 2),
+                "p95": round(sample_percentile(samples, 0.95), 2),
+                "p99": round(sample_percentile(samples, 0.99), 2),
+                "timeouts": timeouts.get((model, agent), 0),
+                "timeout": round(self.timeout(model, agent, self.settings.ollama_timeout), 1)
+            }
+            for (model, agent), samples in snapshot.items() if samples
+        }
+
+
+class CircuitBreaker:
+    """
+    Fail fast on a provider after consecutive failures.
+
+    After LLM_BREAKER_FAILURES connection errors, timeouts or 5xx replies in a
+    row the breaker opens and calls raise CircuitOpenError for
+    LLM_BREAKER_COOLDOWN seconds. Then one trial call is let through: success
+    closes the breaker, failure opens it again. (Ollama hosts are ejected by
+    the host pool instead, see utils/ollama_pool.py.)
+    """
+
+    def __init__(self, name: str, settings=None):
+        self.name = name
+        self.settings = settings or get_settings()
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.open_until = 0.0
+        self.opened = 0
+        self._trial = False
+
+    def check(self):
+        """
+        Raise if the breaker is open.
+
+        Raises:
+            CircuitOpenError: The provider is in its cooldown (or a trial call is in flight)
+        """
+        with self._lock:
+            if self.failures < self.settings.llm_breaker_failures:
+                return
+            now = time.monotonic()
+            if now >= self.open_until and not self._trial:
+                self._trial = True  # Half-open: this call decides
+                return
+            wait = max(0.0, self.open_until - now)
+        raise CircuitOpenError(f"LLM provider {self.name} is failing; not calling it for {wait:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            if self.failures >= self.settings.llm_breaker_failures:
+                logger.info(f"LLM provider {self.name} recovered; circuit closed")
+            self.failures = 0
+            self._trial = False
+
+    def release(self):
+        """End a call that neither reached nor failed the provider (e.g. the run was stopped)."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures < self.settings.llm_breaker_failures:
+                return
+            self.open_until = time.monotonic() + self.settings.llm_breaker_cooldown
+            self.opened += 1
+        logger.warning(
+            f"LLM provider {self.name} failed {self.failures} times in a row; "
+            f"circuit open for {self.settings.llm_breaker_cooldown:.0f}s: {error}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": self.failures >= self.settings.llm_breaker_failures and time.monotonic() < self.open_until,
+                "failures": self.failures,
+                "opened": self.opened
+            }
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Get the process-wide latency tracker."""
+    global _tracker
+    if _tracker is None:
+        with _shared_lock:
+            if _tracker is None:
+                _tracker = LatencyTracker()
+    return _tracker
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Get the circuit breaker of one provider endpoint (e.g. an OpenAI-compatible base URL)."""
+    with _shared_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def latency_stats() -> Dict[str, Any]:
+    """Latency percentiles and adaptive timeouts per (model, agent), and provider circuit breakers."""
+    with _shared_lock:
+        breakers = dict(_breakers)
+    return {
+        "latency": get_latency_tracker().stats(),
+        "circuit_breakers": {name: breaker.stats() for name, breaker in breakers.items()}
+    }
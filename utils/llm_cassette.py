@@ -0,0 +1,160 @@
+"""LLM and embedding cassettes: record the request/reply pairs of a run and replay them without a server."""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import get_settings
+from utils.run_budget import current_run_budget
+from utils.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+_cassette: Optional["Cassette"] = None
+_cassette_lock = threading.Lock()
+
+
+class CassetteMissError(RuntimeError):
+    """A request made while replaying has no recording in the cassette."""
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Hash of a request (kind, model, prompts, schema, sampling) that a recording is matched on."""
+    canonical = json.dumps({"kind": kind, **request}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+class Cassette:
+    """
+    A JSONL file of recorded LLM and embedding requests.
+
+    In record mode every reply is appended with the time it took. In replay
+    mode requests are answered from the file, in recorded order when the same
+    request was made several times (the last reply repeats once they run out),
+    and a request that was never recorded raises CassetteMissError. Replays
+    wait according to LLM_CASSETTE_LATENCY: not at all ("none"), as long as
+    the recorded call ("recorded"), or a fixed number of seconds.
+    """
+
+    def __init__(self, path: str, mode: str = "off", latency: str = "none"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {', '.join(CASSETTE_MODES)})")
+        self.path = path
+        self.mode = mode
+        self.latency = (latency or "none").strip().lower()
+        if self.latency not in ("none", "recorded"):
+            float(self.latency)  # A synthetic delay in seconds; raises ValueError otherwise
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Counter = Counter()
+        self._counts = Counter(recorded=0, replayed=0, missed=0)
+        if mode == "replay":
+            self._load()
+        elif mode == "record" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        """Read the recordings (the file must exist: replaying without one is a setup error)."""
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Replaying {sum(len(entries) for entries in self._entries.values())} recorded requests from {self.path}")
+
+    def call(self, kind: str, request: Dict[str, Any], produce: Callable[[], Any]) -> Any:
+        """
+        Answer one request: from the cassette when replaying, otherwise by produce()
+        (recording its reply when recording).
+
+        Args:
+            kind: Request kind ("generate", "generate_json", "embedding")
+            request: Everything the reply depends on (JSON-serializable)
+            produce: Makes the real request
+
+        Raises:
+            CassetteMissError: Replaying and the request was never recorded
+        """
+        if self.mode == "replay":
+            return self.replay(kind, request)
+        if self.mode == "off":
+            return produce()
+        started = time.monotonic()
+        response = produce()
+        self.record(kind, request, response, time.monotonic() - started)
+        return response
+
+    def record(self, kind: str, request: Dict[str, Any], response: Any, seconds: float):
+        """Append one request/reply pair."""
+        line = json.dumps({
+            "key": request_key(kind, request),
+            "kind": kind,
+            "request": request,
+            "response": response,
+            "seconds": round(seconds, 3),
+        }, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._counts["recorded"] += 1
+
+    def replay(self, kind: str, request: Dict[str, Any]) -> Any:
+        """Serve the recorded reply of a request (a copy: callers may modify it)."""
+        key = request_key(kind, request)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self._counts["missed"] += 1
+                raise CassetteMissError(
+                    f"No recording of this {kind} request (model {request.get('model')}, key {key}) in "
+                    f"{self.path}; record it with LLM_CASSETTE_MODE=record"
+                )
+            entry = entries[min(self._served[key], len(entries) - 1)]
+            self._served[key] += 1
+            self._counts["replayed"] += 1
+        delay = self._delay(entry)
+        if delay > 0:
+            current_run_budget().sleep(delay)
+        current_span().set(replayed=True)
+        return copy.deepcopy(entry["response"])
+
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        if self.latency == "none":
+            return 0.0
+        if self.latency == "recorded":
+            return float(entry.get("seconds", 0.0))
+        return float(self.latency)
+
+    def stats(self) -> Dict[str, Any]:
+        """Mode, path and the requests recorded, replayed and missed."""
+        with self._lock:
+            return {"mode": self.mode, "path": self.path, **self._counts}
+
+
+def get_cassette() -> Cassette:
+    """Get the process-wide cassette configured by LLM_CASSETTE_MODE / LLM_CASSETTE_PATH / LLM_CASSETTE_LATENCY."""
+    global _cassette
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                settings = get_settings()
+                _cassette = Cassette(
+                    settings.llm_cassette_path,
+                    (settings.llm_cassette_mode or "off").strip().lower(),
+                    settings.llm_cassette_latency
+                )
+                if _cassette.mode != "off":
+                    logger.info(f"LLM cassette: {_cassette.mode} {_cassette.path}")
+    return _cassette
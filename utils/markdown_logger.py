@@ -1,11 +1,70 @@
 """Markdown-based logging system for agent workflow tracking."""
 
+import atexit
 import json
+import logging
 import os
 import threading
+import weakref
+from contextvars import ContextVar
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 from pathlib import Path
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Verbosity levels, in order (MARKDOWN_LOG_VERBOSITY). An entry whose level is
+# above the logger's verbosity is dropped before it is formatted:
+#   minimal: workflow start/end, sections, errors, retries, quality feedback
+#   normal:  + processing steps, RAG queries/results, agent text and lists
+#   verbose: + full agent input/output payloads, LLM calls, per-item listings
+LOG_VERBOSITY_LEVELS = ("minimal", "normal", "verbose")
+
+
+class _LogFlusher:
+    """Background thread that writes the buffered entries of every open MarkdownLogger."""
+
+    def __init__(self):
+        self._loggers = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, markdown_logger: "MarkdownLogger"):
+        with self._lock:
+            self._loggers.add(markdown_logger)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="markdown-log-flusher", daemon=True)
+                self._thread.start()
+
+    def unregister(self, markdown_logger: "MarkdownLogger"):
+        with self._lock:
+            self._loggers.discard(markdown_logger)
+
+    def wake(self):
+        """Flush now (a logger's buffer reached MARKDOWN_LOG_FLUSH_BYTES)."""
+        self._wake.set()
+
+    def flush_all(self):
+        with self._lock:
+            markdown_loggers = list(self._loggers)
+        for markdown_logger in markdown_loggers:
+            try:
+                markdown_logger.flush()
+            except Exception as e:
+                logger.warning(f"Failed to flush {markdown_logger.log_file_path}: {e}")
+
+    def _run(self):
+        while True:
+            self._wake.wait(get_settings().markdown_log_flush_interval)
+            self._wake.clear()
+            self.flush_all()
+
+
+_flusher = _LogFlusher()
+# Entries still buffered when the process exits (including on an unhandled error) are written out
+atexit.register(_flusher.flush_all)
 
 
 class MarkdownLogger:
@@ -14,18 +73,38 @@ class MarkdownLogger:
     
     Logs all agent inputs, outputs, RAG queries, and processing steps
     to a markdown file in chronological order.
+    
+    Entries are appended to an in-memory buffer and written through one open
+    file handle by a background thread, when the buffer reaches
+    MARKDOWN_LOG_FLUSH_BYTES or every MARKDOWN_LOG_FLUSH_INTERVAL seconds,
+    and on close() and at process exit.
     """
     
-    def __init__(self, log_file_path: str):
+    def __init__(self, log_file_path: str, verbosity: Optional[str] = None):
         """
         Initialize MarkdownLogger.
         
         Args:
             log_file_path: Path to the log file (e.g., 'action_plans/subject_20251016_log.md')
+            verbosity: One of LOG_VERBOSITY_LEVELS (default: settings.markdown_log_verbosity)
+        
+        Raises:
+            ValueError: Unknown verbosity level
         """
+        settings = get_settings()
         self.log_file_path = log_file_path
-        self.lock = threading.Lock()
-        self._buffer = []
+        self.verbosity = verbosity or settings.markdown_log_verbosity
+        if self.verbosity not in LOG_VERBOSITY_LEVELS:
+            raise ValueError(
+                f"Unknown log verbosity: {self.verbosity} (expected one of: {', '.join(LOG_VERBOSITY_LEVELS)})"
+            )
+        self._flush_bytes = settings.markdown_log_flush_bytes
+        self.lock = threading.Lock()  # Guards the buffer
+        self._file_lock = threading.Lock()  # Keeps flushes in order
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._file = None
+        self._closed = False
         self._initialized = False
         
         # Create directory if needed
@@ -33,30 +112,65 @@ class MarkdownLogger:
         
         # Initialize file
         self._init_log_file()
+        _flusher.register(self)
     
     def _init_log_file(self):
-        """Initialize the log file with header."""
-        with self.lock:
-            with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                f.write("# Action Plan Generation Log\n\n")
-                f.write(f"**Created:** {self._get_timestamp()}\n\n")
-                f.write("---\n\n")
+        """Initialize the log file with header and keep it open for appending."""
+        with self._file_lock:
+            self._file = open(self.log_file_path, 'w', encoding='utf-8')
+            self._file.write("# Action Plan Generation Log\n\n")
+            self._file.write(f"**Created:** {self._get_timestamp()}\n\n")
+            self._file.write("---\n\n")
+            self._file.flush()
             self._initialized = True
     
     def _get_timestamp(self) -> str:
         """Get current timestamp string."""
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
+    def enabled(self, level: str) -> bool:
+        """
+        Whether entries of a verbosity level are written.
+        
+        Callers check this before building expensive entries (e.g. per-item listings).
+        
+        Args:
+            level: One of LOG_VERBOSITY_LEVELS
+        """
+        return LOG_VERBOSITY_LEVELS.index(level) <= LOG_VERBOSITY_LEVELS.index(self.verbosity)
+    
     def _write(self, content: str):
         """
-        Thread-safe write to log file.
+        Thread-safe append to the log buffer.
         
         Args:
             content: Content to write
         """
         with self.lock:
-            with open(self.log_file_path, 'a', encoding='utf-8') as f:
-                f.write(content)
+            self._buffer.append(content)
+            self._buffered_chars += len(content)
+            full = self._buffered_chars >= self._flush_bytes
+        if self._closed:
+            # Late entries (after close) are written directly
+            self.flush()
+        elif full:
+            _flusher.wake()
+    
+    def flush(self):
+        """Write buffered entries to the log file."""
+        with self._file_lock:
+            with self.lock:
+                if not self._buffer:
+                    return
+                content = "".join(self._buffer)
+                self._buffer = []
+                self._buffered_chars = 0
+            if self._file is None:
+                with open(self.log_file_path, 'a', encoding='utf-8') as f:
+                    f.write(content)
+            else:
+                self._file.write(content)
+                self._file.flush()
     
     def _format_json(self, data: Any, max_length: int = 1000000) -> str:
         """
@@ -142,12 +256,15 @@ class MarkdownLogger:
             agent_name: Name of the agent
             input_data: Input data for the agent
         """
+        if not self.enabled("normal"):
+            return
         content = f"## {agent_name} Agent\n\n"
         content += f"**Timestamp:** {self._get_timestamp()}\n"
         content += f"**Status:** Started\n\n"
-        content += "**Input:**\n```json\n"
-        content += self._format_json(input_data)
-        content += "\n```\n\n"
+        if self.enabled("verbose"):
+            content += "**Input:**\n```json\n"
+            content += self._format_json(input_data)
+            content += "\n```\n\n"
         self._write(content)
     
     def log_agent_output(self, agent_name: str, output_data: Any):
@@ -158,9 +275,13 @@ class MarkdownLogger:
             agent_name: Name of the agent
             output_data: Output data from the agent
         """
-        content = f"**Output:**\n```json\n"
-        content += self._format_json(output_data)
-        content += "\n```\n\n"
+        if not self.enabled("normal"):
+            return
+        content = ""
+        if self.enabled("verbose"):
+            content += f"**Output:**\n```json\n"
+            content += self._format_json(output_data)
+            content += "\n```\n\n"
         content += "---\n\n"
         self._write(content)
     
@@ -172,6 +293,8 @@ class MarkdownLogger:
             description: Description of the processing step
             details: Optional details (will be formatted as JSON if dict/list)
         """
+        if not self.enabled("normal"):
+            return
         content = f"**Processing Step:** {description}\n"
         if details:
             if isinstance(details, (dict, list)):
@@ -192,6 +315,8 @@ class MarkdownLogger:
             top_k: Number of results requested
             agent_context: Optional context about which agent is querying
         """
+        if not self.enabled("normal"):
+            return
         content = f"**RAG Query:**\n"
         if agent_context:
             content += f"- Context: {agent_context}\n"
@@ -208,6 +333,8 @@ class MarkdownLogger:
             result_count: Total number of results
             top_results: Top results with text snippets and scores
         """
+        if not self.enabled("normal"):
+            return
         content = f"**RAG Results:** {result_count} results found\n\n"
         
         if top_results:
@@ -248,6 +375,8 @@ class MarkdownLogger:
             model: Model name
             temperature: Temperature setting
         """
+        if not self.enabled("verbose"):
+            return
         content = f"**LLM Call:**\n"
         if model:
             content += f"- Model: {model}\n"
@@ -318,6 +447,8 @@ class MarkdownLogger:
             node_ids: List of found node IDs
             description: Optional description of the search
         """
+        if not self.enabled("normal"):
+            return
         content = f"**Graph Node Search:**\n"
         if description:
             content += f"- Description: {description}\n"
@@ -327,7 +458,7 @@ class MarkdownLogger:
         content += "\n"
         self._write(content)
     
-    def add_text(self, text: str, bold: bool = False, italic: bool = False):
+    def add_text(self, text: str, bold: bool = False, italic: bool = False, verbosity: str = "normal"):
         """
         Add plain text to log.
         
@@ -335,40 +466,108 @@ class MarkdownLogger:
             text: Text to add
             bold: Whether to make text bold
             italic: Whether to make text italic
+            verbosity: Verbosity level of the entry (see LOG_VERBOSITY_LEVELS)
         """
+        if not self.enabled(verbosity):
+            return
         if bold:
             text = f"**{text}**"
         if italic:
             text = f"*{text}*"
         self._write(f"{text}\n")
     
-    def add_code_block(self, code: str, language: str = ""):
+    def add_code_block(self, code: str, language: str = "", verbosity: str = "normal"):
         """
         Add a code block.
         
         Args:
             code: Code content
             language: Language for syntax highlighting
+            verbosity: Verbosity level of the entry (see LOG_VERBOSITY_LEVELS)
         """
+        if not self.enabled(verbosity):
+            return
         content = f"```{language}\n{code}\n```\n\n"
         self._write(content)
     
-    def add_list_item(self, item: str, level: int = 0):
+    def add_list_item(self, item: str, level: int = 0, verbosity: str = "normal"):
         """
         Add a list item.
         
         Args:
             item: List item text
             level: Indentation level
+            verbosity: Verbosity level of the entry (see LOG_VERBOSITY_LEVELS)
         """
+        if not self.enabled(verbosity):
+            return
         indent = "  " * level
         content = f"{indent}- {item}\n"
         self._write(content)
     
     def close(self):
         """Close the logger and ensure all data is written."""
-        with self.lock:
-            # Add final timestamp
-            with open(self.log_file_path, 'a', encoding='utf-8') as f:
-                f.write(f"\n\n**Log closed:** {self._get_timestamp()}\n")
+        # Add final timestamp
+        self._write(f"\n\n**Log closed:** {self._get_timestamp()}\n")
+        with self._file_lock:
+            self._closed = True
+        self.flush()
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        _flusher.unregister(self)
+
+
+def is_log_enabled(markdown_logger, verbosity: str) -> bool:
+    """
+    Whether `markdown_logger` is set and writes entries of `verbosity`.
+
+    Agents use it to skip building per-item listings that would be dropped.
+    Loggers without verbosity levels (e.g. test doubles) log everything.
+    """
+    if not markdown_logger:
+        return False
+    enabled = getattr(markdown_logger, "enabled", None)
+    return enabled(verbosity) if callable(enabled) else True
+
+
+_current_markdown_logger: ContextVar[Optional[MarkdownLogger]] = ContextVar("markdown_logger", default=None)
+
+
+def bind_markdown_logger(markdown_logger: Optional[MarkdownLogger]):
+    """
+    Bind a logger to the current plan run's context.
+
+    Args:
+        markdown_logger: Logger that a ContextMarkdownLogger should forward to
+
+    Returns:
+        Token for reset_markdown_logger
+    """
+    return _current_markdown_logger.set(markdown_logger)
+
+
+def reset_markdown_logger(token):
+    """Restore the logger bound before bind_markdown_logger."""
+    _current_markdown_logger.reset(token)
+
+
+class ContextMarkdownLogger:
+    """
+    Stand-in MarkdownLogger for a workflow shared by concurrent plan runs.
+
+    Every call is forwarded to the logger bound (bind_markdown_logger) in
+    the calling context, so each plan writes its own log file. LangGraph
+    copies the context into the threads that run nodes. It is falsy when
+    nothing is bound, so the usual `if markdown_logger:` checks skip logging.
+    """
+
+    def __bool__(self) -> bool:
+        return _current_markdown_logger.get() is not None
 
+    def __getattr__(self, name: str):
+        target = _current_markdown_logger.get()
+        if target is None:
+            return lambda *args, **kwargs: None
+        return getattr(target, name)
@@ -0,0 +1,188 @@
+"""Shared Neo4j driver registry to avoid per-component connection pools."""
+
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS
+from config.settings import get_settings
+from utils.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+
+class SharedNeo4jDriver:
+    """
+    Singleton registry of Neo4j drivers.
+
+    One driver (and therefore one Bolt connection pool) is kept per
+    (uri, user) pair for the whole process. Components borrow the driver
+    instead of creating their own and must not close it; the registry
+    closes every driver at interpreter exit.
+    """
+
+    _instance = None
+    _drivers: Dict[Tuple[str, str], Any] = {}
+    _lock = threading.Lock()
+    _atexit_registered = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def get_driver(
+        self,
+        uri: Optional[str] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None
+    ):
+        """
+        Get or create the shared driver for a database.
+
+        Args:
+            uri: Bolt URI (default: settings.neo4j_uri)
+            user: Username (default: settings.neo4j_user)
+            password: Password (default: settings.neo4j_password)
+
+        Returns:
+            Shared neo4j Driver instance
+        """
+        settings = get_settings()
+        uri = uri or settings.neo4j_uri
+        user = user or settings.neo4j_user
+        password = password or settings.neo4j_password
+        key = (uri, user)
+
+        driver = self._drivers.get(key)
+        if driver is not None:
+            return driver
+
+        with self._lock:
+            driver = self._drivers.get(key)
+            if driver is None:
+                driver = GraphDatabase.driver(
+                    uri,
+                    auth=(user, password),
+                    max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+                    connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout,
+                    max_connection_lifetime=settings.neo4j_max_connection_lifetime,
+                    max_transaction_retry_time=settings.neo4j_max_transaction_retry_time,
+                    fetch_size=settings.neo4j_fetch_size
+                )
+                self._drivers[key] = driver
+                logger.info(
+                    f"Created shared Neo4j driver for {uri} "
+                    f"(pool={settings.neo4j_max_connection_pool_size}, fetch_size={settings.neo4j_fetch_size})"
+                )
+                if not SharedNeo4jDriver._atexit_registered:
+                    atexit.register(close_neo4j_drivers)
+                    SharedNeo4jDriver._atexit_registered = True
+        return driver
+
+    def close_all(self):
+        """Close every registered driver."""
+        with self._lock:
+            for key, driver in list(self._drivers.items()):
+                try:
+                    driver.close()
+                except Exception as e:
+                    logger.warning(f"Error closing Neo4j driver for {key[0]}: {e}")
+            self._drivers.clear()
+
+
+def get_neo4j_driver():
+    """Get shared Neo4j driver instance."""
+    return SharedNeo4jDriver().get_driver()
+
+
+def close_neo4j_drivers():
+    """Close all shared Neo4j drivers (registered with atexit on first use)."""
+    SharedNeo4jDriver().close_all()
+
+
+def neo4j_session(write: bool = False):
+    """
+    Open a session on the shared driver with read or write routing.
+
+    Args:
+        write: Route to a writer when True, otherwise to a reader
+
+    Returns:
+        neo4j Session (use as a context manager)
+    """
+    return get_neo4j_driver().session(
+        default_access_mode=WRITE_ACCESS if write else READ_ACCESS,
+        fetch_size=get_settings().neo4j_fetch_size
+    )
+
+
+def _collect_records(tx, cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Run a query inside a managed transaction and materialize the records."""
+    result = tx.run(cypher, params)
+    return [dict(record) for record in result]
+
+
+def query_span_name(cypher: str) -> str:
+    """Short one-line name of a Cypher query for trace spans."""
+    return " ".join(cypher.split())[:80]
+
+
+def _run_traced(execute: Callable, cypher: str, params: Dict[str, Any], access: str) -> List[Dict[str, Any]]:
+    """Run a query through session.execute_read / execute_write as one trace span."""
+    with trace_span("neo4j", query_span_name(cypher), access=access, request_chars=len(cypher), retries=0) as span:
+        attempts = []
+
+        def work(tx):
+            if attempts:
+                span.add("retries")  # The driver re-runs the transaction function on transient errors
+            attempts.append(None)
+            records = _collect_records(tx, cypher, params)
+            span.set(result_count=len(records))
+            return records
+
+        return execute(work)
+
+
+def execute_read(cypher: str, **params) -> List[Dict[str, Any]]:
+    """
+    Run a read query in a managed (retried, reader-routed) transaction.
+
+    Args:
+        cypher: Cypher query
+        **params: Query parameters
+
+    Returns:
+        List of records as dictionaries
+    """
+    with neo4j_session() as session:
+        return _run_traced(session.execute_read, cypher, params, "read")
+
+
+def execute_write(cypher: str, **params) -> List[Dict[str, Any]]:
+    """
+    Run a write query in a managed (retried, writer-routed) transaction.
+
+    Args:
+        cypher: Cypher query
+        **params: Query parameters
+
+    Returns:
+        List of records as dictionaries
+    """
+    with neo4j_session(write=True) as session:
+        return _run_traced(session.execute_write, cypher, params, "write")
+
+
+def execute_write_transaction(work: Callable, *args, **kwargs) -> Any:
+    """
+    Run a unit of work (``work(tx, *args, **kwargs)``) in one managed write transaction.
+
+    Args:
+        work: Transaction function receiving the transaction as first argument
+
+    Returns:
+        Whatever the transaction function returns
+    """
+    with neo4j_session(write=True) as session, trace_span("neo4j", getattr(work, "__name__", "transaction"), access="write"):
+        return session.execute_write(work, *args, **kwargs)
@@ -6,6 +6,9 @@ from typing import List, Union, Optional
 import requests
 import numpy as np
 from config.settings import get_settings
+from utils.tracing import trace_span, current_span
+from utils.ollama_pool import get_ollama_pool
+from utils.llm_cassette import get_cassette
 
 logger = logging.getLogger(__name__)
 
@@ -55,27 +58,29 @@ class OllamaEmbeddingsClient:
             logger.warning("Empty text provided for embedding")
             return [0.0] * self.embedding_dim
         
-        # Check cache
-        if use_cache and self._cache_enabled:
-            cache_key = self._get_cache_key(text)
-            if cache_key in self._cache:
-                logger.debug(f"Using cached embedding for text: {text}...")
-                return self._cache[cache_key]
-        
-        # Generate embedding
-        try:
-            embedding = self._generate_embedding(text)
-            
-            # Cache result
+        with trace_span("embedding", self.model, model=self.model, request_chars=len(text), cache_hit=False) as span:
+            # Check cache
             if use_cache and self._cache_enabled:
                 cache_key = self._get_cache_key(text)
-                self._cache[cache_key] = embedding
-            
-            return embedding
+                if cache_key in self._cache:
+                    logger.debug(f"Using cached embedding for text: {text}...")
+                    span.set(cache_hit=True)
+                    return self._cache[cache_key]
             
-        except Exception as e:
-            logger.error(f"Error generating embedding: {e}")
-            raise
+            # Generate embedding
+            try:
+                embedding = self._generate_embedding(text)
+                
+                # Cache result
+                if use_cache and self._cache_enabled:
+                    cache_key = self._get_cache_key(text)
+                    self._cache[cache_key] = embedding
+                
+                return embedding
+                
+            except Exception as e:
+                logger.error(f"Error generating embedding: {e}")
+                raise
     
     def embed_batch(
         self,
@@ -125,6 +130,10 @@ class OllamaEmbeddingsClient:
         """
         Generate embedding using Ollama API with retry logic.
         
+        Each attempt is routed by the Ollama host pool; a retry avoids the hosts
+        that already failed. With LLM_CASSETTE_MODE set, the reply is recorded
+        to or replayed from the cassette (utils/llm_cassette.py).
+        
         Args:
             text: Text to embed
             retry_count: Number of retries on failure
@@ -132,20 +141,25 @@ class OllamaEmbeddingsClient:
         Returns:
             Embedding vector
         """
-        url = f"{self.base_url}/api/embeddings"
         payload = {
             "model": self.model,
             "prompt": text
         }
+        return get_cassette().call("embedding", payload, lambda: self._request_embedding(payload, retry_count))
+    
+    def _request_embedding(self, payload: dict, retry_count: int) -> List[float]:
+        """Post one /api/embeddings request, retrying on another host after a failure."""
+        failed_hosts = set()
         
         for attempt in range(retry_count):
             try:
-                response = requests.post(
-                    url,
-                    json=payload,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
+                with get_ollama_pool().endpoint(self.model, failed_hosts) as base_url:
+                    response = requests.post(
+                        f"{base_url}/api/embeddings",
+                        json=payload,
+                        timeout=self.timeout
+                    )
+                    response.raise_for_status()
                 
                 result = response.json()
                 embedding = result.get("embedding", [])
@@ -169,18 +183,21 @@ class OllamaEmbeddingsClient:
                 logger.warning(f"Request timeout on attempt {attempt + 1}")
                 if attempt == retry_count - 1:
                     raise
+                current_span().add("retries")
                 time.sleep(2 ** attempt)
                 
             except requests.exceptions.RequestException as e:
                 logger.error(f"Request error on attempt {attempt + 1}: {e}")
                 if attempt == retry_count - 1:
                     raise
+                current_span().add("retries")
                 time.sleep(2 ** attempt)
                 
             except Exception as e:
                 logger.error(f"Unexpected error on attempt {attempt + 1}: {e}")
                 if attempt == retry_count - 1:
                     raise
+                current_span().add("retries")
                 time.sleep(2 ** attempt)
         
         raise RuntimeError("Max retries exceeded for embedding generation")
@@ -212,6 +229,8 @@ class OllamaEmbeddingsClient:
     
     def check_connection(self) -> bool:
         """Check if Ollama server is accessible and model is available."""
+        if get_cassette().replaying:
+            return True
         try:
             # Try to generate a small test embedding
             test_embedding = self._generate_embedding("test", retry_count=1)
@@ -0,0 +1,259 @@
+"""Ollama endpoint pool: model discovery, least-outstanding routing with per-model stickiness, and health checks."""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional["OllamaEndpointPool"] = None
+_pool_lock = threading.Lock()
+
+
+def _model_names(name: str) -> Set[str]:
+    """Names a pulled model answers to ("llama3:latest" is also "llama3")."""
+    return {name, name[:-len(":latest")]} if name.endswith(":latest") else {name}
+
+
+class OllamaEndpoint:
+    """One Ollama host and what the pool knows about it."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0  # Requests in flight
+        self.failures = 0  # Consecutive failed requests / probes
+        self.ejected_until = 0.0  # monotonic time; 0 = in rotation
+        self.models: Optional[Set[str]] = None  # From /api/tags; None until discovered
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+
+    def ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def serves(self, model: Optional[str]) -> bool:
+        return self.models is None or model is None or model in self.models
+
+
+class OllamaEndpointPool:
+    """
+    Routes Ollama chat and embedding requests across OLLAMA_BASE_URLS.
+
+    A request goes to a live host that has the model pulled. Each model sticks
+    to one host so its KV cache and loaded weights are reused, until that host
+    has OLLAMA_STICKY_SLACK more requests in flight than the least busy one;
+    the overflow goes to the least busy host without moving the model.
+
+    Health is checked passively and actively. Connection errors, timeouts and
+    5xx replies count against a host, and OLLAMA_EJECT_AFTER_FAILURES in a row
+    take it out of rotation for OLLAMA_EJECT_SECONDS. A background probe of
+    /api/tags every OLLAMA_HEALTH_CHECK_INTERVAL seconds refreshes each host's
+    model list, ejects hosts that do not answer and re-admits those that do.
+    A host whose ejection has run out gets requests again, and its next failure
+    ejects it at once. When every host is out, requests go to the one due back
+    first rather than failing outright.
+
+    With a single host (the default: OLLAMA_BASE_URL) nothing is probed and
+    every request goes to it.
+    """
+
+    def __init__(self, urls: Optional[List[str]] = None, settings=None):
+        self.settings = settings or get_settings()
+        urls = urls or self.settings.ollama_base_urls or [self.settings.ollama_base_url]
+        self.endpoints = [OllamaEndpoint(url) for url in dict.fromkeys(url.rstrip("/") for url in urls)]
+        self._lock = threading.Lock()
+        self._sticky: Dict[str, OllamaEndpoint] = {}
+        self._session = requests.Session()
+        self._checker: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _live(self, now: float) -> List[OllamaEndpoint]:
+        live = [endpoint for endpoint in self.endpoints if not endpoint.ejected(now)]
+        return live or [min(self.endpoints, key=lambda endpoint: endpoint.ejected_until)]
+
+    def capacity(self, model: Optional[str] = None) -> int:
+        """Live hosts serving a model (at least 1); the scheduler scales its per-host caps by this."""
+        if len(self.endpoints) == 1:
+            return 1
+        now = time.monotonic()
+        with self._lock:
+            return max(1, sum(1 for endpoint in self._live(now) if endpoint.serves(model)))
+
+    def choose(self, model: Optional[str] = None, avoid: Optional[Set[str]] = None) -> OllamaEndpoint:
+        """
+        Pick the host for one request (see the class docstring).
+
+        Args:
+            model: Model the request is for (None: any host)
+            avoid: Host URLs that already failed this request; used only if nothing else is live
+        """
+        if len(self.endpoints) == 1:
+            return self.endpoints[0]
+        self._ensure_health_checks()
+        now = time.monotonic()
+        with self._lock:
+            live = self._live(now)
+            serving = [endpoint for endpoint in live if endpoint.serves(model)] or live
+            candidates = [endpoint for endpoint in serving if endpoint.url not in (avoid or ())] or serving
+            least = min(candidates, key=lambda endpoint: (endpoint.outstanding, endpoint.failures))
+            sticky = self._sticky.get(model) if model else None
+            if sticky not in serving:
+                if model:
+                    self._sticky[model] = least  # First request, or its host went out of rotation
+                return least
+            if sticky in candidates and sticky.outstanding - least.outstanding <= self.settings.ollama_sticky_slack:
+                return sticky
+            return least
+
+    def preferred_url(self, model: str) -> str:
+        """URL of the host a model's requests currently go to (pre-warm target)."""
+        return self.choose(model).url
+
+    @contextmanager
+    def endpoint(self, model: Optional[str] = None, avoid: Optional[Set[str]] = None):
+        """
+        Route one request and record its outcome.
+
+        Yields:
+            Base URL of the chosen host; on a host failure it is added to avoid,
+            so the caller's retry goes elsewhere
+        """
+        endpoint = self.choose(model, avoid)
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        try:
+            yield endpoint.url
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            self._failed(endpoint, e, avoid)
+            raise
+        except requests.exceptions.HTTPError as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status == 404 and model and endpoint.models is not None:
+                with self._lock:
+                    endpoint.models -= _model_names(model)  # Removed from the host since discovery
+                if avoid is not None:
+                    avoid.add(endpoint.url)
+            elif status is not None and status >= 500:
+                self._failed(endpoint, e, avoid)
+            raise
+        else:
+            with self._lock:
+                endpoint.failures = 0
+        finally:
+            with self._lock:
+                endpoint.outstanding -= 1
+
+    def _failed(self, endpoint: OllamaEndpoint, error: Exception, avoid: Optional[Set[str]] = None):
+        """Count a failed request against a host, ejecting it at the threshold."""
+        if avoid is not None:
+            avoid.add(endpoint.url)
+        if len(self.endpoints) == 1:
+            return
+        with self._lock:
+            endpoint.errors += 1
+            endpoint.failures += 1
+            if endpoint.failures < self.settings.ollama_eject_after_failures:
+                return
+            self._eject(endpoint)
+        logger.warning(
+            f"Ollama host {endpoint.url} ejected for {self.settings.ollama_eject_seconds:.0f}s "
+            f"after {endpoint.failures} failures: {error}"
+        )
+
+    def _eject(self, endpoint: OllamaEndpoint):
+        if not endpoint.ejected(time.monotonic()):
+            endpoint.ejections += 1
+        endpoint.ejected_until = time.monotonic() + self.settings.ollama_eject_seconds
+        for model, sticky in list(self._sticky.items()):
+            if sticky is endpoint:
+                del self._sticky[model]
+
+    def probe(self, endpoint: OllamaEndpoint) -> bool:
+        """
+        Check one host (GET /api/tags) and refresh its model list.
+
+        A host that answers is re-admitted; one that does not is ejected.
+        """
+        try:
+            response = self._session.get(f"{endpoint.url}/api/tags", timeout=5)
+            response.raise_for_status()
+            models = set()
+            for entry in response.json().get("models", []):
+                models |= _model_names(entry.get("name", ""))
+        except Exception as e:
+            if len(self.endpoints) == 1:
+                logger.warning(f"Ollama host {endpoint.url} failed its health check: {e}")
+                return False
+            with self._lock:
+                was_live = not endpoint.ejected(time.monotonic())
+                endpoint.failures = max(endpoint.failures + 1, self.settings.ollama_eject_after_failures)
+                self._eject(endpoint)
+            if was_live:
+                logger.warning(f"Ollama host {endpoint.url} failed its health check and was ejected: {e}")
+            return False
+        with self._lock:
+            readmitted = endpoint.ejected_until > 0
+            endpoint.models = models
+            endpoint.failures = 0
+            endpoint.ejected_until = 0.0
+        if readmitted:
+            logger.info(f"Ollama host {endpoint.url} passed its health check and is back in rotation")
+        return True
+
+    def check_health(self) -> int:
+        """Probe every host; returns how many are live."""
+        return sum(1 for endpoint in self.endpoints if self.probe(endpoint))
+
+    def _ensure_health_checks(self):
+        """Start the background prober on first use (multi-host pools only)."""
+        if self._checker is not None or self.settings.ollama_health_check_interval <= 0:
+            return
+        with self._lock:
+            if self._checker is not None:
+                return
+            self._checker = threading.Thread(target=self._check_loop, name="ollama-health", daemon=True)
+        self._checker.start()
+
+    def _check_loop(self):
+        while True:
+            self.check_health()
+            time.sleep(self.settings.ollama_health_check_interval)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-host routing and health state."""
+        now = time.monotonic()
+        with self._lock:
+            sticky: Dict[str, List[str]] = {}
+            for model, endpoint in self._sticky.items():
+                sticky.setdefault(endpoint.url, []).append(model)
+            return [
+                {
+                    "url": endpoint.url,
+                    "live": not endpoint.ejected(now),
+                    "outstanding": endpoint.outstanding,
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                    "ejections": endpoint.ejections,
+                    "models": sorted(endpoint.models) if endpoint.models is not None else None,
+                    "sticky_models": sorted(sticky.get(endpoint.url, []))
+                }
+                for endpoint in self.endpoints
+            ]
+
+
+def get_ollama_pool() -> OllamaEndpointPool:
+    """Get the process-wide Ollama endpoint pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = OllamaEndpointPool()
+    return _pool
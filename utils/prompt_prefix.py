@@ -0,0 +1,94 @@
+"""Prompt prefix tracking: hashes of the static head of each prompt, to record KV / prefix cache reuse."""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import get_settings
+from utils.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+_tracker: Optional["PrefixTracker"] = None
+_tracker_lock = threading.Lock()
+
+# Hex digits of the prefix hash recorded in trace spans
+PREFIX_HASH_CHARS = 12
+
+
+def prompt_prefix(prompt: str, system_prompt: Optional[str] = None) -> str:
+    """
+    The part of a request that is the same across calls: the system prompt
+    followed by the user prompt's static_prefix (see config.prompts.PromptText).
+    Plain string prompts contribute nothing beyond the system prompt.
+    """
+    return (system_prompt or "") + "\n\n" + getattr(prompt, "static_prefix", "")
+
+
+class PrefixTracker:
+    """
+    Which prompt prefixes each (provider, model) has been sent recently.
+
+    A prefix sent again within PROMPT_PREFIX_TTL_SECONDS counts as reused: the
+    server can serve it from its KV / prefix cache instead of evaluating it
+    again. This is what the client can see; OpenAI-compatible servers also
+    report the cached tokens they actually used (cached_tokens in the trace).
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        self._lock = threading.Lock()
+        self._seen: Dict[Tuple[str, str, str], float] = {}
+        self._tokens: Dict[str, int] = {}
+        self._counts = {"calls": 0, "reused": 0, "prefix_tokens": 0, "reused_tokens": 0}
+
+    def observe(self, provider: str, model: str, prompt: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Record one request's prefix.
+
+        Returns:
+            Trace attributes: prefix_hash, prefix_tokens and prefix_reused (empty
+            when the request has no static prefix)
+        """
+        prefix = prompt_prefix(prompt, system_prompt)
+        if not prefix.strip():
+            return {}
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:PREFIX_HASH_CHARS]
+        tokens = self._tokens.get(digest)
+        if tokens is None:
+            tokens = count_tokens(prefix)
+        now = time.monotonic()
+        ttl = self.settings.prompt_prefix_ttl_seconds
+        with self._lock:
+            self._tokens[digest] = tokens
+            last = self._seen.get((provider, model, digest))
+            reused = last is not None and now - last < ttl
+            self._seen[(provider, model, digest)] = now
+            if len(self._seen) > 1000:
+                self._seen = {key: seen for key, seen in self._seen.items() if now - seen < ttl}
+                self._tokens = {key[2]: self._tokens[key[2]] for key in self._seen if key[2] in self._tokens}
+            self._counts["calls"] += 1
+            self._counts["prefix_tokens"] += tokens
+            if reused:
+                self._counts["reused"] += 1
+                self._counts["reused_tokens"] += tokens
+        return {"prefix_hash": digest, "prefix_tokens": tokens, "prefix_reused": reused}
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests with a prefix, how many reused one, and the prefix tokens sent / reusable."""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["reuse_rate"] = round(counts["reused"] / counts["calls"], 3) if counts["calls"] else 0.0
+        return counts
+
+
+def get_prefix_tracker() -> PrefixTracker:
+    """Get the process-wide prompt prefix tracker."""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = PrefixTracker()
+    return _tracker
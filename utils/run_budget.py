@@ -0,0 +1,286 @@
+"""Run-level time budget: deadline, degradation levels and cancellation of a plan run."""
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Set, TypeVar
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Degradation levels, in order. A run starts at "normal" and moves down as the
+# remaining share of its budget crosses RUN_DEGRADE_REDUCED_AT / RUN_DEGRADE_MINIMAL_AT.
+DEGRADATION_LEVELS = ("normal", "reduced", "minimal")
+
+# Optional work and the level from which it is skipped
+SKIPPED_FROM = {
+    "sibling_expansion": "reduced",  # Analyzer Phase 2 Step 2
+    "table_scoring": "minimal",  # Selector LLM relevance score per table
+}
+
+# How often a waiting thread re-checks the cancel event and the deadline
+_POLL_INTERVAL = 0.25
+
+
+class RunCancelled(RuntimeError):
+    """The run was stopped (UI stop button or service cancel)."""
+
+
+class DeadlineExceeded(RunCancelled):
+    """The run's deadline passed."""
+
+
+class InflightRequests:
+    """
+    Abort callbacks of the blocking requests in flight.
+
+    A request registers how to interrupt itself (e.g. shut down the socket of
+    a streamed reply) for as long as it runs; abort() is called from another
+    thread to end them all at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aborts: Set[Callable[[], None]] = set()
+
+    @contextmanager
+    def track(self, abort: Callable[[], None]):
+        """Register abort for the duration of the block."""
+        with self._lock:
+            self._aborts.add(abort)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._aborts.discard(abort)
+
+    def abort(self):
+        """Interrupt every registered request."""
+        with self._lock:
+            aborts = list(self._aborts)
+        for abort in aborts:
+            try:
+                abort()
+            except Exception as e:
+                logger.debug(f"Aborting an in-flight request failed: {e}")
+
+
+class RunBudget:
+    """
+    Deadline and cancel event of one plan run.
+
+    The deadline is a wall-clock timestamp so it survives checkpointing
+    (ActionPlanState carries deadline_at / budget_seconds). Agents read the
+    budget bound to the run's context (current_run_budget) and degrade as
+    the deadline approaches; LLM calls go through call() so a stop or an
+    expired deadline returns control immediately.
+    """
+
+    def __init__(
+        self,
+        deadline_at: Optional[float] = None,
+        budget_seconds: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None
+    ):
+        """
+        Initialize the budget.
+
+        Args:
+            deadline_at: Unix time at which the run must stop (None = no deadline)
+            budget_seconds: Total budget, used to compute the remaining share
+            cancel_event: Event set to stop the run (None = not cancellable)
+        """
+        self.deadline_at = deadline_at
+        self.budget_seconds = budget_seconds
+        self.cancel_event = cancel_event
+        self.inflight = InflightRequests()  # Requests to interrupt when the run stops
+
+    @classmethod
+    def start(cls, seconds: Optional[float], cancel_event: Optional[threading.Event] = None) -> "RunBudget":
+        """Create a budget whose deadline is `seconds` from now (None or <= 0 = no deadline)."""
+        if not seconds or seconds <= 0:
+            return cls(cancel_event=cancel_event)
+        return cls(time.time() + seconds, float(seconds), cancel_event)
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], cancel_event: Optional[threading.Event] = None) -> "RunBudget":
+        """Rebuild the budget recorded in a workflow state (see to_state)."""
+        return cls(state.get("deadline_at"), state.get("budget_seconds"), cancel_event)
+
+    def to_state(self) -> Dict[str, Any]:
+        """State keys recording this budget."""
+        return {"deadline_at": self.deadline_at, "budget_seconds": self.budget_seconds}
+
+    @property
+    def limited(self) -> bool:
+        """Whether the run has a deadline or can be cancelled."""
+        return self.deadline_at is not None or self.cancel_event is not None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline_at is not None and time.time() >= self.deadline_at
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the run was cancelled or ran out of time."""
+        return self.cancelled or self.expired
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None = no deadline)."""
+        if self.deadline_at is None:
+            return None
+        return max(0.0, self.deadline_at - time.time())
+
+    @property
+    def level(self) -> str:
+        """Current degradation level (see DEGRADATION_LEVELS)."""
+        if self.deadline_at is None or not self.budget_seconds:
+            return "normal"
+        settings = get_settings()
+        share = self.remaining() / self.budget_seconds
+        if share <= settings.run_degrade_minimal_at:
+            return "minimal"
+        if share <= settings.run_degrade_reduced_at:
+            return "reduced"
+        return "normal"
+
+    def allows(self, feature: str) -> bool:
+        """Whether optional work (a SKIPPED_FROM key) still runs at the current level."""
+        skipped_from = SKIPPED_FROM.get(feature)
+        if skipped_from is None:
+            return True
+        return DEGRADATION_LEVELS.index(self.level) < DEGRADATION_LEVELS.index(skipped_from)
+
+    def top_k(self, top_k: int) -> int:
+        """Retrieval size for the current level (halved when reduced, quartered when minimal)."""
+        divisor = {"normal": 1, "reduced": 2, "minimal": 4}[self.level]
+        return max(1, top_k // divisor)
+
+    def attempts(self, attempts: int) -> int:
+        """LLM call attempts for the current level (at least one)."""
+        return {"normal": attempts, "reduced": max(1, attempts - 1), "minimal": 1}[self.level]
+
+    def retries(self, retries: int) -> int:
+        """Follow-up re-runs for the current level (none when minimal)."""
+        return {"normal": retries, "reduced": max(0, retries - 1), "minimal": 0}[self.level]
+
+    def timeout(self, timeout: float) -> float:
+        """Clamp a request timeout to the time left (at least one second)."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return max(1.0, min(timeout, remaining))
+
+    def check(self):
+        """
+        Raise if the run should stop.
+
+        Raises:
+            RunCancelled: The cancel event is set
+            DeadlineExceeded: The deadline has passed
+        """
+        if self.cancelled:
+            raise RunCancelled("Run cancelled")
+        if self.expired:
+            raise self._deadline_error()
+
+    def _deadline_error(self) -> DeadlineExceeded:
+        return DeadlineExceeded(f"Run deadline of {self.budget_seconds or 0:.0f}s exceeded")
+
+    def sleep(self, seconds: float):
+        """Sleep (e.g. retry backoff), waking up early and raising if the run stops."""
+        self.check()
+        remaining = self.remaining()
+        if remaining is not None and seconds >= remaining:
+            raise self._deadline_error()
+        if self.cancel_event is not None:
+            self.cancel_event.wait(seconds)
+        else:
+            time.sleep(seconds)
+        self.check()
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """
+        Run a blocking call (an LLM request) so a stop or the deadline interrupts the wait.
+
+        Without a deadline or cancel event the call runs inline. Otherwise it runs
+        in a worker thread (with the caller's context) and this thread returns as
+        soon as the run stops. The requests registered in self.inflight are
+        aborted at that moment (streamed Ollama replies shut down their socket,
+        see LLMClient._post), so the worker ends and frees its scheduler slot
+        and connection right away; anything else ends on its own within its
+        request timeout, which is clamped to the remaining budget.
+
+        Raises:
+            RunCancelled / DeadlineExceeded: The run stopped before the call finished
+        """
+        self.check()
+        if not self.limited:
+            return fn()
+
+        outcome: Dict[str, Any] = {}
+        done = threading.Event()
+        context = contextvars.copy_context()
+
+        def worker():
+            try:
+                outcome["value"] = context.run(fn)
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=worker, name="llm-call", daemon=True).start()
+        while not done.wait(_POLL_INTERVAL):
+            if self.stopped:
+                logger.warning("Aborting in-flight LLM request: run stopped")
+                self.inflight.abort()
+                self.check()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["value"]
+
+
+_UNLIMITED = RunBudget()
+_current_run_budget: ContextVar[Optional[RunBudget]] = ContextVar("run_budget", default=None)
+
+
+def current_run_budget() -> RunBudget:
+    """Get the budget bound to the current run (an unlimited budget outside a run)."""
+    return _current_run_budget.get() or _UNLIMITED
+
+
+def budget_for_state(state: Dict[str, Any]) -> RunBudget:
+    """Get the budget bound to the run, or the one recorded in `state` when none is bound."""
+    budget = _current_run_budget.get()
+    if budget is None and state.get("deadline_at"):
+        return RunBudget.from_state(state)
+    return budget or _UNLIMITED
+
+
+def bind_run_budget(budget: Optional[RunBudget]):
+    """
+    Bind a budget to the current plan run's context.
+
+    LangGraph copies the context into the threads that run nodes, so every
+    agent of the run sees it.
+
+    Returns:
+        Token for reset_run_budget
+    """
+    return _current_run_budget.set(budget)
+
+
+def reset_run_budget(token):
+    """Restore the budget bound before bind_run_budget."""
+    _current_run_budget.reset(token)
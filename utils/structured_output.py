@@ -0,0 +1,230 @@
+"""Schema-constrained JSON output: schema resolution, local repair, validation and retry-rate counters."""
+
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# A JSON Schema dict or a pydantic model describing the expected output
+OutputSchema = Union[Dict[str, Any], Type[BaseModel]]
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+class StructuredOutputError(ValueError):
+    """The model's reply is not valid JSON for the requested schema, even after repair."""
+
+
+def resolve_schema(schema: Optional[OutputSchema]) -> Tuple[Optional[Dict[str, Any]], Optional[Type[BaseModel]]]:
+    """
+    Normalize a generate_json schema argument.
+
+    Returns:
+        Tuple of (JSON Schema dict sent to the provider, pydantic model used for validation)
+    """
+    if schema is None:
+        return None, None
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return schema.model_json_schema(), schema
+    return schema, None
+
+
+def schema_name(schema: Dict[str, Any], model: Optional[Type[BaseModel]]) -> str:
+    """Name for the provider's json_schema response format."""
+    return model.__name__ if model is not None else re.sub(r"[^A-Za-z0-9_-]", "_", schema.get("title", "response"))[:64]
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """
+    Recover JSON from a malformed reply without another LLM call.
+
+    Handles markdown code fences, text around the JSON value, trailing commas
+    and a reply cut off before its closing brackets / quote.
+
+    Returns:
+        The parsed value, or None if it cannot be recovered
+    """
+    if not text:
+        return None
+    fenced = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return None
+    text = text[min(starts):]
+
+    candidates = []
+    end = max(text.rfind("}"), text.rfind("]"))
+    if end != -1:
+        candidates.append(text[:end + 1])
+    candidates.append(_close_truncated(text))
+
+    for candidate in candidates:
+        candidate = re.sub(r",\s*([}\]])", r"\1", candidate)
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def _close_truncated(text: str) -> str:
+    """Close the strings and brackets left open by a truncated reply."""
+    stack: List[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    text = text + '"' if in_string else text.rstrip().rstrip(",:")
+    return text + "".join(reversed(stack))
+
+
+def schema_errors(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Check a value against the subset of JSON Schema the agents use.
+
+    Supports type, required, properties, items, enum, minItems and maxItems.
+
+    Returns:
+        Error messages (empty when the value is valid)
+    """
+    errors: List[str] = []
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        python_types: List[type] = []
+        for name in types:
+            python_type = _JSON_TYPES.get(name, object)
+            python_types.extend(python_type if isinstance(python_type, tuple) else (python_type,))
+        # bool is an int subclass, but JSON true/false is not a number
+        if not isinstance(value, tuple(python_types)) or (isinstance(value, bool) and "boolean" not in types):
+            return [f"{path}: expected {'/'.join(types)}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} not in {schema['enum']}")
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing '{key}'")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(schema_errors(value[key], subschema, f"{path}.{key}"))
+    if isinstance(value, list):
+        if "minItems" in schema and len(value) < schema["minItems"]:
+            errors.append(f"{path}: {len(value)} items, expected at least {schema['minItems']}")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: {len(value)} items, expected at most {schema['maxItems']}")
+        if isinstance(schema.get("items"), dict):
+            for idx, item in enumerate(value):
+                errors.extend(schema_errors(item, schema["items"], f"{path}[{idx}]"))
+    return errors
+
+
+def parse_structured(
+    content: str,
+    schema: Optional[Dict[str, Any]] = None,
+    model: Optional[Type[BaseModel]] = None
+) -> Tuple[Any, bool]:
+    """
+    Parse and validate a reply in one pass, repairing it locally if needed.
+
+    Args:
+        content: Raw reply text
+        schema: JSON Schema to validate against (ignored when model is given)
+        model: pydantic model to validate against; the result is its JSON dump
+
+    Returns:
+        Tuple of (value, repaired)
+
+    Raises:
+        StructuredOutputError: The reply cannot be parsed or does not match the schema
+    """
+    repaired = False
+    try:
+        value = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        value = repair_json(content or "")
+        if value is None:
+            raise StructuredOutputError(f"Reply is not JSON: {(content or '')[:200]}")
+        repaired = True
+
+    if model is not None:
+        try:
+            return model.model_validate(value).model_dump(mode="json"), repaired
+        except ValidationError as e:
+            raise StructuredOutputError(f"Reply does not match {model.__name__}: {e}") from e
+    if schema is not None:
+        errors = schema_errors(value, schema)
+        if errors:
+            raise StructuredOutputError(f"Reply does not match the schema: {'; '.join(errors[:5])}")
+    return value, repaired
+
+
+class _StructuredOutputStats:
+    """Process-wide counters of generate_json outcomes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "first_pass": 0, "repaired": 0, "recalls": 0, "failed": 0}
+
+    def record(self, attempts: int, repaired: bool, failed: bool = False):
+        with self._lock:
+            self._counts["calls"] += 1
+            self._counts["recalls"] += max(0, attempts - 1)
+            if failed:
+                self._counts["failed"] += 1
+            elif repaired:
+                self._counts["repaired"] += 1
+            elif attempts == 1:
+                self._counts["first_pass"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        calls = counts["calls"] or 1
+        counts["recall_rate"] = round(counts["recalls"] / calls, 3)
+        counts["repair_rate"] = round(counts["repaired"] / calls, 3)
+        return counts
+
+
+_stats = _StructuredOutputStats()
+
+
+def record_structured_output(attempts: int, repaired: bool, failed: bool = False):
+    """Count one generate_json call (attempts = LLM generations it took)."""
+    _stats.record(attempts, repaired, failed)
+
+
+def structured_output_stats() -> Dict[str, Any]:
+    """
+    Get the process-wide generate_json counters.
+
+    Returns:
+        Dictionary with calls, first_pass, repaired, recalls, failed, recall_rate
+        (extra generations per call) and repair_rate
+    """
+    return _stats.snapshot()
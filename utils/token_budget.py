@@ -0,0 +1,236 @@
+"""Token accounting for prompt assembly: counting, context windows, priority packing and batch splitting."""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Context windows (tokens) by model name prefix; the first match wins, so
+# specific entries precede general ones. MODEL_CONTEXT_WINDOWS overrides these.
+DEFAULT_CONTEXT_WINDOWS: Tuple[Tuple[str, int], ...] = (
+    ("gemini-2.5", 1048576),
+    ("gemini", 1048576),
+    ("gpt-4.1", 1047576),
+    ("gpt-4o", 128000),
+    ("gpt-oss", 131072),
+    ("gpt-3.5", 16385),
+    ("gemma3:1b", 32768),
+    ("gemma3", 131072),
+    ("gemma2", 8192),
+    ("cogito", 131072),
+    ("llama3.1", 131072),
+    ("llama3.2", 131072),
+    ("llama3.3", 131072),
+    ("llama3", 8192),
+    ("qwen3", 40960),
+    ("qwen2.5", 32768),
+    ("mistral", 32768),
+    ("deepseek-r1", 131072),
+    ("sonar", 127072),
+)
+
+# tiktoken's cl100k_base only approximates the Llama / Gemma / Gemini
+# tokenizers, so prompts are planned against 90% of the window.
+TOKENIZER_HEADROOM = 0.9
+
+TRUNCATION_MARKER = "\n[... truncated to fit the model's context window ...]"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_encoding_failed = False
+
+# num_ctx pinned per Ollama model for the process (see ollama_num_ctx)
+_pinned_num_ctx: Dict[str, int] = {}
+_pinned_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once (None if it cannot be loaded, e.g. offline)."""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    _encoding_failed = True
+                    logger.warning(f"tiktoken encoding unavailable, estimating tokens from characters: {e}")
+    return _encoding
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Count the tokens of a text (about 3 characters per token without tiktoken)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = TRUNCATION_MARKER) -> str:
+    """
+    Cut a text to at most max_tokens tokens (marker included).
+
+    Returns:
+        The text unchanged if it fits, otherwise its head followed by the marker
+        ("" when not even the marker fits)
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max_tokens - count_tokens(marker)
+    if keep <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:keep * 3] + marker
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + marker
+
+
+def _model_window(model: str) -> int:
+    """Full context window of a model (table, MODEL_CONTEXT_WINDOWS or DEFAULT_CONTEXT_WINDOW)."""
+    settings = get_settings()
+    name = (model or "").lower()
+    window = settings.model_context_windows.get(model)
+    if window is None:
+        window = next(
+            (size for prefix, size in DEFAULT_CONTEXT_WINDOWS if name.startswith(prefix)),
+            settings.default_context_window
+        )
+    return window
+
+
+def context_window(model: str, provider: Optional[str] = None) -> int:
+    """
+    Get the context window of a model.
+
+    Args:
+        model: Model name (e.g. "cogito:8b", "gemini-2.5-flash")
+        provider: "ollama" returns the num_ctx pinned for the model
+            (ollama_num_ctx), so prompts are planned against the context
+            the server actually allocates
+
+    Returns:
+        Window size in tokens (DEFAULT_CONTEXT_WINDOW for unknown models)
+    """
+    if provider == "ollama":
+        return ollama_num_ctx(model)
+    return _model_window(model)
+
+
+def ollama_num_ctx(model: str, needed: int = 0) -> int:
+    """
+    Get the num_ctx every request to an Ollama model uses.
+
+    Ollama reloads a model whenever num_ctx changes, so the size is pinned per
+    model: OLLAMA_NUM_CTX, capped at the model's window. Prompt budgets plan
+    against it, so work that does not fit is split (split_to_fit) instead of
+    being sent with a larger context. Only a single prompt that cannot be
+    split further (needed tokens, reply included) raises the pin, to the next
+    power of two up to OLLAMA_MAX_NUM_CTX; it never shrinks.
+    """
+    settings = get_settings()
+    limit = min(_model_window(model), settings.ollama_max_num_ctx)
+    with _pinned_lock:
+        pinned = _pinned_num_ctx.get(model)
+        size = pinned or min(settings.ollama_num_ctx, limit)
+        while size < needed and size < limit:
+            size *= 2
+        size = min(size, limit)
+        if pinned is not None and size > pinned:
+            logger.info(f"Raising num_ctx of {model} from {pinned} to {size} for a prompt of ~{needed} tokens")
+        _pinned_num_ctx[model] = size
+    return size
+
+
+class PromptBudget:
+    """Token budget of one prompt for one model."""
+
+    def __init__(self, model: str, provider: Optional[str] = None, reserve_output: Optional[int] = None):
+        """
+        Initialize the budget.
+
+        Args:
+            model: Model the prompt is sent to
+            provider: LLM provider ("ollama" plans against the pinned num_ctx)
+            reserve_output: Tokens kept free for the reply (default: LLM_OUTPUT_RESERVE_TOKENS)
+        """
+        self.model = model
+        self.window = context_window(model, provider)
+        self.reserve_output = get_settings().llm_output_reserve_tokens if reserve_output is None else reserve_output
+
+    @property
+    def available(self) -> int:
+        """Prompt tokens available (system and user prompt together)."""
+        return max(0, int(self.window * TOKENIZER_HEADROOM) - self.reserve_output)
+
+    def remaining(self, *texts: str) -> int:
+        """Tokens left after the given prompt parts (negative when they overflow)."""
+        return self.available - sum(count_tokens(text) for text in texts)
+
+    def fits(self, *texts: str) -> bool:
+        """Whether the given prompt parts fit together."""
+        return self.remaining(*texts) >= 0
+
+
+def fit_components(components: Sequence[Tuple[str, str]], max_tokens: int) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Pack prompt components by priority.
+
+    Components are taken in order (highest priority first). Each is kept whole
+    while it fits; the first that does not is truncated to the tokens left, and
+    any after it are dropped.
+
+    Args:
+        components: (name, text) pairs in priority order
+        max_tokens: Tokens available for all components together
+
+    Returns:
+        Tuple of (name -> fitted text, names of truncated or dropped components)
+    """
+    fitted: Dict[str, str] = {}
+    cut: List[str] = []
+    left = max_tokens
+    for name, text in components:
+        tokens = count_tokens(text)
+        if tokens <= left:
+            fitted[name] = text
+            left -= tokens
+            continue
+        fitted[name] = truncate_to_tokens(text, left) if left > 0 else ""
+        left = 0
+        cut.append(name)
+    return fitted, cut
+
+
+def split_to_fit(items: Sequence[Any], render: Callable[[Any], str], max_tokens: int) -> List[List[Any]]:
+    """
+    Split items into consecutive batches whose rendered text fits max_tokens.
+
+    An item too large on its own gets a batch of its own (the caller truncates it).
+
+    Args:
+        items: Items to batch (nodes, actions, plan sections)
+        render: Text an item contributes to the prompt
+        max_tokens: Tokens available per batch
+
+    Returns:
+        Batches in the original order
+    """
+    batches: List[List[Any]] = []
+    current: List[Any] = []
+    used = 0
+    for item in items:
+        tokens = count_tokens(render(item))
+        if current and used + tokens > max_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,275 @@
+"""Structured JSONL trace of a plan run: one span per workflow node and per LLM, embedding, Neo4j and Chroma call."""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Span kinds. A run span contains node spans, which contain the call spans
+# their agents make (see `python main.py trace` for the per-stage breakdown).
+# "model_load" is an Ollama model pre-warmed for the next stage.
+SPAN_KINDS = ("run", "node", "llm", "embedding", "neo4j", "chroma", "model_load")
+
+# Keys every span record has; attributes are written next to them
+_CORE_KEYS = ("trace_id", "span_id", "parent_id", "kind", "name", "stage", "start", "duration_ms", "status")
+
+
+class Span:
+    """
+    One timed operation.
+
+    Call sites add what they learn while the operation runs (token counts,
+    retries, cache hits, payload sizes) with set() / add().
+    """
+
+    def __init__(self, kind: str, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.name = name
+        # The workflow node a call belongs to is inherited from the enclosing span
+        self.stage = attributes.pop("stage", None) or (parent.stage if parent is not None else None)
+        self.attributes = {key: value for key, value in attributes.items() if key not in _CORE_KEYS}
+        self.status = "ok"
+
+    def set(self, **attributes):
+        """Set span attributes."""
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount: int = 1):
+        """Add to a numeric attribute (e.g. retries, prompt_tokens)."""
+        self.attributes[key] = self.attributes.get(key, 0) + (amount or 0)
+
+
+class _NullSpan:
+    """Span used when no trace is being recorded."""
+
+    stage = None
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, key: str, amount: int = 1):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Writes the spans of one plan run to a JSONL file."""
+
+    def __init__(self, path: str, trace_id: Optional[str] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            path: JSONL file to write (one span per line, written when the span ends)
+            trace_id: Id shared by every span of the run (default: generated)
+        """
+        self.path = path
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def record(self, span: Span, start: float, duration: float):
+        """Write a finished span."""
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "kind": span.kind,
+            "name": span.name,
+            "stage": span.stage,
+            "start": round(start, 3),
+            "duration_ms": round(duration * 1000, 1),
+            "status": span.status,
+            **span.attributes
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+
+    def close(self):
+        """Flush and close the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_current_tracer: ContextVar[Optional[Tracer]] = ContextVar("tracer", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+@contextmanager
+def trace_span(kind: str, name: str, **attributes) -> Iterator[Span]:
+    """
+    Time an operation as a child of the current span.
+
+    Without a bound tracer this yields NULL_SPAN and records nothing.
+
+    Args:
+        kind: One of SPAN_KINDS
+        name: Operation name (node name, model, collection, query summary)
+        **attributes: Initial attributes; `stage` overrides the inherited workflow node
+
+    Yields:
+        The span, for adding attributes while the operation runs
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield NULL_SPAN
+        return
+    span = Span(kind, name, _current_span.get(), attributes)
+    token = _current_span.set(span)
+    start = time.time()
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.attributes["error"] = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        _current_span.reset(token)
+        try:
+            tracer.record(span, start, time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"Failed to record trace span: {e}")
+
+
+def current_span():
+    """Get the innermost open span (NULL_SPAN when none)."""
+    return _current_span.get() or NULL_SPAN
+
+
+def bind_tracer(tracer: Optional[Tracer]):
+    """
+    Bind a tracer to the current plan run's context.
+
+    LangGraph copies the context into the threads that run nodes, so every
+    call made by the run's agents is recorded.
+
+    Returns:
+        Token for reset_tracer
+    """
+    return _current_tracer.set(tracer)
+
+
+def reset_tracer(token):
+    """Restore the tracer bound before bind_tracer."""
+    _current_tracer.reset(token)
+
+
+def load_trace(path: str) -> list:
+    """Read the spans of a trace file (unparseable lines are skipped)."""
+    spans = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping invalid trace line in {path}")
+    return spans
+
+
+def summarize_trace(spans: list, top: int = 10) -> Dict[str, Any]:
+    """
+    Break a run down by stage and list its slowest calls.
+
+    Args:
+        spans: Span records (see load_trace)
+        top: Number of slowest calls to list
+
+    Returns:
+        Dictionary with run_ms, stages (node time plus count / total ms of each call
+        kind, token counts, LLM re-calls and locally repaired replies, Ollama model
+        loads during requests or pre-warms, hedged requests and hedges that won,
+        LLM calls with a static prompt prefix and how many reused one), and slowest
+        (the `top` longest call spans)
+    """
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    def stage_entry(name: Optional[str]) -> Dict[str, Any]:
+        return stages.setdefault(name or "(outside nodes)", {
+            "stage": name or "(outside nodes)", "duration_ms": 0.0, "calls": {},
+            "prompt_tokens": 0, "completion_tokens": 0, "retries": 0, "repaired": 0,
+            "model_loads": 0, "model_load_ms": 0.0, "hedged": 0, "hedges_won": 0,
+            "prefix_calls": 0, "prefix_reused": 0
+        })
+
+    calls = []
+    for span in spans:
+        if span.get("kind") == "node":
+            stage_entry(span.get("stage"))["duration_ms"] += span.get("duration_ms", 0.0)
+        elif span.get("kind") != "run":
+            calls.append(span)
+            entry = stage_entry(span.get("stage"))
+            by_kind = entry["calls"].setdefault(span["kind"], {"count": 0, "duration_ms": 0.0})
+            by_kind["count"] += 1
+            by_kind["duration_ms"] += span.get("duration_ms", 0.0)
+            entry["prompt_tokens"] += span.get("prompt_tokens") or 0
+            entry["completion_tokens"] += span.get("completion_tokens") or 0
+            entry["retries"] += span.get("retries") or 0
+            entry["repaired"] += 1 if span.get("repaired") else 0
+            if span.get("model_load_ms"):
+                entry["model_loads"] += 1
+                entry["model_load_ms"] += span["model_load_ms"]
+            entry["hedged"] += 1 if span.get("hedged") else 0
+            entry["hedges_won"] += 1 if span.get("hedge_won") else 0
+            if span.get("prefix_hash"):
+                entry["prefix_calls"] += 1
+                entry["prefix_reused"] += 1 if span.get("prefix_reused") else 0
+
+    run_ms = sum(span.get("duration_ms", 0.0) for span in spans if span.get("kind") == "run")
+    return {
+        "run_ms": run_ms,
+        "stages": sorted(stages.values(), key=lambda entry: entry["duration_ms"], reverse=True),
+        "slowest": sorted(calls, key=lambda span: span.get("duration_ms", 0.0), reverse=True)[:top]
+    }
+
+
+def render_trace_summary(summary: Dict[str, Any]) -> str:
+    """Render summarize_trace output as plain-text tables."""
+    lines = [f"Run: {summary['run_ms'] / 1000:.1f}s", "", "Per-stage latency:"]
+    lines.append(f"  {'stage':<22} {'node s':>8}  " + "  ".join(f"{kind + ' n/s':>16}" for kind in SPAN_KINDS[2:]) + f"  {'tokens in/out':>15}  {'retries/repaired':>16}  {'model loads':>12}  {'hedged/won':>10}  {'prefix reuse':>12}")
+    for entry in summary["stages"]:
+        cells = []
+        for kind in SPAN_KINDS[2:]:
+            by_kind = entry["calls"].get(kind)
+            cell = f"{by_kind['count']} / {by_kind['duration_ms'] / 1000:.1f}s" if by_kind else "-"
+            cells.append(f"{cell:>16}")
+        tokens = f"{entry['prompt_tokens']}/{entry['completion_tokens']}"
+        recovery = f"{entry['retries']}/{entry['repaired']}"
+        loads = f"{entry['model_loads']} / {entry['model_load_ms'] / 1000:.1f}s" if entry["model_loads"] else "-"
+        hedges = f"{entry['hedged']}/{entry['hedges_won']}" if entry["hedged"] else "-"
+        prefixes = f"{entry['prefix_reused']}/{entry['prefix_calls']}" if entry["prefix_calls"] else "-"
+        lines.append(
+            f"  {entry['stage']:<22} {entry['duration_ms'] / 1000:>7.1f}s  " + "  ".join(cells)
+            + f"  {tokens:>15}  {recovery:>16}  {loads:>12}  {hedges:>10}  {prefixes:>12}"
+        )
+
+    lines += ["", "Slowest calls:"]
+    for span in summary["slowest"]:
+        details = ", ".join(
+            f"{key}={span[key]}" for key in ("agent", "model", "endpoint", "queue_ms", "timeout_s", "hedge_won", "model_load_ms", "for_stage", "prompt_tokens", "completion_tokens", "cached_tokens", "retries", "repaired", "cache_hit", "result_count")
+            if span.get(key) not in (None, 0, "")
+        )
+        lines.append(
+            f"  {span.get('duration_ms', 0.0) / 1000:>7.1f}s  {span['kind']:<9} {span.get('stage') or '-':<20} "
+            f"{str(span.get('name'))[:40]:<40} {details}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,214 @@
+"""Durable workflow checkpoints so interrupted plan runs can resume from the failed node."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from langgraph.checkpoint.sqlite import SqliteSaver
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteCheckpointSaver(SqliteSaver):
+    """
+    LangGraph's SqliteSaver plus a registry of plan runs in the same file.
+
+    The `runs` table holds the parameters and status of each plan run, used
+    by `--resume` and the UI resume button. The checkpoints of a completed
+    run are deleted when it is marked completed, and runs not updated within
+    the retention window are pruned.
+    """
+
+    _RUNS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY, name TEXT, status TEXT, params TEXT,
+        next_node TEXT, error TEXT, created_at TEXT, updated_at TEXT
+    )
+    """
+
+    def __init__(self, path: str, retention_days: int = 0):
+        """
+        Initialize the saver.
+
+        Args:
+            path: SQLite file for checkpoints and the run registry
+            retention_days: Prune runs not updated for this many days (0 = keep all)
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        super().__init__(sqlite3.connect(path, check_same_thread=False))
+        self.path = path
+        self.retention_days = retention_days
+        with self.cursor() as cur:
+            cur.execute(self._RUNS_SCHEMA)
+        self.prune_runs()
+
+    def register_run(self, run_id: str, params: Dict[str, Any]):
+        """Record a new plan run with the parameters needed to resume it."""
+        now = datetime.now().isoformat()
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO runs (run_id, name, status, params, created_at, updated_at) "
+                "VALUES (?, ?, 'running', ?, ?, ?)",
+                (run_id, params.get("name"), json.dumps(params, ensure_ascii=False, default=str), now, now)
+            )
+        self.prune_runs()
+
+    def update_run_status(
+        self,
+        run_id: str,
+        status: str,
+        error: Optional[str] = None,
+        next_node: Optional[str] = None
+    ):
+        """
+        Set a run's status.
+
+        A completed run cannot be resumed, so its checkpoints are deleted.
+
+        Args:
+            run_id: Plan run id
+            status: 'running', 'failed' or 'completed'
+            error: Failure message
+            next_node: Node the run will restart from when resumed
+        """
+        with self.cursor() as cur:
+            cur.execute(
+                "UPDATE runs SET status = ?, error = ?, next_node = ?, updated_at = ? WHERE run_id = ?",
+                (status, error, next_node, datetime.now().isoformat(), run_id)
+            )
+        if status == "completed":
+            self.delete_thread(run_id)
+
+    def prune_runs(self) -> int:
+        """
+        Delete runs (and their checkpoints) not updated within the retention window.
+
+        Returns:
+            Number of runs removed
+        """
+        if not self.retention_days:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat()
+        with self.cursor() as cur:
+            expired = [row[0] for row in cur.execute("SELECT run_id FROM runs WHERE updated_at < ?", (cutoff,))]
+        for run_id in expired:
+            self.delete_thread(run_id)
+        with self.cursor() as cur:
+            removed = cur.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,)).rowcount
+        if removed:
+            logger.info(f"Pruned {removed} runs older than {self.retention_days} days from {self.path}")
+        return removed
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Get a run record (params decoded) or None."""
+        runs = self.list_runs(run_id=run_id)
+        return runs[0] if runs else None
+
+    def list_runs(
+        self,
+        statuses: Optional[List[str]] = None,
+        run_id: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        List plan runs, newest first.
+
+        Args:
+            statuses: Only runs in these statuses
+            run_id: Only this run
+            limit: Maximum number of runs
+
+        Returns:
+            Run dictionaries with run_id, name, status, params, next_node, error and timestamps
+        """
+        query = "SELECT run_id, name, status, params, next_node, error, created_at, updated_at FROM runs"
+        clauses, args = [], []
+        if statuses:
+            clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            args.extend(statuses)
+        if run_id:
+            clauses.append("run_id = ?")
+            args.append(run_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        args.append(limit)
+
+        with self.cursor(transaction=False) as cur:
+            rows = cur.execute(query, args).fetchall()
+        keys = ("run_id", "name", "status", "params", "next_node", "error", "created_at", "updated_at")
+        runs = []
+        for row in rows:
+            run = dict(zip(keys, row))
+            run["params"] = json.loads(run["params"] or "{}")
+            runs.append(run)
+        return runs
+
+
+_checkpointer: Optional[SqliteCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[SqliteCheckpointSaver]:
+    """
+    Get the process-wide checkpoint saver.
+
+    Returns:
+        SqliteCheckpointSaver, or None when settings.enable_checkpointing is off
+    """
+    global _checkpointer
+    settings = get_settings()
+    if not settings.enable_checkpointing:
+        return None
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = SqliteCheckpointSaver(
+                    settings.checkpoint_path, retention_days=settings.checkpoint_retention_days
+                )
+                logger.info(f"Workflow checkpoints stored in {settings.checkpoint_path}")
+    return _checkpointer
+
+
+def new_run_id() -> str:
+    """Generate a sortable, human-readable plan run id."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def get_run_config(run_id: Optional[str], recursion_limit: int = 50) -> Dict[str, Any]:
+    """
+    Build the LangGraph invoke config for a run.
+
+    Args:
+        run_id: Plan run id (used as the checkpoint thread id); None disables checkpointing
+        recursion_limit: LangGraph recursion limit
+
+    Returns:
+        Config dictionary for workflow.invoke
+    """
+    config: Dict[str, Any] = {"recursion_limit": recursion_limit}
+    if run_id:
+        config["configurable"] = {"thread_id": run_id}
+    return config
+
+
+def get_resume_point(workflow, run_id: str) -> Optional[List[str]]:
+    """
+    Get the nodes a run would execute next if resumed.
+
+    Args:
+        workflow: Workflow compiled with the checkpointer
+        run_id: Plan run id
+
+    Returns:
+        Node names (empty if the run finished), or None if the run has no checkpoint
+    """
+    snapshot = workflow.get_state(get_run_config(run_id))
+    if not snapshot or not snapshot.values:
+        return None
+    return list(snapshot.next)
@@ -0,0 +1,98 @@
+"""Critical path of a workflow run, from the per-stage timings of its progress events."""
+
+from typing import Any, Dict, List
+
+# Scheduling slack (seconds) between a stage finishing and its successor starting
+_SLACK_SECONDS = 0.25
+
+
+def compute_critical_path(stages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Find the chain of stages that determined the run's end-to-end latency.
+
+    Walks back from the last stage to finish, each time to the stage that finished
+    last before the current one started. Stages running in parallel with that chain
+    (e.g. special_protocols next to orchestrator → analyzer → phase3) are off the path.
+
+    Args:
+        stages: stage_completed events (node, started_at, finished_at, duration_seconds)
+
+    Returns:
+        Stages on the critical path, in execution order
+    """
+    timed = [s for s in stages if s.get("started_at") is not None and s.get("finished_at") is not None]
+    if not timed:
+        return []
+
+    current = max(timed, key=lambda s: s["finished_at"])
+    path = [current]
+    while True:
+        predecessors = [
+            s for s in timed
+            if s["started_at"] < current["started_at"]
+            and s["finished_at"] <= current["started_at"] + _SLACK_SECONDS
+        ]
+        if not predecessors:
+            break
+        current = max(predecessors, key=lambda s: s["finished_at"])
+        path.append(current)
+
+    return list(reversed(path))
+
+
+def render_timeline(stages: List[Dict[str, Any]], width: int = 40) -> str:
+    """
+    Render a text Gantt chart of the stages, marking the critical path with '*'.
+
+    Args:
+        stages: stage_completed events with started_at / finished_at
+        width: Width of the bar area in characters
+
+    Returns:
+        Multi-line chart (empty string if no timings are available)
+    """
+    timed = [s for s in stages if s.get("started_at") is not None and s.get("finished_at") is not None]
+    if not timed:
+        return ""
+
+    critical = {id(s) for s in compute_critical_path(timed)}
+    run_start = min(s["started_at"] for s in timed)
+    total = max(max(s["finished_at"] for s in timed) - run_start, 1e-6)
+    name_width = max(len(s["node"]) for s in timed)
+
+    lines = []
+    for stage in sorted(timed, key=lambda s: s["started_at"]):
+        begin = int((stage["started_at"] - run_start) / total * width)
+        end = max(begin + 1, int(round((stage["finished_at"] - run_start) / total * width)))
+        bar = " " * begin + "█" * (end - begin)
+        marker = "*" if id(stage) in critical else " "
+        lines.append(f"{stage['node']:<{name_width}} |{bar:<{width}}| {stage['duration_seconds']:>7.1f}s {marker}")
+
+    critical_seconds = sum(s["duration_seconds"] for s in timed if id(s) in critical)
+    lines.append(f"{'':<{name_width}}  total {total:.1f}s, critical path (*) {critical_seconds:.1f}s")
+    return "\n".join(lines)
+
+
+def critical_path_gantt(stages: List[Dict[str, Any]]) -> str:
+    """
+    Render the stages as a Mermaid Gantt chart with the critical path marked `crit`.
+
+    Args:
+        stages: stage_completed events with started_at / finished_at
+
+    Returns:
+        Mermaid source (empty string if no timings are available)
+    """
+    timed = [s for s in stages if s.get("started_at") is not None and s.get("finished_at") is not None]
+    if not timed:
+        return ""
+
+    critical = {id(s) for s in compute_critical_path(timed)}
+    run_start = min(s["started_at"] for s in timed)
+    lines = ["gantt", "    title Workflow stages (critical path in red)", "    dateFormat x", "    axisFormat %M:%S"]
+    for stage in sorted(timed, key=lambda s: s["started_at"]):
+        begin = int((stage["started_at"] - run_start) * 1000)
+        end = max(begin + 1, int((stage["finished_at"] - run_start) * 1000))
+        tag = "crit, " if id(stage) in critical else ""
+        lines.append(f"    {stage['node']} :{tag}{begin}, {end}")
+    return "\n".join(lines)
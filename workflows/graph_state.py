@@ -1,6 +1,12 @@
 """State definitions for LangGraph workflow."""
 
-from typing import TypedDict, List, Dict, Any, Optional
+import operator
+from typing import Annotated, TypedDict, List, Dict, Any, Optional
+
+
+def _latest(current: Any, update: Any) -> Any:
+    """Reducer for keys written by parallel branches where the latest write wins."""
+    return update
 
 
 class ActionPlanState(TypedDict, total=False):
@@ -82,13 +88,18 @@ class ActionPlanState(TypedDict, total=False):
     translated_plan: str  # Initial Persian translation from Translator Agent
     segmented_chunks: List[Dict[str, Any]]  # Chunks with text and metadata
     identified_terms: List[Dict[str, Any]]  # Terms with context windows and positions
-    dictionary_corrections: List[Dict[str, Any]]  # Corrections from dictionary lookup
+    dictionary_corrections: Annotated[List[Dict[str, Any]], operator.add]  # Corrections from dictionary lookup (merged across chunks)
     final_persian_plan: str  # Final corrected Persian translation
     
     # Workflow control
-    current_stage: str  # Current workflow stage
+    # Keys written by parallel branches carry reducers (see _instrument_node in orchestration.py)
+    current_stage: Annotated[str, _latest]  # Current workflow stage
     retry_count: Dict[str, int]  # Retry count per stage
-    errors: List[str]  # Error messages
+    errors: Annotated[List[str], operator.add]  # Error messages (merged across branches)
+    reused_stages: Annotated[List[str], operator.add]  # Stages whose stored output was reused (inputs unchanged)
+    deadline_at: Optional[float]  # Unix time by which the run must finish (None = no deadline, see utils/run_budget.py)
+    budget_seconds: Optional[float]  # Total run time budget the deadline was derived from
+    degraded_stages: Annotated[List[str], operator.add]  # "<stage>: <skipped or reduced work>" recorded under deadline pressure
     metadata: Dict[str, Any]  # Additional metadata
     agent_output_dir: Optional[str] # Directory to save agent outputs for debugging
 
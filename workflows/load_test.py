@@ -0,0 +1,195 @@
+"""Load test: concurrent plan generations against a fake (or real) LLM server, reporting throughput and latency percentiles."""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import utils.ollama_pool as ollama_pool
+from config.dynamic_settings import DynamicSettingsManager
+from config.settings import get_settings
+from utils.latency import sample_percentile
+from utils.llm_client import llm_scheduler_stats
+
+logger = logging.getLogger(__name__)
+
+LOAD_TEST_PLAN = {
+    "name": "Load Test Plan",
+    "timing": "First 72 hours after activation",
+    "level": "center",
+    "phase": "response",
+    "subject": "war",
+}
+
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+
+
+def percentile_summary(samples: List[float]) -> Dict[str, float]:
+    """p50 / p90 / p95 / p99 / max of a sample (empty dict if there are no samples)."""
+    if not samples:
+        return {}
+    return {name: round(sample_percentile(samples, q), 3) for name, q in PERCENTILES}
+
+
+def point_llm_settings_at(url: str):
+    """
+    Send every LLM and embedding request of this process to one server.
+
+    Ollama requests go to <url>, OpenAI-compatible ones (GapGPT, per-agent
+    bases, Perplexity) to <url>/v1. Must run before the workflow is created.
+    """
+    settings = get_settings()
+    url = url.rstrip("/")
+    settings.ollama_base_url = url
+    settings.ollama_base_urls = []
+    settings.gapgpt_api_base = f"{url}/v1"
+    settings.gapgpt_api_key = settings.gapgpt_api_key or "load-test"
+    settings.perplexity_api_url = f"{url}/v1/chat/completions"
+    for agent in DynamicSettingsManager.AGENT_NAMES:
+        setattr(settings, f"{agent}_api_base", f"{url}/v1")
+        setattr(settings, f"{agent}_api_key", getattr(settings, f"{agent}_api_key", None) or "load-test")
+    ollama_pool._pool = None  # Rebuilt from the new hosts on first use
+
+
+def run_load_test(
+    plans: int = 8,
+    concurrency: int = 4,
+    server_url: Optional[str] = None,
+    fake_config: Optional[Dict[str, Any]] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    report_path: Optional[str] = None,
+    reuse_stage_outputs: bool = False,
+    deadline_seconds: Optional[float] = None,
+    execution_profile: Optional[str] = None,
+    priority: str = "batch"
+) -> Dict[str, Any]:
+    """
+    Generate the same plan many times concurrently and measure the pipeline under load.
+
+    Without server_url a FakeLLMServer (utils/fake_llm_server.py) is started
+    in-process, so the run exercises scheduling, pooling, retries and
+    concurrency limits with no model server and reproducible latency. The
+    RAG indexes are used as they are.
+
+    Args:
+        plans: Number of plan generations
+        concurrency: Plans generated at the same time
+        server_url: LLM server to use instead of a fake one (Ollama routes at the root,
+            OpenAI routes under /v1)
+        fake_config: FakeLLMServer configuration (see DEFAULT_FAKE_LLM_CONFIG)
+        plan: Plan parameters (default: LOAD_TEST_PLAN); names get a " #<n>" suffix
+        report_path: Report path (default: action_plans/load_test_<timestamp>/report.json)
+        reuse_stage_outputs: Reuse stored stage outputs (off by default: every plan has
+            the same inputs, so later plans would only measure the stage cache)
+        deadline_seconds: Time budget of each plan (default: RUN_DEADLINE_SECONDS setting)
+        execution_profile: Execution profile of each plan (default: EXECUTION_PROFILE setting)
+        priority: LLM request priority class of the plans (interactive | batch)
+
+    Returns:
+        Report dictionary: wall time, throughput, plan latency percentiles, completed /
+        failed counts, fake server stats and LLM scheduler stats
+    """
+    from workflows.orchestration import create_workflow
+    from workflows.checkpointing import get_checkpointer
+    from workflows.plan_runner import run_plan_generation
+    from utils.fake_llm_server import FakeLLMServer
+    from utils.markdown_logger import ContextMarkdownLogger
+
+    started_at = datetime.now()
+    output_dir = os.path.join("action_plans", f"load_test_{started_at.strftime('%Y%m%d_%H%M%S')}")
+    report_path = report_path or os.path.join(output_dir, "report.json")
+    plan = {**LOAD_TEST_PLAN, **(plan or {})}
+
+    server = None
+    if not server_url:
+        server = FakeLLMServer(fake_config)
+        server_url = server.start()
+    point_llm_settings_at(server_url)
+    logger.info(f"Load test: {plans} plans, {concurrency} at a time, LLM server {server_url}")
+
+    try:
+        workflow = create_workflow(
+            markdown_logger=ContextMarkdownLogger(),
+            dynamic_settings=None,
+            checkpointer=get_checkpointer(),
+            reuse_stage_outputs=reuse_stage_outputs
+        )
+
+        def run_one(index: int) -> Dict[str, Any]:
+            name = f"{plan['name']} #{index}"
+            try:
+                return run_plan_generation(
+                    name=name,
+                    timing=plan["timing"],
+                    level=plan["level"],
+                    phase=plan["phase"],
+                    subject=plan["subject"],
+                    output_path=os.path.join(output_dir, f"plan_{index:03d}.md"),
+                    trigger=plan.get("trigger"),
+                    responsible_party=plan.get("responsible_party"),
+                    process_owner=plan.get("process_owner"),
+                    description=plan.get("description"),
+                    reuse_stage_outputs=reuse_stage_outputs,
+                    workflow=workflow,
+                    deadline_seconds=deadline_seconds,
+                    execution_profile=execution_profile,
+                    priority=priority
+                )
+            except Exception as e:
+                logger.error(f"Load test plan '{name}' failed: {e}", exc_info=True)
+                return {"name": name, "status": "failed", "error": str(e)}
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="load") as executor:
+            results = list(executor.map(run_one, range(1, plans + 1)))
+        duration = time.monotonic() - started
+    finally:
+        if server is not None:
+            server.stop()
+
+    completed = [r for r in results if r["status"] == "completed"]
+    report = {
+        "started_at": started_at.isoformat(),
+        "server_url": server_url,
+        "fake_server": server is not None,
+        "plans": plans,
+        "concurrency": concurrency,
+        "duration_seconds": round(duration, 1),
+        "throughput_plans_per_minute": round(len(completed) * 60.0 / duration, 2) if duration > 0 else 0.0,
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "plan_latency_seconds": percentile_summary([r["duration_seconds"] for r in completed]),
+        "fake_server_stats": server.stats() if server is not None else None,
+        "llm": llm_scheduler_stats(),
+        "results": [
+            {key: r.get(key) for key in ("name", "status", "duration_seconds", "output_path", "error", "stopped")}
+            for r in results
+        ]
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+
+    print("\n" + "="*70)
+    print(f"Load Test ({report['completed']}/{plans} completed, {concurrency} concurrent, {report['duration_seconds']}s)")
+    print("="*70)
+    print(f"Throughput: {report['throughput_plans_per_minute']} plans/min")
+    latency = report["plan_latency_seconds"]
+    if latency:
+        print("Plan latency: " + ", ".join(f"{name} {latency[name]}s" for name, _ in PERCENTILES))
+    if server is not None:
+        stats = report["fake_server_stats"]
+        request_latency = stats.get("latency_seconds", {})
+        print(f"LLM requests: peak {stats['max_in_flight']} in flight, " +
+              ", ".join(f"{name} {value}s" for name, value in request_latency.items()))
+    for result in results:
+        if result["status"] != "completed":
+            print(f"✗ {result.get('name')}: {result.get('error') or result.get('stopped')}")
+    print("="*70)
+    logger.info(f"Load test report saved to: {report_path}")
+
+    return report
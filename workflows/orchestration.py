@@ -1,12 +1,17 @@
 """LangGraph workflow orchestration."""
 
 import logging
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List
 import os
 import json
-from langgraph.graph import StateGraph, END
-from config.settings import get_settings
-from utils.llm_client import LLMClient
+import time
+from langgraph.config import get_stream_writer
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from config.settings import get_settings, current_execution_profile
+from utils.llm_client import LLMClient, count_llm_calls
+from utils.run_budget import current_run_budget, budget_for_state, bind_run_budget, reset_run_budget
+from utils.tracing import trace_span
 from utils.document_hierarchy_loader import DocumentHierarchyLoader
 from rag_tools.hybrid_rag import HybridRAG
 from rag_tools.graph_rag import GraphRAG
@@ -28,6 +33,7 @@ from agents.dictionary_lookup import DictionaryLookupAgent
 from agents.translation_refinement import TranslationRefinementAgent
 from agents.assigning_translator import AssigningTranslatorAgent
 from .graph_state import ActionPlanState
+from .stage_cache import get_stage_cache, compute_stage_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -47,13 +53,176 @@ def _save_agent_output(state: ActionPlanState, agent_name: str, output_data: Dic
             logger.error(f"Failed to save {agent_name} output: {e}")
 
 
-def create_workflow(markdown_logger=None, dynamic_settings=None):
+# Inputs each stage reads: state keys and user_config fields. Their fingerprint
+# keys the stage output cache, so regenerating a plan after changing one field
+# re-executes only the stages that depend on it. The orchestrator prompt reads
+# the `timing` field, so a timing-only change yields a new problem statement and
+# reruns the English stages; trigger / responsible_party / process_owner only
+# reach the formatter. "profile" lists the execution profile knobs
+# (config/settings.py ExecutionProfile) a stage's output depends on.
+NODE_INPUTS: Dict[str, Dict[str, tuple]] = {
+    "orchestrator": {"state": (), "user_config": ("name", "timing", "level", "phase", "subject", "description")},
+    "special_protocols": {"state": ("special_protocols_node_ids",), "user_config": ()},
+    "analyzer": {
+        "state": ("problem_statement", "documents_to_query", "guideline_documents"),
+        "user_config": (),
+        "profile": ("top_k_results", "analyzer_node_batch_size", "rag_use_mmr", "sibling_expansion")
+    },
+    "phase3": {"state": ("node_ids",), "user_config": ()},
+    "extractor": {"state": ("subject_nodes", "special_protocols_nodes"), "user_config": ()},
+    "selector": {
+        "state": ("problem_statement", "actions", "tables"),
+        "user_config": ("name", "timing", "level", "phase", "subject"),
+        "profile": ("action_batch_size", "table_scoring")
+    },
+    "timing_node": {
+        "state": ("selected_actions", "problem_statement", "tables"),
+        "user_config": ("name", "timing", "level", "phase", "subject", "description")
+    },
+    "assigner": {
+        "state": ("timed_actions", "tables"),
+        "user_config": ("level", "phase", "subject"),
+        "profile": ("assigner_batch_size", "assigner_batch_threshold")
+    },
+    "deduplicator": {"state": ("assigned_actions", "tables"), "user_config": (), "profile": ("action_batch_size",)},
+    "formatter": {
+        "state": (
+            "subject", "refined_actions", "tables", "formatted_output", "rules_context",
+            "problem_statement", "trigger", "responsible_party", "process_owner"
+        ),
+        "user_config": ("level", "phase", "subject")
+    },
+    "translator": {"state": ("final_plan",), "user_config": ()},
+    "segmentation": {"state": ("translated_plan",), "user_config": ()},
+    "term_identifier": {"state": ("segmented_chunks",), "user_config": ()},
+    "dictionary_lookup": {"state": ("identified_terms",), "user_config": (), "profile": ("rag_use_mmr",)},
+    "refinement": {"state": ("translated_plan", "dictionary_corrections"), "user_config": ()},
+    "assigning_translator": {"state": ("final_persian_plan",), "user_config": ()},
+}
+
+# The stage that usually follows each stage (the default route). Its model is
+# pre-warmed on the Ollama host while the stage runs, so the next stage does
+# not start with a model load (utils/llm_client.py OllamaModelTracker).
+NEXT_STAGES: Dict[str, tuple] = {
+    "orchestrator": ("analyzer",),
+    "analyzer": ("phase3",),
+    "phase3": ("extractor",),
+    "special_protocols": ("extractor",),
+    "extractor": ("selector",),
+    "selector": ("timing_node",),
+    "timing_node": ("assigner",),
+    "assigner": ("deduplicator",),
+    "deduplicator": ("formatter",),
+    "formatter": ("translator",),
+    "translator": ("segmentation",),
+    "segmentation": ("term_identifier",),
+    "term_identifier": ("dictionary_lookup",),
+    "dictionary_lookup": ("refinement",),
+    "refinement": ("assigning_translator",),
+}
+
+
+def _instrument_node(node_name: str, node_fn: Callable[[ActionPlanState], ActionPlanState]):
+    """
+    Wrap a node so it reports progress and returns only the keys it produced.
+    
+    Emits a stage_started event, then a stage_completed event with the start/finish
+    times, duration, number of LLM requests, the state keys the node produced and
+    their serialized size. Under workflow.invoke the events are dropped.
+    
+    Nodes mutate and return the whole state; the wrapper turns that into a partial
+    update (changed keys, plus new errors / reused stages for the merging reducers)
+    so parallel branches never write the same key.
+    
+    The run budget (utils/run_budget.py) is checked before the node starts; a node
+    whose errors came from the run being stopped raises instead of returning, so its
+    incomplete output is not checkpointed and a resumed run re-executes it.
+    
+    The node runs inside a "node" trace span (utils/tracing.py), the parent of the
+    LLM, embedding and database call spans its agent makes.
+    """
+    def instrumented(state: Dict[str, Any]) -> Dict[str, Any]:
+        budget = budget_for_state(state)
+        budget.check()
+        level = budget.level
+        
+        write = get_stream_writer()
+        write({"type": "stage_started", "node": node_name, "degradation": level})
+        
+        errors_before = list(state.get("errors") or [])
+        reused_before = list(state.get("reused_stages") or [])
+        state = {**state, "errors": list(errors_before), "reused_stages": list(reused_before)}
+        before = dict(state)
+        started_at = time.time()
+        started = time.monotonic()
+        budget_token = bind_run_budget(budget)
+        try:
+            with count_llm_calls() as llm_calls, trace_span("node", node_name, stage=node_name, degradation=level) as span:
+                result = node_fn(state)
+                result = result if result is not None else state
+                span.set(
+                    llm_calls=llm_calls[0],
+                    reused=len(result.get("reused_stages") or []) > len(reused_before)
+                )
+            if budget.stopped and len(result.get("errors") or []) > len(errors_before):
+                budget.check()
+        except Exception as e:
+            write({
+                "type": "stage_failed",
+                "node": node_name,
+                "started_at": started_at,
+                "duration_seconds": round(time.monotonic() - started, 2),
+                "error": str(e)
+            })
+            raise
+        finally:
+            reset_run_budget(budget_token)
+        
+        new_errors = (result.get("errors") or [])[len(errors_before):]
+        new_reused = (result.get("reused_stages") or [])[len(reused_before):]
+        changed = {
+            key: value for key, value in result.items()
+            if key not in ("errors", "reused_stages", "degraded_stages") and (key not in before or before[key] is not value)
+        }
+        duration = time.monotonic() - started
+        write({
+            "type": "stage_completed",
+            "node": node_name,
+            "started_at": started_at,
+            "finished_at": started_at + duration,
+            "duration_seconds": round(duration, 2),
+            "llm_calls": llm_calls[0],
+            "output_keys": sorted(changed),
+            "output_size": len(json.dumps(changed, default=str, ensure_ascii=False)),
+            "new_errors": new_errors,
+            "reused": bool(new_reused),
+            "degradation": level
+        })
+        
+        update = dict(changed)
+        if new_errors:
+            update["errors"] = new_errors
+        if new_reused:
+            update["reused_stages"] = new_reused
+        if level != "normal" and not new_reused:
+            update["degraded_stages"] = [f"{node_name} ({level})"]
+        return update
+    
+    instrumented.__name__ = getattr(node_fn, "__name__", node_name)
+    return instrumented
+
+
+def create_workflow(markdown_logger=None, dynamic_settings=None, checkpointer=None, reuse_stage_outputs=True):
     """
     Create and compile the LangGraph workflow.
     
     Args:
         markdown_logger: Optional MarkdownLogger instance for comprehensive logging
         dynamic_settings: Optional DynamicSettingsManager for per-agent LLM configuration
+        checkpointer: Optional LangGraph checkpoint saver; when given, state is checkpointed
+            after every node so a run (thread_id = run id) can resume from the failed node
+        reuse_stage_outputs: Reuse stored stage outputs whose input fingerprint (NODE_INPUTS)
+            is unchanged; when False every stage runs and its output replaces the stored one
     
     Returns:
         Compiled workflow graph
@@ -100,6 +269,80 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
     translation_refinement = TranslationRefinementAgent("translation_refinement", dynamic_settings, markdown_logger)
     assigning_translator = AssigningTranslatorAgent("assigning_translator", dynamic_settings, markdown_logger)
     
+    stage_cache = get_stage_cache()
+    
+    # LLM client (and model override) of each stage's agent, for pre-warming
+    stage_models = {
+        "orchestrator": (orchestrator, None),
+        "analyzer": (analyzer, None),
+        "phase3": (phase3, None),
+        "extractor": (extractor, None),
+        "selector": (selector, None),
+        "timing_node": (timing, None),
+        "assigner": (assigner, None),
+        "deduplicator": (deduplicator, None),
+        "formatter": (formatter, None),
+        "translator": (translator, translator.translator_model),
+        "segmentation": (segmentation, None),
+        "term_identifier": (term_identifier, None),
+        "dictionary_lookup": (dictionary_lookup, None),
+        "refinement": (translation_refinement, None),
+        "assigning_translator": (assigning_translator, None),
+    }
+    
+    def prewarm_next_stages(node_name: str):
+        """Start loading the models of the stages after node_name (skipped if that would evict one in use)."""
+        for next_stage in NEXT_STAGES.get(node_name, ()):
+            agent, model_override = stage_models.get(next_stage, (None, None))
+            llm = getattr(agent, "llm", None)
+            if llm is None:
+                continue
+            try:
+                llm.prewarm(for_stage=next_stage, model_override=model_override)
+            except Exception as e:
+                logger.debug(f"Could not pre-warm the {next_stage} model: {e}")
+    
+    def run_stage(node_name: str, state: ActionPlanState, agent, compute):
+        """
+        Run a stage's agent call, or reuse its stored output if the stage inputs are unchanged.
+        
+        Validator-requested re-runs always execute, since they exist to produce a different output.
+        The next stage's model is pre-warmed first.
+        """
+        prewarm_next_stages(node_name)
+        if stage_cache is None:
+            return compute()
+        
+        inputs = NODE_INPUTS[node_name]
+        llm = getattr(agent, "llm", None)
+        profile = current_execution_profile()
+        fingerprint = compute_stage_fingerprint(
+            node_name, state, inputs["state"], inputs["user_config"],
+            model=getattr(llm, "model", None),
+            profile={knob: getattr(profile, knob) for knob in inputs.get("profile", ())}
+        )
+        
+        if reuse_stage_outputs and not state.get("validator_retry_count"):
+            found, output = stage_cache.get(node_name, fingerprint)
+            if found:
+                logger.info(f"Reusing stored {node_name} output (inputs unchanged)")
+                state.setdefault("reused_stages", []).append(node_name)
+                if markdown_logger:
+                    markdown_logger.log_processing_step(
+                        f"Reused stored {node_name} output (inputs unchanged)",
+                        {"fingerprint": fingerprint[:16]}
+                    )
+                return output
+        
+        degraded = current_run_budget().level != "normal"
+        output = compute()
+        if degraded or current_run_budget().level != "normal":
+            # Outputs produced under deadline pressure must not replace full-quality ones
+            logger.info(f"Not storing {node_name} output (computed in degraded mode)")
+        else:
+            stage_cache.put(node_name, fingerprint, output)
+        return output
+    
     # Define node functions
     def orchestrator_node(state: ActionPlanState) -> ActionPlanState:
         """Orchestrator node."""
@@ -117,11 +360,15 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            result = orchestrator.execute(user_config)
+            result = run_stage("orchestrator", state, orchestrator, lambda: orchestrator.execute(user_config))
             
-            # Store problem statement and config
+            # Store problem statement and config (only the generated description is taken from the
+            # stage output, so a reused output never overrides the current plan fields)
             state["problem_statement"] = result.get("problem_statement", "")
-            state["user_config"] = result.get("user_config", user_config)
+            state["user_config"] = {
+                **user_config,
+                "description": result.get("user_config", user_config).get("description", "")
+            }
             
             # Set subject for backward compatibility
             state["subject"] = user_config.get("name", "")
@@ -163,9 +410,11 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
         """Analyzer node (2-phase workflow)."""
         logger.info("Executing Analyzer (2-Phase)")
         
-        # Pass problem statement to Analyzer
+        # Pass problem statement and document scope to Analyzer
         context = {
-            "problem_statement": state.get("problem_statement", "")
+            "problem_statement": state.get("problem_statement", ""),
+            "documents_to_query": state.get("documents_to_query"),
+            "guideline_documents": state.get("guideline_documents", [])
         }
         
         if markdown_logger:
@@ -174,7 +423,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            result = analyzer.execute(context)
+            result = run_stage("analyzer", state, analyzer, lambda: analyzer.execute(context))
             
             # Phase 1 outputs
             state["all_document_summaries"] = result.get("all_documents", [])
@@ -228,7 +477,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            result = phase3.execute(context)
+            result = run_stage("phase3", state, phase3, lambda: phase3.execute(context))
             
             # Output: flat list of nodes with complete metadata
             phase3_nodes = result.get("nodes", [])
@@ -288,19 +537,22 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
                 
                 return state
             
-            # Initialize loader
-            loader = DocumentHierarchyLoader()
-            
-            # Expand node IDs to include all nested subsections
-            expanded_node_ids = loader.expand_node_ids_with_subsections(node_ids)
+            def load_special_protocols():
+                loader = DocumentHierarchyLoader()
+                try:
+                    # Expand node IDs to include all nested subsections
+                    expanded = loader.expand_node_ids_with_subsections(node_ids)
+                    # Fetch node data formatted for Extractor
+                    return {"expanded_node_ids": expanded, "nodes": loader.format_for_extractor(expanded)}
+                finally:
+                    loader.close()
+            
+            result = run_stage("special_protocols", state, None, load_special_protocols)
+            expanded_node_ids = result["expanded_node_ids"]
+            nodes = result["nodes"]
             logger.info(f"Expanded {len(node_ids)} node IDs to {len(expanded_node_ids)} (including subsections)")
-            
-            # Fetch node data formatted for Extractor
-            nodes = loader.format_for_extractor(expanded_node_ids)
             state["special_protocols_nodes"] = nodes
             
-            loader.close()
-            
             logger.info(f"Special protocols processed: {len(nodes)} nodes ready for extraction")
             
             if markdown_logger:
@@ -369,7 +621,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
         
         try:
             # Use multi-subject processing with validation
-            result = extractor.execute(input_data)
+            result = run_stage("extractor", state, extractor, lambda: extractor.execute(input_data))
             
             # Update state with new 2-category structure (formulas integrated, dependencies converted)
             state["actions"] = result.get("actions", [])
@@ -437,7 +689,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
         
         try:
             # Perform de-duplication and merging
-            result = deduplicator.execute(input_data)
+            result = run_stage("deduplicator", state, deduplicator, lambda: deduplicator.execute(input_data))
             
             # Update state with refined actions (from deduplicator's "actions" output)
             state["refined_actions"] = result.get("actions", [])
@@ -496,7 +748,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
         
         try:
             # Perform semantic selection on normal actions only
-            result = selector.execute(input_data)
+            result = run_stage("selector", state, selector, lambda: selector.execute(input_data))
             
             # Merge: special protocols (always included) + selected normal actions
             selected_actions = special_actions + result.get("selected_actions", [])
@@ -549,7 +801,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            result = timing.execute(input_data)
+            result = run_stage("timing_node", state, timing, lambda: timing.execute(input_data))
             state["timed_actions"] = result.get("timed_actions", [])
             state["tables"] = result.get("tables", [])
             state["current_stage"] = "timing"
@@ -589,7 +841,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            result = assigner.execute(input_data)
+            result = run_stage("assigner", state, assigner, lambda: assigner.execute(input_data))
             state["assigned_actions"] = result.get("assigned_actions", [])
             state["tables"] = result.get("tables", [])
             state["current_stage"] = "assigner"
@@ -680,7 +932,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            plan = formatter.execute(data)
+            plan = run_stage("formatter", state, formatter, lambda: formatter.execute(data))
             state["final_plan"] = plan
             state["current_stage"] = "formatter"
             
@@ -712,7 +964,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            translated_plan = translator.execute(data)
+            translated_plan = run_stage("translator", state, translator, lambda: translator.execute(data))
             state["translated_plan"] = translated_plan
             state["current_stage"] = "translator"
             
@@ -742,7 +994,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            segmented_chunks = segmentation.execute(data)
+            segmented_chunks = run_stage("segmentation", state, segmentation, lambda: segmentation.execute(data))
             state["segmented_chunks"] = segmented_chunks
             state["current_stage"] = "segmentation"
             
@@ -772,7 +1024,7 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            identified_terms = term_identifier.execute(data)
+            identified_terms = run_stage("term_identifier", state, term_identifier, lambda: term_identifier.execute(data))
             state["identified_terms"] = identified_terms
             state["current_stage"] = "term_identifier"
             
@@ -792,8 +1044,9 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             return state
     
     def dictionary_lookup_node(state: ActionPlanState) -> ActionPlanState:
-        """Dictionary lookup node."""
-        logger.info("Executing Dictionary Lookup")
+        """Dictionary lookup node (one task per translated chunk, see route_dictionary_lookup)."""
+        chunk_id = state.get("chunk_id")
+        logger.info(f"Executing Dictionary Lookup (chunk {chunk_id})")
         data = {"identified_terms": state["identified_terms"]}
         
         if markdown_logger:
@@ -802,11 +1055,15 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            dictionary_corrections = dictionary_lookup.execute(data)
+            dictionary_corrections = run_stage(
+                "dictionary_lookup", state, dictionary_lookup, lambda: dictionary_lookup.execute(data)
+            )
             state["dictionary_corrections"] = dictionary_corrections
             state["current_stage"] = "dictionary_lookup"
             
-            _save_agent_output(state, "dictionary_lookup", {"dictionary_corrections": dictionary_corrections})
+            _save_agent_output(
+                state, f"dictionary_lookup_chunk{chunk_id}", {"dictionary_corrections": dictionary_corrections}
+            )
 
             if markdown_logger:
                 markdown_logger.log_agent_output("Dictionary Lookup", {
@@ -826,17 +1083,19 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
         logger.info("Executing Translation Refinement")
         data = {
             "translated_plan": state["translated_plan"],
-            "dictionary_corrections": state["dictionary_corrections"]
+            "dictionary_corrections": state.get("dictionary_corrections", [])
         }
         
         if markdown_logger:
             markdown_logger.log_agent_start("Translation Refinement", {
                 "plan_length": len(state["translated_plan"]),
-                "corrections_count": len(state["dictionary_corrections"]) if isinstance(state["dictionary_corrections"], (list, dict)) else 0
+                "corrections_count": len(data["dictionary_corrections"])
             })
         
         try:
-            final_persian_plan = translation_refinement.execute(data)
+            final_persian_plan = run_stage(
+                "refinement", state, translation_refinement, lambda: translation_refinement.execute(data)
+            )
             state["final_persian_plan"] = final_persian_plan
             state["current_stage"] = "refinement"
             
@@ -866,7 +1125,9 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
             })
         
         try:
-            corrected_persian_plan = assigning_translator.execute(data)
+            corrected_persian_plan = run_stage(
+                "assigning_translator", state, assigning_translator, lambda: assigning_translator.execute(data)
+            )
             state["final_persian_plan"] = corrected_persian_plan
             state["current_stage"] = "assigning_translator"
             
@@ -1059,9 +1320,9 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
         diagnosis = validation_result.get("diagnosis", {})
         responsible = diagnosis.get("responsible_agent", "formatter")
         
-        # Check retry limit
+        # Check retry limit (fewer re-runs as the run deadline approaches)
         retry_count = state.get("validator_retry_count", 0)
-        max_retries = settings.max_validator_retries
+        max_retries = budget_for_state(state).retries(current_execution_profile().max_validator_retries)
         
         if retry_count >= max_retries:
             logger.warning(f"Max validator retries ({max_retries}) reached, proceeding to translator")
@@ -1090,37 +1351,38 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
     workflow = StateGraph(ActionPlanState)
     
     # Add nodes (NEW: includes phase3, deduplicator, selector, special_protocols, and translation workflow)
-    workflow.add_node("orchestrator", orchestrator_node)
-    workflow.add_node("analyzer", analyzer_node)
-    workflow.add_node("phase3", phase3_node)
-    workflow.add_node("special_protocols", special_protocols_node)  # NEW: Special Protocols processor
-    workflow.add_node("extractor", extractor_node)
-    workflow.add_node("deduplicator", deduplicator_node)
-    workflow.add_node("selector", selector_node)
-    workflow.add_node("timing_node", timing_node)
-    workflow.add_node("assigner", assigner_node)
-    workflow.add_node("quality_checker", quality_checker_node)
-    workflow.add_node("formatter", formatter_node)
-    workflow.add_node("comprehensive_quality_validator", comprehensive_quality_validator_node)
+    workflow.add_node("orchestrator", _instrument_node("orchestrator", orchestrator_node))
+    workflow.add_node("analyzer", _instrument_node("analyzer", analyzer_node))
+    workflow.add_node("phase3", _instrument_node("phase3", phase3_node))
+    workflow.add_node("special_protocols", _instrument_node("special_protocols", special_protocols_node))  # NEW: Special Protocols processor
+    workflow.add_node("extractor", _instrument_node("extractor", extractor_node), defer=True)
+    workflow.add_node("deduplicator", _instrument_node("deduplicator", deduplicator_node))
+    workflow.add_node("selector", _instrument_node("selector", selector_node))
+    workflow.add_node("timing_node", _instrument_node("timing_node", timing_node))
+    workflow.add_node("assigner", _instrument_node("assigner", assigner_node))
+    workflow.add_node("quality_checker", _instrument_node("quality_checker", quality_checker_node))
+    workflow.add_node("formatter", _instrument_node("formatter", formatter_node))
+    workflow.add_node("comprehensive_quality_validator", _instrument_node("comprehensive_quality_validator", comprehensive_quality_validator_node))
     
     # Add translation workflow nodes
-    workflow.add_node("translator", translator_node)
-    workflow.add_node("segmentation", segmentation_node)
-    workflow.add_node("term_identifier", term_identifier_node)
-    workflow.add_node("dictionary_lookup", dictionary_lookup_node)
-    workflow.add_node("refinement", refinement_node)
-    workflow.add_node("assigning_translator", assigning_translator_node)
-    
-    # Set entry point
-    workflow.set_entry_point("orchestrator")
+    workflow.add_node("translator", _instrument_node("translator", translator_node))
+    workflow.add_node("segmentation", _instrument_node("segmentation", segmentation_node))
+    workflow.add_node("term_identifier", _instrument_node("term_identifier", term_identifier_node))
+    workflow.add_node("dictionary_lookup", _instrument_node("dictionary_lookup", dictionary_lookup_node))
+    workflow.add_node("refinement", _instrument_node("refinement", refinement_node))
+    workflow.add_node("assigning_translator", _instrument_node("assigning_translator", assigning_translator_node))
     
-    # Add edges (FIXED: Sequential execution to avoid concurrent state updates)
-    # Sequential flow: orchestrator → special_protocols → analyzer → phase3 → extractor
-    # This ensures no concurrent writes to state
-    workflow.add_edge("orchestrator", "special_protocols")
-    workflow.add_edge("special_protocols", "analyzer")
+    # Fan out from the start: special_protocols only needs the user-selected node ids,
+    # so it runs alongside orchestrator → analyzer → phase3. Nodes return partial
+    # updates and shared keys have reducers (graph_state.py), so the branches never
+    # conflict. The extractor is deferred: it runs once, after both branches (or after
+    # whichever one a validator re-run restarted) have finished.
+    workflow.add_edge(START, "orchestrator")
+    workflow.add_edge(START, "special_protocols")
+    workflow.add_edge("orchestrator", "analyzer")
     workflow.add_edge("analyzer", "phase3")
     workflow.add_edge("phase3", "extractor")
+    workflow.add_edge("special_protocols", "extractor")
     
     # Continue with normal flow after extractor
     # New flow: selector → timing → assigner → deduplicator → formatter
@@ -1179,16 +1441,38 @@ def create_workflow(markdown_logger=None, dynamic_settings=None):
         }
     )
     
-    # Translation workflow (translator → ... → refinement → assigning_translator → END)
+    # Translation workflow (translator → ... → refinement → assigning_translator → END);
+    # dictionary lookups fan out per chunk and their corrections merge before refinement
+    def route_dictionary_lookup(state: ActionPlanState):
+        """Send each chunk's identified terms to its own dictionary lookup task."""
+        terms_by_chunk: Dict[Any, List[Dict[str, Any]]] = {}
+        for term in state.get("identified_terms") or []:
+            terms_by_chunk.setdefault(term.get("position", {}).get("chunk_id", 0), []).append(term)
+        
+        if not terms_by_chunk:
+            logger.info("No terms identified, skipping dictionary lookup")
+            return "refinement"
+        
+        logger.info(f"Dictionary lookup: {len(terms_by_chunk)} chunks in parallel")
+        return [
+            Send("dictionary_lookup", {
+                "chunk_id": chunk_id,
+                "identified_terms": terms,
+                "user_config": state.get("user_config", {}),
+                "agent_output_dir": state.get("agent_output_dir")
+            })
+            for chunk_id, terms in terms_by_chunk.items()
+        ]
+    
     workflow.add_edge("translator", "segmentation")
     workflow.add_edge("segmentation", "term_identifier")
-    workflow.add_edge("term_identifier", "dictionary_lookup")
+    workflow.add_conditional_edges("term_identifier", route_dictionary_lookup, ["dictionary_lookup", "refinement"])
     workflow.add_edge("dictionary_lookup", "refinement")
     workflow.add_edge("refinement", "assigning_translator")
     workflow.add_edge("assigning_translator", END)
     
     # Compile and return
-    compiled_workflow = workflow.compile()
+    compiled_workflow = workflow.compile(checkpointer=checkpointer)
     logger.info("Workflow compiled successfully")
     
     return compiled_workflow
@@ -0,0 +1,408 @@
+"""Single code path for running one plan generation (CLI, batch, service and UI)."""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from config.settings import get_settings, get_execution_profile, bind_execution_profile, reset_execution_profile
+from utils.input_validator import InputValidator
+from utils.markdown_logger import MarkdownLogger, bind_markdown_logger, reset_markdown_logger
+from utils.run_budget import RunBudget, RunCancelled, DeadlineExceeded, bind_run_budget, reset_run_budget
+from utils.tracing import Tracer, trace_span, bind_tracer, reset_tracer
+from utils.llm_client import LLM_PRIORITIES, bind_llm_request_context, reset_llm_request_context
+from .checkpointing import get_checkpointer, new_run_id, get_run_config, get_resume_point
+from .critical_path import compute_critical_path, render_timeline, critical_path_gantt
+from .graph_state import ActionPlanState
+from .orchestration import create_workflow
+
+logger = logging.getLogger(__name__)
+
+
+def default_output_path(name: str) -> str:
+    """Build the default plan path (action_plans/<safe name>_<timestamp>.md)."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    safe_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in name)
+    safe_name = safe_name.replace(' ', '_')[:50]
+    return f"action_plans/{safe_name}_{timestamp}.md"
+
+
+def run_plan_generation(
+    name: str,
+    timing: str,
+    level: str,
+    phase: str,
+    subject: str,
+    output_path: str = None,
+    document_filter: list = None,
+    trigger: str = None,
+    responsible_party: str = None,
+    process_owner: str = None,
+    special_protocols_node_ids: list = None,
+    save_agent_output: bool = False,
+    run_id: str = None,
+    resume_run_id: str = None,
+    reuse_stage_outputs: bool = True,
+    description: str = None,
+    workflow=None,
+    dynamic_settings=None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    include_final_state: bool = False,
+    deadline_seconds: Optional[float] = None,
+    cancel_event: Optional[threading.Event] = None,
+    execution_profile: Optional[str] = None,
+    priority: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Generate one action plan, streaming per-stage progress events.
+
+    The workflow is always driven through workflow.stream; every node emits
+    stage_started / stage_completed events (duration, LLM calls, output size)
+    that are logged and forwarded to on_event.
+
+    Args:
+        name: Action plan title
+        timing: Time period and/or trigger
+        level: One of: ministry, university, center
+        phase: One of: preparedness, response
+        subject: One of: war, sanction
+        output_path: Optional output file path
+        document_filter: Optional list of documents to query
+        trigger: Optional activation trigger
+        responsible_party: Optional responsible party
+        process_owner: Optional process owner
+        special_protocols_node_ids: Optional list of node IDs for special protocols
+        save_agent_output: Save each agent's output next to the plan
+        run_id: Optional run id for checkpoints (default: generated)
+        resume_run_id: Resume a checkpointed run from its failed node; all other
+            arguments are restored from the run record
+        reuse_stage_outputs: Reuse stored outputs of stages whose inputs did not change
+        description: Optional user-provided description appended to the generated one
+        workflow: Optional workflow shared across plans; it must have been created with a
+            ContextMarkdownLogger so each plan logs to its own file
+        dynamic_settings: Optional DynamicSettingsManager (per-agent LLM configuration)
+        on_event: Optional callback receiving progress events (dicts with "type": run_started |
+            stage_started | stage_completed | run_finished); called from the generating thread
+        include_final_state: Add the final workflow state to the summary as "final_state"
+        deadline_seconds: Time budget for the run (default: settings.run_deadline_seconds;
+            0 = none). Agents degrade as it runs out and the run stops when it passes; a
+            resumed run gets a fresh budget
+        cancel_event: Optional event that stops the run when set (e.g. a UI stop button);
+            in-flight LLM requests are abandoned
+        execution_profile: Execution profile (fast | balanced | thorough; default:
+            settings.execution_profile); recorded in the plan log and the run record
+        priority: LLM request priority class (interactive | batch; default: interactive).
+            Waiting requests of interactive runs are admitted first, see LLMScheduler
+
+    Returns:
+        Dictionary with name, status ('completed' | 'failed'), run_id, output_path,
+        log_path, trace_path, execution_profile, duration_seconds, errors, reused_stages, degraded_stages, stages,
+        critical_path, critical_path_seconds, error and stopped ('cancelled' |
+        'deadline') on failure
+    """
+    started = time.monotonic()
+    summary = {
+        "name": name,
+        "status": "failed",
+        "run_id": None,
+        "output_path": None,
+        "log_path": None,
+        "trace_path": None,
+        "execution_profile": None,
+        "duration_seconds": 0.0,
+        "errors": [],
+        "reused_stages": [],
+        "degraded_stages": [],
+        "stages": []
+    }
+    final_state: Dict[str, Any] = {}
+
+    def emit(event: Dict[str, Any]):
+        if on_event is not None:
+            try:
+                on_event(event)
+            except Exception as e:
+                logger.warning(f"Progress event handler failed: {e}")
+
+    def finish(status: str, error: str = None) -> Dict[str, Any]:
+        summary["status"] = status
+        summary["duration_seconds"] = round(time.monotonic() - started, 1)
+        if error:
+            summary["error"] = error
+        emit({"type": "run_finished", **summary})
+        if include_final_state:
+            summary["final_state"] = final_state
+        return summary
+
+    checkpointer = get_checkpointer()
+    if resume_run_id:
+        if checkpointer is None:
+            logger.error("Checkpointing is disabled (ENABLE_CHECKPOINTING=false); cannot resume")
+            return finish("failed", "Checkpointing is disabled")
+        run = checkpointer.get_run(resume_run_id)
+        if run is None:
+            logger.error(f"Unknown run id: {resume_run_id}")
+            return finish("failed", f"Unknown run id: {resume_run_id}")
+        params = run["params"]
+        name = params["name"]
+        timing = params["timing"]
+        level = params["level"]
+        phase = params["phase"]
+        subject = params["subject"]
+        output_path = params.get("output_path")
+        document_filter = params.get("document_filter")
+        trigger = params.get("trigger")
+        responsible_party = params.get("responsible_party")
+        process_owner = params.get("process_owner")
+        special_protocols_node_ids = params.get("special_protocols_node_ids")
+        save_agent_output = params.get("save_agent_output", False)
+        description = params.get("description")
+        execution_profile = params.get("execution_profile")
+        run_id = resume_run_id
+        summary["name"] = name
+        logger.info(f"Resuming run {run_id} (status: {run['status']})")
+    elif checkpointer is not None:
+        run_id = run_id or new_run_id()
+    summary["run_id"] = run_id
+
+    logger.info(f"Generating action plan: {name}")
+
+    try:
+        profile = get_execution_profile(execution_profile)
+    except ValueError as e:
+        logger.error(str(e))
+        return finish("failed", str(e))
+    summary["execution_profile"] = profile.name
+    priority = priority or LLM_PRIORITIES[0]
+    if priority not in LLM_PRIORITIES:
+        logger.error(f"Unknown LLM priority: {priority}")
+        return finish("failed", f"Unknown LLM priority: {priority} (expected one of: {', '.join(LLM_PRIORITIES)})")
+
+    # Build user configuration dict
+    user_config = {
+        "name": name,
+        "timing": timing,
+        "level": level,
+        "phase": phase,
+        "subject": subject
+    }
+
+    # Validate configuration
+    is_valid, errors = InputValidator.validate_user_config(user_config)
+    if not is_valid:
+        logger.error(f"Invalid configuration: {'; '.join(errors)}")
+        return finish("failed", f"Invalid configuration: {'; '.join(errors)}")
+
+    # Normalize configuration
+    user_config = InputValidator.normalize_config(user_config)
+    if description:
+        user_config["description"] = description
+    logger.info(f"Configuration validated: level={level}, phase={phase}, subject={subject}")
+
+    # Generate output paths (a resumed run gets its own log and trace so the original is kept)
+    output_path = output_path or default_output_path(name)
+    run_suffix = f"_resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}" if resume_run_id else ""
+    log_path = output_path.replace('.md', f"_log{run_suffix}.md")
+    summary["log_path"] = log_path
+    trace_path = output_path.replace('.md', f"_trace{run_suffix}.jsonl") if get_settings().enable_tracing else None
+    summary["trace_path"] = trace_path
+
+    if checkpointer is not None and not resume_run_id:
+        checkpointer.register_run(run_id, {
+            "name": name,
+            "timing": timing,
+            "level": level,
+            "phase": phase,
+            "subject": subject,
+            "description": description,
+            "output_path": output_path,
+            "document_filter": document_filter,
+            "trigger": trigger,
+            "responsible_party": responsible_party,
+            "process_owner": process_owner,
+            "special_protocols_node_ids": special_protocols_node_ids,
+            "save_agent_output": save_agent_output,
+            "execution_profile": profile.name
+        })
+        logger.info(f"Run id: {run_id} (resume with: python main.py generate --resume {run_id})")
+
+    # Run budget (deadline + stop event), bound to this run's context like the logger
+    if deadline_seconds is None:
+        deadline_seconds = get_settings().run_deadline_seconds
+    budget = RunBudget.start(deadline_seconds, cancel_event)
+    if budget.deadline_at is not None:
+        logger.info(f"Run deadline: {deadline_seconds:.0f}s")
+
+    # Initialize markdown logger (bound to this run's context for a shared workflow)
+    markdown_logger = MarkdownLogger(log_path)
+    markdown_logger.log_workflow_start(name)
+    markdown_logger.log_processing_step(f"Execution profile: {profile.name}", profile.model_dump())
+    logger.info(f"Logging to: {log_path}")
+    logger.info(f"Execution profile: {profile.name}")
+    logger_token = bind_markdown_logger(markdown_logger)
+    budget_token = bind_run_budget(budget)
+    profile_token = bind_execution_profile(profile)
+    tracer = Tracer(trace_path, trace_id=run_id) if trace_path else None
+    tracer_token = bind_tracer(tracer)
+    # LLM requests are queued fairly across concurrent runs (per run key) and by priority class
+    request_token = bind_llm_request_context(run_id or output_path, priority)
+
+    try:
+        if workflow is None:
+            workflow = create_workflow(
+                markdown_logger=markdown_logger,
+                dynamic_settings=dynamic_settings,
+                checkpointer=checkpointer,
+                reuse_stage_outputs=reuse_stage_outputs
+            )
+        run_config = get_run_config(run_id if checkpointer is not None else None)
+
+        # Initialize state with new parameters (no separate guideline documents)
+        initial_state: ActionPlanState = {
+            "user_config": user_config,
+            "subject": name,  # For backward compatibility
+            "current_stage": "start",
+            "retry_count": {},
+            "errors": [],
+            "metadata": {},
+            "documents_to_query": document_filter,
+            "guideline_documents": [],
+            "timing": timing,
+            "trigger": trigger,
+            "responsible_party": responsible_party,
+            "process_owner": process_owner,
+            "special_protocols_node_ids": special_protocols_node_ids,
+            **budget.to_state()
+        }
+
+        if save_agent_output:
+            # Create a directory for agent outputs
+            output_dir = Path(output_path).parent
+            agent_output_dir = output_dir / f"{Path(output_path).stem}_agent_outputs"
+            agent_output_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Saving agent outputs to: {agent_output_dir}")
+            initial_state["agent_output_dir"] = str(agent_output_dir)
+
+        # Execute workflow (a resumed run continues from its last checkpoint)
+        workflow_input = initial_state
+        if resume_run_id:
+            next_nodes = get_resume_point(workflow, run_id)
+            if next_nodes is None:
+                logger.error(f"No checkpoint found for run {run_id}")
+                markdown_logger.close()
+                return finish("failed", f"No checkpoint found for run {run_id}")
+            logger.info(f"Restarting from: {', '.join(next_nodes) if next_nodes else 'end (run already completed)'}")
+            checkpointer.update_run_status(run_id, "running")
+            workflow_input = None
+
+        logger.info("Executing workflow...")
+        emit({"type": "run_started", "run_id": run_id, "name": name, "log_path": log_path})
+        with trace_span("run", name, run_id=run_id, execution_profile=profile.name, resumed=bool(resume_run_id)):
+            for mode, chunk in workflow.stream(workflow_input, config=run_config, stream_mode=["custom", "values"]):
+                if mode == "values":
+                    final_state = chunk
+                    continue
+                if chunk.get("type") == "stage_completed":
+                    summary["stages"].append({key: value for key, value in chunk.items() if key != "type"})
+                    logger.info(
+                        f"✓ {chunk['node']} finished in {chunk['duration_seconds']}s "
+                        f"({chunk['llm_calls']} LLM calls, {chunk['output_size']} chars"
+                        f"{', reused' if chunk.get('reused') else ''})"
+                    )
+                emit({**chunk, "elapsed_seconds": round(time.monotonic() - started, 1)})
+        if tracer is not None:
+            logger.info(f"Trace saved to: {trace_path} (summarize with: python main.py trace {trace_path})")
+
+        # Latency is bounded by the critical path, not the sum of stage times
+        critical_path = compute_critical_path(summary["stages"])
+        summary["critical_path"] = [stage["node"] for stage in critical_path]
+        summary["critical_path_seconds"] = round(sum(stage["duration_seconds"] for stage in critical_path), 1)
+        if critical_path:
+            timeline = render_timeline(summary["stages"])
+            logger.info(f"Critical path ({summary['critical_path_seconds']}s): {' → '.join(summary['critical_path'])}")
+            logger.info(f"Stage timeline:\n{timeline}")
+            markdown_logger.add_section("Stage Timeline")
+            markdown_logger.add_code_block(timeline)
+            markdown_logger.add_code_block(critical_path_gantt(summary["stages"]), "mermaid")
+
+        summary["errors"] = list(final_state.get("errors") or [])
+        summary["reused_stages"] = list(final_state.get("reused_stages") or [])
+        summary["degraded_stages"] = list(final_state.get("degraded_stages") or [])
+
+        if final_state.get("reused_stages"):
+            logger.info(f"Reused unchanged stages: {', '.join(final_state['reused_stages'])}")
+        if summary["degraded_stages"]:
+            logger.warning(f"Degraded to meet the run deadline: {', '.join(summary['degraded_stages'])}")
+
+        # Check for errors
+        if final_state.get("errors"):
+            logger.warning("Workflow completed with errors:")
+            for error in final_state["errors"]:
+                logger.warning(f"  - {error}")
+                markdown_logger.log_error("Workflow", error)
+
+        # Get final plans (English and Persian)
+        final_plan = final_state.get("final_plan", "")
+        final_persian_plan = final_state.get("final_persian_plan", "")
+
+        if not final_plan:
+            logger.error("No action plan generated")
+            markdown_logger.log_workflow_end(success=False, error_msg="No action plan generated")
+            markdown_logger.close()
+            if checkpointer is not None:
+                checkpointer.update_run_status(run_id, "failed", error="No action plan generated")
+            return finish("failed", "No action plan generated")
+
+        # Ensure directory exists
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+        # Save English plan
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(final_plan)
+
+        logger.info(f"✓ English action plan saved to: {output_path}")
+        summary["output_path"] = output_path
+
+        # Save Persian plan
+        if final_persian_plan:
+            persian_path = output_path.replace('.md', '_fa.md')
+            with open(persian_path, 'w', encoding='utf-8') as f:
+                f.write(final_persian_plan)
+            logger.info(f"✓ Persian action plan saved to: {persian_path}")
+
+        # Log completion
+        markdown_logger.log_workflow_end(success=True)
+        markdown_logger.close()
+        logger.info(f"✓ Workflow log saved to: {log_path}")
+        if checkpointer is not None:
+            checkpointer.update_run_status(run_id, "completed")
+
+        return finish("completed")
+
+    except Exception as e:
+        if isinstance(e, RunCancelled):
+            summary["stopped"] = "deadline" if isinstance(e, DeadlineExceeded) else "cancelled"
+            logger.error(f"Workflow stopped: {e}")
+        else:
+            logger.error(f"Workflow execution failed: {e}", exc_info=True)
+        markdown_logger.log_workflow_end(success=False, error_msg=str(e))
+        markdown_logger.close()
+        if checkpointer is not None and workflow is not None:
+            next_nodes = get_resume_point(workflow, run_id) or []
+            checkpointer.update_run_status(run_id, "failed", error=str(e), next_node=", ".join(next_nodes))
+            logger.error(
+                f"Run {run_id} checkpointed before {', '.join(next_nodes) or 'start'}; "
+                f"resume with: python main.py generate --resume {run_id}"
+            )
+        return finish("failed", str(e))
+
+    finally:
+        reset_llm_request_context(request_token)
+        reset_tracer(tracer_token)
+        if tracer is not None:
+            tracer.close()
+        reset_execution_profile(profile_token)
+        reset_run_budget(budget_token)
+        reset_markdown_logger(logger_token)
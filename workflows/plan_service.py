@@ -0,0 +1,426 @@
+"""Long-running plan generation service: warm workflow, job queue and a local HTTP API."""
+
+import http.client
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+PLAN_FIELDS = (
+    "name", "timing", "level", "phase", "subject", "description", "output",
+    "document_filter", "trigger", "responsible_party", "process_owner", "special_protocols_node_ids",
+    "deadline_seconds", "execution_profile", "priority"
+)
+
+
+class PlanJob:
+    """A queued plan generation request and its progress events."""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.summary: Optional[Dict[str, Any]] = None
+        self.events: List[Dict[str, Any]] = []
+        self.cancel_event = threading.Event()
+        self._changed = threading.Condition()
+        self.add_event({"type": "queued"})
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def add_event(self, event: Dict[str, Any]):
+        """Append a progress event and wake up waiting event readers."""
+        with self._changed:
+            self.events.append({"seq": len(self.events), "time": datetime.now().isoformat(), **event})
+            self._changed.notify_all()
+
+    def wait_for_events(self, since: int, timeout: float) -> List[Dict[str, Any]]:
+        """Block until events after `since` exist, the job is done, or timeout."""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > since or self.done, timeout=timeout)
+            return self.events[since:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "name": self.params.get("name"),
+            "created_at": self.created_at,
+            "events": len(self.events),
+            "summary": self.summary
+        }
+
+
+class PlanService:
+    """
+    Keeps one compiled workflow warm and runs submitted plans with bounded concurrency.
+
+    Plans are executed by `run_plan` (main.run_plan_generation) with the shared
+    workflow; each job logs to its own markdown file through ContextMarkdownLogger.
+    """
+
+    def __init__(self, run_plan: Callable[..., Dict[str, Any]], max_concurrent_jobs: Optional[int] = None):
+        """
+        Initialize the service.
+
+        Args:
+            run_plan: Callable generating one plan (accepts the plan fields, workflow and on_event)
+            max_concurrent_jobs: Jobs executed at the same time (default: settings.service_max_concurrent_jobs)
+        """
+        settings = get_settings()
+        self.run_plan = run_plan
+        self.max_concurrent_jobs = max_concurrent_jobs or settings.service_max_concurrent_jobs
+        self.max_retained_jobs = settings.service_max_retained_jobs
+        self.jobs: Dict[str, PlanJob] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_jobs, thread_name_prefix="plan-job")
+        self.workflow = None
+
+    def start(self):
+        """Build the shared workflow (agents, RAG tools, connections) before accepting jobs."""
+        from workflows.orchestration import create_workflow
+        from workflows.checkpointing import get_checkpointer
+        from utils.markdown_logger import ContextMarkdownLogger
+
+        started = time.monotonic()
+        self.workflow = create_workflow(
+            markdown_logger=ContextMarkdownLogger(),
+            dynamic_settings=None,
+            checkpointer=get_checkpointer()
+        )
+        logger.info(f"Plan service workflow ready in {time.monotonic() - started:.1f}s")
+
+    def submit(self, params: Dict[str, Any]) -> PlanJob:
+        """
+        Queue a plan.
+
+        Args:
+            params: Plan fields (see PLAN_FIELDS); unknown fields are ignored
+
+        Returns:
+            The queued job
+        """
+        job = PlanJob({key: params.get(key) for key in PLAN_FIELDS if params.get(key) is not None})
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self._trim_jobs()
+        self._executor.submit(self._run_job, job)
+        logger.info(f"Queued job {job.job_id}: {job.params.get('name')}")
+        return job
+
+    def get(self, job_id: str) -> Optional[PlanJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in reversed(list(self.jobs.values()))]
+
+    def cancel(self, job_id: str) -> Optional[PlanJob]:
+        """
+        Stop a queued or running job (its in-flight LLM requests are abandoned).
+
+        Returns:
+            The job, or None if unknown
+        """
+        job = self.jobs.get(job_id)
+        if job is not None and not job.done:
+            job.cancel_event.set()
+            job.add_event({"type": "cancel_requested"})
+            logger.info(f"Cancelling job {job_id}")
+        return job
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _trim_jobs(self):
+        """Forget the oldest finished jobs beyond the retention limit."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_retained_jobs)]:
+            del self.jobs[job_id]
+
+    def _run_job(self, job: PlanJob):
+        if job.cancel_event.is_set():
+            job.summary = {"name": job.params.get("name"), "status": "failed", "error": "Run cancelled", "stopped": "cancelled"}
+            job.status = "failed"
+            job.add_event({"type": job.status})
+            return
+        job.status = "running"
+        job.add_event({"type": "started"})
+        params = job.params
+        try:
+            summary = self.run_plan(
+                name=params.get("name"),
+                timing=params.get("timing"),
+                level=params.get("level"),
+                phase=params.get("phase"),
+                subject=params.get("subject"),
+                output_path=params.get("output"),
+                document_filter=params.get("document_filter"),
+                trigger=params.get("trigger"),
+                responsible_party=params.get("responsible_party"),
+                process_owner=params.get("process_owner"),
+                special_protocols_node_ids=params.get("special_protocols_node_ids"),
+                description=params.get("description"),
+                workflow=self.workflow,
+                on_event=job.add_event,
+                deadline_seconds=params.get("deadline_seconds"),
+                cancel_event=job.cancel_event,
+                execution_profile=params.get("execution_profile"),
+                priority=params.get("priority")
+            )
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}", exc_info=True)
+            summary = {"name": params.get("name"), "status": "failed", "error": str(e)}
+        job.summary = summary
+        job.status = summary.get("status", "failed")
+        job.add_event({"type": job.status})
+
+
+class _PlanServiceHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /jobs, POST /jobs/<id>/cancel, GET /jobs, GET /jobs/<id>, GET /jobs/<id>/events, GET /jobs/<id>/result."""
+
+    service: PlanService = None
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        # UNIX socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, payload: Any):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job_or_404(self, job_id: str) -> Optional[PlanJob]:
+        job = self.service.get(job_id)
+        if job is None:
+            self._send_json(404, {"error": f"Unknown job: {job_id}"})
+        return job
+
+    def do_POST(self):
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            job = self._job_or_404(parts[1])
+            if job:
+                self.service.cancel(job.job_id)
+                self._send_json(202, job.to_dict())
+            return
+        if parts != ["jobs"]:
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+        missing = [field for field in ("name", "timing", "level", "phase", "subject") if not params.get(field)]
+        if missing:
+            self._send_json(400, {"error": f"Missing required fields: {', '.join(missing)}"})
+            return
+        job = self.service.submit(params)
+        self._send_json(202, job.to_dict())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+
+        if parts == ["health"]:
+            self._send_json(200, {"status": "ok", "workflow_ready": self.service.workflow is not None})
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": self.service.list_jobs()})
+        elif parts == ["metrics"]:
+            from utils.llm_client import llm_scheduler_stats
+            self._send_json(200, {"llm_scheduler": llm_scheduler_stats()})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self._job_or_404(parts[1])
+            if job:
+                self._send_json(200, job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            job = self._job_or_404(parts[1])
+            if job:
+                # Long poll: wait up to `wait` seconds for events after `since`
+                try:
+                    since = int(query.get("since", ["0"])[0])
+                    wait = min(float(query.get("wait", ["0"])[0]), 60.0)
+                    if since < 0:
+                        raise ValueError("since must not be negative")
+                except ValueError as e:
+                    self._send_json(400, {"error": f"Invalid query parameter: {e}"})
+                    return
+                events = job.wait_for_events(since, wait) if wait > 0 else job.events[since:]
+                self._send_json(200, {
+                    "events": events,
+                    "next": since + len(events),
+                    "status": job.status,
+                    "done": job.done
+                })
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+            job = self._job_or_404(parts[1])
+            if job:
+                self._send_result(job)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def _send_result(self, job: PlanJob):
+        if not job.done:
+            self._send_json(409, {"error": f"Job is {job.status}"})
+            return
+        output_path = (job.summary or {}).get("output_path")
+        if job.status != "completed" or not output_path:
+            self._send_json(200, {"status": job.status, "summary": job.summary})
+            return
+        result = {"status": job.status, "summary": job.summary, "final_plan": None, "final_persian_plan": None}
+        for key, path in (("final_plan", output_path), ("final_persian_plan", output_path.replace(".md", "_fa.md"))):
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    result[key] = f.read()
+        self._send_json(200, result)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(
+    service: PlanService,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    socket_path: Optional[str] = None
+):
+    """
+    Run the plan service until interrupted.
+
+    Args:
+        service: Started PlanService
+        host: TCP bind address (default: settings.service_host)
+        port: TCP port (default: settings.service_port)
+        socket_path: Listen on this UNIX socket instead of TCP
+    """
+    settings = get_settings()
+    handler = type("PlanServiceHandler", (_PlanServiceHandler,), {"service": service})
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, handler)
+        location = f"unix://{os.path.abspath(socket_path)}"
+    else:
+        server = ThreadingHTTPServer((host or settings.service_host, port or settings.service_port), handler)
+        server.daemon_threads = True
+        location = f"http://{server.server_address[0]}:{server.server_address[1]}"
+
+    logger.info(f"Plan service listening on {location} ({service.max_concurrent_jobs} concurrent jobs)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Plan service stopping")
+    finally:
+        server.server_close()
+        service.shutdown()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a UNIX domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class PlanServiceClient:
+    """Thin client for the plan service (used by `generate --server` and the UI)."""
+
+    def __init__(self, url: Optional[str] = None, timeout: float = 90.0):
+        """
+        Initialize the client.
+
+        Args:
+            url: http://host:port or unix:///path/to.sock (default: settings.plan_service_url)
+            timeout: Socket timeout in seconds (must exceed the long-poll wait)
+        """
+        self.url = url or get_settings().plan_service_url
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        parsed = urlparse(self.url)
+        if parsed.scheme == "unix":
+            return _UnixHTTPConnection(parsed.path, self.timeout)
+        return http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        connection = self._connection()
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else None
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = json.loads(response.read() or b"{}")
+            if response.status >= 400:
+                raise RuntimeError(data.get("error", f"HTTP {response.status}"))
+            return data
+        finally:
+            connection.close()
+
+    def health(self) -> bool:
+        """Check whether the service is reachable and its workflow is compiled."""
+        try:
+            return bool(self._request("GET", "/health").get("workflow_ready"))
+        except Exception as e:
+            logger.debug(f"Plan service not reachable at {self.url}: {e}")
+            return False
+
+    def submit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a plan; returns the job dictionary (with job_id)."""
+        return self._request("POST", "/jobs", params)
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Stop a queued or running job; returns the job dictionary."""
+        return self._request("POST", f"/jobs/{job_id}/cancel", {})
+
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def get_result(self, job_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/jobs/{job_id}/result")
+
+    def iter_events(self, job_id: str, wait: float = 30.0):
+        """Yield a job's progress events as they happen, until the job finishes."""
+        since = 0
+        while True:
+            data = self._request("GET", f"/jobs/{job_id}/events?since={since}&wait={wait}")
+            for event in data["events"]:
+                yield event
+            since = data["next"]
+            if data["done"] and not data["events"]:
+                return
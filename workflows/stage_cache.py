@@ -0,0 +1,193 @@
+"""Fingerprinted stage outputs so a regenerated plan only re-executes stages whose inputs changed."""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when stage output formats or agent prompts change so stale outputs are never reused
+STAGE_CACHE_VERSION = 3  # 3: packed item prompts (generate_many)
+
+
+def compute_stage_fingerprint(
+    node_name: str,
+    state: Dict[str, Any],
+    state_keys: Iterable[str],
+    user_config_fields: Iterable[str],
+    model: Optional[str] = None,
+    profile: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Fingerprint the inputs a stage reads.
+
+    Args:
+        node_name: Workflow node name
+        state: Current workflow state
+        state_keys: State keys the node reads
+        user_config_fields: user_config fields the node reads
+        model: LLM model used by the node's agent (a model change invalidates the output)
+        profile: Execution profile knobs the node reads (omitted from the payload when empty)
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON of the inputs
+    """
+    user_config = state.get("user_config") or {}
+    payload = {
+        "node": node_name,
+        "version": STAGE_CACHE_VERSION,
+        "model": model,
+        "state": {key: state.get(key) for key in state_keys},
+        "user_config": {field: user_config.get(field) for field in user_config_fields}
+    }
+    if profile:
+        payload["profile"] = profile
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class StageOutputCache:
+    """
+    SQLite store of stage outputs keyed by (node, input fingerprint).
+
+    Only the latest output per fingerprint is kept; outputs are stored as
+    JSON, which is what every agent returns. Outputs older than the
+    retention window are pruned.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS stage_outputs (
+        node TEXT, fingerprint TEXT, output TEXT, created_at TEXT, hits INTEGER DEFAULT 0,
+        PRIMARY KEY (node, fingerprint)
+    );
+    CREATE INDEX IF NOT EXISTS stage_outputs_created_at ON stage_outputs (created_at);
+    """
+
+    def __init__(self, path: str, retention_days: int = 0):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file for stage outputs
+            retention_days: Prune outputs stored more than this many days ago (0 = keep all)
+        """
+        self.path = path
+        self.retention_days = retention_days
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self._SCHEMA)
+        self._lock = threading.Lock()
+        self.prune()
+
+    def get(self, node_name: str, fingerprint: str) -> Tuple[bool, Any]:
+        """
+        Look up a stage output.
+
+        Returns:
+            Tuple of (found, output)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM stage_outputs WHERE node = ? AND fingerprint = ?",
+                (node_name, fingerprint)
+            ).fetchone()
+            if row is None:
+                return False, None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE stage_outputs SET hits = hits + 1 WHERE node = ? AND fingerprint = ?",
+                    (node_name, fingerprint)
+                )
+        return True, json.loads(row[0])
+
+    def put(self, node_name: str, fingerprint: str, output: Any):
+        """Store a stage output (silently skipped if it is not JSON serializable)."""
+        try:
+            serialized = json.dumps(output, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Not caching {node_name} output: {e}")
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stage_outputs (node, fingerprint, output, created_at) VALUES (?, ?, ?, ?)",
+                (node_name, fingerprint, serialized, datetime.now().isoformat())
+            )
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete outputs stored before the retention window.
+
+        Returns:
+            Number of outputs removed
+        """
+        if not self.retention_days:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat()
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM stage_outputs WHERE created_at < ?", (cutoff,)).rowcount
+        if removed:
+            logger.info(f"Pruned {removed} stage outputs older than {self.retention_days} days from {self.path}")
+        return removed
+
+    def clear(self, nodes: Optional[Iterable[str]] = None) -> int:
+        """
+        Delete stored outputs.
+
+        Args:
+            nodes: Only these nodes (default: all)
+
+        Returns:
+            Number of outputs deleted
+        """
+        with self._lock, self._conn:
+            if nodes is None:
+                cursor = self._conn.execute("DELETE FROM stage_outputs")
+            else:
+                nodes = list(nodes)
+                cursor = self._conn.execute(
+                    f"DELETE FROM stage_outputs WHERE node IN ({', '.join('?' for _ in nodes)})",
+                    nodes
+                )
+        return cursor.rowcount
+
+
+_stage_cache: Optional[StageOutputCache] = None
+_stage_cache_lock = threading.Lock()
+
+
+def get_stage_cache() -> Optional[StageOutputCache]:
+    """
+    Get the process-wide stage output cache.
+
+    Returns:
+        StageOutputCache, or None when settings.enable_stage_reuse is off
+    """
+    global _stage_cache
+    settings = get_settings()
+    if not settings.enable_stage_reuse:
+        return None
+    if _stage_cache is None:
+        with _stage_cache_lock:
+            if _stage_cache is None:
+                _stage_cache = StageOutputCache(
+                    settings.stage_cache_path, retention_days=settings.stage_cache_retention_days
+                )
+    return _stage_cache
+
+
+def clear_stage_cache(nodes: Optional[Iterable[str]] = None):
+    """Drop stored stage outputs, e.g. after the knowledge base changed."""
+    try:
+        cache = get_stage_cache()
+        if cache is not None:
+            deleted = cache.clear(nodes)
+            logger.info(f"Cleared {deleted} cached stage outputs")
+    except Exception as e:
+        logger.warning(f"Could not clear stage output cache: {e}")